@@ -0,0 +1,309 @@
+import re
+import time
+from config import OPENAI_API_KEY
+from tracing import traced
+
+# 6 Etapas da Conversa Híbrida
+HYBRID_STEPS = ['warmer_score', 'reframe_score', 'rational_drowning_score', 'emotional_impact_score', 'new_way_score', 'your_solution_score']
+HYBRID_LABELS = ['1. Warmer', '2. Reframe', '3. Rational Drowning', '4. Emotional Impact', '5. New Way', '6. Your Solution']
+
+TRANSCRIPTION_MODEL = "whisper-1"
+ANALYSIS_MODEL = "gpt-4-turbo"
+
+# Prompts bilíngues da Conversa Híbrida
+COLD_CALL_PROMPT_EN = """
+You are a sales expert and certified coach in the Hybrid Conversation methodology.
+
+Analyze this cold call transcription based on the HYBRID CONVERSATION methodology (6 steps):
+
+**HYBRID CONVERSATION METHODOLOGY:**
+This approach combines SPIN Selling and The Challenger Sale in 6 sequential steps for maximum effectiveness in complex B2B sales.
+
+**THE 6 STEPS:**
+
+**1. Warmer (Warm-up)**
+- SPIN Focus: Situation and Problem Questions
+- Objective: Establish credibility, show research, diagnose known problems
+- Key Elements: Transparent opening, demonstrate knowledge, engagement question
+
+**2. Reframe (Recontextualization)**
+- SPIN Focus: Problem Validation
+- Objective: Validate prospect response and introduce disruptive commercial insight
+- Key Elements: Validate and agree, introduce reframing with insight
+
+**3. Rational Drowning (Rational Drowning)**
+- SPIN Focus: Implication Questions
+- Objective: Use data and logic to quantify cost of reframed problem
+- Key Elements: Present key data, ask implication question
+
+**4. Emotional Impact (Emotional Impact)**
+- SPIN Focus: Need-Payoff Questions
+- Objective: Make problem personal with story and make prospect articulate benefits
+- Key Elements: Tell mini-story, ask need-payoff question
+
+**5. New Way (New Way)**
+- Objective: Introduce ideal solution vision, capabilities needed to solve reframed problem
+- Key Elements: Present solution vision without mentioning specific product
+
+**6. Your Solution (Your Solution)**
+- Objective: Connect "New Way" directly to your product/service and schedule next step
+- Key Elements: Make connection, propose next step (call to action)
+
+**CALL INFORMATION:**
+- BDR: {bdr_nome_selecionado}
+- Prospect: {prospect_nome}
+- Company: {prospect_empresa}
+- Language: English
+- Commercial Insight Used: {insight_comercial}
+
+**TRANSCRIPTION:**
+{texto_transcrito}
+
+**REQUESTED ANALYSIS:**
+
+Evaluate each step from 0 to 10 and provide:
+
+### HYBRID CONVERSATION SCORES
+**Warmer:** X/10
+**Reframe:** X/10
+**Rational Drowning:** X/10
+**Emotional Impact:** X/10
+**New Way:** X/10
+**Your Solution:** X/10
+
+### DETAILED ANALYSIS
+(Complete call analysis based on the 6-step hybrid conversation methodology)
+
+### COMMERCIAL INSIGHT EVALUATION
+(How well was the commercial insight used and developed?)
+
+### ATTENTION POINTS
+(Specific areas that need improvement based on the 6 steps)
+
+### RECOMMENDATIONS
+(Specific actions to improve each step)
+
+IMPORTANT: Be rigorous in evaluation. High scores (8-10) should be reserved for exemplary execution of each step.
+"""
+
+COLD_CALL_PROMPT_PT = """
+Você é um especialista em vendas e coach certificado na metodologia Conversa Híbrida.
+
+Analise esta transcrição de cold call baseado na metodologia CONVERSA HÍBRIDA (6 etapas):
+
+**METODOLOGIA CONVERSA HÍBRIDA:**
+Esta abordagem combina SPIN Selling e The Challenger Sale em 6 etapas sequenciais para máxima eficácia em vendas B2B complexas.
+
+**AS 6 ETAPAS:**
+
+**1. Warmer (Aquecimento)**
+- Foco SPIN: Perguntas de Situação e Problema
+- Objetivo: Estabelecer credibilidade, mostrar pesquisa, diagnosticar problemas conhecidos
+- Elementos-chave: Abertura transparente, demonstrar conhecimento, pergunta de engajamento
+
+**2. Reframe (Reenquadramento)**
+- Foco SPIN: Validação do Problema
+- Objetivo: Validar resposta do prospect e introduzir insight comercial disruptivo
+- Elementos-chave: Validar e concordar, introduzir reenquadramento com insight
+
+**3. Rational Drowning (Afogamento Racional)**
+- Foco SPIN: Perguntas de Implicação
+- Objetivo: Usar dados e lógica para quantificar custo do problema reenquadrado
+- Elementos-chave: Apresentar dado chave, fazer pergunta de implicação
+
+**4. Emotional Impact (Impacto Emocional)**
+- Foco SPIN: Perguntas de Necessidade de Solução
+- Objetivo: Tornar problema pessoal com história e fazer prospect articular benefícios
+- Elementos-chave: Contar mini-história, fazer pergunta de necessidade de solução
+
+**5. New Way (Novo Caminho)**
+- Objetivo: Introduzir visão da solução ideal, capacidades necessárias para resolver problema reenquadrado
+- Elementos-chave: Apresentar visão da solução sem mencionar produto específico
+
+**6. Your Solution (Sua Solução)**
+- Objetivo: Conectar "Novo Caminho" diretamente ao seu produto/serviço e agendar próximo passo
+- Elementos-chave: Fazer conexão, propor próximo passo (call to action)
+
+**INFORMAÇÕES DA LIGAÇÃO:**
+- BDR: {bdr_nome_selecionado}
+- Prospect: {prospect_nome}
+- Empresa: {prospect_empresa}
+- Idioma: Português
+- Insight Comercial Utilizado: {insight_comercial}
+
+**TRANSCRIÇÃO:**
+{texto_transcrito}
+
+**ANÁLISE SOLICITADA:**
+
+Avalie cada etapa de 0 a 10 e forneça:
+
+### SCORES CONVERSA HÍBRIDA
+**Warmer:** X/10
+**Reframe:** X/10
+**Rational Drowning:** X/10
+**Emotional Impact:** X/10
+**New Way:** X/10
+**Your Solution:** X/10
+
+### ANÁLISE DETALHADA
+(Análise completa da ligação baseada na metodologia de 6 etapas da conversa híbrida)
+
+### AVALIAÇÃO DO INSIGHT COMERCIAL
+(Quão bem o insight comercial foi usado e desenvolvido?)
+
+### PONTOS DE ATENÇÃO
+(Áreas específicas que precisam de melhoria baseadas nas 6 etapas)
+
+### RECOMENDAÇÕES
+(Ações específicas para melhorar cada etapa)
+
+IMPORTANTE: Seja rigoroso na avaliação. Scores altos (8-10) devem ser reservados para execução exemplar de cada etapa.
+"""
+
+# Regex de scores (iguais nos dois idiomas) compiladas uma única vez
+SCORE_PATTERNS = {
+    'warmer_score': re.compile(r'Warmer.*?(\d+)/10', re.IGNORECASE),
+    'reframe_score': re.compile(r'Reframe.*?(\d+)/10', re.IGNORECASE),
+    'rational_drowning_score': re.compile(r'Rational Drowning.*?(\d+)/10', re.IGNORECASE),
+    'emotional_impact_score': re.compile(r'Emotional Impact.*?(\d+)/10', re.IGNORECASE),
+    'new_way_score': re.compile(r'New Way.*?(\d+)/10', re.IGNORECASE),
+    'your_solution_score': re.compile(r'Your Solution.*?(\d+)/10', re.IGNORECASE)
+}
+
+SECTION_TITLES = {
+    "English": ("ATTENTION POINTS", "RECOMMENDATIONS"),
+    "Português": ("PONTOS DE ATENÇÃO", "RECOMENDAÇÕES")
+}
+
+# Prompt e seções da análise de reuniões 1:1
+ONE_ON_ONE_PROMPT = """
+Você é um coach de vendas... (seu prompt completo aqui)
+
+Transcrição:
+\"\"\"
+{texto_transcrito}
+\"\"\"
+... (resto do seu prompt aqui, pedindo Resumo e Metas)
+"""
+
+ONE_ON_ONE_SUMMARY_TITLE = "### 📋 Resumo da Reunião"
+ONE_ON_ONE_GOALS_TITLE = "### 🎯 Metas e Próximos Passos"
+
+def build_cold_call_prompt(idioma, bdr_nome, prospect_nome, prospect_empresa, insight_comercial, texto_transcrito):
+    """Monta o prompt de análise da Conversa Híbrida no idioma selecionado."""
+    if idioma == "English":
+        template = COLD_CALL_PROMPT_EN
+        insight = insight_comercial if insight_comercial else 'Not specified'
+    else:
+        template = COLD_CALL_PROMPT_PT
+        insight = insight_comercial if insight_comercial else 'Não especificado'
+    return template.format(
+        bdr_nome_selecionado=bdr_nome,
+        prospect_nome=prospect_nome,
+        prospect_empresa=prospect_empresa,
+        insight_comercial=insight,
+        texto_transcrito=texto_transcrito
+    )
+
+def build_one_on_one_prompt(texto_transcrito):
+    """Monta o prompt de análise de uma reunião 1:1."""
+    return ONE_ON_ONE_PROMPT.format(texto_transcrito=texto_transcrito)
+
+def get_openai_client():
+    """Cria o cliente da OpenAI.
+
+    O import do SDK fica aqui dentro para não pesar no carregamento das
+    páginas: ele só é feito quando uma análise é de fato executada.
+    """
+    from openai import OpenAI
+    return OpenAI(api_key=OPENAI_API_KEY)
+
+@traced()
+def transcribe_audio(client, audio_file, on_usage=None):
+    """Transcreve o áudio com o Whisper e retorna o texto.
+
+    `on_usage`, se informado, recebe o consumo da chamada (modelo,
+    latência e duração do áudio, cobrada por minuto).
+    """
+    inicio = time.perf_counter()
+    transcription = client.audio.transcriptions.create(
+        model=TRANSCRIPTION_MODEL, file=audio_file, response_format="verbose_json"
+    )
+    if on_usage:
+        on_usage({
+            'tipo': "transcricao", 'modelo': TRANSCRIPTION_MODEL,
+            'latencia_ms': (time.perf_counter() - inicio) * 1000,
+            'audio_segundos': float(getattr(transcription, "duration", None) or 0),
+        })
+    return transcription.text
+
+@traced()
+def run_analysis(client, prompt, on_usage=None):
+    """Envia o prompt ao GPT e retorna o conteúdo da resposta.
+
+    `on_usage`, se informado, recebe o consumo da chamada (`response.usage`:
+    tokens de prompt, de resposta e de prompt em cache, além da latência).
+    """
+    inicio = time.perf_counter()
+    response = client.chat.completions.create(
+        model=ANALYSIS_MODEL,
+        messages=[{"role": "user", "content": prompt}]
+    )
+    if on_usage:
+        usage = response.usage
+        detalhes = getattr(usage, "prompt_tokens_details", None)
+        on_usage({
+            'tipo': "analise", 'modelo': response.model or ANALYSIS_MODEL,
+            'latencia_ms': (time.perf_counter() - inicio) * 1000,
+            'prompt_tokens': usage.prompt_tokens if usage else 0,
+            'completion_tokens': usage.completion_tokens if usage else 0,
+            'cached_tokens': (getattr(detalhes, "cached_tokens", None) or 0) if detalhes else 0,
+        })
+    return response.choices[0].message.content
+
+@traced()
+def parse_cold_call_analysis(analise_completa, idioma):
+    """Extrai scores, pontos de atenção e recomendações da análise do GPT."""
+    scores = {}
+    for key, pattern in SCORE_PATTERNS.items():
+        match = pattern.search(analise_completa)
+        scores[key] = int(match.group(1)) if match else 5
+
+    # Extrair seções bilíngue
+    titulo_atencao, titulo_recomendacoes = SECTION_TITLES.get(idioma, SECTION_TITLES["Português"])
+    pontos_atencao = ""
+    recomendacoes = ""
+
+    for section in analise_completa.split("###"):
+        section_upper = section.upper()
+        if titulo_atencao in section_upper:
+            pontos_atencao = section.split(titulo_atencao)[1].strip()
+        elif titulo_recomendacoes in section_upper:
+            recomendacoes = section.split(titulo_recomendacoes)[1].strip()
+
+    if not pontos_atencao:
+        pontos_atencao = "Ver análise completa"
+    if not recomendacoes:
+        recomendacoes = "Ver análise completa"
+
+    return {'scores': scores, 'pontos_atencao': pontos_atencao, 'recomendacoes': recomendacoes}
+
+def default_cold_call_parse():
+    """Resultado usado quando a extração dos scores falha."""
+    return {
+        'scores': {key: 5 for key in HYBRID_STEPS},
+        'pontos_atencao': "Erro no processamento",
+        'recomendacoes': "Ver análise completa"
+    }
+
+@traced()
+def parse_one_on_one_analysis(analise_completa):
+    """Separa o resumo e as metas da análise de uma reunião 1:1. Retorna (resumo, metas)."""
+    try:
+        resumo = analise_completa.split(ONE_ON_ONE_GOALS_TITLE)[0].replace(ONE_ON_ONE_SUMMARY_TITLE, "").strip()
+        metas = analise_completa.split(ONE_ON_ONE_GOALS_TITLE)[1].strip()
+    except IndexError:
+        resumo = "Não foi possível extrair o resumo."
+        metas = analise_completa
+    return resumo, metas
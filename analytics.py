@@ -0,0 +1,73 @@
+import warnings
+import numpy as np
+from analysis import HYBRID_STEPS
+
+def stage_matrix(rows):
+    """Converte as linhas de `get_stage_averages_by_bdr` em arrays NumPy.
+
+    Retorna (ids, nomes, contagens, matriz, quantidades): a matriz tem
+    formato (n_bdrs, 6), uma coluna por etapa da Conversa Híbrida, com NaN
+    nas etapas sem nenhum score; `quantidades` (mesmo formato) diz quantos
+    scores entraram em cada média e `contagens`, o total de calls.
+    """
+    etapas = len(HYBRID_STEPS)
+    if not rows:
+        return (np.empty(0, dtype=np.int64), [], np.empty(0, dtype=np.int64), np.empty((0, etapas)),
+                np.empty((0, etapas), dtype=np.int64))
+    ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+    nomes = [row[1] for row in rows]
+    contagens = np.fromiter((row[2] for row in rows), dtype=np.int64, count=len(rows))
+    matriz = np.array([row[3:3 + etapas] for row in rows], dtype=np.float64)
+    quantidades = np.array([row[3 + etapas:3 + 2 * etapas] for row in rows], dtype=np.int64)
+    return ids, nomes, contagens, matriz, quantidades
+
+def compare_stages(matriz, contagens):
+    """Compara cada BDR com a média do time, de forma vetorizada.
+
+    `contagens` são os pesos: as quantidades de scores por BDR e etapa
+    (formato da matriz) ou um total de calls por BDR. A média do time é
+    ponderada por eles (equivale à média de todos os scores da etapa) e
+    células NaN (etapa sem score) ficam de fora de tudo. Retorna um
+    dicionário com:
+    - team_mean: média do time por etapa, formato (6,)
+    - delta: diferença BDR - time, formato (n, 6)
+    - zscore: delta dividido pelo desvio padrão entre BDRs de cada etapa
+    - normalized: posição min-max (0 a 1) de cada BDR dentro da etapa
+    delta, zscore e normalized são NaN onde a matriz é NaN.
+    """
+    if matriz.shape[0] == 0 or np.sum(contagens) == 0:
+        vazio = np.zeros_like(matriz)
+        return {'team_mean': np.zeros(matriz.shape[1]), 'delta': vazio, 'zscore': vazio, 'normalized': vazio}
+
+    presentes = ~np.isnan(matriz)
+    pesos = np.asarray(contagens, dtype=np.float64)
+    pesos = np.where(presentes, pesos if pesos.ndim == 2 else pesos[:, None], 0)
+    with warnings.catch_warnings(), np.errstate(invalid='ignore', divide='ignore'):
+        # Etapas sem nenhum score no time inteiro ficam NaN
+        warnings.simplefilter('ignore', RuntimeWarning)
+        team_mean = (np.where(presentes, matriz, 0) * pesos).sum(axis=0) / pesos.sum(axis=0)
+        delta = matriz - team_mean
+
+        desvio = np.nanstd(matriz, axis=0)
+        zscore = np.divide(delta, desvio, out=np.where(presentes, 0.0, np.nan), where=presentes & (desvio > 0))
+
+        minimo = np.nanmin(matriz, axis=0)
+        amplitude = np.nanmax(matriz, axis=0) - minimo
+        normalized = np.divide(matriz - minimo, amplitude, out=np.where(presentes, 0.0, np.nan),
+                               where=presentes & (amplitude > 0))
+
+    return {'team_mean': team_mean, 'delta': delta, 'zscore': zscore, 'normalized': normalized}
+
+def overall_means(matriz):
+    """Média das etapas com score de cada linha da matriz; 0 para linhas sem nenhum score."""
+    presentes = ~np.isnan(matriz)
+    quantidades = presentes.sum(axis=1)
+    somas = np.where(presentes, matriz, 0).sum(axis=1)
+    return np.divide(somas, quantidades, out=np.zeros(len(matriz)), where=quantidades > 0)
+
+def scores_dict(values):
+    """Converte uma linha da matriz (6 valores) no dicionário de scores usado pelos gráficos.
+
+    Etapas sem score (NaN) aparecem como 0, como em get_hybrid_conversation_average_scores.
+    """
+    return {key: 0.0 if np.isnan(value) else round(float(value), 1) for key, value in zip(HYBRID_STEPS, values)}
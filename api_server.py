@@ -0,0 +1,324 @@
+"""
+API JSON somente leitura sobre o banco (database.py), para o
+analise-bdrs-nextjs e dashboards externos consultarem os dados sem abrir
+o arquivo SQLite diretamente.
+
+    python api_server.py                              # http://127.0.0.1:8502
+    python api_server.py --host 0.0.0.0 --port 8080
+
+Endpoints (GET; erros respondem {"erro": "..."} com 400, 404 ou 503):
+
+    /api/versao                      versão atual dos dados
+    /api/contagens                   totais de BDRs, análises 1:1 e cold calls
+    /api/bdrs                        BDRs cadastrados
+    /api/bdrs/<id>/cold-calls        cold calls do BDR, paginados (limit, offset)
+    /api/bdrs/<id>/analises          análises 1:1 do BDR, paginadas (limit, offset)
+    /api/bdrs/<id>/tendencias        médias móveis (agrupar=calls, janela) ou semanais (agrupar=semana)
+    /api/cold-calls/<id>             scores e textos completos de um cold call
+    /api/medias                      médias das 6 etapas (bdr_id opcional)
+    /api/ranking                     ranking de BDRs (etapa, min_calls, limite, crescente)
+    /api/empresas                    empresas de prospects (bdr_id opcional)
+    /api/busca?q=<termo>             busca por prospect, empresa ou insight
+
+Filtros comuns: since/until (data ISO ou epoch, `until` exclusivo),
+empresa e arquivados=1 (inclui o histórico arquivado).
+
+Cache HTTP: toda resposta leva um ETag com a versão dos dados
+(database.get_shared_data_version), que muda a cada gravação de qualquer
+processo. Um cliente que repete a requisição com If-None-Match recebe 304
+sem corpo enquanto nada mudar; as respostas completas ficam guardadas em
+memória (LRU de API_CACHE_SIZE entradas) até a próxima mudança de versão.
+"""
+
+import argparse
+import json
+import re
+import threading
+from collections import Counter, OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+from config import API_HOST, API_PORT, API_CACHE_SIZE
+from analysis import HYBRID_STEPS
+from storage import DatabaseError
+import database
+
+# Tamanho padrão e máximo das páginas (limit)
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+class NotFound(Exception):
+    """Recurso inexistente (responde 404)."""
+
+def _inteiro(params, nome, padrao=None, minimo=0, maximo=None):
+    """Parâmetro inteiro da query string, validado (ValueError responde 400)."""
+    valor = params.get(nome)
+    if valor is None:
+        return padrao
+    try:
+        numero = int(valor)
+    except ValueError:
+        raise ValueError(f"Parâmetro '{nome}' deve ser um número inteiro") from None
+    if numero < minimo or (maximo is not None and numero > maximo):
+        limite = f"entre {minimo} e {maximo}" if maximo is not None else f"maior ou igual a {minimo}"
+        raise ValueError(f"Parâmetro '{nome}' deve estar {limite}")
+    return numero
+
+def _booleano(params, nome):
+    return params.get(nome, "").lower() in ("1", "true", "sim")
+
+def _data(params, nome):
+    """Data ISO (ou epoch) da query string em segundos desde 1970."""
+    valor = params.get(nome)
+    if valor is None:
+        return None
+    if valor.isdigit():
+        return int(valor)
+    try:
+        return database.to_epoch(valor)
+    except ValueError:
+        raise ValueError(f"Parâmetro '{nome}' deve ser uma data ISO (AAAA-MM-DD) ou epoch") from None
+
+def _periodo(params):
+    return {'since': _data(params, 'since'), 'until': _data(params, 'until')}
+
+def _pagina(params):
+    return {'limit': _inteiro(params, 'limit', PAGE_SIZE, 1, MAX_PAGE_SIZE), 'offset': _inteiro(params, 'offset', 0)}
+
+def _scores(valores):
+    return dict(zip(HYBRID_STEPS, valores))
+
+def _bdr(bdr_id):
+    """Confere que o BDR existe e devolve {id, nome}."""
+    for id_, nome in database.get_bdrs():
+        if id_ == bdr_id:
+            return {'id': id_, 'nome': nome}
+    raise NotFound(f"BDR {bdr_id} não encontrado")
+
+def versao(params):
+    return {'versao': database.get_shared_data_version()}
+
+def contagens(params):
+    return database.get_table_counts(**_periodo(params))
+
+def bdrs(params):
+    return [{'id': id_, 'nome': nome} for id_, nome in database.get_bdrs()]
+
+def cold_calls(params, bdr_id):
+    bdr = _bdr(bdr_id)
+    filtros = dict(_periodo(params), empresa=params.get('empresa'))
+    pagina = _pagina(params)
+    linhas = database.get_bdr_cold_calls(bdr_id, **pagina, **filtros)
+    return {
+        'bdr': bdr,
+        'total': database.count_bdr_cold_calls(bdr_id, **filtros),
+        **pagina,
+        'itens': [{'id': linha[13], 'data': linha[0], 'prospect_nome': linha[1], 'prospect_empresa': linha[2],
+                   'insight_comercial': linha[12], 'scores': _scores(linha[3:9])} for linha in linhas],
+    }
+
+def analises(params, bdr_id):
+    bdr = _bdr(bdr_id)
+    periodo = _periodo(params)
+    pagina = _pagina(params)
+    linhas = database.get_bdr_analyses(bdr_id, **pagina, **periodo)
+    return {
+        'bdr': bdr,
+        'total': database.count_bdr_analyses(bdr_id, **periodo),
+        **pagina,
+        'itens': [{'data': data, 'resumo': resumo, 'metas': metas} for data, resumo, metas in linhas],
+    }
+
+def tendencias(params, bdr_id):
+    bdr = _bdr(bdr_id)
+    filtros = dict(_periodo(params), empresa=params.get('empresa'),
+                   limit=_inteiro(params, 'limite', None, 1, MAX_PAGE_SIZE))
+    agrupar = params.get('agrupar', 'calls')
+    if agrupar == 'calls':
+        janela = _inteiro(params, 'janela', 10, 1, 100)
+        pontos = [{'data': data, 'id': id_, 'medias': _scores(medias)}
+                  for data, id_, *medias in database.get_rolling_score_trends(bdr_id, janela, **filtros)]
+    elif agrupar == 'semana':
+        pontos = [{'semana': semana, 'calls': calls, 'medias': _scores(medias)}
+                  for semana, calls, *medias in database.get_weekly_score_trends(bdr_id, **filtros)]
+    else:
+        raise ValueError("Parâmetro 'agrupar' deve ser 'calls' ou 'semana'")
+    return {'bdr': bdr, 'agrupar': agrupar, 'pontos': pontos}
+
+def cold_call(params, call_id):
+    detalhes = database.get_cold_call(call_id)
+    if detalhes is None:
+        raise NotFound(f"Cold call {call_id} não encontrado")
+    return dict(detalhes, id=call_id)
+
+def medias(params):
+    resultado = database.get_hybrid_conversation_average_scores(_inteiro(params, 'bdr_id', None, 1), **_periodo(params),
+                                                                empresa=params.get('empresa'))
+    return {'total_calls': resultado.pop('total_calls'), 'medias': resultado}
+
+def ranking(params):
+    linhas = database.get_leaderboard(params.get('etapa'), **_periodo(params),
+                                      min_calls=_inteiro(params, 'min_calls', 1, 1),
+                                      limit=_inteiro(params, 'limite', 5, 1, MAX_PAGE_SIZE),
+                                      ascending=_booleano(params, 'crescente'), empresa=params.get('empresa'))
+    return [{'posicao': posicao, 'bdr_id': bdr_id, 'nome': nome, 'calls': calls, 'media': media}
+            for posicao, bdr_id, nome, calls, media in linhas]
+
+def empresas(params):
+    return database.get_prospect_companies(_inteiro(params, 'bdr_id', None, 1))
+
+def busca(params):
+    termo = params.get('q', '').strip()
+    if not termo:
+        raise ValueError("Informe o termo de busca (q)")
+    pagina = _pagina(params)
+    linhas = database.search_cold_calls(termo, _inteiro(params, 'bdr_id', None, 1), **pagina, **_periodo(params))
+    return {
+        'q': termo,
+        **pagina,
+        'itens': [{'id': linha[0], 'bdr_id': linha[1], 'data': linha[2], 'prospect_nome': linha[3],
+                   'prospect_empresa': linha[4], 'insight_comercial': linha[5], 'scores': _scores(linha[6:12])}
+                  for linha in linhas],
+    }
+
+# Rotas: expressão do caminho -> função(params, *ids)
+ROUTES = [(re.compile(padrao), funcao) for padrao, funcao in (
+    (r"/api/versao", versao),
+    (r"/api/contagens", contagens),
+    (r"/api/bdrs", bdrs),
+    (r"/api/bdrs/(\d+)/cold-calls", cold_calls),
+    (r"/api/bdrs/(\d+)/analises", analises),
+    (r"/api/bdrs/(\d+)/tendencias", tendencias),
+    (r"/api/cold-calls/(\d+)", cold_call),
+    (r"/api/medias", medias),
+    (r"/api/ranking", ranking),
+    (r"/api/empresas", empresas),
+    (r"/api/busca", busca),
+)]
+
+class APIServer(ThreadingHTTPServer):
+    """Servidor com o cache de respostas (LRU por caminho e query string) e os contadores de requisições."""
+
+    daemon_threads = True
+
+    def __init__(self, address, cache_size=API_CACHE_SIZE):
+        super().__init__(address, Handler)
+        self.cache_size = cache_size
+        self.contadores = Counter()
+        self._cache = OrderedDict()
+        self._cache_versao = None
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        return f"http://{self.server_address[0]}:{self.server_port}/api"
+
+    def cached(self, chave, versao):
+        """Corpo guardado para `chave` na versão `versao` dos dados (descarta tudo se a versão mudou)."""
+        with self._lock:
+            if versao != self._cache_versao:
+                self._cache.clear()
+                self._cache_versao = versao
+                return None
+            corpo = self._cache.get(chave)
+            if corpo is not None:
+                self._cache.move_to_end(chave)
+            return corpo
+
+    def store(self, chave, versao, corpo):
+        with self._lock:
+            if versao != self._cache_versao or self.cache_size <= 0:
+                return
+            self._cache[chave] = corpo
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def contar(self, chave):
+        with self._lock:
+            self.contadores[chave] += 1
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _responder(self, status, corpo, headers=None):
+        self.server.contar(str(status))
+        self.send_response(status)
+        if corpo is not None:
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(corpo or b"")))
+        for nome, valor in (headers or {}).items():
+            self.send_header(nome, valor)
+        self.end_headers()
+        if corpo:
+            self.wfile.write(corpo)
+
+    def _erro(self, status, mensagem):
+        self._responder(status, json.dumps({'erro': mensagem}, ensure_ascii=False).encode("utf-8"))
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        caminho = url.path.rstrip("/")
+        for padrao, funcao in ROUTES:
+            encontrado = padrao.fullmatch(caminho)
+            if encontrado:
+                break
+        else:
+            self._erro(404, f"Endpoint desconhecido: {url.path}")
+            return
+        params = {nome: valores[-1] for nome, valores in parse_qs(url.query).items()}
+        # Cada requisição roda na sua thread: a leitura do arquivo vale só para ela
+        database.set_include_archived(_booleano(params, 'arquivados'))
+
+        versao_dados = database.get_shared_data_version()
+        etag = f'"{versao_dados}"'
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+        if etag in (tag.strip() for tag in self.headers.get('If-None-Match', '').split(",")):
+            self._responder(304, None, headers)
+            return
+
+        chave = (caminho, tuple(sorted(params.items())))
+        corpo = self.server.cached(chave, versao_dados)
+        if corpo is not None:
+            self.server.contar("cache")
+        else:
+            try:
+                resultado = funcao(params, *(int(grupo) for grupo in encontrado.groups()))
+            except NotFound as erro:
+                self._erro(404, str(erro))
+                return
+            except ValueError as erro:
+                self._erro(400, str(erro))
+                return
+            except DatabaseError:
+                self._erro(503, "Banco de dados indisponível")
+                return
+            corpo = json.dumps(resultado, ensure_ascii=False).encode("utf-8")
+            self.server.store(chave, versao_dados, corpo)
+        self._responder(200, corpo, headers)
+
+    def log_message(self, *args):
+        pass
+
+def start_server(host="127.0.0.1", port=0, **opcoes):
+    """Inicia o servidor em uma thread daemon e o retorna (use `shutdown()` para parar)."""
+    servidor = APIServer((host, port), **opcoes)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+def main():
+    parser = argparse.ArgumentParser(description="API JSON somente leitura sobre o banco de análises dos BDRs.")
+    parser.add_argument("--host", default=API_HOST)
+    parser.add_argument("--port", type=int, default=API_PORT)
+    parser.add_argument("--cache-size", type=int, default=API_CACHE_SIZE, help="respostas guardadas em memória")
+    args = parser.parse_args()
+
+    servidor = APIServer((args.host, args.port), args.cache_size)
+    print(f"API em {servidor.base_url} (Ctrl+C para parar)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+
+if __name__ == "__main__":
+    main()
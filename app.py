@@ -1,4 +1,5 @@
 import streamlit as st
+from maintenance import start_scheduler
 
 st.set_page_config(
     page_title="Sistema de Análise - BDRs",
@@ -6,6 +7,9 @@ st.set_page_config(
     layout="wide"
 )
 
+# Arquivamento e manutenção do banco quando ele fica ocioso (maintenance.py)
+start_scheduler()
+
 st.title("🎯 Sistema de Análise para BDRs")
 st.markdown("**Plataforma completa para análise de Cold Calls e reuniões 1:1 com metodologia Conversa Híbrida**")
 
@@ -58,6 +62,6 @@ st.markdown("""
 1. **Cadastre seus BDRs** na página "Gerenciar BDRs"
 2. **Analise Cold Calls** com metodologia Conversa Híbrida na página dedicada
 3. **Analise reuniões 1:1** para extrair insights e definir metas
-4. **Acompanhe a performance** nos dashboards de gerenciamento
+4. **Acompanhe a performance** nos dashboards de gerenciamento e no ranking de BDRs
 5. **Desenvolva insights comerciais** para cada persona e mercado
 """)
\ No newline at end of file
@@ -0,0 +1,90 @@
+"""
+Versão assíncrona da camada de dados, para pipelines em asyncio.
+
+Cada função tem a mesma assinatura da equivalente em database.py e a
+executa em threads dedicadas ao banco, fora do event loop:
+
+    import async_database as adb
+    call_id = await adb.save_cold_call_analise(bdr_id, ...)
+
+As escritas passam por uma única thread, na ordem em que foram pedidas:
+o SQLite aceita um escritor por vez, e várias threads disputando o lock só
+acrescentariam espera e erros `database is locked`. As leituras usam um
+pool separado (DB_READ_WORKERS) e não ficam na fila atrás das escritas.
+O cache de consultas e os spans de tempo (tracing.py) funcionam como nas
+chamadas síncronas.
+"""
+
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import database
+from config import DB_READ_WORKERS
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+def _executor(kind):
+    """Pool de threads de leitura ou de escrita, criado no primeiro uso."""
+    executor = _executors.get(kind)
+    if executor is None:
+        with _executors_lock:
+            executor = _executors.get(kind)
+            if executor is None:
+                workers = 1 if kind == "escrita" else DB_READ_WORKERS
+                executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"db-{kind}")
+                _executors[kind] = executor
+    return executor
+
+def shutdown(wait=True):
+    """Encerra as threads do banco (são recriadas se outra função for chamada depois)."""
+    with _executors_lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=wait)
+
+def _async(fn, kind):
+    """Versão `async` de uma função de database.py, executada no pool indicado."""
+    nome = fn.__name__
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        loop = asyncio.get_running_loop()
+        # Busca a função no módulo a cada chamada e leva o contexto (span atual) para a thread
+        chamada = functools.partial(getattr(database, nome), *args, **kwargs)
+        return await loop.run_in_executor(_executor(kind), contextvars.copy_context().run, chamada)
+    return wrapper
+
+def _read(fn):
+    return _async(fn, "leitura")
+
+def _write(fn):
+    return _async(fn, "escrita")
+
+# Leituras
+get_bdrs = _read(database.get_bdrs)
+get_bdr_cold_calls = _read(database.get_bdr_cold_calls)
+get_bdr_analyses = _read(database.get_bdr_analyses)
+count_bdr_analyses = _read(database.count_bdr_analyses)
+get_cold_call = _read(database.get_cold_call)
+get_analise = _read(database.get_analise)
+get_hybrid_conversation_average_scores = _read(database.get_hybrid_conversation_average_scores)
+get_stage_averages_by_bdr = _read(database.get_stage_averages_by_bdr)
+get_leaderboard = _read(database.get_leaderboard)
+get_table_counts = _read(database.get_table_counts)
+get_analysis_checkpoint = _read(database.get_analysis_checkpoint)
+find_audio_recordings = _read(database.find_audio_recordings)
+get_usage_cost = _read(database.get_usage_cost)
+
+# Escritas
+add_bdr = _write(database.add_bdr)
+save_cold_call_analise = _write(database.save_cold_call_analise)
+save_analise = _write(database.save_analise)
+save_analysis_checkpoint = _write(database.save_analysis_checkpoint)
+delete_analysis_checkpoint = _write(database.delete_analysis_checkpoint)
+save_audio_recording = _write(database.save_audio_recording)
+save_api_usage = _write(database.save_api_usage)
+link_api_usage = _write(database.link_api_usage)
@@ -0,0 +1,177 @@
+import hashlib
+import io
+import os
+import tempfile
+from config import ALLOWED_AUDIO_TYPES, AUDIO_SPOOL_THRESHOLD_MB, AUDIO_CHUNK_SIZE
+from tracing import traced
+
+# Tipo MIME enviado na API para cada formato reconhecido
+AUDIO_MIME_TYPES = {
+    "mp3": "audio/mpeg",
+    "wav": "audio/wav",
+    "m4a": "audio/mp4",
+    "mp4": "audio/mp4",
+    "ogg": "audio/ogg",
+    "flac": "audio/flac",
+    "webm": "audio/webm",
+}
+
+# Marcas (brand) do contêiner MP4 que indicam apenas áudio
+_M4A_BRANDS = (b"M4A ", b"M4B ", b"M4P ", b"F4A ")
+
+# Bytes lidos do início do arquivo para identificar o formato
+HEADER_SIZE = 16
+
+def sniff_audio_format(header):
+    """Identifica o formato real do áudio pelos primeiros bytes (magic bytes).
+
+    Retorna "mp3", "wav", "m4a", "mp4", "ogg", "flac", "webm" ou None se
+    o conteúdo não for reconhecido.
+    """
+    header = bytes(header[:HEADER_SIZE])
+    if header.startswith(b"ID3"):
+        return "mp3"
+    # Frame MPEG sem tag ID3: 11 bits de sincronismo e layer III
+    if len(header) >= 2 and header[0] == 0xFF and header[1] & 0xE0 == 0xE0 and header[1] & 0x06 == 0x02:
+        return "mp3"
+    if header.startswith(b"RIFF") and header[8:12] == b"WAVE":
+        return "wav"
+    if header[4:8] == b"ftyp":
+        return "m4a" if header[8:12] in _M4A_BRANDS else "mp4"
+    if header.startswith(b"OggS"):
+        return "ogg"
+    if header.startswith(b"fLaC"):
+        return "flac"
+    if header.startswith(b"\x1a\x45\xdf\xa3"):
+        return "webm"
+    return None
+
+class AudioUpload:
+    """Áudio pronto para validação, checkpoint e envio à API.
+
+    Guarda um handle do conteúdo em vez de uma cópia dos bytes: buffers
+    que já estão em memória (como o UploadedFile do Streamlit) e arquivos
+    em disco são usados diretamente; outros streams são copiados em blocos
+    para um arquivo temporário que só fica em memória até
+    `AUDIO_SPOOL_THRESHOLD_MB`.
+    """
+
+    def __init__(self, file, name, size, sha256, audio_format):
+        self.file = file
+        self.name = name
+        self.size = size
+        self.sha256 = sha256
+        self.format = audio_format
+
+    @property
+    def upload_name(self):
+        """Nome enviado à API, com a extensão do formato real do conteúdo."""
+        base = os.path.splitext(os.path.basename(self.name))[0] or "audio"
+        return f"{base}.{self.format}" if self.format else os.path.basename(self.name)
+
+    def as_upload(self):
+        """Tupla (nome, handle, tipo MIME) para o cliente da OpenAI, que envia o handle em blocos."""
+        self.file.seek(0)
+        return (self.upload_name, self.file, AUDIO_MIME_TYPES.get(self.format, "application/octet-stream"))
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def _iter_chunks(source, chunk_size):
+    """Percorre o conteúdo em blocos sem copiar buffers que já estão em memória.
+
+    Em um BytesIO, `getvalue()` devolve o próprio objeto bytes enquanto o
+    buffer não é alterado (`getbuffer()` forçaria uma cópia), e as fatias
+    de um memoryview não copiam dados.
+    """
+    if hasattr(source, "getvalue"):
+        dados = memoryview(source.getvalue())
+        for inicio in range(0, len(dados), chunk_size):
+            yield dados[inicio:inicio + chunk_size]
+        return
+    if getattr(source, "seekable", lambda: False)():
+        source.seek(0)
+    while True:
+        bloco = source.read(chunk_size)
+        if not bloco:
+            return
+        yield bloco
+
+def read_header(source, size=HEADER_SIZE):
+    """Lê os primeiros bytes do conteúdo sem alterar a posição atual do stream."""
+    if hasattr(source, "getvalue"):
+        return bytes(memoryview(source.getvalue())[:size])
+    posicao = source.tell()
+    source.seek(0)
+    try:
+        return source.read(size)
+    finally:
+        source.seek(posicao)
+
+def stream_sha256(source, chunk_size=AUDIO_CHUNK_SIZE):
+    """Calcula o SHA-256 do conteúdo em uma passada por blocos."""
+    hasher = hashlib.sha256()
+    for bloco in _iter_chunks(source, chunk_size):
+        hasher.update(bloco)
+    return hasher.hexdigest()
+
+def _reusable(source):
+    """Indica se o conteúdo pode ser usado no lugar, sem cópia: buffer em memória ou arquivo em disco."""
+    if hasattr(source, "getvalue"):
+        return True
+    return isinstance(source, (io.BufferedReader, io.FileIO)) and source.seekable()
+
+@traced()
+def ingest_audio(source, name=None, spool_threshold=None, chunk_size=AUDIO_CHUNK_SIZE):
+    """Lê o áudio uma única vez: calcula o hash, identifica o formato e guarda um handle.
+
+    UploadedFile/BytesIO e arquivos abertos em disco são usados no lugar,
+    sem cópia. Outros streams (como o corpo de uma requisição) são copiados
+    em blocos para um SpooledTemporaryFile, que vai para o disco acima de
+    `spool_threshold` bytes.
+    """
+    name = name or getattr(source, "name", None) or "audio"
+    if spool_threshold is None:
+        spool_threshold = AUDIO_SPOOL_THRESHOLD_MB * 1024 * 1024
+
+    no_lugar = _reusable(source)
+    destino = source if no_lugar else tempfile.SpooledTemporaryFile(max_size=spool_threshold)
+    hasher = hashlib.sha256()
+    cabecalho = b""
+    tamanho = 0
+    try:
+        for bloco in _iter_chunks(source, chunk_size):
+            if len(cabecalho) < HEADER_SIZE:
+                cabecalho += bytes(bloco[:HEADER_SIZE - len(cabecalho)])
+            hasher.update(bloco)
+            tamanho += len(bloco)
+            if not no_lugar:
+                destino.write(bloco)
+    except BaseException:
+        if not no_lugar:
+            destino.close()
+        raise
+    destino.seek(0)
+    return AudioUpload(destino, os.path.basename(str(name)), tamanho, hasher.hexdigest(), sniff_audio_format(cabecalho))
+
+def ingest_audio_path(path):
+    """Abre um arquivo de áudio em disco e o ingere sem carregá-lo na memória.
+
+    O AudioUpload retornado é dono do handle aberto; feche-o com `close()`.
+    """
+    handle = open(path, "rb")
+    try:
+        return ingest_audio(handle)
+    except BaseException:
+        handle.close()
+        raise
+
+def is_allowed_format(audio_format):
+    """Indica se o formato identificado está entre os aceitos pela aplicação."""
+    return audio_format in ALLOWED_AUDIO_TYPES
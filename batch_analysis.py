@@ -0,0 +1,248 @@
+"""
+Análise em lote de gravações de cold calls, sem a interface do Streamlit.
+
+Para agendar (cron) a ingestão das gravações exportadas pelo sistema de
+telefonia:
+
+    python batch_analysis.py gravacoes/ --bdr "Ana Souza" --empresa "Acme"
+    python batch_analysis.py --manifest gravacoes.csv --workers 8
+
+Com um diretório, todas as gravações (inclusive em subdiretórios) são do
+BDR informado e o nome do prospect é o nome do arquivo. O manifesto CSV
+tem as colunas arquivo, bdr, prospect, empresa e, opcionais, insight e
+idioma; caminhos relativos são resolvidos a partir do próprio CSV.
+
+Cada arquivo passa pelas validações da página Analisar Cold Calls e pelas
+mesmas etapas com checkpoints no banco (workflow.py): uma execução
+interrompida pode ser repetida, e arquivos concluídos são pulados sem
+chamadas à API (etapas parciais são retomadas de onde pararam). Até
+`--workers` arquivos são processados ao mesmo tempo.
+"""
+
+import argparse
+import csv
+import io
+import os
+import re
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from config import OPENAI_API_KEY, ALLOWED_AUDIO_TYPES, BATCH_WORKERS
+from database import get_bdrs, save_cold_call_analise, link_api_usage, find_audio_recordings, save_audio_recording
+from analysis import (TRANSCRIPTION_MODEL, ANALYSIS_MODEL, get_openai_client, build_cold_call_prompt, transcribe_audio,
+                      run_analysis, parse_cold_call_analysis, default_cold_call_parse)
+from audio import ingest_audio
+from utils import validate_audio_file
+from validation import validate_text, validate_records
+from workflow import make_checkpoint_key, last_completed_stage, load_checkpoint, run_stage
+from tracing import span
+from usage import usage_recorder, record_cache_hit, budget_status, budget_message
+
+IDIOMAS = ("Português", "English")
+
+# Colunas obrigatórias do manifesto (insight e idioma são opcionais)
+MANIFEST_COLUMNS = ("arquivo", "bdr", "prospect", "empresa")
+
+# Campos de cada item validados como os da página Analisar Cold Calls: (nome exibido, tamanho máximo)
+_ITEM_SCHEMA = {'prospect': ("Nome do Prospect", 100), 'empresa': ("Empresa do Prospect", 100)}
+
+# Situação final de cada arquivo
+STATUS_ANALISADO = "analisado"
+STATUS_JA_PROCESSADO = "ja_processado"
+STATUS_DUPLICADO = "duplicado"
+STATUS_INVALIDO = "invalido"
+STATUS_ERRO = "erro"
+
+class LocalAudioFile(io.FileIO):
+    """Gravação em disco com `name` (só o nome do arquivo) e `size`, como o UploadedFile do Streamlit.
+
+    Assim ela passa por validate_audio_file e é lida no lugar por
+    ingest_audio, sem cópia.
+    """
+
+    def __init__(self, path):
+        super().__init__(path, "rb")
+        self.name = os.path.basename(path)
+        self.size = os.fstat(self.fileno()).st_size
+
+def scan_directory(diretorio, bdr, empresa, insight="", idioma="English"):
+    """Itens de todas as gravações do diretório e subdiretórios, em ordem de caminho.
+
+    Arquivos com outras extensões (metadados do sistema de telefonia, por
+    exemplo) são ignorados; o prospect é o nome do arquivo sem extensão.
+    """
+    itens = []
+    for raiz, _, arquivos in os.walk(diretorio):
+        for arquivo in arquivos:
+            nome, extensao = os.path.splitext(arquivo)
+            if extensao[1:].lower() not in ALLOWED_AUDIO_TYPES:
+                continue
+            itens.append({
+                'caminho': os.path.join(raiz, arquivo), 'bdr': bdr, 'prospect': re.sub(r"[_\s]+", " ", nome).strip(),
+                'empresa': empresa, 'insight': insight, 'idioma': idioma,
+            })
+    return sorted(itens, key=lambda item: item['caminho'])
+
+def read_manifest(caminho, idioma="English"):
+    """Itens do manifesto CSV, na ordem das linhas. Lança ValueError se faltar alguma coluna obrigatória."""
+    base = os.path.dirname(os.path.abspath(caminho))
+    with open(caminho, newline="", encoding="utf-8-sig") as arquivo:
+        leitor = csv.DictReader(arquivo)
+        faltando = [coluna for coluna in MANIFEST_COLUMNS if coluna not in (leitor.fieldnames or [])]
+        if faltando:
+            raise ValueError(f"Colunas ausentes no manifesto: {', '.join(faltando)}")
+        return [{
+            'caminho': os.path.join(base, linha['arquivo'].strip()), 'bdr': linha['bdr'].strip(),
+            'prospect': linha['prospect'].strip(), 'empresa': linha['empresa'].strip(),
+            'insight': (linha.get('insight') or "").strip(), 'idioma': (linha.get('idioma') or "").strip() or idioma,
+        } for linha in leitor]
+
+def validate_item(item, bdr_ids):
+    """Valida BDR, idioma e os campos digitados de um item. Retorna a mensagem do primeiro erro ou None."""
+    if item['bdr'] not in bdr_ids:
+        return f"BDR '{item['bdr']}' não cadastrado"
+    if item['idioma'] not in IDIOMAS:
+        return f"Idioma '{item['idioma']}' não suportado. Use: {', '.join(IDIOMAS)}"
+    erros = validate_records([item], _ITEM_SCHEMA)
+    if erros:
+        return erros[0][2]
+    if item['insight']:
+        valido, mensagem = validate_text(item['insight'], "Insight Comercial", 500)
+        if not valido:
+            return mensagem
+    return None
+
+def analyze_file(client, item, bdr_id, skip_duplicates=True):
+    """Analisa uma gravação com as etapas da página Analisar Cold Calls. Retorna (situação, detalhe).
+
+    O checkpoint usa a mesma chave da página: o mesmo áudio com os mesmos
+    dados, enviado por aqui ou pela interface, não é analisado duas vezes.
+    """
+    session_state = {}
+    with LocalAudioFile(item['caminho']) as arquivo:
+        valido, mensagem = validate_audio_file(arquivo)
+        if not valido:
+            return STATUS_INVALIDO, mensagem
+        upload = ingest_audio(arquivo)
+        checkpoint_key = make_checkpoint_key(
+            "cold_call", upload.sha256, bdr_id=bdr_id, prospect_nome=item['prospect'],
+            prospect_empresa=item['empresa'], insight_comercial=item['insight'], idioma=item['idioma']
+        )
+        etapa_concluida = last_completed_stage(session_state, checkpoint_key)
+        if etapa_concluida == "saved":
+            return STATUS_JA_PROCESSADO, load_checkpoint(session_state, checkpoint_key)['outputs']['saved']
+        if skip_duplicates and etapa_concluida is None:
+            # Mesmo áudio já analisado com outros dados (ou pela interface): não gasta a API de novo
+            anterior = next((linha for linha in find_audio_recordings(upload.sha256) if linha[3]), None)
+            if anterior:
+                return STATUS_DUPLICADO, anterior[3]
+
+        registrar_uso = usage_recorder(checkpoint_key, bdr_id)
+
+        def analisar():
+            prompt = build_cold_call_prompt(item['idioma'], item['bdr'], item['prospect'], item['empresa'],
+                                            item['insight'], texto_transcrito)
+            return run_analysis(client, prompt, on_usage=registrar_uso)
+
+        def extrair_resultados():
+            try:
+                return parse_cold_call_analysis(analise_completa, item['idioma'])
+            except Exception:
+                return default_cold_call_parse()
+
+        def salvar():
+            call_id = save_cold_call_analise(bdr_id, item['prospect'], item['empresa'], resultados['scores'],
+                                             analise_completa, resultados['pontos_atencao'],
+                                             resultados['recomendacoes'], item['insight'])
+            link_api_usage(checkpoint_key, cold_call_id=call_id)
+            save_audio_recording(upload.sha256, upload.size, "cold_call", bdr_id, cold_call_id=call_id,
+                                 transcricao=texto_transcrito)
+            return call_id
+
+        with span("lote.analisar_cold_call", idioma=item['idioma'], tamanho_audio=upload.size):
+            run_stage(session_state, checkpoint_key, "uploaded", lambda: {'file_name': arquivo.name, 'size': arquivo.size})
+            texto_transcrito = run_stage(
+                session_state, checkpoint_key, "transcribed",
+                lambda: transcribe_audio(client, upload.as_upload(), on_usage=registrar_uso),
+                on_cached=lambda: record_cache_hit(checkpoint_key, bdr_id, "transcricao", TRANSCRIPTION_MODEL))
+            analise_completa = run_stage(
+                session_state, checkpoint_key, "analysed", analisar,
+                on_cached=lambda: record_cache_hit(checkpoint_key, bdr_id, "analise", ANALYSIS_MODEL))
+            resultados = run_stage(session_state, checkpoint_key, "parsed", extrair_resultados)
+            return STATUS_ANALISADO, run_stage(session_state, checkpoint_key, "saved", salvar)
+
+def _process(client, item, bdr_ids, skip_duplicates):
+    """Valida e analisa um item; erros viram a situação do item, sem interromper o lote."""
+    erro = validate_item(item, bdr_ids)
+    if erro:
+        return STATUS_INVALIDO, erro
+    try:
+        return analyze_file(client, item, bdr_ids[item['bdr']], skip_duplicates)
+    except Exception as e:
+        return STATUS_ERRO, str(e)
+
+def run(itens, workers=BATCH_WORKERS, skip_duplicates=True, client=None, on_result=None):
+    """Analisa os itens com até `workers` arquivos em andamento ao mesmo tempo.
+
+    Cada thread abre o seu arquivo só quando começa a processá-lo, então no
+    máximo `workers` gravações ficam abertas (e `workers` chamadas à API em
+    andamento). `on_result(item, situação, detalhe)` é chamado a cada
+    arquivo concluído. Retorna a lista de (item, situação, detalhe) na ordem
+    de conclusão.
+    """
+    bdr_ids = {nome: bdr_id for bdr_id, nome in get_bdrs()}
+    client = client or get_openai_client()
+    resultados = []
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="lote") as executor:
+        futuros = {executor.submit(_process, client, item, bdr_ids, skip_duplicates): item for item in itens}
+        for futuro in as_completed(futuros):
+            resultado = (futuros[futuro],) + futuro.result()
+            resultados.append(resultado)
+            if on_result:
+                on_result(*resultado)
+    return resultados
+
+def main():
+    parser = argparse.ArgumentParser(description="Analisa em lote gravações de cold calls (Conversa Híbrida).")
+    parser.add_argument("diretorio", nargs="?", help="diretório com as gravações de um BDR (use --bdr)")
+    parser.add_argument("--manifest", help="CSV com as colunas arquivo, bdr, prospect, empresa[, insight, idioma]")
+    parser.add_argument("--bdr", help="BDR das gravações do diretório")
+    parser.add_argument("--empresa", default="Não informada", help="empresa dos prospects do diretório")
+    parser.add_argument("--insight", default="", help="insight comercial usado nas calls do diretório")
+    parser.add_argument("--idioma", choices=IDIOMAS, default="English",
+                        help="idioma das calls (no manifesto, quando a coluna idioma estiver vazia)")
+    parser.add_argument("--workers", type=int, default=BATCH_WORKERS, help="arquivos processados ao mesmo tempo")
+    parser.add_argument("--reanalisar-duplicados", action="store_true",
+                        help="analisa também áudios que já têm uma análise com outros dados")
+    args = parser.parse_args()
+    if (args.diretorio is None) == (args.manifest is None):
+        parser.error("informe um diretório ou --manifest")
+    if args.diretorio is not None and not args.bdr:
+        parser.error("--bdr é obrigatório ao analisar um diretório")
+    if not OPENAI_API_KEY:
+        parser.exit(1, "OPENAI_API_KEY não está configurada.\n")
+
+    if args.manifest:
+        itens = read_manifest(args.manifest, args.idioma)
+    else:
+        itens = scan_directory(args.diretorio, args.bdr, args.empresa, args.insight, args.idioma)
+    gasto, orcamento, nivel = budget_status()
+    if nivel:
+        print(budget_message(gasto, orcamento, nivel), file=sys.stderr)
+
+    def mostrar(item, situacao, detalhe):
+        if situacao in (STATUS_ANALISADO, STATUS_JA_PROCESSADO, STATUS_DUPLICADO):
+            detalhe = f"cold call #{detalhe}"
+        print(f"[{situacao}] {item['caminho']}: {detalhe}", flush=True)
+
+    inicio = time.perf_counter()
+    resultados = run(itens, args.workers, not args.reanalisar_duplicados, on_result=mostrar)
+    contagem = Counter(situacao for _, situacao, _ in resultados)
+    print(f"{len(resultados)} arquivo(s) em {time.perf_counter() - inicio:.0f} s: " +
+          ", ".join(f"{total} {situacao}" for situacao, total in sorted(contagem.items())))
+    if contagem[STATUS_ERRO] or contagem[STATUS_INVALIDO]:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark da ingestão de áudio (audio.py): memória de pico e tempo.
+
+Compara, para um áudio de N MB:
+- UploadedFile (BytesIO): hash com getvalue() a cada rerun x ingestão
+  única sem cópia;
+- stream sequencial (corpo de requisição, pipe): read() inteiro x
+  ingestão com SpooledTemporaryFile;
+- envio à API: o handle de as_upload() enviado a um servidor local que
+  descarta o corpo (sem rede externa).
+
+Uso: python benchmarks/bench_audio_ingest.py [--mb 25]
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio import ingest_audio
+
+class StreamSequencial(io.RawIOBase):
+    """Stream sem seek, como o corpo de uma requisição HTTP."""
+
+    def __init__(self, dados):
+        self._dados = io.BytesIO(dados)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        return self._dados.readinto(buffer)
+
+class Descartar(BaseHTTPRequestHandler):
+    """Servidor local que lê e descarta o upload, respondendo como a API de transcrição."""
+
+    def do_POST(self):
+        restante = int(self.headers.get('Content-Length', 0))
+        while restante:
+            restante -= len(self.rfile.read(min(restante, 1 << 20)))
+        corpo = json.dumps({"text": "ok"}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, *args):
+        pass
+
+def medir(nome, fn):
+    """Executa `fn` medindo o pico de memória alocada e o tempo."""
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    resultado = fn()
+    duracao = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {nome:<44} pico {pico / 2**20:7.1f} MB   {duracao * 1000:7.1f} ms")
+    return resultado
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mb', type=int, default=25)
+    args = parser.parse_args()
+    dados = b"ID3\x04\x00\x00\x00\x00\x00\x00" + os.urandom(args.mb * 2**20)
+
+    print(f"UploadedFile em memória ({args.mb} MB)")
+    enviado = io.BytesIO(dados)
+    medir("hash com getvalue() (a cada rerun)", lambda: hashlib.sha256(enviado.getvalue()).hexdigest())
+    medir("hash com getbuffer()", lambda: hashlib.sha256(enviado.getbuffer()).hexdigest())
+    upload = medir("ingest_audio (uma vez por arquivo)", lambda: ingest_audio(enviado))
+
+    print(f"\nStream sequencial ({args.mb} MB)")
+    medir("read() inteiro + hash", lambda: hashlib.sha256(io.BufferedReader(StreamSequencial(dados)).read()).hexdigest())
+    spooled = medir("ingest_audio com spool em disco",
+                    lambda: ingest_audio(io.BufferedReader(StreamSequencial(dados)), name="call.mp3"))
+    spooled.close()
+
+    try:
+        import openai
+    except ImportError:
+        print("\nopenai não instalado; envio à API não medido.")
+        return
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), Descartar)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    client = openai.OpenAI(api_key="teste", base_url=f"http://127.0.0.1:{servidor.server_port}/v1")
+    print("\nEnvio à API (servidor local)")
+    medir("as_upload() (handle enviado em blocos)",
+          lambda: client.audio.transcriptions.create(model="whisper-1", file=upload.as_upload()))
+    medir("bytes em memória", lambda: client.audio.transcriptions.create(model="whisper-1", file=("call.mp3", dados)))
+    servidor.shutdown()
+
+if __name__ == "__main__":
+    main()
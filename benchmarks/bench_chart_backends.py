@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Compara o custo no servidor dos backends de gráfico (matplotlib x Plotly).
+
+Para cada backend, simula um rerun do dashboard com um radar chart por BDR
+e mede o tempo gasto no processo Python:
+- matplotlib (sem cache): renderização completa para PNG
+- matplotlib (cache): PNG servido do cache LRU
+- plotly: montagem da spec + validação e serialização JSON, exatamente
+  como `st.plotly_chart` faz antes de enviar a figura ao navegador
+
+Uso: python benchmarks/bench_chart_backends.py [--bdrs 100] [--reruns 3]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import plotly.io
+import plotly.tools
+from analysis import HYBRID_STEPS
+from charts import radar_figure_spec, render_radar_chart, clear_chart_cache
+
+def plotly_server_cost(spec):
+    """Reproduz o trabalho de st.plotly_chart sobre uma spec (validação + JSON)."""
+    figure = plotly.tools.return_figure_from_figure_or_data(spec, validate_figure=True)
+    return plotly.io.to_json(figure, validate=False)
+
+def medir(nome, reruns, fn):
+    """Executa `fn` (um rerun completo) várias vezes e imprime mediana e máximo."""
+    tempos = []
+    for _ in range(reruns):
+        inicio = time.perf_counter()
+        fn()
+        tempos.append(time.perf_counter() - inicio)
+    print(f"{nome:<28} mediana {statistics.median(tempos) * 1000:9.1f} ms | máx {max(tempos) * 1000:9.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bdrs', type=int, default=100)
+    parser.add_argument('--reruns', type=int, default=3)
+    args = parser.parse_args()
+
+    random.seed(1)
+    bdrs = [(f"BDR {i}", {key: round(random.uniform(0, 10), 1) for key in HYBRID_STEPS}) for i in range(args.bdrs)]
+
+    def rerun_matplotlib_sem_cache():
+        clear_chart_cache()
+        for nome, scores in bdrs:
+            render_radar_chart(scores, nome, size=8)
+
+    def rerun_matplotlib_com_cache():
+        for nome, scores in bdrs:
+            render_radar_chart(scores, nome, size=8)
+
+    def rerun_plotly():
+        for nome, scores in bdrs:
+            plotly_server_cost(radar_figure_spec([(nome, scores)], nome, size=8))
+
+    # Aquecimento (imports e validadores do Plotly)
+    plotly_server_cost(radar_figure_spec(bdrs[:1], "aquecimento"))
+
+    print(f"{args.bdrs} BDRs por rerun, {args.reruns} reruns")
+    medir("matplotlib (sem cache)", args.reruns, rerun_matplotlib_sem_cache)
+    medir("matplotlib (cache LRU)", args.reruns, rerun_matplotlib_com_cache)
+    medir("plotly (spec + JSON)", args.reruns, rerun_plotly)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Benchmark da renderização dos radar charts do dashboard.
+
+Simula reruns da página de gerenciamento (um gráfico geral + um por BDR)
+e mede o tempo por rerun e o crescimento de memória (RSS) do processo.
+
+Uso: python benchmarks/bench_charts.py [--bdrs 20] [--reruns 5]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis import HYBRID_STEPS
+from charts import render_radar_chart, chart_cache_info
+
+def rss_mb():
+    """RSS atual do processo em MB (Linux)."""
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bdrs', type=int, default=20)
+    parser.add_argument('--reruns', type=int, default=5)
+    args = parser.parse_args()
+
+    random.seed(1)
+    bdrs = [{key: round(random.uniform(0, 10), 1) for key in HYBRID_STEPS} for _ in range(args.bdrs)]
+
+    rss_inicial = rss_mb()
+    tempos = []
+    for _ in range(args.reruns):
+        inicio = time.perf_counter()
+        render_radar_chart(bdrs[0], "Performance Média Geral", size=8)
+        for i, scores in enumerate(bdrs):
+            render_radar_chart(scores, f"Performance Conversa Híbrida - BDR {i}", size=8)
+        tempos.append(time.perf_counter() - inicio)
+
+    print(f"BDRs: {args.bdrs} | reruns: {args.reruns}")
+    print("Tempo por rerun (s):", [round(t, 3) for t in tempos])
+    print(f"Crescimento de RSS: {rss_mb() - rss_inicial:.1f} MB")
+    print("Cache:", chart_cache_info())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Contenção no SQLite com várias sessões do Streamlit ao mesmo tempo.
+
+Cada sessão do Streamlit roda em uma thread própria. Este harness simula
+leitores (os dados das páginas Gerenciar Cold Calls e Gerenciar BDRs) e
+escritores (checkpoints do fluxo de análise, cold calls e 1:1s salvos)
+concorrentes, chamando as funções reais de database.py, e mede por
+operação: latência (p50/p95/p99), espera estimada por lock (latência sob
+contenção menos a latência da mesma operação sem concorrência) e erros
+"database is locked".
+
+A matriz de cenários combina modos de journal do SQLite (delete, wal,
+...) e estratégias de conexão:
+- por_chamada: uma conexão nova a cada função (o comportamento atual);
+- por_thread: uma conexão reaproveitada por thread (sessão).
+
+O relatório final compara os cenários lado a lado e é gravado em JSON em
+benchmarks/results/.
+
+Uso: python benchmarks/bench_contention.py [--leitores 16] [--escritores 4] [--duracao 5] [--modos delete,wal]
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import database
+from analysis import HYBRID_STEPS
+from benchmarks.bench_suite import PASTA_RESULTADOS, git_commit, montar_pagina_cold_calls, percentil
+from benchmarks.synthetic import generate
+
+ESTRATEGIAS = ("por_chamada", "por_thread")
+
+class ConexaoDaThread:
+    """Conexão reaproveitada pela thread: `close()` só descarta a transação pendente."""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def __getattr__(self, nome):
+        return getattr(self._conn, nome)
+
+    def close(self):
+        if self._conn.in_transaction:
+            self._conn.rollback()
+
+def fabrica_de_conexoes(estrategia, timeout):
+    """Substituto de database.get_connection para a estratégia escolhida.
+
+    Aceita `archived` como o original; com o arquivo, a conexão ganha as
+    views de leitura do histórico arquivado (e, por thread, fica separada
+    da conexão sem elas).
+    """
+    def conectar(archived):
+        conn = sqlite3.connect(database.DATABASE_PATH, timeout=timeout)
+        if archived:
+            database._read_through_archive(conn)
+        return conn
+
+    def incluir_arquivo(archived):
+        return database._include_archived.get() if archived is None else bool(archived)
+
+    if estrategia == "por_chamada":
+        return lambda archived=None: conectar(incluir_arquivo(archived))
+    locais = threading.local()
+
+    def conexao_da_thread(archived=None):
+        conexoes = locais.__dict__.setdefault("conexoes", {})
+        chave = incluir_arquivo(archived)
+        if chave not in conexoes:
+            conexoes[chave] = ConexaoDaThread(conectar(chave))
+        return conexoes[chave]
+    return conexao_da_thread
+
+def pagina_bdrs(rng, bdrs):
+    """Consultas de um rerun da página Gerenciar BDRs."""
+    bdr_id = rng.choice(bdrs)
+    database.get_bdrs()
+    total = database.count_bdr_analyses(bdr_id)
+    database.get_bdr_analyses(bdr_id, limit=10, offset=rng.randrange(max(1, total - 10)))
+    database.get_table_counts()
+
+def historico(rng, bdrs):
+    """Uma página do histórico de cold calls de um BDR."""
+    database.get_bdr_cold_calls(rng.choice(bdrs), limit=10, offset=rng.randrange(200))
+
+def checkpoint(rng, bdrs):
+    """Gravação de checkpoint, feita a cada etapa do fluxo de análise."""
+    database.save_analysis_checkpoint(f"carga:{rng.randrange(500)}", "analysed", {'analysed': "x" * 2000})
+
+def salvar_cold_call(rng, bdrs):
+    scores = {key: rng.randint(0, 10) for key in HYBRID_STEPS}
+    database.save_cold_call_analise(rng.choice(bdrs), "Prospect Carga", "Empresa Carga", scores, "Análise " * 500,
+                                    "Pontos", "Recomendações", "Insight")
+
+def salvar_1x1(rng, bdrs):
+    database.save_analise(rng.choice(bdrs), "Resumo " * 100, "Metas " * 50)
+
+LEITURAS = (
+    ("página 3", lambda rng, bdrs: montar_pagina_cold_calls(rng.choice(bdrs))),
+    ("página 4", pagina_bdrs),
+    ("histórico cold calls", historico),
+)
+ESCRITAS = (
+    ("checkpoint", checkpoint),
+    ("save_cold_call_analise", salvar_cold_call),
+    ("save_analise", salvar_1x1),
+)
+
+def e_lock(erro):
+    return isinstance(erro, sqlite3.OperationalError) and "locked" in str(erro)
+
+def executar(operacoes, duracao, seed, pausa, bdrs, parar, tempos, erros, lock):
+    """Laço de uma sessão: sorteia operações até `parar` e acumula tempos e erros."""
+    rng = random.Random(seed)
+    locais_tempos, locais_erros = defaultdict(list), defaultdict(int)
+    while not parar.is_set():
+        nome, fn = rng.choice(operacoes)
+        inicio = time.perf_counter()
+        try:
+            fn(rng, bdrs)
+            locais_tempos[nome].append(time.perf_counter() - inicio)
+        except sqlite3.Error as erro:
+            locais_erros[(nome, "locked" if e_lock(erro) else type(erro).__name__)] += 1
+            conn = database.get_connection()
+            conn.close()  # na estratégia por_thread, descarta a transação interrompida
+        if pausa:
+            time.sleep(pausa)
+    with lock:
+        for nome, valores in locais_tempos.items():
+            tempos[nome].extend(valores)
+        for chave, total in locais_erros.items():
+            erros[chave] += total
+
+def medir_sozinho(operacoes, bdrs, repeticoes=20):
+    """Latência média de cada operação sem concorrência (base para a espera por lock)."""
+    rng = random.Random(0)
+    base = {}
+    for nome, fn in operacoes:
+        fn(rng, bdrs)
+        inicio = time.perf_counter()
+        for _ in range(repeticoes):
+            fn(rng, bdrs)
+        base[nome] = (time.perf_counter() - inicio) / repeticoes
+    return base
+
+def cenario(origem, modo, estrategia, args):
+    """Roda um cenário em uma cópia do banco e retorna as métricas por operação."""
+    pasta = tempfile.mkdtemp()
+    caminho = os.path.join(pasta, "contencao.db")
+    shutil.copyfile(origem, caminho)
+    conn = sqlite3.connect(caminho)
+    conn.execute(f"PRAGMA journal_mode = {modo}")
+    conn.close()
+
+    get_connection_original = database.get_connection
+    cached_original = database._cached
+    database.DATABASE_PATH = caminho
+    database._invalidate_cache(rewrite=True)
+    database.get_connection = fabrica_de_conexoes(estrategia, args.timeout)
+    if not args.cache:
+        database._cached = lambda key, fn: fn()
+    try:
+        bdrs = [bdr_id for bdr_id, _ in database.get_bdrs()]
+        base = medir_sozinho(LEITURAS + ESCRITAS, bdrs)
+        tempos, erros, lock, parar = defaultdict(list), defaultdict(int), threading.Lock(), threading.Event()
+        threads = [threading.Thread(target=executar, args=(LEITURAS, args.duracao, i, 0, bdrs, parar, tempos, erros,
+                                                           lock))
+                   for i in range(args.leitores)]
+        threads += [threading.Thread(target=executar, args=(ESCRITAS, args.duracao, 1000 + i, args.pausa_escrita_ms / 1000,
+                                                            bdrs, parar, tempos, erros, lock))
+                    for i in range(args.escritores)]
+        for thread in threads:
+            thread.start()
+        time.sleep(args.duracao)
+        parar.set()
+        for thread in threads:
+            thread.join()
+    finally:
+        database.get_connection = get_connection_original
+        database._cached = cached_original
+        shutil.rmtree(pasta, ignore_errors=True)
+
+    operacoes = {}
+    for nome, _ in LEITURAS + ESCRITAS:
+        valores = tempos.get(nome, [])
+        locked = sum(total for (op, tipo), total in erros.items() if op == nome and tipo == "locked")
+        outros = sum(total for (op, tipo), total in erros.items() if op == nome and tipo != "locked")
+        media = sum(valores) / len(valores) if valores else 0.0
+        operacoes[nome] = {
+            'n': len(valores), 'locked': locked, 'outros_erros': outros,
+            'p50_ms': percentil(valores, 50) * 1000 if valores else None,
+            'p95_ms': percentil(valores, 95) * 1000 if valores else None,
+            'p99_ms': percentil(valores, 99) * 1000 if valores else None,
+            'espera_media_ms': max(0.0, media - base[nome]) * 1000 if valores else None,
+        }
+    leituras = sum(operacoes[nome]['n'] for nome, _ in LEITURAS)
+    escritas = sum(operacoes[nome]['n'] for nome, _ in ESCRITAS)
+    return {'modo': modo, 'estrategia': estrategia, 'leituras_s': leituras / args.duracao,
+            'escritas_s': escritas / args.duracao, 'operacoes': operacoes}
+
+def imprimir_cenario(resultado):
+    print(f"\n{resultado['modo']} / {resultado['estrategia']}: {resultado['leituras_s']:.0f} leituras/s, "
+          f"{resultado['escritas_s']:.0f} escritas/s")
+    print(f"  {'operação':<24} {'n':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'espera ms':>10} {'locked':>7}")
+    for nome, op in resultado['operacoes'].items():
+        if not op['n']:
+            print(f"  {nome:<24} {0:6d} {'-':>8} {'-':>8} {'-':>8} {'-':>10} {op['locked']:7d}")
+            continue
+        print(f"  {nome:<24} {op['n']:6d} {op['p50_ms']:8.1f} {op['p95_ms']:8.1f} {op['p99_ms']:8.1f} "
+              f"{op['espera_media_ms']:10.1f} {op['locked']:7d}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--leitores', type=int, default=16, help="sessões lendo as páginas de gerenciamento")
+    parser.add_argument('--escritores', type=int, default=4, help="sessões gravando análises e checkpoints")
+    parser.add_argument('--duracao', type=float, default=5.0, help="segundos por cenário")
+    parser.add_argument('--modos', default="delete,wal", help="modos de journal, separados por vírgula")
+    parser.add_argument('--estrategias', default=",".join(ESTRATEGIAS))
+    parser.add_argument('--timeout', type=float, default=5.0, help="busy timeout das conexões, em segundos")
+    parser.add_argument('--pausa-escrita-ms', type=float, default=5.0, help="pausa entre escritas de uma sessão")
+    parser.add_argument('--cache', action='store_true', help="mantém o cache de consultas de database.py")
+    parser.add_argument('--bdrs', type=int, default=20)
+    parser.add_argument('--calls-por-bdr', type=int, default=500)
+    parser.add_argument('--no-save', action='store_true')
+    args = parser.parse_args()
+
+    estrategias = args.estrategias.split(",")
+    for estrategia in estrategias:
+        if estrategia not in ESTRATEGIAS:
+            parser.error(f"estratégia desconhecida: {estrategia}")
+
+    with tempfile.TemporaryDirectory() as pasta:
+        origem = os.path.join(pasta, "origem.db")
+        generate(origem, args.bdrs, args.calls_por_bdr, tamanho_texto=2000)
+        print(f"{args.bdrs * args.calls_por_bdr} cold calls; {args.leitores} leitores e {args.escritores} escritores "
+              f"por {args.duracao:.0f} s; cache de consultas {'ligado' if args.cache else 'desligado'}")
+        resultados = []
+        for modo in args.modos.split(","):
+            for estrategia in estrategias:
+                resultados.append(cenario(origem, modo, estrategia, args))
+                imprimir_cenario(resultados[-1])
+
+    print(f"\n  {'cenário':<26} {'leituras/s':>10} {'escritas/s':>10} {'p95 leitura':>12} {'p95 escrita':>12} "
+          f"{'locked':>7}")
+    for resultado in resultados:
+        ops = resultado['operacoes']
+        p95_leitura = max((ops[nome]['p95_ms'] or 0) for nome, _ in LEITURAS)
+        p95_escrita = max((ops[nome]['p95_ms'] or 0) for nome, _ in ESCRITAS)
+        locked = sum(op['locked'] for op in ops.values())
+        print(f"  {resultado['modo'] + ' / ' + resultado['estrategia']:<26} {resultado['leituras_s']:10.0f} "
+              f"{resultado['escritas_s']:10.0f} {p95_leitura:12.1f} {p95_escrita:12.1f} {locked:7d}")
+
+    if not args.no_save:
+        commit, alterado = git_commit()
+        os.makedirs(PASTA_RESULTADOS, exist_ok=True)
+        caminho = os.path.join(PASTA_RESULTADOS, f"contencao-{datetime.now():%Y%m%d-%H%M%S}-{commit}.json")
+        with open(caminho, "w") as f:
+            json.dump({'commit': commit, 'alterado': alterado, 'data': datetime.now().isoformat(timespec='seconds'),
+                       'parametros': {k: v for k, v in vars(args).items() if k != 'no_save'},
+                       'sqlite': sqlite3.sqlite_version, 'cenarios': resultados}, f, indent=2, ensure_ascii=False)
+        print(f"\nResultado gravado em {os.path.relpath(caminho, RAIZ)}")
+
+if __name__ == "__main__":
+    main()
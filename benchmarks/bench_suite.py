@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Suíte de benchmarks da camada de dados e dos dashboards com dados sintéticos.
+
+Gera (ou reaproveita) um banco sintético determinístico (synthetic.py) e
+mede, com o cache de consultas frio e quente:
+- get_bdrs, get_bdr_cold_calls (uma página e o histórico inteiro de um BDR);
+- get_hybrid_conversation_average_scores (geral e por BDR);
+- save_cold_call_analise;
+- a montagem dos dados da página Gerenciar Cold Calls;
+- a carga completa do snapshot e a renderização dos gráficos.
+
+Para cada caso imprime p50/p95 do tempo e o pico de memória alocada
+(tracemalloc, em uma execução separada). Os resultados são gravados em
+JSON com o commit atual em benchmarks/results/; `--compare` mostra a
+variação em relação ao último resultado com os mesmos parâmetros.
+
+Uso: python benchmarks/bench_suite.py [--rows 1k|100k|1m] [--repeat 20] [--compare]
+"""
+
+import argparse
+import glob
+import json
+import os
+import platform
+import resource
+import sqlite3
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import database
+from analysis import HYBRID_STEPS, HYBRID_LABELS
+from analytics import compare_stages
+from charts import render_radar_chart, render_trend_chart, render_heatmap, clear_chart_cache
+from config import HISTORY_PAGE_SIZE, TREND_WINDOW, TREND_MAX_POINTS
+from snapshot import get_snapshot
+from benchmarks.synthetic import PRESETS, generate
+
+PASTA_DADOS = os.path.join(RAIZ, "benchmarks", ".data")
+PASTA_RESULTADOS = os.path.join(RAIZ, "benchmarks", "results")
+
+def percentil(valores, q):
+    """Percentil pelo método nearest-rank (sem interpolação)."""
+    ordenados = sorted(valores)
+    return ordenados[max(0, -(-len(ordenados) * q // 100) - 1)]
+
+def git_commit():
+    """(commit curto, árvore alterada) do repositório, ou (None, None) fora do git."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        status = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=RAIZ,
+                                capture_output=True, text=True, check=True).stdout
+        return commit, bool(status.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+def preparar_banco(bdrs, calls_por_bdr, tamanho_texto, seed):
+    """Caminho do banco sintético, gerado só na primeira vez para cada combinação de parâmetros."""
+    os.makedirs(PASTA_DADOS, exist_ok=True)
+    caminho = os.path.join(PASTA_DADOS, f"sintetico-{bdrs}x{calls_por_bdr}-t{tamanho_texto}-s{seed}.db")
+    if not os.path.exists(caminho):
+        inicio = time.perf_counter()
+        total = generate(caminho + ".tmp", bdrs, calls_por_bdr, tamanho_texto, seed)
+        os.replace(caminho + ".tmp", caminho)
+        print(f"Banco sintético gerado: {total} cold calls em {time.perf_counter() - inicio:.1f} s")
+    return caminho
+
+def montar_pagina_cold_calls(bdr_id):
+    """Consultas e cálculos de um rerun da página 3 (sem filtros), sem o Streamlit."""
+    stats = database.get_hybrid_conversation_average_scores()
+    nomes_por_id = dict(database.get_bdrs())
+    ids, nomes, contagens, matriz, quantidades = get_snapshot().stage_matrix(nomes_por_id)
+    comparacao = compare_stages(matriz, quantidades)
+    scores_bdr = database.get_hybrid_conversation_average_scores(bdr_id)
+    tendencia = database.get_rolling_score_trends(bdr_id, window=TREND_WINDOW, limit=TREND_MAX_POINTS)
+    calls = database.get_bdr_cold_calls(bdr_id, limit=HISTORY_PAGE_SIZE)
+    return stats, nomes, comparacao, scores_bdr, tendencia, calls
+
+def renderizar_graficos(bdr_id):
+    """Os gráficos da página 3: radar geral, heatmap BDR x etapa e evolução de um BDR."""
+    stats, nomes, comparacao, _, tendencia, _ = montar_pagina_cold_calls(bdr_id)
+    render_radar_chart(stats, "Performance Média Geral", size=8)
+    render_heatmap(nomes, HYBRID_LABELS, comparacao['zscore'], "BDR x Etapa (Z-score vs média do time)")
+    series = {label: [round(linha[2 + i], 1) for linha in tendencia] for i, label in enumerate(HYBRID_LABELS)}
+    render_trend_chart([linha[0] for linha in tendencia], series, "Evolução")
+
+def casos(bdr_id, inseridos):
+    """Lista de (nome, função medida, preparação executada fora da medição)."""
+    frio = database._invalidate_cache
+
+    def salvar():
+        scores = {key: 7 for key in HYBRID_STEPS}
+        inseridos.append(database.save_cold_call_analise(
+            bdr_id, "Prospect Benchmark", "Empresa Benchmark", scores, "Análise " * 500, "Pontos", "Recomendações",
+            "Insight"))
+
+    def graficos_frios():
+        frio()
+        clear_chart_cache()
+
+    return [
+        ("get_bdrs (frio)", database.get_bdrs, frio),
+        ("get_bdrs (cache)", database.get_bdrs, None),
+        ("get_bdr_cold_calls página (frio)",
+         lambda: database.get_bdr_cold_calls(bdr_id, limit=HISTORY_PAGE_SIZE), frio),
+        ("get_bdr_cold_calls histórico do BDR", lambda: database.get_bdr_cold_calls(bdr_id), frio),
+        ("médias gerais (frio)", database.get_hybrid_conversation_average_scores, frio),
+        ("médias gerais (cache)", database.get_hybrid_conversation_average_scores, None),
+        ("médias do BDR (frio)", lambda: database.get_hybrid_conversation_average_scores(bdr_id), frio),
+        ("snapshot carga completa", lambda: get_snapshot().refresh(force=True), None),
+        ("página 3 após escrita (frio)", lambda: montar_pagina_cold_calls(bdr_id), frio),
+        ("página 3 rerun (cache)", lambda: montar_pagina_cold_calls(bdr_id), None),
+        ("gráficos página 3 (sem cache)", lambda: renderizar_graficos(bdr_id), graficos_frios),
+        ("gráficos página 3 (cache)", lambda: renderizar_graficos(bdr_id), None),
+        # Por último: as inserções mudam o banco (são removidas ao final)
+        ("save_cold_call_analise", salvar, None),
+    ]
+
+def medir(fn, preparar, repeticoes):
+    """Tempos (s) de `repeticoes` execuções e o pico de memória (bytes) de uma execução extra."""
+    fn()  # aquecimento: conexões, imports e caches do processo
+    tempos = []
+    for _ in range(repeticoes):
+        if preparar:
+            preparar()
+        inicio = time.perf_counter()
+        fn()
+        tempos.append(time.perf_counter() - inicio)
+    if preparar:
+        preparar()
+    tracemalloc.start()
+    fn()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return tempos, pico
+
+def ultimo_resultado(parametros, excluir):
+    """Resultado mais recente salvo com os mesmos parâmetros, ou None."""
+    for caminho in sorted(glob.glob(os.path.join(PASTA_RESULTADOS, "*.json")), reverse=True):
+        if caminho == excluir:
+            continue
+        with open(caminho) as f:
+            resultado = json.load(f)
+        if resultado.get('parametros') == parametros:
+            return resultado
+    return None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', choices=sorted(PRESETS), default="1k", help="tamanho predefinido do banco")
+    parser.add_argument('--bdrs', type=int, help="sobrescreve o número de BDRs do tamanho escolhido")
+    parser.add_argument('--calls-por-bdr', type=int, help="sobrescreve os calls por BDR do tamanho escolhido")
+    parser.add_argument('--tamanho-texto', type=int, default=4000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--compare', action='store_true', help="compara com o último resultado equivalente")
+    parser.add_argument('--no-save', action='store_true', help="não grava o resultado em benchmarks/results/")
+    args = parser.parse_args()
+
+    bdrs, calls_por_bdr = PRESETS[args.rows]
+    bdrs = args.bdrs or bdrs
+    calls_por_bdr = args.calls_por_bdr or calls_por_bdr
+    parametros = {'bdrs': bdrs, 'calls_por_bdr': calls_por_bdr, 'tamanho_texto': args.tamanho_texto,
+                  'seed': args.seed, 'repeat': args.repeat}
+    database.DATABASE_PATH = preparar_banco(bdrs, calls_por_bdr, args.tamanho_texto, args.seed)
+    commit, alterado = git_commit()
+    print(f"{bdrs * calls_por_bdr} cold calls ({bdrs} BDRs x {calls_por_bdr}), {args.repeat} repetições, "
+          f"commit {commit}{' (alterado)' if alterado else ''}\n")
+
+    inseridos = []
+    resultados = {}
+    print(f"  {'caso':<40} {'p50 ms':>10} {'p95 ms':>10} {'pico MB':>9}")
+    try:
+        for nome, fn, preparar in casos(1, inseridos):
+            tempos, pico = medir(fn, preparar, args.repeat)
+            resultados[nome] = {'p50_ms': percentil(tempos, 50) * 1000, 'p95_ms': percentil(tempos, 95) * 1000,
+                                'pico_mb': pico / 2**20}
+            print(f"  {nome:<40} {resultados[nome]['p50_ms']:10.2f} {resultados[nome]['p95_ms']:10.2f} "
+                  f"{resultados[nome]['pico_mb']:9.1f}")
+    finally:
+        # Mantém o banco sintético idêntico para as próximas execuções
+        for call_id in inseridos:
+            database.delete_cold_call(call_id)
+    rss_max = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"\nRSS máximo do processo: {rss_max:.0f} MB")
+
+    resultado = {
+        'commit': commit, 'alterado': alterado, 'data': datetime.now().isoformat(timespec='seconds'),
+        'parametros': parametros, 'rss_max_mb': rss_max, 'casos': resultados,
+        'maquina': {'python': platform.python_version(), 'plataforma': platform.platform(),
+                    'sqlite': sqlite3.sqlite_version, 'cpus': os.cpu_count()},
+    }
+    caminho = None
+    if not args.no_save:
+        os.makedirs(PASTA_RESULTADOS, exist_ok=True)
+        caminho = os.path.join(PASTA_RESULTADOS, f"{datetime.now():%Y%m%d-%H%M%S}-{commit}-{bdrs}x{calls_por_bdr}.json")
+        with open(caminho, "w") as f:
+            json.dump(resultado, f, indent=2, ensure_ascii=False)
+        print(f"Resultado gravado em {os.path.relpath(caminho, RAIZ)}")
+
+    if args.compare:
+        anterior = ultimo_resultado(parametros, caminho)
+        if anterior is None:
+            print("\nNenhum resultado anterior com os mesmos parâmetros para comparar.")
+            return
+        print(f"\nComparação com {anterior['commit']} ({anterior['data']}), variação do p50 e do p95:")
+        for nome, atual in resultados.items():
+            antes = anterior['casos'].get(nome)
+            if not antes:
+                continue
+            variacoes = [(atual[k] - antes[k]) / antes[k] * 100 if antes[k] else 0.0 for k in ('p50_ms', 'p95_ms')]
+            print(f"  {nome:<40} {variacoes[0]:+9.1f}% {variacoes[1]:+9.1f}%")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark do custo do tracing (tracing.py) em uma chamada decorada.
+
+Mede uma função vazia sem decorator, com @traced() e a coleta desligada e
+com a coleta ligada. Os spans coletados vão para um banco temporário
+(DATABASE_PATH) e são descartados no fim: o flush do atexit nunca grava
+no banco configurado do app.
+
+Uso: python benchmarks/bench_tracing.py [--repeticoes 200000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+import tracing
+from tracing import traced, set_enabled
+
+def medir(nome, fn, repeticoes):
+    """Imprime o tempo médio por chamada em nanossegundos."""
+    segundos = min(timeit.repeat(fn, number=repeticoes, repeat=3)) / repeticoes
+    print(f"  {nome:<24} {segundos * 1e9:9.0f} ns")
+    return segundos
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeticoes', type=int, default=200000)
+    args = parser.parse_args()
+
+    pasta = tempfile.TemporaryDirectory()
+    database.DATABASE_PATH = os.path.join(pasta.name, "tracing.db")
+
+    def vazia():
+        pass
+    decorada = traced("bench.vazia")(vazia)
+
+    print("Chamada de função")
+    medir("sem decorator", vazia, args.repeticoes)
+    set_enabled(False)
+    medir("@traced, desligado", decorada, args.repeticoes)
+    set_enabled(True)
+    medir("@traced, ligado", decorada, args.repeticoes)
+    set_enabled(False)
+    # Os spans medidos não interessam: nada fica para o flush do atexit
+    with tracing._buffer_lock:
+        tracing._buffer.clear()
+    pasta.cleanup()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark da validação e sanitização de textos (validation.py).
+
+Compara o motor atual (varredura única com padrões pré-compilados) com a
+implementação anterior de utils.validate_input_text e
+database.sanitize_text, sobre nomes, insights e campos do tamanho das
+análises geradas pelo GPT. Também confere que os resultados são os mesmos.
+
+Uso: python benchmarks/bench_validation.py [--repeticoes 2000] [--tamanho 6000]
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from validation import validate_text, validate_many, sanitize_text
+from benchmarks.synthetic import texto_de_analise
+
+def legacy_validate_input_text(text, field_name, max_length=1000):
+    """Implementação anterior de utils.validate_input_text (para comparação)."""
+    if not text or text.strip() == "":
+        return False, f"{field_name} não pode estar vazio"
+    if len(text) > max_length:
+        return False, f"{field_name} muito longo. Máximo {max_length} caracteres"
+    dangerous_chars = ['<', '>', '"', "'", '&', ';', '--', '/*', '*/', 'xp_', 'sp_', 'exec', 'select', 'insert', 'update', 'delete', 'drop', 'create', 'alter', 'union', 'script', 'javascript', 'vbscript', 'onload', 'onerror', 'onclick']
+    text_lower = text.lower()
+    for char in dangerous_chars:
+        if char in text_lower:
+            return False, f"{field_name} contém caracteres ou palavras inválidas: '{char}'"
+    if not re.match(r'^[a-zA-Z0-9\sáàâãéèêíìîóòôõúùûçÁÀÂÃÉÈÊÍÌÎÓÒÔÕÚÙÛÇ\-\.\,\!\?\(\)]+$', text):
+        return False, f"{field_name} contém caracteres não permitidos. Use apenas letras, números, espaços e acentos"
+    return True, "Texto válido"
+
+def legacy_sanitize_text(text):
+    """Implementação anterior de database.sanitize_text (para comparação)."""
+    if not text:
+        return text
+    import re
+    text = re.sub(r'[<>"\';]', '', text)
+    text = re.sub(r'--|/\*|\*/', '', text)
+    return text.strip()
+
+def medir(nome, fn, repeticoes):
+    """Imprime o tempo médio por chamada em microssegundos."""
+    segundos = min(timeit.repeat(fn, number=repeticoes, repeat=3)) / repeticoes
+    print(f"  {nome:<24} {segundos * 1e6:9.2f} µs")
+    return segundos
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeticoes', type=int, default=2000)
+    parser.add_argument('--tamanho', type=int, default=6000, help="caracteres dos campos de análise")
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    analise = texto_de_analise(rng, args.tamanho)
+    insight = texto_de_analise(rng, 480).replace("\n", " ").replace("#", "").replace("*", "").replace("/", " ")
+    casos = {
+        "nome": ("João da Silva", 50),
+        "insight (480 chars)": (insight, 500),
+        f"análise ({len(analise)} chars)": (analise.replace("#", "").replace("*", "").replace("/", " "), 10000),
+        "nome com script": ("João <script>alert('x')</script>", 50),
+    }
+
+    print("Validação de texto")
+    for nome, (texto, maximo) in casos.items():
+        assert validate_text(texto, "Campo", maximo)[0] == legacy_validate_input_text(texto, "Campo", maximo)[0]
+        print(f" {nome}")
+        antes = medir("anterior", lambda: legacy_validate_input_text(texto, "Campo", maximo), args.repeticoes)
+        depois = medir("atual", lambda: validate_text(texto, "Campo", maximo), args.repeticoes)
+        print(f"  {'ganho':<24} {antes / depois:9.1f}x")
+
+    lote = [(texto, nome, maximo) for nome, (texto, maximo) in casos.items()] * 250
+    print(f"\nValidação em lote ({len(lote)} campos)")
+    medir("validate_many", lambda: validate_many(lote), max(args.repeticoes // 100, 1))
+
+    print("\nSanitização de campos do GPT")
+    for nome, texto in [(f"análise ({len(analise)} chars)", analise),
+                        ("análise com -- e /* */", analise.replace(". ", "; -- /* */ ", 20))]:
+        assert sanitize_text(texto) == legacy_sanitize_text(texto)
+        print(f" {nome}")
+        antes = medir("anterior", lambda: legacy_sanitize_text(texto), args.repeticoes)
+        depois = medir("atual", lambda: sanitize_text(texto), args.repeticoes)
+        print(f"  {'ganho':<24} {antes / depois:9.1f}x")
+
+if __name__ == "__main__":
+    main()
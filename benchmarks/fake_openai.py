@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Servidor local que imita a API da OpenAI para testes de carga, sem rede
+externa e sem custo.
+
+Implementa os endpoints usados pelo sistema:
+- POST /v1/audio/transcriptions: lê e descarta o áudio e devolve uma
+  transcrição pronta (português ou inglês), com idioma e duração;
+- POST /v1/chat/completions: devolve uma análise da Conversa Híbrida no
+  idioma do prompt (ou de reunião 1:1), com scores sorteados e `usage`.
+
+A latência de cada endpoint segue uma distribuição configurável e uma
+fração das requisições pode receber 429 (com Retry-After) ou 500, como a
+API real sob carga. GET /stats devolve os contadores do servidor.
+
+Para usar com o Streamlit, aponte o SDK para o servidor:
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=teste streamlit run app.py
+
+Uso: python benchmarks/fake_openai.py [--porta 8765] [--latencia-chat lognormal:3000,0.4] [--taxa-429 0.05]
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis import HYBRID_LABELS, ONE_ON_ONE_SUMMARY_TITLE, ONE_ON_ONE_GOALS_TITLE
+
+# Nome do idioma como o Whisper devolve em verbose_json
+IDIOMAS_WHISPER = {"Português": "portuguese", "English": "english"}
+
+TRANSCRICOES = {
+    "Português": (
+        "BDR: Oi Carla, aqui é o Pedro da Acme. Vi que vocês abriram três vagas de SDR este trimestre. "
+        "Prospect: Sim, estamos crescendo o time. BDR: Empresas nesse momento costumam perder 30% das "
+        "oportunidades por falta de cadência. Quanto isso representa para vocês hoje? Prospect: Não sei "
+        "dizer, mas o ramp-up tem sido lento. BDR: Faz sentido conversarmos 20 minutos na quinta?"
+    ),
+    "English": (
+        "BDR: Hi Carla, this is Pedro from Acme. I noticed you opened three SDR roles this quarter. "
+        "Prospect: Yes, we are growing the team. BDR: Companies at this stage usually lose 30% of their "
+        "pipeline to inconsistent cadences. What would that mean for you? Prospect: Hard to say, but "
+        "ramp-up has been slow. BDR: Would a 20 minute call on Thursday make sense?"
+    ),
+}
+
+SECOES_COLD_CALL = {
+    "Português": ("SCORES CONVERSA HÍBRIDA", "ANÁLISE DETALHADA", "AVALIAÇÃO DO INSIGHT COMERCIAL",
+                  "PONTOS DE ATENÇÃO", "RECOMENDAÇÕES"),
+    "English": ("HYBRID CONVERSATION SCORES", "DETAILED ANALYSIS", "COMMERCIAL INSIGHT EVALUATION",
+                "ATTENTION POINTS", "RECOMMENDATIONS"),
+}
+
+TEXTOS_COLD_CALL = {
+    "Português": ("O BDR abriu com contexto relevante, mas demorou a introduzir o insight.",
+                  "O insight sobre cadência foi apresentado sem dados de apoio.",
+                  "- Faltou quantificar o custo do problema\n- Próximo passo sem horário definido",
+                  "- Trazer um dado de mercado no Reframe\n- Propor dois horários no fechamento"),
+    "English": ("The BDR opened with relevant context but was slow to introduce the insight.",
+                "The cadence insight was presented without supporting data.",
+                "- The cost of the problem was not quantified\n- Next step had no set time",
+                "- Bring a market data point into the Reframe\n- Offer two time slots when closing"),
+}
+
+def parse_latency(spec):
+    """Converte uma especificação de latência (em ms) em uma função que sorteia segundos.
+
+    Formatos: "const:200", "uniform:100,400", "normal:media,desvio" e
+    "lognormal:mediana,sigma" (cauda longa, como a API real).
+    """
+    tipo, _, parametros = spec.partition(":")
+    valores = [float(valor) for valor in parametros.split(",")] if parametros else []
+    if tipo == "const" and len(valores) == 1:
+        return lambda rng: valores[0] / 1000
+    if tipo == "uniform" and len(valores) == 2:
+        return lambda rng: rng.uniform(*valores) / 1000
+    if tipo == "normal" and len(valores) == 2:
+        return lambda rng: max(0.0, rng.gauss(*valores)) / 1000
+    if tipo == "lognormal" and len(valores) == 2:
+        return lambda rng: rng.lognormvariate(math.log(valores[0]), valores[1]) / 1000
+    raise ValueError(f"Latência inválida: {spec!r} (use const:ms, uniform:min,max, normal:media,desvio "
+                     f"ou lognormal:mediana,sigma)")
+
+def cold_call_analysis(idioma, rng):
+    """Análise da Conversa Híbrida no formato pedido pelo prompt, com scores sorteados."""
+    titulo_scores, titulo_analise, titulo_insight, titulo_atencao, titulo_recomendacoes = SECOES_COLD_CALL[idioma]
+    analise, insight, atencao, recomendacoes = TEXTOS_COLD_CALL[idioma]
+    scores = "\n".join(f"**{label.split('. ', 1)[1]}:** {rng.randint(2, 10)}/10" for label in HYBRID_LABELS)
+    return (f"### {titulo_scores}\n{scores}\n\n### {titulo_analise}\n{analise}\n\n### {titulo_insight}\n{insight}\n\n"
+            f"### {titulo_atencao}\n{atencao}\n\n### {titulo_recomendacoes}\n{recomendacoes}")
+
+def one_on_one_analysis(rng):
+    """Análise de reunião 1:1 com as seções de resumo e metas."""
+    return (f"{ONE_ON_ONE_SUMMARY_TITLE}\nO BDR fechou {rng.randint(5, 30)} reuniões no mês e relatou dificuldade "
+            f"no Reframe.\n\n{ONE_ON_ONE_GOALS_TITLE}\n- Praticar o Reframe com dados\n- Meta de "
+            f"{rng.randint(10, 40)} reuniões no próximo mês")
+
+def idioma_do_prompt(prompt):
+    """Idioma da análise de cold call pedida no prompt, ou None para reuniões 1:1."""
+    if "Language: English" in prompt:
+        return "English"
+    if "Idioma: Português" in prompt:
+        return "Português"
+    return None
+
+class OpenAIStandIn(ThreadingHTTPServer):
+    """Servidor com a configuração de latência e falhas e os contadores de requisições."""
+
+    daemon_threads = True
+
+    def __init__(self, address, latencia_transcricao="lognormal:1500,0.4", latencia_chat="lognormal:4000,0.4",
+                 taxa_429=0.0, taxa_erro=0.0, retry_after_ms=500, seed=None):
+        super().__init__(address, Handler)
+        self.latencias = {
+            "/v1/audio/transcriptions": parse_latency(latencia_transcricao),
+            "/v1/chat/completions": parse_latency(latencia_chat),
+        }
+        self.taxa_429 = taxa_429
+        self.taxa_erro = taxa_erro
+        self.retry_after_ms = retry_after_ms
+        self.contadores = Counter()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        return f"http://{self.server_address[0]}:{self.server_port}/v1"
+
+    def sortear(self, fn):
+        """Executa `fn(rng)` com o gerador compartilhado (as threads do servidor disputam o mesmo RNG)."""
+        with self._lock:
+            return fn(self._rng)
+
+    def contar(self, chave):
+        with self._lock:
+            self.contadores[chave] += 1
+
+class Handler(BaseHTTPRequestHandler):
+    # HTTP/1.1 mantém a conexão aberta entre requisições, como o cliente da OpenAI espera
+    protocol_version = "HTTP/1.1"
+
+    def _ler_corpo(self):
+        """Lê o corpo inteiro (Content-Length ou chunked) em blocos, sem guardar o áudio."""
+        partes = []
+        self.bytes_recebidos = 0
+        guardar = not self.path.endswith("/transcriptions")
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            while True:
+                tamanho = int(self.rfile.readline().split(b";")[0], 16)
+                if tamanho == 0:
+                    self.rfile.readline()
+                    break
+                bloco = self.rfile.read(tamanho)
+                self.bytes_recebidos += len(bloco)
+                if guardar:
+                    partes.append(bloco)
+                self.rfile.readline()
+        else:
+            restante = int(self.headers.get('Content-Length', 0))
+            while restante:
+                bloco = self.rfile.read(min(restante, 1 << 20))
+                if not bloco:
+                    break
+                restante -= len(bloco)
+                self.bytes_recebidos += len(bloco)
+                if guardar:
+                    partes.append(bloco)
+        return b"".join(partes)
+
+    def _responder(self, status, corpo, headers=None):
+        dados = json.dumps(corpo, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(dados)))
+        for nome, valor in (headers or {}).items():
+            self.send_header(nome, valor)
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def _erro(self, status, tipo, mensagem, headers=None):
+        self.server.contar(f"{self.path} {status}")
+        self._responder(status, {"error": {"message": mensagem, "type": tipo, "code": tipo}}, headers)
+
+    def do_GET(self):
+        if self.path == "/stats":
+            with self.server._lock:
+                self._responder(200, dict(self.server.contadores))
+            return
+        self._erro(404, "not_found", f"Endpoint desconhecido: {self.path}")
+
+    def do_POST(self):
+        corpo = self._ler_corpo()
+        latencia = self.server.latencias.get(self.path)
+        if latencia is None:
+            self._erro(404, "not_found", f"Endpoint desconhecido: {self.path}")
+            return
+
+        sorteio = self.server.sortear(lambda rng: rng.random())
+        if sorteio < self.server.taxa_429:
+            retry = self.server.retry_after_ms
+            self._erro(429, "rate_limit_exceeded", "Rate limit reached (simulado).",
+                       {'retry-after-ms': str(retry), 'retry-after': str(max(1, math.ceil(retry / 1000)))})
+            return
+        if sorteio < self.server.taxa_429 + self.server.taxa_erro:
+            self._erro(500, "server_error", "Erro interno (simulado).")
+            return
+
+        time.sleep(self.server.sortear(latencia))
+        if self.path == "/v1/audio/transcriptions":
+            idioma = self.server.sortear(lambda rng: rng.choice(sorted(TRANSCRICOES)))
+            # verbose_json: duração estimada como MP3 a 128 kbps (16 KB por segundo)
+            resposta = {"text": TRANSCRICOES[idioma], "language": IDIOMAS_WHISPER[idioma],
+                        "duration": max(1.0, round(self.bytes_recebidos / 16000, 2))}
+        else:
+            resposta = self._chat(json.loads(corpo or b"{}"))
+        self.server.contar(f"{self.path} 200")
+        self._responder(200, resposta)
+
+    def _chat(self, pedido):
+        prompt = "\n".join(str(mensagem.get("content", "")) for mensagem in pedido.get("messages", []))
+        idioma = idioma_do_prompt(prompt)
+        if idioma:
+            conteudo = self.server.sortear(lambda rng: cold_call_analysis(idioma, rng))
+        else:
+            conteudo = self.server.sortear(one_on_one_analysis)
+        # Tokens estimados em ~4 caracteres por token, como ordem de grandeza
+        prompt_tokens, completion_tokens = len(prompt) // 4, len(conteudo) // 4
+        return {
+            "id": f"chatcmpl-local-{self.server.sortear(lambda rng: rng.getrandbits(48)):x}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": pedido.get("model", "gpt-4-turbo"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": conteudo}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens},
+        }
+
+    def log_message(self, *args):
+        pass
+
+def start_server(host="127.0.0.1", port=0, **opcoes):
+    """Inicia o servidor em uma thread daemon e o retorna (use `shutdown()` para parar)."""
+    servidor = OpenAIStandIn((host, port), **opcoes)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--porta', type=int, default=8765)
+    parser.add_argument('--latencia-transcricao', default="lognormal:1500,0.4", help="em ms (ver parse_latency)")
+    parser.add_argument('--latencia-chat', default="lognormal:4000,0.4", help="em ms (ver parse_latency)")
+    parser.add_argument('--taxa-429', type=float, default=0.0, help="fração de requisições com 429")
+    parser.add_argument('--taxa-erro', type=float, default=0.0, help="fração de requisições com 500")
+    parser.add_argument('--retry-after-ms', type=int, default=500)
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+
+    servidor = OpenAIStandIn((args.host, args.porta), args.latencia_transcricao, args.latencia_chat, args.taxa_429,
+                             args.taxa_erro, args.retry_after_ms, args.seed)
+    print(f"API local em {servidor.base_url} (Ctrl+C para parar)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+
+if __name__ == "__main__":
+    main()
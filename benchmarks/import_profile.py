@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Perfil de tempo de import das páginas do Streamlit.
+
+O Streamlit reexecuta a página a cada interação e, após um deploy/restart,
+o primeiro acesso paga todos os imports a frio. Este script executa o bloco
+de imports de cada página em um processo Python novo e mostra:
+- o tempo total de import a frio
+- os módulos de topo mais caros (via `python -X importtime`)
+- quais dependências pesadas (matplotlib, openai, numpy) foram carregadas
+
+Uso: python benchmarks/import_profile.py [--top 8]
+"""
+
+import argparse
+import ast
+import glob
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PAGES = ["app.py"] + sorted(os.path.relpath(p, ROOT) for p in glob.glob(os.path.join(ROOT, "pages", "*.py")))
+
+# Dependências que só devem ser carregadas quando realmente usadas
+HEAVY_MODULES = ("matplotlib", "openai", "numpy")
+
+# Módulos carregados pela inicialização do interpretador (não pela página)
+STARTUP_MODULES = {"site", "encodings", "zipimport", "codecs", "io", "abc", "stat", "_frozen_importlib_external", "time", "sys", "json"}
+
+def import_block(page):
+    """Retorna o código com apenas os imports de topo da página."""
+    with open(os.path.join(ROOT, page), encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    return "\n".join(ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom)))
+
+def profile_page(page, importtime=False):
+    """Importa os módulos da página em um processo novo e mede o tempo a frio.
+
+    Retorna um dicionário com `seconds`, `heavy_modules` e, se `importtime`
+    for verdadeiro, `top_imports` (lista de (módulo, ms cumulativos)).
+    """
+    code = "\n".join([
+        "import time, sys, json",
+        "_inicio = time.perf_counter()",
+        import_block(page),
+        "_fim = time.perf_counter()",
+        f"print(json.dumps({{'seconds': _fim - _inicio, 'heavy_modules': sorted(m for m in {HEAVY_MODULES!r} if m in sys.modules)}}))",
+    ])
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", code]
+    env = dict(os.environ, DATABASE_PATH=os.path.join(tempfile.gettempdir(), "import_profile.db"))
+    result = subprocess.run(command, capture_output=True, text=True, cwd=ROOT, env=env, check=True)
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+
+    if importtime:
+        top_imports = []
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "self [us]" in line:
+                continue
+            _, cumulative, name = line.split("|")
+            # Apenas módulos de topo (sem indentação), que somam o tempo total
+            if not name.rstrip().startswith("  ") and name.strip() not in STARTUP_MODULES:
+                top_imports.append((name.strip(), int(cumulative) / 1000))
+        report['top_imports'] = sorted(top_imports, key=lambda item: item[1], reverse=True)
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--top', type=int, default=8, help="quantos módulos mostrar por página")
+    args = parser.parse_args()
+
+    for page in PAGES:
+        report = profile_page(page, importtime=True)
+        pesados = ", ".join(report['heavy_modules']) or "nenhuma"
+        print(f"\n{page}: {report['seconds'] * 1000:.0f} ms | dependências pesadas: {pesados}")
+        for name, ms in report['top_imports'][:args.top]:
+            print(f"    {ms:8.1f} ms  {name}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Teste de carga do fluxo de análise (cold calls e 1:1s) contra a API local.
+
+Executa N análises concorrentes com o código real do fluxo (ingestão do
+áudio, checkpoints de workflow.py, transcrição, análise, extração dos
+resultados e gravação no banco) usando o cliente oficial da OpenAI
+apontado para benchmarks/fake_openai.py. Tudo roda localmente, em um
+banco temporário, sem rede externa.
+
+Reporta vazão (análises/s), percentis de latência por etapa e do fluxo
+inteiro, falhas e os 429/500 injetados pelo servidor (que o SDK repete
+com backoff, até `--max-retries`).
+
+Uso: python benchmarks/load_analysis.py [--analises 40] [--concorrencia 8] [--tipo misto] [--taxa-429 0.05]
+"""
+
+import argparse
+import io
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+from analysis import (build_cold_call_prompt, transcribe_audio, run_analysis, parse_cold_call_analysis,
+                      default_cold_call_parse, build_one_on_one_prompt, parse_one_on_one_analysis)
+from audio import ingest_audio
+from workflow import make_checkpoint_key, run_stage
+from benchmarks.bench_suite import percentil
+from benchmarks.fake_openai import start_server
+
+IDIOMAS = ("Português", "English")
+
+class ArquivoEnviado(io.BytesIO):
+    """Imita o UploadedFile do Streamlit (BytesIO com nome e tamanho)."""
+
+    def __init__(self, dados, name):
+        super().__init__(dados)
+        self.name = name
+        self.size = len(dados)
+
+def cold_call(client, indice, bdr, audio, tempos):
+    """Mesmas etapas da página Analisar Cold Calls, com checkpoints na sessão e no banco."""
+    bdr_id, bdr_nome = bdr
+    idioma = IDIOMAS[indice % 2]
+    prospect_nome, prospect_empresa, insight = f"Prospect {indice}", f"Empresa {indice % 50}", "Cadência de SDRs"
+    session_state = {}
+    upload = ingest_audio(audio)
+    checkpoint_key = make_checkpoint_key("cold_call", f"{upload.sha256}-{indice}", bdr_id=bdr_id,
+                                         prospect_nome=prospect_nome, prospect_empresa=prospect_empresa,
+                                         insight_comercial=insight, idioma=idioma)
+
+    def etapa(nome, fn):
+        inicio = time.perf_counter()
+        resultado = run_stage(session_state, checkpoint_key, nome, fn)
+        tempos[nome].append(time.perf_counter() - inicio)
+        return resultado
+
+    def extrair_resultados():
+        try:
+            return parse_cold_call_analysis(analise_completa, idioma)
+        except Exception:
+            return default_cold_call_parse()
+
+    etapa("uploaded", lambda: {'file_name': audio.name, 'size': audio.size})
+    texto = etapa("transcribed", lambda: transcribe_audio(client, upload.as_upload()))
+    analise_completa = etapa("analysed", lambda: run_analysis(client, build_cold_call_prompt(
+        idioma, bdr_nome, prospect_nome, prospect_empresa, insight, texto)))
+    resultados = etapa("parsed", extrair_resultados)
+    etapa("saved", lambda: database.save_cold_call_analise(
+        bdr_id, prospect_nome, prospect_empresa, resultados['scores'], analise_completa, resultados['pontos_atencao'],
+        resultados['recomendacoes'], insight))
+
+def one_on_one(client, indice, bdr, audio, tempos):
+    """Mesmas etapas da página Analisar 1:1s."""
+    def medir(nome, fn):
+        inicio = time.perf_counter()
+        resultado = fn()
+        tempos[nome].append(time.perf_counter() - inicio)
+        return resultado
+
+    upload = medir("uploaded", lambda: ingest_audio(audio))
+    texto = medir("transcribed", lambda: transcribe_audio(client, upload.as_upload()))
+    analise_completa = medir("analysed", lambda: run_analysis(client, build_one_on_one_prompt(texto)))
+    resumo, metas = medir("parsed", lambda: parse_one_on_one_analysis(analise_completa))
+    medir("saved", lambda: database.save_analise(bdr[0], resumo, metas))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--analises', type=int, default=40)
+    parser.add_argument('--concorrencia', type=int, default=8)
+    parser.add_argument('--tipo', choices=["cold_call", "1x1", "misto"], default="misto")
+    parser.add_argument('--audio-kb', type=int, default=512, help="tamanho do áudio enviado em cada análise")
+    parser.add_argument('--latencia-transcricao', default="lognormal:1500,0.4", help="em ms")
+    parser.add_argument('--latencia-chat', default="lognormal:4000,0.4", help="em ms")
+    parser.add_argument('--taxa-429', type=float, default=0.0)
+    parser.add_argument('--taxa-erro', type=float, default=0.0)
+    parser.add_argument('--retry-after-ms', type=int, default=500)
+    parser.add_argument('--max-retries', type=int, default=2, help="tentativas extras do SDK da OpenAI")
+    parser.add_argument('--base-url', help="usa um servidor já iniciado em vez de um local nesta execução")
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    from openai import OpenAI
+
+    servidor = None
+    base_url = args.base_url
+    if base_url is None:
+        servidor = start_server(latencia_transcricao=args.latencia_transcricao, latencia_chat=args.latencia_chat,
+                                taxa_429=args.taxa_429, taxa_erro=args.taxa_erro,
+                                retry_after_ms=args.retry_after_ms, seed=args.seed)
+        base_url = servidor.base_url
+    client = OpenAI(api_key="teste", base_url=base_url, max_retries=args.max_retries)
+
+    pasta = tempfile.TemporaryDirectory()
+    database.DATABASE_PATH = os.path.join(pasta.name, "carga.db")
+    for i in range(1, 6):
+        database.add_bdr(f"BDR Carga {i}")
+    bdrs = database.get_bdrs()
+
+    rng = random.Random(args.seed)
+    audio = b"ID3\x04\x00\x00\x00\x00\x00\x00" + rng.randbytes(args.audio_kb * 1024)
+    tempos = defaultdict(list)
+    lock = threading.Lock()
+    falhas = Counter()
+
+    def executar(indice):
+        tipo = args.tipo if args.tipo != "misto" else ("cold_call", "1x1")[indice % 2]
+        fluxo = cold_call if tipo == "cold_call" else one_on_one
+        tempos_analise = defaultdict(list)
+        inicio = time.perf_counter()
+        try:
+            fluxo(client, indice, bdrs[indice % len(bdrs)], ArquivoEnviado(audio, f"call_{indice}.mp3"), tempos_analise)
+        except Exception as e:
+            with lock:
+                falhas[type(e).__name__] += 1
+            return
+        duracao = time.perf_counter() - inicio
+        with lock:
+            for nome, valores in tempos_analise.items():
+                tempos[nome].extend(valores)
+            tempos[f"total {tipo}"].append(duracao)
+
+    print(f"{args.analises} análises ({args.tipo}), concorrência {args.concorrencia}, API em {base_url}\n")
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concorrencia) as executor:
+        list(executor.map(executar, range(args.analises)))
+    duracao = time.perf_counter() - inicio
+    concluidas = args.analises - sum(falhas.values())
+
+    print(f"  {'etapa':<20} {'n':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'máx ms':>9}")
+    ordem = ["uploaded", "transcribed", "analysed", "parsed", "saved", "total cold_call", "total 1x1"]
+    for nome in ordem:
+        valores = tempos.get(nome)
+        if not valores:
+            continue
+        p50, p95, p99 = (percentil(valores, q) * 1000 for q in (50, 95, 99))
+        print(f"  {nome:<20} {len(valores):5d} {p50:9.1f} {p95:9.1f} {p99:9.1f} {max(valores) * 1000:9.1f}")
+
+    print(f"\nConcluídas: {concluidas}/{args.analises} em {duracao:.1f} s ({concluidas / duracao:.2f} análises/s)")
+    if falhas:
+        print("Falhas: " + ", ".join(f"{nome} x{total}" for nome, total in falhas.most_common()))
+    if servidor is not None:
+        print("Requisições no servidor: " + ", ".join(f"{chave} x{total}"
+                                                      for chave, total in sorted(servidor.contadores.items())))
+        servidor.shutdown()
+    pasta.cleanup()
+
+if __name__ == "__main__":
+    main()
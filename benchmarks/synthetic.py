@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Gerador determinístico de dados sintéticos para benchmarks.
+
+Cria um banco SQLite com o schema de database.py e preenche BDRs, cold
+calls (scores, empresas, datas e textos do tamanho das análises do GPT) e
+análises 1:1. A mesma semente e os mesmos parâmetros geram sempre o mesmo
+banco, então resultados de commits diferentes são comparáveis.
+
+Uso: python benchmarks/synthetic.py destino.db [--bdrs 50] [--calls-por-bdr 2000] [--tamanho-texto 4000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+from analysis import HYBRID_STEPS
+
+# Tamanhos predefinidos: total de linhas -> (BDRs, calls por BDR)
+PRESETS = {
+    "1k": (20, 50),
+    "100k": (50, 2000),
+    "1m": (100, 10000),
+}
+
+# Data de referência fixa, para que o banco não dependa do dia da geração
+DATA_REFERENCIA = datetime(2026, 1, 1, 18, 0, 0)
+DIAS_DE_HISTORICO = 365
+
+PALAVRAS = ("prospect cliente reunião etapa dor impacto solução proposta valor negócio equipe vendas contexto "
+            "objeção próxima ação conversa decisão orçamento prazo resultado métrica crescimento").split()
+
+# Textos distintos gerados por campo; as linhas sorteiam entre eles
+TEXTOS_POR_CAMPO = 64
+
+def texto_de_analise(rng, tamanho):
+    """Texto parecido com uma análise do GPT: seções, notas e bullets em português."""
+    linhas = []
+    while sum(len(linha) + 1 for linha in linhas) < tamanho:
+        if rng.random() < 0.1:
+            linhas.append(f"## {rng.randint(1, 6)}. {rng.choice(PALAVRAS).title()}")
+            linhas.append(f"**Nota: {rng.randint(0, 10)}/10**")
+        prefixo = "- " if rng.random() < 0.5 else ""
+        linhas.append(prefixo + " ".join(rng.choice(PALAVRAS) for _ in range(rng.randint(8, 20))).capitalize() + ".")
+    return "\n".join(linhas)[:tamanho]
+
+def _linhas_cold_calls(rng, bdr_ids, calls_por_bdr, textos):
+    """Gera as linhas de cold_calls BDR a BDR, com nível de habilidade próprio por etapa."""
+    empresas = [f"Empresa {i:03d}" for i in range(200)]
+    for bdr_id in bdr_ids:
+        habilidade = [rng.uniform(3, 9) for _ in HYBRID_STEPS]
+        for _ in range(calls_por_bdr):
+            quando = DATA_REFERENCIA - timedelta(seconds=rng.randrange(DIAS_DE_HISTORICO * 86400))
+            scores = [min(10, max(0, round(rng.gauss(media, 1.5)))) for media in habilidade]
+            yield (bdr_id, quando.strftime("%Y-%m-%d %H:%M:%S"), database.to_epoch(quando),
+                   f"Prospect {rng.randrange(10000)}", rng.choice(empresas), *scores,
+                   rng.choice(textos['analise']), rng.choice(textos['pontos']), rng.choice(textos['recomendacoes']),
+                   rng.choice(textos['insight']))
+
+def generate(path, bdrs, calls_por_bdr, tamanho_texto=4000, seed=42, analises_por_bdr=20, lote=5000):
+    """Cria (ou recria) o banco em `path` e retorna o total de cold calls gerados."""
+    if os.path.exists(path):
+        os.remove(path)
+    rng = random.Random(seed)
+    textos = {
+        'analise': [texto_de_analise(rng, tamanho_texto) for _ in range(TEXTOS_POR_CAMPO)],
+        'pontos': [texto_de_analise(rng, tamanho_texto // 6) for _ in range(TEXTOS_POR_CAMPO)],
+        'recomendacoes': [texto_de_analise(rng, tamanho_texto // 6) for _ in range(TEXTOS_POR_CAMPO)],
+        'insight': [texto_de_analise(rng, 300).replace("\n", " ") for _ in range(TEXTOS_POR_CAMPO)],
+    }
+
+    caminho_anterior = database.DATABASE_PATH
+    database.DATABASE_PATH = path
+    try:
+        conn = database.get_connection()
+    finally:
+        database.DATABASE_PATH = caminho_anterior
+    # Geração em massa: sem journal nem fsync (o banco é descartável)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+
+    conn.executemany("INSERT INTO bdrs (id, nome) VALUES (?, ?)", [(i, f"BDR {i:03d}") for i in range(1, bdrs + 1)])
+    bdr_ids = list(range(1, bdrs + 1))
+
+    colunas = ", ".join(["bdr_id", "data", "data_ts", "prospect_nome", "prospect_empresa", *HYBRID_STEPS,
+                         "analise_completa", "pontos_atencao", "recomendacoes", "insight_comercial"])
+    sql = f"INSERT INTO cold_calls ({colunas}) VALUES ({', '.join('?' * (9 + len(HYBRID_STEPS)))})"
+    linhas = _linhas_cold_calls(rng, bdr_ids, calls_por_bdr, textos)
+    total = 0
+    while True:
+        bloco = [linha for _, linha in zip(range(lote), linhas)]
+        if not bloco:
+            break
+        conn.executemany(sql, bloco)
+        total += len(bloco)
+
+    analises = []
+    for bdr_id in bdr_ids:
+        for _ in range(analises_por_bdr):
+            quando = DATA_REFERENCIA - timedelta(seconds=rng.randrange(DIAS_DE_HISTORICO * 86400))
+            analises.append((bdr_id, quando.strftime("%Y-%m-%d %H:%M:%S"), database.to_epoch(quando),
+                             rng.choice(textos['pontos']), rng.choice(textos['recomendacoes'])))
+    conn.executemany("INSERT INTO analises (bdr_id, data, data_ts, resumo, metas) VALUES (?, ?, ?, ?, ?)", analises)
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+    return total
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('destino')
+    parser.add_argument('--bdrs', type=int, default=50)
+    parser.add_argument('--calls-por-bdr', type=int, default=2000)
+    parser.add_argument('--tamanho-texto', type=int, default=4000, help="caracteres da análise completa")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    total = generate(args.destino, args.bdrs, args.calls_por_bdr, args.tamanho_texto, args.seed)
+    tamanho = os.path.getsize(args.destino) / 2**20
+    print(f"{total} cold calls de {args.bdrs} BDRs em {time.perf_counter() - inicio:.1f} s ({tamanho:.0f} MB)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,368 @@
+import io
+from functools import lru_cache
+from math import pi
+import streamlit as st
+from analysis import HYBRID_STEPS
+from config import CHART_BACKEND, CHART_CACHE_SIZE
+from tracing import traced
+
+# Categorias - 6 Etapas da Conversa Híbrida
+RADAR_CATEGORIES = [
+    '1. Warmer\n(Aquecimento)',
+    '2. Reframe\n(Reenquadramento)',
+    '3. Rational Drowning\n(Afogamento Racional)',
+    '4. Emotional Impact\n(Impacto Emocional)',
+    '5. New Way\n(Novo Caminho)',
+    '6. Your Solution\n(Sua Solução)'
+]
+
+# Temas disponíveis (o escuro acompanha o .streamlit/config.toml)
+THEMES = {
+    'dark': {
+        'style': 'dark_background',
+        'background': '#1a1a1a',
+        'line': '#00ffff',
+        'text': 'white',
+        'grid': '#333333'
+    },
+    'light': {
+        'style': 'default',
+        'background': '#ffffff',
+        'line': '#0077b6',
+        'text': 'black',
+        'grid': '#cccccc'
+    }
+}
+
+# Cores das séries em gráficos com vários BDRs (a primeira é a cor do tema)
+SERIES_COLORS = ['#ff6b6b', '#ffd93d', '#6bcb77', '#4d96ff', '#c77dff', '#ff9f1c', '#2ec4b6', '#e71d36']
+
+# Tamanhos de fonte por tamanho de figura: (categorias, eixo radial, valores, título)
+FONT_SIZES = {
+    10: (11, 9, 10, 18),
+    8: (10, 8, 9, 14)
+}
+
+CHART_DPI = 120
+
+# Altura em pixels por polegada de figura no backend Plotly
+PLOTLY_PX_PER_INCH = 60
+
+def _scores_values(scores):
+    """Converte o dicionário de scores em uma tupla (hashable) na ordem das etapas."""
+    return tuple(scores[key] for key in HYBRID_STEPS)
+
+def _series_color(theme, index):
+    """Cor da série: a do tema para a primeira, depois a paleta."""
+    if index == 0:
+        return THEMES[theme]['line']
+    return SERIES_COLORS[(index - 1) % len(SERIES_COLORS)]
+
+def _to_bytes(fig, fmt):
+    """Salva a figura em memória e libera seus artistas."""
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=fmt, dpi=CHART_DPI, facecolor=fig.get_facecolor(), bbox_inches='tight')
+    fig.clear()
+    return buffer.getvalue()
+
+# --- Backend matplotlib (imagem renderizada no servidor) ---
+# O matplotlib é importado dentro das funções de renderização: ele só é
+# carregado quando um gráfico realmente precisa ser desenhado (cache miss).
+
+@lru_cache(maxsize=CHART_CACHE_SIZE)
+@traced()
+def _render_radar(series, title, size, theme, fmt):
+    """Renderiza o radar chart e retorna os bytes da imagem.
+
+    `series` é uma tupla de (nome, valores). Usa `Figure` diretamente (sem
+    pyplot): a figura não entra no registro global do matplotlib, não depende
+    de `plt.style.use` global e é liberada assim que a função termina.
+    """
+    from matplotlib.figure import Figure
+    from matplotlib import style
+
+    colors = THEMES[theme]
+    category_size, radial_size, value_size, title_size = FONT_SIZES.get(size, FONT_SIZES[10])
+
+    # Número de variáveis
+    N = len(RADAR_CATEGORIES)
+
+    # Calcular ângulos para cada eixo
+    angles = [n / float(N) * 2 * pi for n in range(N)]
+    angles += angles[:1]  # Fechar o círculo
+
+    with style.context(colors['style']):
+        fig = Figure(figsize=(size, size))
+        ax = fig.add_subplot(projection='polar')
+        fig.patch.set_facecolor(colors['background'])
+        ax.set_facecolor(colors['background'])
+
+        # Plotar uma área por série
+        for index, (name, values) in enumerate(series):
+            # Adicionar primeiro valor no final para fechar o círculo
+            closed_values = list(values) + list(values[:1])
+            color = _series_color(theme, index)
+            ax.plot(angles, closed_values, 'o-', linewidth=3 if len(series) == 1 else 2, color=color, label=name)
+            ax.fill(angles, closed_values, alpha=0.25 if len(series) == 1 else 0.1, color=color)
+
+        # Configurar eixos
+        ax.set_xticks(angles[:-1])
+        ax.set_xticklabels(RADAR_CATEGORIES, fontsize=category_size, color=colors['text'])
+
+        # Configurar escala radial
+        ax.set_ylim(0, 10)
+        ax.set_yticks([0, 2, 4, 6, 8, 10])
+        ax.set_yticklabels(['0', '2', '4', '6', '8', '10'], fontsize=radial_size, color=colors['text'])
+        ax.grid(True, color=colors['grid'], alpha=0.3)
+
+        if len(series) == 1:
+            # Adicionar valores nos pontos
+            for angle, value in zip(angles[:-1], series[0][1]):
+                ax.text(angle, value + 0.5, str(value),
+                        horizontalalignment='center',
+                        verticalalignment='center',
+                        fontsize=value_size,
+                        color=colors['text'],
+                        weight='bold')
+        else:
+            ax.legend(loc='upper right', bbox_to_anchor=(1.3, 1.1), fontsize=radial_size)
+
+        # Título
+        ax.set_title(title, size=title_size, color=colors['text'], weight='bold', pad=20)
+
+        # Remover bordas
+        ax.spines['polar'].set_visible(False)
+
+        fig.tight_layout()
+        return _to_bytes(fig, fmt)
+
+@lru_cache(maxsize=CHART_CACHE_SIZE)
+@traced()
+def _render_trend(x, series, title, size, theme, fmt):
+    """Renderiza um gráfico de linhas (uma por série) e retorna os bytes da imagem."""
+    from matplotlib.figure import Figure
+    from matplotlib import style
+
+    colors = THEMES[theme]
+    category_size, radial_size, value_size, title_size = FONT_SIZES.get(size, FONT_SIZES[10])
+
+    with style.context(colors['style']):
+        fig = Figure(figsize=(size * 1.5, size * 0.6))
+        ax = fig.add_subplot()
+        fig.patch.set_facecolor(colors['background'])
+        ax.set_facecolor(colors['background'])
+
+        for index, (name, values) in enumerate(series):
+            ax.plot(range(len(x)), values, 'o-', linewidth=2, color=_series_color(theme, index), label=name)
+
+        # Mostrar no máximo ~10 rótulos no eixo X
+        step = max(1, len(x) // 10)
+        ax.set_xticks(range(0, len(x), step))
+        ax.set_xticklabels(x[::step], fontsize=radial_size, color=colors['text'], rotation=30, ha='right')
+        ax.set_ylim(0, 10.5)
+        ax.tick_params(axis='y', labelsize=radial_size, colors=colors['text'])
+        ax.grid(True, color=colors['grid'], alpha=0.3)
+        ax.legend(fontsize=radial_size)
+        ax.set_title(title, size=title_size, color=colors['text'], weight='bold')
+
+        fig.tight_layout()
+        return _to_bytes(fig, fmt)
+
+@lru_cache(maxsize=CHART_CACHE_SIZE)
+@traced()
+def _render_heatmap(rows, columns, values, title, theme, fmt):
+    """Renderiza um heatmap (linhas x colunas) centrado em zero e retorna os bytes da imagem.
+
+    Células None (sem dados) ficam mascaradas, na cor de fundo e sem valor.
+    """
+    import numpy as np
+    from matplotlib import colormaps, style
+    from matplotlib.figure import Figure
+
+    colors = THEMES[theme]
+    limite = max((abs(value) for row in values for value in row if value is not None), default=1) or 1
+    matriz = np.ma.masked_invalid(np.array(values, dtype=np.float64).reshape(len(rows), len(columns)))
+
+    with style.context(colors['style']):
+        # A altura cresce com o número de linhas para manter os rótulos legíveis
+        fig = Figure(figsize=(10, max(3, 0.35 * len(rows) + 1.5)))
+        ax = fig.add_subplot()
+        fig.patch.set_facecolor(colors['background'])
+
+        cmap = colormaps['RdYlGn'].with_extremes(bad=colors['background'])
+        image = ax.imshow(matriz, cmap=cmap, aspect='auto', vmin=-limite, vmax=limite)
+        ax.set_xticks(range(len(columns)))
+        ax.set_xticklabels(columns, fontsize=9, color=colors['text'], rotation=20, ha='right')
+        ax.set_yticks(range(len(rows)))
+        ax.set_yticklabels(rows, fontsize=9, color=colors['text'])
+
+        # Valores nas células apenas quando ainda cabem
+        if len(rows) * len(columns) <= 300:
+            for i, row in enumerate(values):
+                for j, value in enumerate(row):
+                    if value is None:
+                        continue
+                    ax.text(j, i, f"{value:+.1f}", ha='center', va='center', fontsize=8, color='black')
+
+        fig.colorbar(image, ax=ax)
+        ax.set_title(title, size=14, color=colors['text'], weight='bold')
+
+        fig.tight_layout()
+        return _to_bytes(fig, fmt)
+
+def render_radar_chart(scores, title, size=10, theme='dark', fmt='png'):
+    """Retorna o radar chart da Conversa Híbrida (6 etapas) como bytes PNG/SVG.
+
+    Renderizações idênticas (mesmos scores, título, tamanho e tema) vêm do
+    cache LRU, então reruns do Streamlit não redesenham o gráfico.
+    """
+    return _render_radar(((title, _scores_values(scores)),), title, size, theme, fmt)
+
+def render_radar_overlay(series, title, size=10, theme='dark', fmt='png'):
+    """Radar chart com vários BDRs sobrepostos; `series` é uma lista de (nome, scores)."""
+    series_key = tuple((name, _scores_values(scores)) for name, scores in series)
+    return _render_radar(series_key, title, size, theme, fmt)
+
+def render_trend_chart(x, series, title, size=8, theme='dark', fmt='png'):
+    """Gráfico de linhas; `x` são os rótulos e `series` um dicionário nome -> valores."""
+    series_key = tuple((name, tuple(values)) for name, values in series.items())
+    return _render_trend(tuple(x), series_key, title, size, theme, fmt)
+
+def _cell(value):
+    """Valor de uma célula de heatmap arredondado, ou None sem dados (NaN não serve de chave de cache)."""
+    return None if value is None or value != value else round(float(value), 2)
+
+def render_heatmap(rows, columns, values, title, theme='dark', fmt='png'):
+    """Heatmap com uma linha por item (ex.: BDR) e uma coluna por etapa; células NaN ou None ficam em branco."""
+    values_key = tuple(tuple(_cell(value) for value in row) for row in values)
+    return _render_heatmap(tuple(rows), tuple(columns), values_key, title, theme, fmt)
+
+def chart_cache_info():
+    """Estatísticas do cache de radar charts (hits, misses, tamanho)."""
+    return _render_radar.cache_info()
+
+def clear_chart_cache():
+    """Esvazia os caches de gráficos renderizados."""
+    _render_radar.cache_clear()
+    _render_trend.cache_clear()
+    _render_heatmap.cache_clear()
+
+# --- Backend Plotly (spec JSON renderizada no navegador) ---
+
+def _plotly_layout(title, size, theme):
+    """Layout comum às figuras Plotly, com as cores do tema."""
+    colors = THEMES[theme]
+    return {
+        'title': {'text': title, 'font': {'size': FONT_SIZES.get(size, FONT_SIZES[10])[3]}},
+        'height': size * PLOTLY_PX_PER_INCH,
+        'paper_bgcolor': colors['background'],
+        'plot_bgcolor': colors['background'],
+        'font': {'color': colors['text']},
+        'margin': {'l': 60, 'r': 60, 't': 80, 'b': 40}
+    }
+
+def radar_figure_spec(series, title, size=10, theme='dark'):
+    """Spec Plotly (dict) do radar chart; `series` é uma lista de (nome, scores)."""
+    colors = THEMES[theme]
+    labels = [category.replace('\n', '<br>') for category in RADAR_CATEGORIES]
+    single = len(series) == 1
+    data = []
+    for index, (name, scores) in enumerate(series):
+        values = list(_scores_values(scores))
+        data.append({
+            'type': 'scatterpolar',
+            'name': name,
+            'r': values + values[:1],
+            'theta': labels + labels[:1],
+            'mode': 'lines+markers+text' if single else 'lines+markers',
+            'text': [str(value) for value in values] + [''] if single else None,
+            'textposition': 'top center',
+            'fill': 'toself',
+            'opacity': 0.9 if single else 0.6,
+            'line': {'color': _series_color(theme, index), 'width': 3 if single else 2}
+        })
+    layout = _plotly_layout(title, size, theme)
+    layout['showlegend'] = not single
+    layout['polar'] = {
+        'bgcolor': colors['background'],
+        'radialaxis': {'range': [0, 10], 'tickvals': [0, 2, 4, 6, 8, 10], 'gridcolor': colors['grid']},
+        'angularaxis': {'gridcolor': colors['grid']}
+    }
+    return {'data': data, 'layout': layout}
+
+def trend_figure_spec(x, series, title, size=8, theme='dark'):
+    """Spec Plotly (dict) de linhas; `series` é um dicionário nome -> valores."""
+    colors = THEMES[theme]
+    data = [
+        {
+            'type': 'scatter',
+            'mode': 'lines+markers',
+            'name': name,
+            'x': list(x),
+            'y': list(values),
+            'line': {'color': _series_color(theme, index)}
+        }
+        for index, (name, values) in enumerate(series.items())
+    ]
+    layout = _plotly_layout(title, size, theme)
+    layout['yaxis'] = {'range': [0, 10.5], 'gridcolor': colors['grid']}
+    layout['xaxis'] = {'gridcolor': colors['grid']}
+    return {'data': data, 'layout': layout}
+
+def heatmap_figure_spec(rows, columns, values, title, theme='dark'):
+    """Spec Plotly (dict) de heatmap centrado em zero; células NaN ou None viram lacunas."""
+    layout = _plotly_layout(title, 10, theme)
+    layout['height'] = max(300, 25 * len(rows) + 150)
+    layout['yaxis'] = {'autorange': 'reversed'}
+    return {
+        'data': [{
+            'type': 'heatmap',
+            'z': [[_cell(value) for value in row] for row in values],
+            'x': list(columns),
+            'y': list(rows),
+            'colorscale': 'RdYlGn',
+            'zmid': 0
+        }],
+        'layout': layout
+    }
+
+# --- Exibição no Streamlit (escolhe o backend pela configuração) ---
+
+CHART_BACKENDS = ('matplotlib', 'plotly')
+
+def chart_backend():
+    """Backend em uso segundo CHART_BACKEND (sem diferenciar maiúsculas); valores desconhecidos usam o matplotlib."""
+    backend = (CHART_BACKEND or '').strip().lower()
+    return backend if backend in CHART_BACKENDS else 'matplotlib'
+
+@traced()
+def show_radar_chart(scores, title, size=10, theme='dark'):
+    """Exibe o radar chart de um BDR com o backend configurado em CHART_BACKEND."""
+    if chart_backend() == 'plotly':
+        st.plotly_chart(radar_figure_spec([(title, scores)], title, size, theme), theme=None)
+    else:
+        st.image(render_radar_chart(scores, title, size, theme))
+
+@traced()
+def show_radar_overlay(series, title, size=10, theme='dark'):
+    """Exibe vários BDRs sobrepostos em um único radar chart."""
+    if chart_backend() == 'plotly':
+        st.plotly_chart(radar_figure_spec(series, title, size, theme), theme=None)
+    else:
+        st.image(render_radar_overlay(series, title, size, theme))
+
+@traced()
+def show_trend_chart(x, series, title, size=8, theme='dark'):
+    """Exibe um gráfico de linhas de evolução dos scores."""
+    if chart_backend() == 'plotly':
+        st.plotly_chart(trend_figure_spec(x, series, title, size, theme), theme=None)
+    else:
+        st.image(render_trend_chart(x, series, title, size, theme))
+
+@traced()
+def show_heatmap(rows, columns, values, title, theme='dark'):
+    """Exibe um heatmap (ex.: BDR x etapa)."""
+    if chart_backend() == 'plotly':
+        st.plotly_chart(heatmap_figure_spec(rows, columns, values, title, theme), theme=None)
+    else:
+        st.image(render_heatmap(rows, columns, values, title, theme))
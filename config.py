@@ -1,6 +1,33 @@
 import os
 
-DATABASE_PATH = "gestao_bdrs.db"
+DATABASE_PATH = os.getenv("DATABASE_PATH", "gestao_bdrs.db")
+
+# Backend do banco (storage.py): "sqlite" (arquivo em DATABASE_PATH) ou "postgres" (DATABASE_URL)
+DATABASE_BACKEND = os.getenv("DATABASE_BACKEND", "sqlite")
+DATABASE_URL = os.getenv("DATABASE_URL", "")
+# PostgreSQL: schema das tabelas (separado das tabelas do Prisma), tamanho do pool e linhas por lote nos cursores do servidor
+POSTGRES_SCHEMA = os.getenv("POSTGRES_SCHEMA", "gestao_bdrs")
+POSTGRES_POOL_MIN = int(os.getenv("POSTGRES_POOL_MIN", "1"))
+POSTGRES_POOL_MAX = int(os.getenv("POSTGRES_POOL_MAX", "10"))
+POSTGRES_ITER_SIZE = 2000
+
+# Sincronização com o banco do Next.js (prisma_sync.py): URL do PostgreSQL do Prisma e alterações por transação
+SYNC_DATABASE_URL = os.getenv("SYNC_DATABASE_URL", DATABASE_URL)
+SYNC_BATCH_SIZE = int(os.getenv("SYNC_BATCH_SIZE", "500"))
+
+# Arquivamento (maintenance.py): cold calls e análises 1:1 com mais de ARCHIVE_AFTER_DAYS dias vão para um
+# banco SQLite à parte (padrão: "<DATABASE_PATH sem extensão>_arquivo.db"); 0 desliga o arquivamento
+ARCHIVE_DATABASE_PATH = os.getenv("ARCHIVE_DATABASE_PATH", "")
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "0"))
+# Manutenção do banco (ANALYZE, vacuum incremental, checkpoint do WAL): roda quando o banco fica ocioso por
+# MAINTENANCE_IDLE_SECONDS, no máximo uma vez a cada MAINTENANCE_INTERVAL_HOURS, liberando até
+# MAINTENANCE_VACUUM_PAGES páginas livres por execução
+MAINTENANCE_IDLE_SECONDS = int(os.getenv("MAINTENANCE_IDLE_SECONDS", "300"))
+MAINTENANCE_INTERVAL_HOURS = int(os.getenv("MAINTENANCE_INTERVAL_HOURS", "24"))
+MAINTENANCE_VACUUM_PAGES = 5000
+# Gravações de outros processos (análise em lote, manutenção pelo cron): o cache de consultas e o snapshot
+# conferem a versão compartilhada dos dados no máximo a cada SHARED_VERSION_CHECK_SECONDS (0 confere sempre)
+SHARED_VERSION_CHECK_SECONDS = float(os.getenv("SHARED_VERSION_CHECK_SECONDS", "2"))
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
 # Validar se a API key está configurada (apenas em produção)
@@ -14,4 +41,55 @@ PAGE_CONFIG = {
 }
 
 ALLOWED_AUDIO_TYPES = ["mp3", "mp4", "m4a", "wav"]
-MAX_FILE_SIZE_MB = 25
\ No newline at end of file
+MAX_FILE_SIZE_MB = 25
+
+# Backend dos gráficos: "matplotlib" (imagem gerada no servidor) ou "plotly" (renderizado no navegador)
+CHART_BACKEND = os.getenv("CHART_BACKEND", "matplotlib")
+
+# Quantidade máxima de gráficos renderizados mantidos em cache (LRU)
+CHART_CACHE_SIZE = 128
+
+# Itens por página nos históricos dos dashboards
+HISTORY_PAGE_SIZE = 10
+
+# Tendências: tamanho da média móvel (em calls) e quantidade máxima de pontos no gráfico
+TREND_WINDOW = 10
+TREND_MAX_POINTS = 100
+
+# Threads de leitura da camada de dados assíncrona (async_database.py); as escritas usam uma única thread
+DB_READ_WORKERS = int(os.getenv("DB_READ_WORKERS", "4"))
+
+# API JSON somente leitura (api_server.py): endereço e respostas guardadas em memória (LRU)
+API_HOST = os.getenv("API_HOST", "127.0.0.1")
+API_PORT = int(os.getenv("API_PORT", "8502"))
+API_CACHE_SIZE = int(os.getenv("API_CACHE_SIZE", "256"))
+
+# Análise em lote (batch_analysis.py): gravações processadas ao mesmo tempo (cada uma com suas chamadas à API)
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "4"))
+
+# Ingestão de áudio: acima deste tamanho o arquivo lido de um stream vai para um arquivo temporário em disco
+AUDIO_SPOOL_THRESHOLD_MB = int(os.getenv("AUDIO_SPOOL_THRESHOLD_MB", "4"))
+AUDIO_CHUNK_SIZE = 1024 * 1024
+
+# Métricas de desempenho (tracing.py): coleta de spans e gravação em lote na tabela metrics_spans
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "0") == "1"
+TRACING_FLUSH_SPANS = 200
+TRACING_FLUSH_SECONDS = 5
+METRICS_RETENTION_DAYS = 7
+
+# Custos da API (USD), valores de referência: atualize conforme a tabela de preços da OpenAI.
+# Modelos de texto: preço por 1 milhão de tokens (entrada, entrada em cache, saída); o modelo
+# retornado pela API (ex.: "gpt-4-turbo-2024-04-09") usa o preço do prefixo mais longo.
+TOKEN_PRICES_USD = {
+    "gpt-4-turbo": (10.00, 10.00, 30.00),
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+}
+# Modelos de transcrição: preço por minuto de áudio
+AUDIO_PRICES_USD = {
+    "whisper-1": 0.006,
+}
+
+# Orçamento mensal da API (USD; 0 desliga o alerta) e fração do orçamento que dispara o aviso
+MONTHLY_BUDGET_USD = float(os.getenv("MONTHLY_BUDGET_USD", "0"))
+BUDGET_ALERT_THRESHOLD = float(os.getenv("BUDGET_ALERT_THRESHOLD", "0.8"))
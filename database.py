@@ -1,14 +1,201 @@
-import sqlite3
-from datetime import datetime
-from config import DATABASE_PATH
-
-def get_connection():
-    """Retorna uma conexão com o banco de dados."""
-    conn = sqlite3.connect(DATABASE_PATH)
-    # Criar tabelas se não existirem
-    create_tables_if_not_exist(conn)
+import json
+import os
+import threading
+from contextvars import ContextVar
+from datetime import datetime, time, timedelta
+from time import monotonic
+from config import DATABASE_PATH, ARCHIVE_DATABASE_PATH, MAINTENANCE_VACUUM_PAGES, SHARED_VERSION_CHECK_SECONDS
+from analysis import HYBRID_STEPS
+from validation import sanitize_text, sanitize_fields
+from tracing import traced
+import storage
+
+# Bancos cujo schema já foi verificado neste processo
+_schema_ready = set()
+
+# Cache de consultas de leitura, invalidado a cada escrita feita por este módulo
+_data_version = 0
+_rewrite_version = 0
+_query_cache = {}
+_MISSING = object()
+# Última versão compartilhada lida (get_shared_data_version)
+_shared_version = None
+_shared_version_lock = threading.Lock()
+# Momento da última conferência da versão compartilhada (poll_shared_data_version)
+_shared_checked_at = None
+
+# Leitura do histórico arquivado (cold calls e análises antigos, ver archive_records) na sessão atual
+_include_archived = ContextVar("include_archived", default=False)
+# Momento do último acesso ao banco neste processo (maintenance.py espera o banco ficar ocioso)
+_last_access = monotonic()
+
+def _backend():
+    """Backend configurado (ver storage.py): SQLite em DATABASE_PATH ou PostgreSQL."""
+    return storage.get_backend(DATABASE_PATH)
+
+def get_connection(archived=None):
+    """Retorna uma conexão com o banco de dados.
+
+    Com `archived` (por padrão, o que set_include_archived definiu para a
+    sessão atual), cold_calls e analises também mostram as linhas
+    arquivadas; nesse modo as duas tabelas são só leitura na conexão.
+    """
+    global _last_access
+    _last_access = monotonic()
+    backend = _backend()
+    conn = backend.connect()
+    # Criar tabelas se não existirem (uma vez por processo)
+    if backend.key not in _schema_ready:
+        if backend.name == "postgres":
+            _create_postgres_tables(conn)
+        else:
+            create_tables_if_not_exist(conn)
+        _schema_ready.add(backend.key)
+    if _include_archived.get() if archived is None else archived:
+        _read_through_archive(conn)
     return conn
 
+def get_database_key():
+    """Identifica o banco em uso: caminho do SQLite ou URL e schema do PostgreSQL."""
+    return _backend().key
+
+def _limit(limit):
+    """Valor do parâmetro LIMIT: `limit` ou "todas as linhas" no dialeto do backend."""
+    return _backend().no_limit if limit is None else limit
+
+def get_data_version():
+    """Versão dos dados: muda sempre que este processo grava no banco."""
+    return _data_version
+
+def get_rewrite_version():
+    """Versão de remoções/alterações de cold calls (inserções não mudam este valor)."""
+    return _rewrite_version
+
+def get_shared_data_version():
+    """Versão dos dados vista por todos os processos que usam o banco.
+
+    Muda a cada gravação em bdrs, cold_calls e analises (inclusive no
+    histórico arquivado), feita por qualquer processo: no SQLite é a
+    sequência do log `sync_changes`, mantido por triggers; no PostgreSQL, o
+    contador da tabela `data_version`. Como as gravações de outros processos
+    não passam por _invalidate_cache, o cache de consultas deste processo é
+    descartado quando a versão muda desde a última chamada. Se o log mostra
+    só inserções de cold calls (e alterações em outras tabelas), o snapshot
+    lê apenas as linhas novas; senão, é recarregado.
+    """
+    global _shared_version
+    conn = get_connection(archived=False)
+    try:
+        if _backend().name == "postgres":
+            versao = conn.execute("SELECT versao FROM data_version").fetchone()[0]
+        else:
+            versao = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM sqlite_sequence WHERE name = 'sync_changes'").fetchone()[0]
+        anterior = _shared_version
+        rewrite = True
+        if anterior is not None and versao != anterior and _backend().name == "sqlite":
+            # Entradas já aplicadas pelo prisma_sync.py podem ter sido removidas do log: na dúvida, recarrega
+            registradas, alteracoes = conn.execute(
+                """SELECT COUNT(*), COALESCE(SUM(tabela = 'cold_calls' AND operacao <> 'INSERT'), 0)
+                   FROM sync_changes WHERE seq > :anterior AND seq <= :versao""",
+                {'anterior': anterior, 'versao': versao}
+            ).fetchone()
+            rewrite = registradas != versao - anterior or alteracoes > 0
+    finally:
+        conn.close()
+    with _shared_version_lock:
+        if _shared_version is not None and versao != _shared_version:
+            _invalidate_cache(rewrite=rewrite or _shared_version != anterior)
+        _shared_version = versao
+    return versao
+
+def poll_shared_data_version():
+    """Confere se outro processo gravou no banco, no máximo a cada SHARED_VERSION_CHECK_SECONDS.
+
+    Chamada pelo cache de consultas e pelo snapshot: gravações da análise em
+    lote ou da manutenção pelo cron aparecem nos dashboards sem esperar uma
+    gravação deste processo (ver get_shared_data_version).
+    """
+    global _shared_checked_at
+    agora = monotonic()
+    if _shared_checked_at is not None and agora - _shared_checked_at < SHARED_VERSION_CHECK_SECONDS:
+        return
+    _shared_checked_at = agora
+    get_shared_data_version()
+
+def _invalidate_cache(rewrite=False):
+    """Descarta as consultas em cache após uma escrita.
+
+    `rewrite` indica que linhas existentes de cold_calls foram removidas ou
+    alteradas, e não apenas inseridas (ver snapshot.py).
+    """
+    global _data_version, _rewrite_version
+    _data_version += 1
+    if rewrite:
+        _rewrite_version += 1
+    _query_cache.clear()
+
+def _cached(key, fn):
+    """Retorna o resultado em cache para `key` ou executa `fn` e guarda o resultado.
+
+    Seguro com várias sessões (threads) ao mesmo tempo: o resultado não é
+    relido do cache, que pode ter sido limpo por uma escrita concorrente, e
+    só é guardado se nenhuma escrita aconteceu durante a consulta. Gravações
+    de outros processos limpam o cache via poll_shared_data_version.
+    """
+    poll_shared_data_version()
+    key = (_backend().key, _include_archived.get()) + key
+    resultado = _query_cache.get(key, _MISSING)
+    if resultado is not _MISSING:
+        return resultado
+    versao = _data_version
+    resultado = fn()
+    if versao == _data_version:
+        _query_cache[key] = resultado
+    return resultado
+
+# Colunas de analises e cold_calls, usadas também nas tabelas do banco de arquivo (archive_records).
+# AUTOINCREMENT: ids de linhas removidas ou arquivadas nunca são reutilizados
+_ANALISES_COLUMNS = '''
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        bdr_id INTEGER,
+        data TEXT NOT NULL,
+        data_ts INTEGER,
+        resumo TEXT,
+        metas TEXT'''
+
+_COLD_CALLS_COLUMNS = '''
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        bdr_id INTEGER,
+        data TEXT NOT NULL,
+        data_ts INTEGER,
+        prospect_nome TEXT,
+        prospect_empresa TEXT,
+        -- Conversa Híbrida - 6 Etapas
+        warmer_score INTEGER,
+        reframe_score INTEGER,
+        rational_drowning_score INTEGER,
+        emotional_impact_score INTEGER,
+        new_way_score INTEGER,
+        your_solution_score INTEGER,
+        -- Analysis Content
+        analise_completa TEXT,
+        pontos_atencao TEXT,
+        recomendacoes TEXT,
+        insight_comercial TEXT'''
+
+# Chave estrangeira de analises e cold_calls (o banco de arquivo não tem a tabela de BDRs nem a chave)
+_HISTORY_FOREIGN_KEY = '''
+        FOREIGN KEY (bdr_id) REFERENCES bdrs (id) ON DELETE CASCADE
+        '''
+
+# Índices para filtros por período, BDR e empresa em ordem cronológica: (nome, tabela, colunas)
+_HISTORY_INDEXES = (
+    ("idx_cold_calls_bdr_ts", "cold_calls", "bdr_id, data_ts"),
+    ("idx_cold_calls_ts", "cold_calls", "data_ts"),
+    ("idx_cold_calls_empresa_ts", "cold_calls", "prospect_empresa, data_ts"),
+    ("idx_analises_bdr_ts", "analises", "bdr_id, data_ts"),
+)
+
 def create_tables_if_not_exist(conn):
     """Cria as tabelas se elas não existirem."""
     cursor = conn.cursor()
@@ -22,43 +209,386 @@ def create_tables_if_not_exist(conn):
     ''')
     
     # Tabela de análises 1:1
-    cursor.execute(''' 
-        CREATE TABLE IF NOT EXISTS analises (
+    cursor.execute(f"CREATE TABLE IF NOT EXISTS analises ({_ANALISES_COLUMNS},{_HISTORY_FOREIGN_KEY})")
+    
+    # Tabela de cold calls
+    cursor.execute(f"CREATE TABLE IF NOT EXISTS cold_calls ({_COLD_CALLS_COLUMNS},{_HISTORY_FOREIGN_KEY})")
+    
+    # Remover um BDR remove seu histórico e ids nunca se repetem (bancos anteriores são recriados)
+    _migrate_history_tables(conn)
+    
+    # Coluna de data em epoch para filtros por período (bancos antigos só têm `data`)
+    _migrate_timestamps(cursor)
+    
+    # Índices para filtros por período, BDR e empresa em ordem cronológica
+    cursor.execute("DROP INDEX IF EXISTS idx_cold_calls_bdr_data")
+    for nome, tabela, colunas in _HISTORY_INDEXES:
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {nome} ON {tabela} ({colunas})")
+    
+    # Checkpoints do fluxo de análise (retomada após falhas)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS analysis_checkpoints (
+        checkpoint_key TEXT PRIMARY KEY,
+        stage TEXT NOT NULL,
+        outputs TEXT NOT NULL,
+        updated_at TEXT NOT NULL
+        )
+    ''')
+    
+    # Consumo da API por chamada (usage.py), ligado ao cold call ou à análise 1:1 salva
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS api_usage (
         id INTEGER PRIMARY KEY,
+        analysis_key TEXT NOT NULL,
         bdr_id INTEGER,
-        data TEXT NOT NULL,
-        resumo TEXT,
-        metas TEXT,
-        FOREIGN KEY (bdr_id) REFERENCES bdrs (id)
+        cold_call_id INTEGER,
+        analise_id INTEGER,
+        data_ts INTEGER NOT NULL,
+        tipo TEXT NOT NULL,
+        modelo TEXT NOT NULL,
+        latencia_ms REAL NOT NULL DEFAULT 0,
+        prompt_tokens INTEGER NOT NULL DEFAULT 0,
+        completion_tokens INTEGER NOT NULL DEFAULT 0,
+        cached_tokens INTEGER NOT NULL DEFAULT 0,
+        audio_segundos REAL NOT NULL DEFAULT 0,
+        custo_usd REAL NOT NULL DEFAULT 0,
+        cache_hit INTEGER NOT NULL DEFAULT 0
         )
     ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_api_usage_ts ON api_usage (data_ts)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_api_usage_key ON api_usage (analysis_key)")
     
-    # Tabela de cold calls
+    # Gravações já processadas, pelo hash do conteúdo, para detectar o mesmo áudio enviado de novo
     cursor.execute('''
-        CREATE TABLE IF NOT EXISTS cold_calls (
+        CREATE TABLE IF NOT EXISTS audio_recordings (
         id INTEGER PRIMARY KEY,
+        sha256 TEXT NOT NULL,
+        tamanho INTEGER NOT NULL,
+        tipo TEXT NOT NULL,
         bdr_id INTEGER,
-        data TEXT NOT NULL,
-        prospect_nome TEXT,
-        prospect_empresa TEXT,
-        -- Conversa Híbrida - 6 Etapas
-        warmer_score INTEGER,
-        reframe_score INTEGER,
-        rational_drowning_score INTEGER,
-        emotional_impact_score INTEGER,
-        new_way_score INTEGER,
-        your_solution_score INTEGER,
-        -- Analysis Content
-        analise_completa TEXT,
-        pontos_atencao TEXT,
-        recomendacoes TEXT,
-        insight_comercial TEXT,
-        FOREIGN KEY (bdr_id) REFERENCES bdrs (id)
+        cold_call_id INTEGER,
+        analise_id INTEGER,
+        transcricao TEXT,
+        data_ts INTEGER NOT NULL
         )
     ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_audio_recordings_sha256 ON audio_recordings (sha256)")
+    
+    # Métricas de desempenho gravadas por tracing.py
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS metrics_spans (
+        id INTEGER PRIMARY KEY,
+        run_id TEXT NOT NULL,
+        span_id TEXT NOT NULL,
+        parent_id TEXT,
+        nome TEXT NOT NULL,
+        inicio REAL NOT NULL,
+        duracao_ms REAL NOT NULL,
+        status TEXT NOT NULL,
+        atributos TEXT
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_metrics_spans_inicio ON metrics_spans (inicio)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_metrics_spans_run ON metrics_spans (run_id)")
+
+    # Totais do histórico arquivado por BDR, somados às médias e contagens gerais (archive_records)
+    cursor.execute(_ARCHIVE_TOTALS_TABLE)
     
+    # Execuções da manutenção do banco (maintenance.py)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS maintenance_runs (
+        id INTEGER PRIMARY KEY,
+        data_ts INTEGER NOT NULL,
+        arquivados INTEGER NOT NULL DEFAULT 0,
+        paginas_liberadas INTEGER NOT NULL DEFAULT 0,
+        duracao_ms REAL NOT NULL DEFAULT 0
+        )
+    ''')
+
+    # Log de alterações lido pela sincronização incremental com o banco do Next.js (prisma_sync.py)
+    _create_change_log(cursor)
+
     conn.commit()
 
+# Por BDR: calls e análises arquivadas e, por etapa, soma e quantidade de scores (as médias ignoram NULL, como o AVG)
+_ARCHIVE_TOTALS_TABLE = f'''
+    CREATE TABLE IF NOT EXISTS archive_totals (
+    bdr_id INTEGER PRIMARY KEY,
+    total_cold_calls INTEGER NOT NULL DEFAULT 0,
+    total_analises INTEGER NOT NULL DEFAULT 0,
+    {", ".join(f"soma_{step} INTEGER NOT NULL DEFAULT 0, n_{step} INTEGER NOT NULL DEFAULT 0" for step in HYBRID_STEPS)}
+    )
+'''
+
+# Tabelas espelhadas no banco do Next.js (prisma_sync.py)
+SYNCED_TABLES = ("bdrs", "cold_calls", "analises")
+
+def _create_change_log(cursor):
+    """Cria `sync_changes` e os triggers que registram inserções, alterações e remoções.
+
+    `seq` (AUTOINCREMENT, nunca reutilizado) é a marca d'água da
+    sincronização: quem já aplicou até `seq` só precisa ler o que veio depois.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sync_changes (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        tabela TEXT NOT NULL,
+        row_id INTEGER NOT NULL,
+        operacao TEXT NOT NULL
+        )
+    ''')
+    for table in SYNCED_TABLES:
+        for evento, linha in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS {table}_sync_{evento.lower()} AFTER {evento} ON {table} BEGIN
+                    INSERT INTO sync_changes (tabela, row_id, operacao) VALUES ('{table}', {linha}.id, '{evento}');
+                END
+            ''')
+
+def _migrate_history_tables(conn):
+    """Recria analises e cold_calls com ON DELETE CASCADE e AUTOINCREMENT em bancos criados antes deles.
+
+    O SQLite não altera a chave estrangeira nem o tipo do id de uma tabela
+    existente: a tabela é recriada com o schema atual e as linhas são
+    copiadas, com as chaves desligadas durante a troca (linhas órfãs de
+    bancos antigos são mantidas). Índices e triggers são recriados em
+    seguida por create_tables_if_not_exist.
+    """
+    for tabela, colunas in (("analises", _ANALISES_COLUMNS), ("cold_calls", _COLD_CALLS_COLUMNS)):
+        chaves = conn.execute(f"PRAGMA foreign_key_list({tabela})").fetchall()
+        schema = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (tabela,)).fetchone()[0]
+        if any(chave[2] == "bdrs" and chave[6] == "CASCADE" for chave in chaves) and "AUTOINCREMENT" in schema.upper():
+            continue
+        antigas = {row[1] for row in conn.execute(f"PRAGMA table_info({tabela})")}
+        conn.commit()
+        conn.execute("PRAGMA foreign_keys = OFF")
+        try:
+            conn.execute("BEGIN")
+            conn.execute(f"CREATE TABLE {tabela}_nova ({colunas},{_HISTORY_FOREIGN_KEY})")
+            copiadas = ", ".join(row[1] for row in conn.execute(f"PRAGMA table_info({tabela}_nova)") if row[1] in antigas)
+            conn.execute(f"INSERT INTO {tabela}_nova ({copiadas}) SELECT {copiadas} FROM {tabela}")
+            conn.execute(f"DROP TABLE {tabela}")
+            conn.execute(f"ALTER TABLE {tabela}_nova RENAME TO {tabela}")
+            _raise_id_floor(conn, tabela)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.execute("PRAGMA foreign_keys = ON")
+
+def _raise_id_floor(conn, tabela):
+    """Faz os próximos ids de `tabela` continuarem depois do maior id já arquivado.
+
+    Antes do AUTOINCREMENT, o SQLite podia reutilizar ids de linhas que
+    estavam no banco de arquivo; a sequência começa acima de todos eles.
+    """
+    if not os.path.exists(get_archive_path()):
+        return
+    arquivo = storage.SQLiteBackend(get_archive_path()).connect()
+    try:
+        maior = arquivo.execute(f"SELECT MAX(id) FROM {tabela}").fetchone()[0]
+    except storage.DatabaseError:
+        # Arquivo sem a tabela (nada arquivado dela)
+        maior = None
+    finally:
+        arquivo.close()
+    if maior is not None:
+        conn.execute("INSERT INTO sqlite_sequence (name, seq) SELECT ?, 0 WHERE NOT EXISTS "
+                     "(SELECT 1 FROM sqlite_sequence WHERE name = ?)", (tabela, tabela))
+        conn.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?", (maior, tabela))
+
+def _migrate_timestamps(cursor):
+    """Adiciona e preenche `data_ts` (epoch em segundos) em analises e cold_calls.
+
+    `data` continua sendo gravada como texto na hora local; os triggers
+    mantêm `data_ts` em sincronia quando outro código insere ou altera
+    linhas sem informá-la.
+    """
+    for table in ("analises", "cold_calls"):
+        colunas = {row[1] for row in cursor.execute(f"PRAGMA table_info({table})")}
+        if 'data_ts' not in colunas:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN data_ts INTEGER")
+        cursor.execute(f"UPDATE {table} SET data_ts = CAST(strftime('%s', data, 'utc') AS INTEGER) WHERE data_ts IS NULL")
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_data_ts_insert AFTER INSERT ON {table}
+            WHEN NEW.data_ts IS NULL BEGIN
+                UPDATE {table} SET data_ts = CAST(strftime('%s', NEW.data, 'utc') AS INTEGER) WHERE id = NEW.id;
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_data_ts_update AFTER UPDATE OF data ON {table}
+            WHEN NEW.data IS NOT OLD.data BEGIN
+                UPDATE {table} SET data_ts = CAST(strftime('%s', NEW.data, 'utc') AS INTEGER) WHERE id = NEW.id;
+            END
+        ''')
+
+# Mesmo schema de create_tables_if_not_exist, nos tipos do PostgreSQL (data_ts em BIGINT, reais em DOUBLE PRECISION).
+# Bancos PostgreSQL são sempre novos: não há colunas antigas a migrar, só o trigger que mantém data_ts em sincronia
+# e a chave estrangeira de bancos criados antes do ON DELETE CASCADE.
+_POSTGRES_TABLES = (
+    """CREATE TABLE IF NOT EXISTS bdrs (
+       id SERIAL PRIMARY KEY,
+       nome TEXT NOT NULL UNIQUE
+    )""",
+    """CREATE TABLE IF NOT EXISTS analises (
+       id SERIAL PRIMARY KEY,
+       bdr_id INTEGER REFERENCES bdrs (id) ON DELETE CASCADE,
+       data TEXT NOT NULL,
+       data_ts BIGINT,
+       resumo TEXT,
+       metas TEXT
+    )""",
+    """CREATE TABLE IF NOT EXISTS cold_calls (
+       id SERIAL PRIMARY KEY,
+       bdr_id INTEGER REFERENCES bdrs (id) ON DELETE CASCADE,
+       data TEXT NOT NULL,
+       data_ts BIGINT,
+       prospect_nome TEXT,
+       prospect_empresa TEXT,
+       warmer_score INTEGER,
+       reframe_score INTEGER,
+       rational_drowning_score INTEGER,
+       emotional_impact_score INTEGER,
+       new_way_score INTEGER,
+       your_solution_score INTEGER,
+       analise_completa TEXT,
+       pontos_atencao TEXT,
+       recomendacoes TEXT,
+       insight_comercial TEXT
+    )""",
+    """CREATE OR REPLACE FUNCTION preencher_data_ts() RETURNS trigger LANGUAGE plpgsql AS $$
+       BEGIN
+           IF (TG_OP = 'INSERT' AND NEW.data_ts IS NULL) OR (TG_OP = 'UPDATE' AND NEW.data IS DISTINCT FROM OLD.data) THEN
+               NEW.data_ts := CAST(extract(epoch FROM CAST(NEW.data AS timestamptz)) AS BIGINT);
+           END IF;
+           RETURN NEW;
+       END $$""",
+    "DROP TRIGGER IF EXISTS analises_data_ts ON analises",
+    "CREATE TRIGGER analises_data_ts BEFORE INSERT OR UPDATE ON analises FOR EACH ROW EXECUTE FUNCTION preencher_data_ts()",
+    "DROP TRIGGER IF EXISTS cold_calls_data_ts ON cold_calls",
+    "CREATE TRIGGER cold_calls_data_ts BEFORE INSERT OR UPDATE ON cold_calls FOR EACH ROW EXECUTE FUNCTION preencher_data_ts()",
+    *(f"""DO $$ BEGIN
+          IF EXISTS (SELECT 1 FROM pg_constraint WHERE conrelid = '{tabela}'::regclass AND contype = 'f' AND confdeltype <> 'c') THEN
+              ALTER TABLE {tabela} DROP CONSTRAINT {tabela}_bdr_id_fkey,
+                  ADD CONSTRAINT {tabela}_bdr_id_fkey FOREIGN KEY (bdr_id) REFERENCES bdrs (id) ON DELETE CASCADE;
+          END IF;
+       END $$""" for tabela in ("analises", "cold_calls")),
+    # Versão dos dados compartilhada entre processos (get_shared_data_version): +1 a cada comando que grava
+    "CREATE TABLE IF NOT EXISTS data_version (versao BIGINT NOT NULL)",
+    "INSERT INTO data_version (versao) SELECT 0 WHERE NOT EXISTS (SELECT 1 FROM data_version)",
+    """CREATE OR REPLACE FUNCTION incrementar_data_version() RETURNS trigger LANGUAGE plpgsql AS $$
+       BEGIN
+           UPDATE data_version SET versao = versao + 1;
+           RETURN NULL;
+       END $$""",
+    *(statement for tabela in SYNCED_TABLES for statement in (
+        f"DROP TRIGGER IF EXISTS {tabela}_data_version ON {tabela}",
+        f"""CREATE TRIGGER {tabela}_data_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {tabela}
+            FOR EACH STATEMENT EXECUTE FUNCTION incrementar_data_version()""",
+    )),
+    "CREATE INDEX IF NOT EXISTS idx_cold_calls_bdr_ts ON cold_calls (bdr_id, data_ts)",
+    "CREATE INDEX IF NOT EXISTS idx_cold_calls_ts ON cold_calls (data_ts)",
+    "CREATE INDEX IF NOT EXISTS idx_cold_calls_empresa_ts ON cold_calls (prospect_empresa, data_ts)",
+    "CREATE INDEX IF NOT EXISTS idx_analises_bdr_ts ON analises (bdr_id, data_ts)",
+    """CREATE TABLE IF NOT EXISTS analysis_checkpoints (
+       checkpoint_key TEXT PRIMARY KEY,
+       stage TEXT NOT NULL,
+       outputs TEXT NOT NULL,
+       updated_at TEXT NOT NULL
+    )""",
+    """CREATE TABLE IF NOT EXISTS api_usage (
+       id SERIAL PRIMARY KEY,
+       analysis_key TEXT NOT NULL,
+       bdr_id INTEGER,
+       cold_call_id INTEGER,
+       analise_id INTEGER,
+       data_ts BIGINT NOT NULL,
+       tipo TEXT NOT NULL,
+       modelo TEXT NOT NULL,
+       latencia_ms DOUBLE PRECISION NOT NULL DEFAULT 0,
+       prompt_tokens INTEGER NOT NULL DEFAULT 0,
+       completion_tokens INTEGER NOT NULL DEFAULT 0,
+       cached_tokens INTEGER NOT NULL DEFAULT 0,
+       audio_segundos DOUBLE PRECISION NOT NULL DEFAULT 0,
+       custo_usd DOUBLE PRECISION NOT NULL DEFAULT 0,
+       cache_hit INTEGER NOT NULL DEFAULT 0
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_api_usage_ts ON api_usage (data_ts)",
+    "CREATE INDEX IF NOT EXISTS idx_api_usage_key ON api_usage (analysis_key)",
+    """CREATE TABLE IF NOT EXISTS audio_recordings (
+       id SERIAL PRIMARY KEY,
+       sha256 TEXT NOT NULL,
+       tamanho BIGINT NOT NULL,
+       tipo TEXT NOT NULL,
+       bdr_id INTEGER,
+       cold_call_id INTEGER,
+       analise_id INTEGER,
+       transcricao TEXT,
+       data_ts BIGINT NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_audio_recordings_sha256 ON audio_recordings (sha256)",
+    """CREATE TABLE IF NOT EXISTS metrics_spans (
+       id SERIAL PRIMARY KEY,
+       run_id TEXT NOT NULL,
+       span_id TEXT NOT NULL,
+       parent_id TEXT,
+       nome TEXT NOT NULL,
+       inicio DOUBLE PRECISION NOT NULL,
+       duracao_ms DOUBLE PRECISION NOT NULL,
+       status TEXT NOT NULL,
+       atributos TEXT
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_metrics_spans_inicio ON metrics_spans (inicio)",
+    "CREATE INDEX IF NOT EXISTS idx_metrics_spans_run ON metrics_spans (run_id)",
+    # O arquivamento é só do SQLite; a tabela existe para que as médias usem a mesma consulta
+    _ARCHIVE_TOTALS_TABLE,
+)
+
+def _create_postgres_tables(conn):
+    """Cria as tabelas no PostgreSQL se elas não existirem."""
+    for statement in _POSTGRES_TABLES:
+        conn.execute(statement)
+    conn.commit()
+
+def to_epoch(value):
+    """Converte datetime, date, texto ISO ou epoch para segundos desde 1970 (hora local)."""
+    if value is None or isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    elif not isinstance(value, datetime):
+        value = datetime.combine(value, time())
+    return int(value.timestamp())
+
+def period_bounds(start_date=None, end_date=None):
+    """Limites (since, until) em epoch para um intervalo de datas com o último dia incluído."""
+    until = None if end_date is None else to_epoch(end_date + timedelta(days=1))
+    return to_epoch(start_date), until
+
+def _filters(bdr_id=None, since=None, until=None, empresa=None, alias=""):
+    """Monta o WHERE com os filtros informados e seus parâmetros nomeados.
+
+    Só os filtros presentes entram na consulta, para que o SQLite percorra
+    apenas o intervalo correspondente dos índices de data. `until` é
+    exclusivo.
+    """
+    condicoes, params = [], {}
+    if bdr_id is not None:
+        condicoes.append(f"{alias}bdr_id = :bdr_id")
+        params['bdr_id'] = bdr_id
+    if empresa is not None:
+        condicoes.append(f"{alias}prospect_empresa = :empresa")
+        params['empresa'] = empresa
+    if since is not None:
+        condicoes.append(f"{alias}data_ts >= :since")
+        params['since'] = to_epoch(since)
+    if until is not None:
+        condicoes.append(f"{alias}data_ts < :until")
+        params['until'] = to_epoch(until)
+    return (" WHERE " + " AND ".join(condicoes)) if condicoes else "", params
+
+@traced()
 def get_bdrs():
     """Busca todos os BDRs cadastrados no banco de dados."""
     conn = get_connection()
@@ -68,91 +598,154 @@ def get_bdrs():
     conn.close()
     return bdrs
 
-def sanitize_text(text):
-    """Sanitiza texto removendo caracteres perigosos."""
-    if not text:
-        return text
-    
-    # Remover caracteres de controle e caracteres perigosos
-    import re
-    text = re.sub(r'[<>"\';]', '', text)
-    text = re.sub(r'--|/\*|\*/', '', text)
-    return text.strip()
-
+@traced()
 def save_cold_call_analise(bdr_id, prospect_nome, prospect_empresa, scores, analise_completa, pontos_atencao, recomendacoes, insight_comercial):
     """Salva uma nova análise de cold call com foco na Conversa Híbrida (6 etapas)."""
     # Sanitizar dados de entrada
-    prospect_nome = sanitize_text(prospect_nome)
-    prospect_empresa = sanitize_text(prospect_empresa)
-    analise_completa = sanitize_text(analise_completa)
-    pontos_atencao = sanitize_text(pontos_atencao)
-    recomendacoes = sanitize_text(recomendacoes)
-    insight_comercial = sanitize_text(insight_comercial)
+    campos = sanitize_fields({
+        'prospect_nome': prospect_nome, 'prospect_empresa': prospect_empresa, 'analise_completa': analise_completa,
+        'pontos_atencao': pontos_atencao, 'recomendacoes': recomendacoes, 'insight_comercial': insight_comercial,
+    })
     
-    conn = get_connection()
+    conn = get_connection(archived=False)
     cursor = conn.cursor()
-    data_atual = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    agora = datetime.now()
     cursor.execute(
-        """INSERT INTO cold_calls (bdr_id, data, prospect_nome, prospect_empresa, 
+        """INSERT INTO cold_calls (bdr_id, data, data_ts, prospect_nome, prospect_empresa, 
            warmer_score, reframe_score, rational_drowning_score, emotional_impact_score, 
            new_way_score, your_solution_score, analise_completa, pontos_atencao, recomendacoes, insight_comercial) 
-           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-        (bdr_id, data_atual, prospect_nome, prospect_empresa, 
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+        (bdr_id, agora.strftime("%Y-%m-%d %H:%M:%S"), to_epoch(agora), campos['prospect_nome'], campos['prospect_empresa'], 
          scores['warmer_score'], scores['reframe_score'], scores['rational_drowning_score'], 
          scores['emotional_impact_score'], scores['new_way_score'], scores['your_solution_score'],
-         analise_completa, pontos_atencao, recomendacoes, insight_comercial)
+         campos['analise_completa'], campos['pontos_atencao'], campos['recomendacoes'], campos['insight_comercial'])
     )
+    call_id = cursor.lastrowid
     conn.commit()
     conn.close()
+    _invalidate_cache()
+    return call_id
 
+@traced()
 def save_analise(bdr_id, resumo, metas):
     """Salva uma nova análise de 1:1 no banco de dados."""
     # Sanitizar dados de entrada
     resumo = sanitize_text(resumo)
     metas = sanitize_text(metas)
     
-    conn = get_connection()
+    conn = get_connection(archived=False)
     cursor = conn.cursor()
-    data_atual = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    agora = datetime.now()
     cursor.execute(
-        "INSERT INTO analises (bdr_id, data, resumo, metas) VALUES (?, ?, ?, ?)",
-        (bdr_id, data_atual, resumo, metas)
+        "INSERT INTO analises (bdr_id, data, data_ts, resumo, metas) VALUES (?, ?, ?, ?, ?)",
+        (bdr_id, agora.strftime("%Y-%m-%d %H:%M:%S"), to_epoch(agora), resumo, metas)
     )
+    analise_id = cursor.lastrowid
     conn.commit()
     conn.close()
+    _invalidate_cache()
+    return analise_id
+
+@traced()
+def get_bdr_cold_calls(bdr_id, limit=None, offset=0, since=None, until=None, empresa=None):
+    """Busca os cold calls da Conversa Híbrida de um BDR específico.
 
-def get_bdr_cold_calls(bdr_id):
-    """Busca todos os cold calls da Conversa Híbrida de um BDR específico."""
+    Paginados se `limit` for informado; `since`/`until` (`until` exclusivo)
+    e `empresa` filtram por período e empresa do prospect.
+    """
+    where, params = _filters(bdr_id, since, until, empresa)
+    params.update(limit=_limit(limit), offset=offset)
     conn = get_connection()
     cursor = conn.cursor()
     cursor.execute(
-        """SELECT data, prospect_nome, prospect_empresa, 
+        f"""SELECT data, prospect_nome, prospect_empresa, 
            warmer_score, reframe_score, rational_drowning_score, emotional_impact_score, 
            new_way_score, your_solution_score, analise_completa, pontos_atencao, recomendacoes, insight_comercial, id 
-           FROM cold_calls WHERE bdr_id = ? ORDER BY data DESC""",
-        (bdr_id,)
+           FROM cold_calls{where} ORDER BY data_ts DESC, id DESC LIMIT :limit OFFSET :offset""",
+        params
     )
     cold_calls = cursor.fetchall()
     conn.close()
     return cold_calls
 
-def get_hybrid_conversation_average_scores(bdr_id=None):
-    """Calcula médias dos scores da Conversa Híbrida (6 etapas)."""
+@traced()
+def search_cold_calls(termo, bdr_id=None, limit=None, offset=0, since=None, until=None):
+    """Busca cold calls pelo nome do prospect, empresa ou insight comercial (sem diferenciar maiúsculas).
+
+    Retorna linhas (id, bdr_id, data, prospect_nome, prospect_empresa,
+    insight_comercial, 6 scores), das mais recentes para as mais antigas.
+    """
+    where, params = _filters(bdr_id, since, until)
+    # `%`, `_` e `\` digitados são literais no LIKE
+    literal = termo.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    params.update(termo=f"%{literal}%", limit=_limit(limit), offset=offset)
+    conn = get_connection()
+    rows = conn.execute(
+        f"""SELECT id, bdr_id, data, prospect_nome, prospect_empresa, insight_comercial, {", ".join(HYBRID_STEPS)}
+            FROM cold_calls{where}{" AND" if where else " WHERE"}
+            (LOWER(prospect_nome) LIKE :termo ESCAPE '\\' OR LOWER(prospect_empresa) LIKE :termo ESCAPE '\\'
+             OR LOWER(insight_comercial) LIKE :termo ESCAPE '\\')
+            ORDER BY data_ts DESC, id DESC LIMIT :limit OFFSET :offset""",
+        params
+    ).fetchall()
+    conn.close()
+    return rows
+
+@traced()
+def get_prospect_companies(bdr_id=None):
+    """Lista as empresas de prospects já analisadas (de um BDR, se informado), em ordem alfabética."""
+    return _cached(('prospect_companies', bdr_id), lambda: _query_prospect_companies(bdr_id))
+
+def _query_prospect_companies(bdr_id):
+    """Consulta as empresas distintas no banco."""
+    where, params = _filters(bdr_id)
     conn = get_connection()
     cursor = conn.cursor()
-    
-    if bdr_id:
+    cursor.execute(
+        f"""SELECT DISTINCT prospect_empresa FROM cold_calls{where}{" AND" if where else " WHERE"}
+            prospect_empresa IS NOT NULL AND prospect_empresa != '' ORDER BY prospect_empresa""",
+        params
+    )
+    empresas = [row[0] for row in cursor.fetchall()]
+    conn.close()
+    return empresas
+
+@traced()
+def get_hybrid_conversation_average_scores(bdr_id=None, since=None, until=None, empresa=None):
+    """Calcula médias dos scores da Conversa Híbrida (6 etapas), com cache até a próxima escrita.
+
+    Sem `bdr_id`, considera todos os BDRs; `since`/`until` e `empresa`
+    restringem o período e a empresa do prospect.
+    """
+    since, until = to_epoch(since), to_epoch(until)
+    return dict(_cached(('averages', bdr_id or None, since, until, empresa),
+                        lambda: _query_average_scores(bdr_id or None, since, until, empresa)))
+
+def _query_average_scores(bdr_id, since, until, empresa):
+    """Consulta as médias da Conversa Híbrida no banco."""
+    where, params = _filters(bdr_id, since, until, empresa)
+    conn = get_connection()
+    cursor = conn.cursor()
+    if _folds_archive_totals(since, until, empresa):
+        # Médias de todo o histórico: somas e quantidades do banco principal mais as do histórico arquivado
+        filtro_bdr = " WHERE bdr_id = :bdr_id" if bdr_id else ""
         cursor.execute(
-            """SELECT AVG(warmer_score), AVG(reframe_score), AVG(rational_drowning_score), 
-               AVG(emotional_impact_score), AVG(new_way_score), AVG(your_solution_score), COUNT(*) 
-               FROM cold_calls WHERE bdr_id = ?""",
-            (bdr_id,)
+            f"""SELECT {", ".join(f"1.0 * SUM(soma_{step}) / NULLIF(SUM(n_{step}), 0)" for step in HYBRID_STEPS)},
+               COALESCE(SUM(calls), 0) FROM (
+                   SELECT {", ".join(f"SUM({step}) AS soma_{step}, COUNT({step}) AS n_{step}" for step in HYBRID_STEPS)},
+                   COUNT(*) AS calls FROM cold_calls{where}
+                   UNION ALL
+                   SELECT {", ".join(f"soma_{step}, n_{step}" for step in HYBRID_STEPS)}, total_cold_calls
+                   FROM archive_totals{filtro_bdr}
+               ) AS partes""",
+            params
         )
     else:
         cursor.execute(
-            """SELECT AVG(warmer_score), AVG(reframe_score), AVG(rational_drowning_score), 
+            f"""SELECT AVG(warmer_score), AVG(reframe_score), AVG(rational_drowning_score), 
                AVG(emotional_impact_score), AVG(new_way_score), AVG(your_solution_score), COUNT(*) 
-               FROM cold_calls"""
+               FROM cold_calls{where}""",
+            params
         )
 
     result = cursor.fetchone()
@@ -179,22 +772,978 @@ def get_hybrid_conversation_average_scores(bdr_id=None):
             'total_calls': 0
         }
 
+def _in_list(coluna, valores, prefixo):
+    """Condição `coluna IN (...)` com um parâmetro nomeado por valor (lista vazia não atende nenhuma linha)."""
+    params = {f"{prefixo}_{posicao}": int(valor) for posicao, valor in enumerate(valores)}
+    return f"{coluna} IN ({', '.join(f':{nome}' for nome in params) or 'NULL'})", params
+
+def _selection(ids=None, bdr_id=None, since=None, until=None, empresa=None):
+    """WHERE das operações em lote com cold calls: os `ids` selecionados e/ou os filtros de _filters.
+
+    Sem seleção nem filtros lança ValueError (remover tudo é delete_all_cold_calls).
+    """
+    where, params = _filters(bdr_id, since, until, empresa)
+    if ids is not None:
+        condicao, params_ids = _in_list("id", ids, "id")
+        where += (" AND " if where else " WHERE ") + condicao
+        params.update(params_ids)
+    if not where:
+        raise ValueError("Selecione os cold calls ou informe ao menos um filtro.")
+    return where, params
+
+def _archived_bdrs(conn, tabela, where, params):
+    """BDRs (0 para linhas sem BDR) das linhas arquivadas de `tabela` que atendem `where`."""
+    return {row[0] for row in conn.execute(f"SELECT DISTINCT COALESCE(bdr_id, 0) FROM arquivo.{tabela}{where}", params)}
+
+@traced()
 def delete_cold_call(call_id):
-    """Deleta um cold call específico."""
+    """Deleta um cold call específico (também do histórico arquivado)."""
+    delete_cold_calls(ids=[call_id])
+
+@traced()
+def delete_cold_calls(ids=None, bdr_id=None, since=None, until=None, empresa=None):
+    """Remove de uma vez os cold calls selecionados (`ids`) e/ou que atendem aos filtros.
+
+    Tudo acontece em uma única transação, inclusive no histórico arquivado.
+    Retorna quantos cold calls foram removidos.
+    """
+    where, params = _selection(ids, bdr_id, since, until, empresa)
+    conn = get_connection(archived=False)
+    try:
+        arquivo = _attach_archive(conn)
+        removidos = conn.execute(f"DELETE FROM cold_calls{where}", params).rowcount
+        if arquivo:
+            afetados = _archived_bdrs(conn, "cold_calls", where, params)
+            removidos += _delete_archived(conn, "cold_calls", where, params)
+            for afetado in afetados:
+                _refresh_archive_totals(conn, afetado)
+        conn.commit()
+    finally:
+        conn.close()
+    _invalidate_cache(rewrite=True)
+    return removidos
+
+@traced()
+def reassign_cold_calls(to_bdr_id, ids=None, bdr_id=None, since=None, until=None, empresa=None):
+    """Passa para o BDR `to_bdr_id` os cold calls selecionados (`ids`) e/ou que atendem aos filtros.
+
+    Em uma única transação, inclusive no histórico arquivado. Lança
+    sqlite3.IntegrityError se o BDR de destino não existir. Retorna quantos
+    cold calls foram movidos.
+    """
+    where, params = _selection(ids, bdr_id, since, until, empresa)
+    params['destino'] = to_bdr_id
+    conn = get_connection(archived=False)
+    try:
+        arquivo = _attach_archive(conn)
+        if conn.execute("SELECT 1 FROM bdrs WHERE id = :destino", params).fetchone() is None:
+            raise storage.IntegrityError(f"BDR {to_bdr_id} não encontrado.")
+        movidos = conn.execute(f"UPDATE cold_calls SET bdr_id = :destino{where}", params).rowcount
+        if arquivo:
+            afetados = _archived_bdrs(conn, "cold_calls", where, params)
+            if afetados:
+                movidos += _update_archived(conn, "cold_calls", "bdr_id = :destino", where, params)
+                for afetado in afetados | {to_bdr_id}:
+                    _refresh_archive_totals(conn, afetado)
+        conn.commit()
+    finally:
+        conn.close()
+    _invalidate_cache(rewrite=True)
+    return movidos
+
+@traced()
+def get_bdr_analyses(bdr_id, limit=None, offset=0, since=None, until=None):
+    """Busca as análises de 1:1 de um BDR específico (paginadas se `limit` for informado, filtradas por período)."""
+    where, params = _filters(bdr_id, since, until)
+    params.update(limit=_limit(limit), offset=offset)
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        f"SELECT data, resumo, metas FROM analises{where} ORDER BY data_ts DESC, id DESC LIMIT :limit OFFSET :offset",
+        params
+    )
+    analyses = cursor.fetchall()
+    conn.close()
+    return analyses
+
+@traced()
+def count_bdr_cold_calls(bdr_id, since=None, until=None, empresa=None):
+    """Conta os cold calls de um BDR com os mesmos filtros e linhas de get_bdr_cold_calls (total da paginação)."""
+    where, params = _filters(bdr_id, since, until, empresa)
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT COUNT(*) FROM cold_calls{where}", params)
+    total = cursor.fetchone()[0]
+    conn.close()
+    return total
+
+@traced()
+def count_bdr_analyses(bdr_id, since=None, until=None):
+    """Conta as análises de 1:1 de um BDR, opcionalmente dentro de um período."""
+    where, params = _filters(bdr_id, since, until)
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT COUNT(*) FROM analises{where}", params)
+    total = cursor.fetchone()[0]
+    conn.close()
+    return total
+
+@traced()
+def add_bdr(nome):
+    """Cadastra um novo BDR. Lança sqlite3.IntegrityError se o nome já existir."""
     conn = get_connection()
     cursor = conn.cursor()
-    cursor.execute("DELETE FROM cold_calls WHERE id = ?", (call_id,))
+    try:
+        cursor.execute("INSERT INTO bdrs (nome) VALUES (?)", (nome,))
+        conn.commit()
+    finally:
+        conn.close()
+    _invalidate_cache()
+    return cursor.lastrowid
+
+@traced()
+def update_bdr_nome(bdr_id, nome):
+    """Renomeia um BDR. Lança sqlite3.IntegrityError se o nome já existir."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("UPDATE bdrs SET nome = ? WHERE id = ?", (nome, bdr_id))
+        conn.commit()
+    finally:
+        conn.close()
+    _invalidate_cache()
+
+@traced()
+def rename_bdrs(nomes):
+    """Renomeia vários BDRs ({id: novo nome}) em uma única transação.
+
+    Os nomes passam antes por valores temporários, para que dois BDRs possam
+    trocar de nome entre si (o UNIQUE é verificado a cada linha). Lança
+    sqlite3.IntegrityError, sem renomear nenhum, se algum nome já existir.
+    """
+    conn = get_connection()
+    try:
+        conn.executemany("UPDATE bdrs SET nome = ? WHERE id = ?", [(f"\x01{bdr_id}", bdr_id) for bdr_id in nomes])
+        conn.executemany("UPDATE bdrs SET nome = ? WHERE id = ?", [(nome, bdr_id) for bdr_id, nome in nomes.items()])
+        conn.commit()
+    finally:
+        conn.close()
+    _invalidate_cache()
+
+@traced()
+def merge_bdrs(source_id, target_id):
+    """Une dois BDRs: o histórico de `source_id` passa para `target_id` e `source_id` é removido.
+
+    Em uma única transação, são movidos os cold calls e análises 1:1
+    (inclusive os arquivados), o consumo da API e as gravações. Lança
+    sqlite3.IntegrityError se `target_id` não existir. Retorna quantas
+    linhas de cada tabela do histórico foram movidas.
+    """
+    if source_id == target_id:
+        raise ValueError("Escolha dois BDRs diferentes para unir.")
+    params = {'origem': source_id, 'destino': target_id}
+    conn = get_connection(archived=False)
+    try:
+        arquivo = _attach_archive(conn)
+        if conn.execute("SELECT 1 FROM bdrs WHERE id = :destino", params).fetchone() is None:
+            raise storage.IntegrityError(f"BDR {target_id} não encontrado.")
+        movidos = {}
+        for tabela in ARCHIVED_TABLES:
+            movidos[tabela] = conn.execute(f"UPDATE {tabela} SET bdr_id = :destino WHERE bdr_id = :origem", params).rowcount
+            if arquivo:
+                movidos[tabela] += _update_archived(conn, tabela, "bdr_id = :destino", " WHERE bdr_id = :origem", params)
+        for tabela in ("api_usage", "audio_recordings"):
+            conn.execute(f"UPDATE {tabela} SET bdr_id = :destino WHERE bdr_id = :origem", params)
+        for bdr_id in (source_id, target_id):
+            _refresh_archive_totals(conn, bdr_id)
+        conn.execute("DELETE FROM bdrs WHERE id = :origem", params)
+        conn.commit()
+    finally:
+        conn.close()
+    _invalidate_cache(rewrite=True)
+    return movidos
+
+@traced()
+def delete_bdr(bdr_id):
+    """Remove um BDR e todo o seu histórico (análises 1:1 e cold calls, inclusive os arquivados)."""
+    delete_bdrs([bdr_id])
+
+@traced()
+def delete_bdrs(bdr_ids):
+    """Remove vários BDRs e todo o seu histórico em uma única transação.
+
+    Análises 1:1 e cold calls saem pelo ON DELETE CASCADE; os arquivados,
+    que ficam em outro banco, são removidos aqui. Retorna quantos BDRs foram
+    removidos.
+    """
+    condicao, params = _in_list("bdr_id", bdr_ids, "bdr")
+    conn = get_connection(archived=False)
+    try:
+        if _attach_archive(conn):
+            for tabela in ARCHIVED_TABLES:
+                _delete_archived(conn, tabela, f" WHERE {condicao}", params)
+        conn.execute(f"DELETE FROM archive_totals WHERE {condicao}", params)
+        removidos = conn.execute(f"DELETE FROM bdrs WHERE {condicao.replace('bdr_id', 'id', 1)}", params).rowcount
+        conn.commit()
+    finally:
+        conn.close()
+    _invalidate_cache(rewrite=True)
+    return removidos
+
+@traced()
+def delete_all_cold_calls():
+    """Remove todos os cold calls (também os arquivados)."""
+    conn = get_connection(archived=False)
+    arquivo = _attach_archive(conn)
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM cold_calls")
+    if arquivo:
+        _delete_archived(conn, "cold_calls", "", {})
+    _refresh_archive_totals(conn)
     conn.commit()
     conn.close()
+    _invalidate_cache(rewrite=True)
 
-def get_bdr_analyses(bdr_id):
-    """Busca todas as análises de um BDR específico"""
+@traced()
+def get_table_counts(since=None, until=None):
+    """Conta BDRs, análises 1:1 e cold calls (as análises dentro do período, se informado).
+
+    Sem período, as contagens incluem o histórico arquivado.
+    """
+    where, params = _filters(since=since, until=until)
     conn = get_connection()
     cursor = conn.cursor()
+    if _folds_archive_totals(since, until):
+        arquivadas = lambda coluna: f" + (SELECT COALESCE(SUM({coluna}), 0) FROM archive_totals)"
+    else:
+        arquivadas = lambda coluna: ""
     cursor.execute(
-        "SELECT data, resumo, metas FROM analises WHERE bdr_id = ? ORDER BY data DESC",
-        (bdr_id,)
+        f"""SELECT (SELECT COUNT(*) FROM bdrs), (SELECT COUNT(*) FROM analises{where}){arquivadas("total_analises")},
+           (SELECT COUNT(*) FROM cold_calls{where}){arquivadas("total_cold_calls")}""",
+        params
     )
-    analyses = cursor.fetchall()
+    total_bdrs, total_analises, total_cold_calls = cursor.fetchone()
+    conn.close()
+    return {'bdrs': total_bdrs, 'analises': total_analises, 'cold_calls': total_cold_calls}
+
+@traced()
+def get_analysis_checkpoint(checkpoint_key):
+    """Busca o checkpoint salvo de uma análise em andamento."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT stage, outputs FROM analysis_checkpoints WHERE checkpoint_key = ?",
+        (checkpoint_key,)
+    )
+    result = cursor.fetchone()
+    conn.close()
+    if not result:
+        return None
+    return {'stage': result[0], 'outputs': json.loads(result[1])}
+
+@traced()
+def save_analysis_checkpoint(checkpoint_key, stage, outputs):
+    """Grava (ou atualiza) o checkpoint de uma análise após uma etapa concluída."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    data_atual = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    cursor.execute(
+        """INSERT INTO analysis_checkpoints (checkpoint_key, stage, outputs, updated_at) VALUES (?, ?, ?, ?)
+           ON CONFLICT(checkpoint_key) DO UPDATE SET stage = excluded.stage, outputs = excluded.outputs, updated_at = excluded.updated_at""",
+        (checkpoint_key, stage, json.dumps(outputs, ensure_ascii=False), data_atual)
+    )
+    conn.commit()
+    conn.close()
+
+@traced()
+def delete_analysis_checkpoint(checkpoint_key):
+    """Remove o checkpoint de uma análise."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM analysis_checkpoints WHERE checkpoint_key = ?", (checkpoint_key,))
+    conn.commit()
+    conn.close()
+
+@traced()
+def get_stage_averages_by_bdr(since=None, until=None, empresa=None):
+    """Busca, em uma única consulta, as médias das 6 etapas e o total de calls de cada BDR.
+
+    Cada linha é (bdr_id, nome, calls, 6 médias, 6 quantidades de scores);
+    etapas sem nenhum score têm média NULL e quantidade 0. Sem filtros, como
+    get_hybrid_conversation_average_scores, inclui o histórico arquivado.
+    """
+    since, until = to_epoch(since), to_epoch(until)
+    return _cached(('stage_averages_by_bdr', since, until, empresa),
+                   lambda: _query_stage_averages_by_bdr(since, until, empresa))
+
+def _query_stage_averages_by_bdr(since, until, empresa):
+    """Consulta as médias por BDR no banco."""
+    where, params = _filters(since=since, until=until, empresa=empresa, alias="c.")
+    conn = get_connection()
+    cursor = conn.cursor()
+    if _folds_archive_totals(since, until, empresa):
+        # Somas e quantidades do banco principal mais as do histórico arquivado de cada BDR
+        cursor.execute(
+            f"""SELECT b.id, b.nome, SUM(p.calls),
+               {", ".join(f"1.0 * SUM(p.soma_{step}) / NULLIF(SUM(p.n_{step}), 0)" for step in HYBRID_STEPS)},
+               {", ".join(f"SUM(p.n_{step})" for step in HYBRID_STEPS)} FROM (
+                   SELECT bdr_id, COUNT(*) AS calls,
+                   {", ".join(f"SUM({step}) AS soma_{step}, COUNT({step}) AS n_{step}" for step in HYBRID_STEPS)}
+                   FROM cold_calls GROUP BY bdr_id
+                   UNION ALL
+                   SELECT bdr_id, total_cold_calls, {", ".join(f"soma_{step}, n_{step}" for step in HYBRID_STEPS)}
+                   FROM archive_totals WHERE total_cold_calls > 0
+               ) AS p JOIN bdrs b ON b.id = p.bdr_id
+               GROUP BY b.id, b.nome ORDER BY b.nome"""
+        )
+    else:
+        cursor.execute(
+            f"""SELECT b.id, b.nome, COUNT(*), {", ".join(f"AVG(c.{step})" for step in HYBRID_STEPS)},
+               {", ".join(f"COUNT(c.{step})" for step in HYBRID_STEPS)}
+               FROM cold_calls c JOIN bdrs b ON b.id = c.bdr_id{where}
+               GROUP BY b.id, b.nome ORDER BY b.nome""",
+            params
+        )
+    rows = cursor.fetchall()
+    conn.close()
+    return rows
+
+@traced()
+def get_archive_score_totals():
+    """Totais do histórico arquivado por BDR: (bdr_id, calls, 6 somas, 6 quantidades de scores).
+
+    Só BDRs com cold calls arquivados; calls sem BDR vêm com bdr_id 0.
+    """
+    return _cached(('archive_score_totals',), _query_archive_score_totals)
+
+def _query_archive_score_totals():
+    """Consulta archive_totals no banco."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        f"""SELECT bdr_id, total_cold_calls, {", ".join(f"soma_{step}" for step in HYBRID_STEPS)},
+           {", ".join(f"n_{step}" for step in HYBRID_STEPS)}
+           FROM archive_totals WHERE total_cold_calls > 0 ORDER BY bdr_id"""
+    )
+    rows = cursor.fetchall()
+    conn.close()
+    return rows
+
+@traced()
+def get_rolling_score_trends(bdr_id, window=10, limit=None, since=None, until=None, empresa=None):
+    """Médias móveis das 6 etapas sobre as últimas `window` calls de um BDR.
+
+    Retorna uma linha por call em ordem cronológica: (data, id, 6 médias).
+    Com `limit`, apenas os pontos mais recentes; `since`/`until` e `empresa`
+    restringem as calls consideradas. Usa window functions sobre o índice
+    (bdr_id, data_ts) e fica em cache até a próxima escrita.
+    """
+    since, until = to_epoch(since), to_epoch(until)
+    return _cached(('rolling_trends', bdr_id, window, limit, since, until, empresa),
+                   lambda: _query_rolling_score_trends(bdr_id, window, limit, since, until, empresa))
+
+def _query_rolling_score_trends(bdr_id, window, limit, since, until, empresa):
+    """Consulta as médias móveis no banco."""
+    where, params = _filters(bdr_id, since, until, empresa)
+    params.update(preceding=max(window, 1) - 1, limit=_limit(limit))
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        f"""SELECT data, id, m1, m2, m3, m4, m5, m6 FROM (
+               SELECT data, data_ts, id,
+                      AVG(warmer_score) OVER w AS m1, AVG(reframe_score) OVER w AS m2,
+                      AVG(rational_drowning_score) OVER w AS m3, AVG(emotional_impact_score) OVER w AS m4,
+                      AVG(new_way_score) OVER w AS m5, AVG(your_solution_score) OVER w AS m6
+               FROM cold_calls{where}
+               WINDOW w AS (ORDER BY data_ts, id ROWS BETWEEN :preceding PRECEDING AND CURRENT ROW)
+               ORDER BY data_ts DESC, id DESC LIMIT :limit
+           ) AS recentes ORDER BY data_ts, id""",
+        params
+    )
+    trends = cursor.fetchall()
+    conn.close()
+    return trends
+
+@traced()
+def get_weekly_score_trends(bdr_id, limit=None, since=None, until=None, empresa=None):
+    """Médias semanais das 6 etapas de um BDR.
+
+    Retorna uma linha por semana em ordem cronológica: (semana 'AAAA-SS',
+    total de calls, 6 médias). Com `limit`, apenas as semanas mais recentes.
+    """
+    since, until = to_epoch(since), to_epoch(until)
+    return _cached(('weekly_trends', bdr_id, limit, since, until, empresa),
+                   lambda: _query_weekly_score_trends(bdr_id, limit, since, until, empresa))
+
+def _query_weekly_score_trends(bdr_id, limit, since, until, empresa):
+    """Consulta as médias semanais no banco."""
+    where, params = _filters(bdr_id, since, until, empresa)
+    params['limit'] = _limit(limit)
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        f"""SELECT * FROM (
+               SELECT {_backend().week_expression("data")} AS semana, COUNT(*),
+                      AVG(warmer_score), AVG(reframe_score), AVG(rational_drowning_score),
+                      AVG(emotional_impact_score), AVG(new_way_score), AVG(your_solution_score)
+               FROM cold_calls{where}
+               GROUP BY semana ORDER BY semana DESC LIMIT :limit
+           ) AS semanas ORDER BY semana""",
+        params
+    )
+    trends = cursor.fetchall()
+    conn.close()
+    return trends
+
+def _score_expression(stage):
+    """Expressão SQL do score usado no ranking: uma etapa ou a média das 6.
+
+    A média geral de uma call só considera as etapas com score (como o AVG
+    dos rankings por etapa) e é NULL se nenhuma tiver.
+    """
+    if stage is None:
+        soma = " + ".join(f"COALESCE({key}, 0)" for key in HYBRID_STEPS)
+        presentes = " + ".join(f"CASE WHEN {key} IS NULL THEN 0 ELSE 1 END" for key in HYBRID_STEPS)
+        return f"1.0 * ({soma}) / NULLIF({presentes}, 0)"
+    if stage not in HYBRID_STEPS:
+        raise ValueError(f"Etapa desconhecida: {stage}")
+    return stage
+
+@traced()
+def get_leaderboard(stage=None, since=None, until=None, min_calls=1, limit=5, ascending=False, empresa=None):
+    """Ranking de BDRs pela média de uma etapa (ou geral, com `stage=None`).
+
+    `since`/`until` limitam o período (`until` exclusivo), `empresa` filtra
+    a empresa do prospect e `min_calls` exclui BDRs com poucas calls no
+    período. Com `ascending`, os piores primeiro; BDRs sem nenhum score na
+    etapa ficam de fora. Retorna linhas (posição, bdr_id, nome, calls,
+    média); empates dividem a posição.
+    """
+    since, until = to_epoch(since), to_epoch(until)
+    return _cached(('leaderboard', stage, since, until, min_calls, limit, ascending, empresa),
+                   lambda: _query_leaderboard(stage, since, until, min_calls, limit, ascending, empresa))
+
+def _query_leaderboard(stage, since, until, min_calls, limit, ascending, empresa):
+    """Consulta o ranking no banco."""
+    where, params = _filters(since=since, until=until, empresa=empresa)
+    params.update(min_calls=min_calls, limit=_limit(limit))
+    ordem = "ASC" if ascending else "DESC"
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        f"""WITH medias AS (
+                SELECT bdr_id, COUNT(*) AS calls, AVG({_score_expression(stage)}) AS media
+                FROM cold_calls{where}
+                GROUP BY bdr_id HAVING COUNT(*) >= :min_calls AND AVG({_score_expression(stage)}) IS NOT NULL
+            )
+            SELECT RANK() OVER (ORDER BY m.media {ordem}) AS posicao, b.id, b.nome, m.calls, m.media
+            FROM medias m JOIN bdrs b ON b.id = m.bdr_id
+            ORDER BY posicao, b.nome LIMIT :limit""",
+        params
+    )
+    rows = cursor.fetchall()
+    conn.close()
+    return rows
+
+@traced()
+def get_stage_top_k(k=3, since=None, until=None, min_calls=1, empresa=None):
+    """Top-k BDRs de cada uma das 6 etapas em uma única consulta.
+
+    Retorna um dicionário etapa -> lista de (posição, bdr_id, nome, calls, média).
+    """
+    since, until = to_epoch(since), to_epoch(until)
+    return _cached(('stage_top_k', k, since, until, min_calls, empresa),
+                   lambda: _query_stage_top_k(k, since, until, min_calls, empresa))
+
+def _query_stage_top_k(k, since, until, min_calls, empresa):
+    """Consulta o top-k por etapa no banco."""
+    where, params = _filters(since=since, until=until, empresa=empresa)
+    params.update(min_calls=min_calls, k=k)
+    etapas = " UNION ALL ".join(
+        f"SELECT '{key}' AS etapa, bdr_id, calls, {key} AS media FROM medias" for key in HYBRID_STEPS
+    )
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        f"""WITH medias AS (
+                SELECT bdr_id, COUNT(*) AS calls, {", ".join(f"AVG({key}) AS {key}" for key in HYBRID_STEPS)}
+                FROM cold_calls{where}
+                GROUP BY bdr_id HAVING COUNT(*) >= :min_calls
+            ),
+            ranking AS (
+                SELECT etapa, bdr_id, calls, media,
+                       RANK() OVER (PARTITION BY etapa ORDER BY media DESC) AS posicao
+                FROM ({etapas}) AS etapas WHERE media IS NOT NULL
+            )
+            SELECT r.etapa, r.posicao, b.id, b.nome, r.calls, r.media
+            FROM ranking r JOIN bdrs b ON b.id = r.bdr_id
+            WHERE r.posicao <= :k ORDER BY r.etapa, r.posicao, b.nome""",
+        params
+    )
+    top_k = {key: [] for key in HYBRID_STEPS}
+    for etapa, *linha in cursor.fetchall():
+        top_k[etapa].append(tuple(linha))
+    conn.close()
+    return top_k
+
+@traced()
+def get_score_changes(since, previous_since=None, until=None, stage=None, min_calls=1, limit=5, improved=False,
+                      empresa=None):
+    """BDRs que mais regrediram (ou evoluíram, com `improved`) entre dois períodos.
+
+    Compara a média em [previous_since, since) com a média em [since, until);
+    sem `previous_since`, o período anterior é todo o histórico. Só entram
+    BDRs com pelo menos `min_calls` calls em cada período.
+    Retorna linhas (bdr_id, nome, média anterior, média atual, variação).
+    """
+    previous_since, since, until = to_epoch(previous_since), to_epoch(since), to_epoch(until)
+    return _cached(('score_changes', stage, previous_since, since, until, min_calls, limit, improved, empresa),
+                   lambda: _query_score_changes(stage, previous_since, since, until, min_calls, limit, improved, empresa))
+
+def _query_score_changes(stage, previous_since, since, until, min_calls, limit, improved, empresa):
+    """Consulta a variação entre períodos no banco."""
+    where, params = _filters(since=previous_since, until=until, empresa=empresa)
+    params.update(corte=since, min_calls=max(min_calls, 1), limit=_limit(limit))
+    score = _score_expression(stage)
+    ordem = "DESC" if improved else "ASC"
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        f"""WITH periodos AS (
+                SELECT bdr_id,
+                       COUNT(CASE WHEN data_ts < :corte THEN 1 END) AS calls_anteriores,
+                       AVG(CASE WHEN data_ts < :corte THEN {score} END) AS anterior,
+                       COUNT(CASE WHEN data_ts >= :corte THEN 1 END) AS calls_atuais,
+                       AVG(CASE WHEN data_ts >= :corte THEN {score} END) AS atual
+                FROM cold_calls{where}
+                GROUP BY bdr_id
+            )
+            SELECT b.id, b.nome, p.anterior, p.atual, p.atual - p.anterior AS variacao
+            FROM periodos p JOIN bdrs b ON b.id = p.bdr_id
+            WHERE p.calls_anteriores >= :min_calls AND p.calls_atuais >= :min_calls
+            ORDER BY variacao {ordem}, b.nome LIMIT :limit""",
+        params
+    )
+    rows = cursor.fetchall()
+    conn.close()
+    return rows
+
+def iter_score_rows(after_id=0, missing=None):
+    """Percorre (id, bdr_id, timestamp epoch, 6 scores) dos cold calls com id > `after_id`, em ordem de id.
+
+    Scores ausentes vêm como `missing` (por padrão None, o NULL que o AVG
+    do SQL ignora); calls sem BDR ou sem data_ts vêm com 0, como em
+    archive_totals. Só o banco principal: o snapshot é compartilhado entre
+    as sessões e não segue set_include_archived.
+    """
+    conn = get_connection(archived=False)
+    try:
+        # No PostgreSQL, um cursor no servidor entrega as linhas em lotes
+        yield from _backend().iterate(
+            conn,
+            f"""SELECT id, COALESCE(bdr_id, 0), COALESCE(data_ts, 0), {", ".join(f"COALESCE({step}, :missing)" for step in HYBRID_STEPS)}
+                FROM cold_calls WHERE id > :after_id ORDER BY id""",
+            {'after_id': after_id, 'missing': missing}
+        )
+    finally:
+        conn.close()
+
+# --- Consumo e custo da API (usage.py) ---
+
+# Agrupamentos aceitos por get_usage_summary: (expressão do grupo, JOIN extra)
+_USAGE_GROUPS = {
+    'bdr': ("COALESCE(b.nome, 'Sem BDR')", "LEFT JOIN bdrs b ON b.id = u.bdr_id"),
+    'dia': (None, ""),  # expressão do backend (storage.py)
+    'modelo': ("u.modelo", ""),
+}
+
+@traced()
+def save_api_usage(analysis_key, bdr_id, tipo, modelo, latencia_ms=0.0, prompt_tokens=0, completion_tokens=0,
+                   cached_tokens=0, audio_segundos=0.0, custo_usd=0.0, cache_hit=False):
+    """Registra o consumo de uma chamada à API (ou de uma chamada evitada, com `cache_hit`)."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        """INSERT INTO api_usage (analysis_key, bdr_id, data_ts, tipo, modelo, latencia_ms, prompt_tokens,
+           completion_tokens, cached_tokens, audio_segundos, custo_usd, cache_hit)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+        (analysis_key, bdr_id, to_epoch(datetime.now()), tipo, modelo, latencia_ms, prompt_tokens, completion_tokens,
+         cached_tokens, audio_segundos, custo_usd, int(cache_hit))
+    )
+    usage_id = cursor.lastrowid
+    conn.commit()
+    conn.close()
+    _invalidate_cache()
+    return usage_id
+
+@traced()
+def link_api_usage(analysis_key, cold_call_id=None, analise_id=None):
+    """Liga o consumo ainda sem destino de uma análise ao cold call ou à análise 1:1 salva."""
+    conn = get_connection()
+    conn.execute(
+        """UPDATE api_usage SET cold_call_id = ?, analise_id = ?
+           WHERE analysis_key = ? AND cold_call_id IS NULL AND analise_id IS NULL""",
+        (cold_call_id, analise_id, analysis_key)
+    )
+    conn.commit()
+    conn.close()
+    _invalidate_cache()
+
+@traced()
+def get_usage_summary(group_by='dia', since=None, until=None):
+    """Consumo agregado por 'bdr', 'dia' ou 'modelo'.
+
+    Retorna linhas (grupo, chamadas, chamadas evitadas, análises, tokens de
+    prompt, tokens de resposta, tokens em cache, segundos de áudio,
+    latência média em ms, custo USD), do maior custo para o menor.
+    """
+    if group_by not in _USAGE_GROUPS:
+        raise ValueError(f"Agrupamento desconhecido: {group_by}")
+    since, until = to_epoch(since), to_epoch(until)
+    return _cached(("usage_summary", group_by, since, until),
+                   lambda: _query_usage_summary(group_by, since, until))
+
+def _query_usage_summary(group_by, since, until):
+    grupo, join = _USAGE_GROUPS[group_by]
+    if group_by == 'dia':
+        grupo = _backend().day_expression("u.data_ts")
+    where, params = _filters(since=since, until=until, alias="u.")
+    conn = get_connection()
+    rows = conn.execute(
+        f"""SELECT {grupo} AS grupo, SUM(1 - u.cache_hit), SUM(u.cache_hit), COUNT(DISTINCT u.analysis_key),
+           SUM(u.prompt_tokens), SUM(u.completion_tokens), SUM(u.cached_tokens), SUM(u.audio_segundos),
+           AVG(CASE WHEN u.cache_hit = 0 THEN u.latencia_ms END), SUM(u.custo_usd)
+           FROM api_usage u {join}{where}
+           GROUP BY grupo ORDER BY SUM(u.custo_usd) DESC, grupo""",
+        params
+    ).fetchall()
+    conn.close()
+    return rows
+
+@traced()
+def get_usage_cost(since=None, until=None):
+    """Custo total (USD) das chamadas à API no intervalo."""
+    since, until = to_epoch(since), to_epoch(until)
+    return _cached(("usage_cost", since, until), lambda: _query_usage_cost(since, until))
+
+def _query_usage_cost(since, until):
+    where, params = _filters(since=since, until=until)
+    conn = get_connection()
+    custo = conn.execute(f"SELECT COALESCE(SUM(custo_usd), 0) FROM api_usage{where}", params).fetchone()[0]
+    conn.close()
+    return custo
+
+# --- Gravações já processadas (uploads duplicados) ---
+
+@traced()
+def save_audio_recording(sha256, tamanho, tipo, bdr_id, cold_call_id=None, analise_id=None, transcricao=None):
+    """Registra o áudio de uma análise salva ('cold_call' ou '1x1') com a sua transcrição."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        """INSERT INTO audio_recordings (sha256, tamanho, tipo, bdr_id, cold_call_id, analise_id, transcricao, data_ts)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+        (sha256, tamanho, tipo, bdr_id, cold_call_id, analise_id, transcricao, to_epoch(datetime.now()))
+    )
+    recording_id = cursor.lastrowid
+    conn.commit()
+    conn.close()
+    return recording_id
+
+@traced()
+def find_audio_recordings(sha256):
+    """Busca as análises já feitas com o mesmo áudio, da mais recente para a mais antiga.
+
+    Retorna linhas (tipo, data_ts, nome do BDR, id do cold call, id da
+    análise 1:1, transcrição, prospect, empresa). Os ids vêm como None se a
+    análise foi removida depois; a transcrição continua aproveitável.
+    Análises já arquivadas também são encontradas.
+    """
+    conn = get_connection(archived=True)
+    rows = conn.execute(
+        """SELECT r.tipo, r.data_ts, b.nome, c.id, a.id, r.transcricao, c.prospect_nome, c.prospect_empresa
+           FROM audio_recordings r
+           LEFT JOIN bdrs b ON b.id = r.bdr_id
+           LEFT JOIN cold_calls c ON c.id = r.cold_call_id
+           LEFT JOIN analises a ON a.id = r.analise_id
+           WHERE r.sha256 = ? ORDER BY r.data_ts DESC, r.id DESC""",
+        (sha256,)
+    ).fetchall()
+    conn.close()
+    return rows
+
+@traced()
+def get_cold_call(call_id):
+    """Busca um cold call pelo id (inclusive arquivado): dicionário com scores, análise completa, pontos de atenção e recomendações."""
+    conn = get_connection(archived=True)
+    row = conn.execute(
+        """SELECT warmer_score, reframe_score, rational_drowning_score, emotional_impact_score, new_way_score,
+           your_solution_score, analise_completa, pontos_atencao, recomendacoes FROM cold_calls WHERE id = ?""",
+        (call_id,)
+    ).fetchone()
+    conn.close()
+    if row is None:
+        return None
+    scores = dict(zip(('warmer_score', 'reframe_score', 'rational_drowning_score', 'emotional_impact_score',
+                       'new_way_score', 'your_solution_score'), (score or 0 for score in row[:6])))
+    return {'scores': scores, 'analise_completa': row[6], 'pontos_atencao': row[7], 'recomendacoes': row[8]}
+
+@traced()
+def get_analise(analise_id):
+    """Busca uma análise de 1:1 pelo id (inclusive arquivada): (data, resumo, metas) ou None."""
+    conn = get_connection(archived=True)
+    row = conn.execute("SELECT data, resumo, metas FROM analises WHERE id = ?", (analise_id,)).fetchone()
+    conn.close()
+    return row
+
+# --- Métricas de desempenho (tracing.py) ---
+# Estas funções não são medidas e não invalidam o cache de consultas: a
+# tabela de métricas não é lida por nenhuma consulta em cache.
+
+def save_spans(spans, before=None):
+    """Grava um lote de spans e, se `before` for informado, remove os iniciados antes dele (epoch)."""
+    conn = get_connection()
+    conn.executemany(
+        """INSERT INTO metrics_spans (run_id, span_id, parent_id, nome, inicio, duracao_ms, status, atributos)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+        spans
+    )
+    if before is not None:
+        conn.execute("DELETE FROM metrics_spans WHERE inicio < ?", (before,))
+    conn.commit()
+    conn.close()
+
+def get_span_durations(since=None, nome=None):
+    """Duração (ms) de cada span iniciado a partir de `since` (epoch): lista de (nome, duração)."""
+    conn = get_connection()
+    rows = conn.execute(
+        f"SELECT nome, duracao_ms FROM metrics_spans WHERE inicio >= :since{' AND nome = :nome' if nome else ''}",
+        {'since': since or 0, 'nome': nome}
+    ).fetchall()
+    conn.close()
+    return rows
+
+def get_slowest_runs(since=None, limit=10, nome=None):
+    """Execuções (spans raiz) mais lentas da janela: (run_id, nome, início, duração ms, status)."""
+    conn = get_connection()
+    rows = conn.execute(
+        f"""SELECT run_id, nome, inicio, duracao_ms, status FROM metrics_spans
+           WHERE parent_id IS NULL AND inicio >= :since{' AND nome = :nome' if nome else ''}
+           ORDER BY duracao_ms DESC LIMIT :limit""",
+        {'since': since or 0, 'nome': nome, 'limit': limit}
+    ).fetchall()
+    conn.close()
+    return rows
+
+def get_run_spans(run_id):
+    """Spans de uma execução: (span_id, parent_id, nome, início, duração ms, status, atributos)."""
+    conn = get_connection()
+    rows = conn.execute(
+        """SELECT span_id, parent_id, nome, inicio, duracao_ms, status, atributos FROM metrics_spans
+           WHERE run_id = ? ORDER BY inicio""",
+        (run_id,)
+    ).fetchall()
+    conn.close()
+    return rows
+
+# --- Histórico arquivado e manutenção (maintenance.py) ---
+# Só no SQLite: cold calls e análises antigos vão para outro arquivo, anexado
+# como `arquivo`, e o banco principal fica pequeno. As médias e contagens
+# gerais somam os totais do arquivo (archive_totals); listagens, filtros por
+# período e rankings leem o arquivo só com set_include_archived(True).
+
+# Tabelas cujas linhas antigas vão para o banco de arquivo
+ARCHIVED_TABLES = ("cold_calls", "analises")
+
+# Colunas de archive_totals somadas a cada arquivamento
+_TOTALS_COLUMNS = ["total_cold_calls", "total_analises"] + [f"{prefixo}_{step}" for step in HYBRID_STEPS
+                                                            for prefixo in ("soma", "n")]
+
+def get_archive_path():
+    """Caminho do banco de arquivo: ARCHIVE_DATABASE_PATH ou "<banco>_arquivo.db" ao lado do banco principal."""
+    return ARCHIVE_DATABASE_PATH or f"{os.path.splitext(DATABASE_PATH)[0]}_arquivo.db"
+
+def has_archive():
+    """Indica se já existe histórico arquivado."""
+    return _backend().name == "sqlite" and os.path.exists(get_archive_path())
+
+def set_include_archived(enabled):
+    """Liga ou desliga, na sessão atual (contexto), a leitura do histórico arquivado pelas consultas."""
+    _include_archived.set(bool(enabled))
+
+def _folds_archive_totals(since=None, until=None, empresa=None):
+    """Indica se a consulta soma archive_totals: histórico completo, sem filtros e sem o arquivo já anexado."""
+    return since is None and until is None and empresa is None and not _include_archived.get()
+
+def _attach_archive(conn, create=False):
+    """Anexa o banco de arquivo como `arquivo` (sem `create`, só se ele existir). Retorna se ele foi anexado.
+
+    Precisa ser chamada antes de qualquer escrita na conexão: o SQLite não anexa bancos dentro de uma transação.
+    """
+    if _backend().name != "sqlite":
+        return False
+    if conn.execute("SELECT 1 FROM pragma_database_list WHERE name = 'arquivo'").fetchone():
+        return True
+    if not create and not os.path.exists(get_archive_path()):
+        return False
+    conn.execute("ATTACH DATABASE ? AS arquivo", (get_archive_path(),))
+    if create:
+        # Banco novo: o vacuum incremental só pode ser ligado antes de criar as tabelas
+        conn.execute("PRAGMA arquivo.auto_vacuum = INCREMENTAL")
+        conn.execute(f"CREATE TABLE IF NOT EXISTS arquivo.analises ({_ANALISES_COLUMNS})")
+        conn.execute(f"CREATE TABLE IF NOT EXISTS arquivo.cold_calls ({_COLD_CALLS_COLUMNS})")
+        for nome, tabela, colunas in _HISTORY_INDEXES:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS arquivo.{nome} ON {tabela} ({colunas})")
+    return True
+
+def _history_columns(conn, tabela):
+    """Colunas de `tabela` no banco principal, por nome (bancos migrados têm data_ts no fim)."""
+    return ", ".join(row[1] for row in conn.execute(f"PRAGMA main.table_info({tabela})"))
+
+def _read_through_archive(conn):
+    """Faz cold_calls e analises incluírem as linhas arquivadas nesta conexão.
+
+    Views temporárias com o mesmo nome têm precedência sobre as tabelas do
+    banco principal, então as consultas existentes funcionam sem mudanças.
+    """
+    if not _attach_archive(conn):
+        return
+    for tabela in ARCHIVED_TABLES:
+        colunas = _history_columns(conn, tabela)
+        conn.execute(f"""CREATE TEMP VIEW {tabela} AS
+                         SELECT {colunas} FROM main.{tabela} UNION ALL SELECT {colunas} FROM arquivo.{tabela}""")
+
+def _add_archive_totals(conn, schema, where, params):
+    """Soma em archive_totals, por BDR, as linhas de `schema`.cold_calls e `schema`.analises que atendem `where`.
+
+    `where` pode usar `{tabela}` para se referir à tabela de cada parte.
+    """
+    por_call = ", ".join(f"COALESCE({step}, 0) AS soma_{step}, {step} IS NOT NULL AS n_{step}" for step in HYBRID_STEPS)
+    zeros = ", ".join("0, 0" for _ in HYBRID_STEPS)
+    colunas = ", ".join(_TOTALS_COLUMNS)
+    conn.execute(
+        f"""INSERT INTO archive_totals (bdr_id, {colunas})
+            SELECT chave, {", ".join(f"SUM({coluna})" for coluna in _TOTALS_COLUMNS)} FROM (
+                SELECT COALESCE(bdr_id, 0) AS chave, 1 AS total_cold_calls, 0 AS total_analises, {por_call}
+                FROM {schema}.cold_calls{where.format(tabela="cold_calls")}
+                UNION ALL
+                SELECT COALESCE(bdr_id, 0), 0, 1, {zeros} FROM {schema}.analises{where.format(tabela="analises")}
+            ) AS linhas GROUP BY chave
+            ON CONFLICT (bdr_id) DO UPDATE SET {", ".join(f"{coluna} = {coluna} + excluded.{coluna}" for coluna in _TOTALS_COLUMNS)}""",
+        params
+    )
+
+def _refresh_archive_totals(conn, bdr_id=None):
+    """Recalcula archive_totals a partir do banco de arquivo (de todos os BDRs ou só de `bdr_id`)."""
+    if bdr_id is None:
+        conn.execute("DELETE FROM archive_totals")
+        where, params = "", {}
+    else:
+        conn.execute("DELETE FROM archive_totals WHERE bdr_id = ?", (bdr_id,))
+        where, params = " WHERE COALESCE(bdr_id, 0) = :bdr_id", {'bdr_id': bdr_id}
+    if _attach_archive(conn):
+        _add_archive_totals(conn, "arquivo", where, params)
+
+def _log_archived(conn, tabela, operacao, where, params):
+    """Registra no log de sincronização (prisma_sync.py) as linhas arquivadas de `tabela` que atendem `where`.
+
+    O banco de arquivo não tem os triggers do banco principal.
+    """
+    conn.execute(
+        f"INSERT INTO sync_changes (tabela, row_id, operacao) SELECT '{tabela}', id, '{operacao}' FROM arquivo.{tabela}{where}",
+        params
+    )
+
+def _delete_archived(conn, tabela, where, params):
+    """Remove linhas arquivadas de `tabela`, registrando as remoções no log de sincronização. Retorna quantas foram removidas."""
+    _log_archived(conn, tabela, "DELETE", where, params)
+    return conn.execute(f"DELETE FROM arquivo.{tabela}{where}", params).rowcount
+
+def _update_archived(conn, tabela, alteracao, where, params):
+    """Aplica `alteracao` (SET) às linhas arquivadas de `tabela`, registrando-as no log de sincronização. Retorna quantas foram alteradas."""
+    _log_archived(conn, tabela, "UPDATE", where, params)
+    return conn.execute(f"UPDATE arquivo.{tabela} SET {alteracao}{where}", params).rowcount
+
+@traced()
+def archive_records(before):
+    """Move os cold calls e análises 1:1 anteriores a `before` (data ou epoch) para o banco de arquivo.
+
+    Em uma única transação, as linhas são copiadas para o arquivo, somadas
+    em archive_totals e removidas do banco principal. Os ids são
+    AUTOINCREMENT, então os próximos continuam depois dos arquivados mesmo
+    sem nenhuma linha no banco principal. Retorna quantas linhas de cada
+    tabela foram arquivadas.
+    """
+    if _backend().name != "sqlite":
+        raise ValueError("O arquivamento do histórico só está disponível no SQLite.")
+    where = " WHERE data_ts < :before"
+    params = {'before': to_epoch(before)}
+    conn = get_connection(archived=False)
+    arquivados = {}
+    try:
+        _attach_archive(conn, create=True)
+        conn.execute("BEGIN IMMEDIATE")
+        _add_archive_totals(conn, "main", where, params)
+        for tabela in ARCHIVED_TABLES:
+            colunas = _history_columns(conn, tabela)
+            filtro = where.format(tabela=tabela)
+            conn.execute(f"INSERT INTO arquivo.{tabela} ({colunas}) SELECT {colunas} FROM main.{tabela}{filtro}", params)
+            arquivados[tabela] = conn.execute(f"DELETE FROM main.{tabela}{filtro}", params).rowcount
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    _invalidate_cache(rewrite=True)
+    return arquivados
+
+def run_maintenance(vacuum_pages=MAINTENANCE_VACUUM_PAGES):
+    """ANALYZE, vacuum incremental e checkpoint do WAL no banco principal e no de arquivo.
+
+    Em um banco criado sem auto_vacuum incremental, a primeira execução o
+    liga com um VACUUM completo (uma vez só). Retorna quantas páginas livres
+    foram devolvidas ao sistema de arquivos.
+    """
+    if _backend().name != "sqlite":
+        raise ValueError("A manutenção do banco só está disponível no SQLite.")
+    liberadas = 0
+    for backend in (_backend(), storage.SQLiteBackend(get_archive_path()) if has_archive() else None):
+        if backend is None:
+            continue
+        conn = backend.connect()
+        try:
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                conn.execute("VACUUM")
+            conn.execute("ANALYZE")
+            livres = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            conn.execute(f"PRAGMA incremental_vacuum({int(vacuum_pages)})").fetchall()
+            liberadas += livres - conn.execute("PRAGMA freelist_count").fetchone()[0]
+            # Sem efeito fora do modo WAL
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+            conn.commit()
+        finally:
+            conn.close()
+    return liberadas
+
+def seconds_idle():
+    """Segundos desde o último acesso ao banco feito por este processo."""
+    return monotonic() - _last_access
+
+def save_maintenance_run(arquivados, paginas_liberadas, duracao_ms):
+    """Registra uma execução da manutenção."""
+    conn = get_connection(archived=False)
+    conn.execute(
+        "INSERT INTO maintenance_runs (data_ts, arquivados, paginas_liberadas, duracao_ms) VALUES (?, ?, ?, ?)",
+        (to_epoch(datetime.now()), arquivados, paginas_liberadas, duracao_ms)
+    )
+    conn.commit()
+    conn.close()
+
+def get_last_maintenance():
+    """Epoch da última execução da manutenção, ou None."""
+    conn = get_connection(archived=False)
+    ultima = conn.execute("SELECT MAX(data_ts) FROM maintenance_runs").fetchone()[0]
     conn.close()
-    return analyses
\ No newline at end of file
+    return ultima
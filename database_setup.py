@@ -1,56 +1,9 @@
-import sqlite3
+from config import DATABASE_BACKEND, DATABASE_PATH, POSTGRES_SCHEMA
+from database import get_connection
 
-conn = sqlite3.connect('gestao_bdrs.db')
-
-cursor = conn.cursor()
-
-cursor.execute('''
-    CREATE TABLE IF NOT EXISTS bdrs (
-    id INTEGER PRIMARY KEY,
-    nome TEXT NOT NULL UNIQUE
-    )
-''')
-print("Tabela de 'bdrs' criada ou já existente.")
-
-cursor.execute(''' 
-    CREATE TABLE IF NOT EXISTS analises (
-    id INTEGER PRIMARY KEY,
-    bdr_id INTEGER,
-    data TEXT NOT NULL,
-    resumo TEXT,
-    metas TEXT,
-    FOREIGN KEY (bdr_id) REFERENCES bdrs (id)
-    )
-''')
-
-print("Tabela 'analises' criada ou já existente.")
-
-cursor.execute('''
-    CREATE TABLE IF NOT EXISTS cold_calls (
-    id INTEGER PRIMARY KEY,
-    bdr_id INTEGER,
-    data TEXT NOT NULL,
-    prospect_nome TEXT,
-    prospect_empresa TEXT,
-    -- Conversa Híbrida - 6 Etapas
-    warmer_score INTEGER,
-    reframe_score INTEGER,
-    rational_drowning_score INTEGER,
-    emotional_impact_score INTEGER,
-    new_way_score INTEGER,
-    your_solution_score INTEGER,
-    -- Analysis Content
-    analise_completa TEXT,
-    pontos_atencao TEXT,
-    recomendacoes TEXT,
-    insight_comercial TEXT,
-    FOREIGN KEY (bdr_id) REFERENCES bdrs (id)
-    )
-''')
-
-print("Tabela 'cold_calls' criada ou já existente.")
-
-conn.commit()
+# Cria todas as tabelas e índices no banco configurado (SQLite em DATABASE_PATH ou PostgreSQL em DATABASE_URL)
+conn = get_connection()
 conn.close()
 
-print("\nBanco de dados 'gestao_bdrs.db' configurado com sucesso!")
\ No newline at end of file
+destino = f"schema '{POSTGRES_SCHEMA}' do PostgreSQL" if DATABASE_BACKEND == "postgres" else f"'{DATABASE_PATH}'"
+print(f"\nBanco de dados {destino} configurado com sucesso!")
@@ -0,0 +1,33 @@
+from datetime import date
+import streamlit as st
+from database import period_bounds, get_prospect_companies, has_archive, set_include_archived
+
+def period_filter(key="filtro_periodo"):
+    """Seletor de período na barra lateral.
+
+    Retorna (since, until) em epoch para as funções de database.py, com o
+    último dia incluído, ou (None, None) para todo o histórico.
+    """
+    datas = st.sidebar.date_input("Período:", value=(), max_value=date.today(), format="DD/MM/YYYY", key=key,
+                                  help="Deixe em branco para considerar todo o histórico")
+    inicio = datas[0] if len(datas) > 0 else None
+    fim = datas[1] if len(datas) > 1 else None
+    return period_bounds(inicio, fim)
+
+def company_filter(key="filtro_empresa"):
+    """Seletor da empresa do prospect na barra lateral; retorna None para todas."""
+    return st.sidebar.selectbox("Empresa do prospect:", [None] + get_prospect_companies(), key=key,
+                                format_func=lambda empresa: "Todas" if empresa is None else empresa)
+
+def archive_filter(key="filtro_arquivo"):
+    """Caixa "Incluir histórico arquivado" na barra lateral (só aparece se houver arquivo).
+
+    Liga ou desliga a leitura do banco de arquivo nas consultas desta
+    execução da página e retorna a escolha.
+    """
+    incluir = has_archive() and st.sidebar.checkbox(
+        "Incluir histórico arquivado", key=key,
+        help="Cold calls e análises antigos ficam em um banco de arquivo; os totais gerais já os incluem, "
+             "mas listagens, filtros por período e comparações só os consideram com esta opção")
+    set_include_archived(incluir)
+    return incluir
@@ -0,0 +1,97 @@
+"""
+Retenção e manutenção do banco SQLite.
+
+- Arquivamento: cold calls e análises 1:1 com mais de ARCHIVE_AFTER_DAYS
+  dias vão para o banco de arquivo (database.archive_records), e o banco
+  principal, lido pelos dashboards, continua pequeno o bastante para ficar
+  no cache de páginas do sistema operacional.
+- Manutenção: ANALYZE, vacuum incremental e checkpoint do WAL
+  (database.run_maintenance).
+
+O agendador roda em uma thread do processo do Streamlit e só age quando o
+banco fica ocioso por MAINTENANCE_IDLE_SECONDS, no máximo uma vez a cada
+MAINTENANCE_INTERVAL_HOURS. Também dá para rodar pelo cron:
+
+    python maintenance.py                      # arquiva (se configurado) e faz a manutenção agora
+    python maintenance.py --archive-days 365   # arquiva o que tiver mais de 1 ano
+"""
+
+import argparse
+import threading
+import time
+from datetime import datetime, timedelta
+from config import ARCHIVE_AFTER_DAYS, MAINTENANCE_IDLE_SECONDS, MAINTENANCE_INTERVAL_HOURS, DATABASE_BACKEND
+from storage import DatabaseError
+import database
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+_stop = threading.Event()
+# Epoch da última execução (lido do banco uma vez; consultas repetidas contariam como atividade)
+_last_run = None
+
+def archive_cutoff(days, agora=None):
+    """Data antes da qual o histórico é arquivado."""
+    return (agora or datetime.now()) - timedelta(days=days)
+
+def run(archive_days=ARCHIVE_AFTER_DAYS):
+    """Arquiva o histórico antigo (se `archive_days` > 0) e faz a manutenção; registra e retorna o resultado."""
+    global _last_run
+    inicio = time.perf_counter()
+    arquivados = database.archive_records(archive_cutoff(archive_days)) if archive_days > 0 else {}
+    paginas = database.run_maintenance()
+    duracao_ms = (time.perf_counter() - inicio) * 1000
+    database.save_maintenance_run(sum(arquivados.values()), paginas, duracao_ms)
+    _last_run = time.time()
+    return {'arquivados': arquivados, 'paginas_liberadas': paginas, 'duracao_ms': duracao_ms}
+
+def is_due(agora=None):
+    """Indica se a manutenção deve rodar: banco ocioso e intervalo desde a última execução já passado."""
+    global _last_run
+    if database.seconds_idle() < MAINTENANCE_IDLE_SECONDS:
+        return False
+    if _last_run is None:
+        _last_run = database.get_last_maintenance() or 0
+    return (agora or time.time()) - _last_run >= MAINTENANCE_INTERVAL_HOURS * 3600
+
+def _loop(check_seconds):
+    while not _stop.wait(check_seconds):
+        try:
+            if is_due():
+                run()
+        except DatabaseError:
+            # Banco ocupado (ou indisponível): tenta de novo na próxima verificação
+            pass
+
+def start_scheduler(check_seconds=60):
+    """Inicia o agendador em segundo plano (uma vez por processo; só no SQLite)."""
+    global _scheduler
+    if DATABASE_BACKEND != "sqlite":
+        return None
+    with _scheduler_lock:
+        if _scheduler is None or not _scheduler.is_alive():
+            _stop.clear()
+            _scheduler = threading.Thread(target=_loop, args=(check_seconds,), name="db-manutencao", daemon=True)
+            _scheduler.start()
+    return _scheduler
+
+def stop_scheduler():
+    """Para o agendador (usado nos testes)."""
+    global _scheduler
+    _stop.set()
+    if _scheduler is not None:
+        _scheduler.join()
+        _scheduler = None
+
+def main():
+    parser = argparse.ArgumentParser(description="Arquiva o histórico antigo e faz a manutenção do banco SQLite.")
+    parser.add_argument("--archive-days", type=int, default=ARCHIVE_AFTER_DAYS,
+                        help="arquiva cold calls e análises com mais dias que isso (0: não arquiva)")
+    args = parser.parse_args()
+    resultado = run(args.archive_days)
+    arquivados = resultado['arquivados']
+    print(f"Arquivados: {arquivados.get('cold_calls', 0)} cold calls e {arquivados.get('analises', 0)} análises 1:1; "
+          f"{resultado['paginas_liberadas']} páginas liberadas em {resultado['duracao_ms']:.0f} ms")
+
+if __name__ == "__main__":
+    main()
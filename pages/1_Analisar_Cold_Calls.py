@@ -1,14 +1,17 @@
 import streamlit as st
-from openai import OpenAI
-import sqlite3
-from datetime import datetime
-import matplotlib.pyplot as plt
-import numpy as np
-from math import pi
-import os
-from config import OPENAI_API_KEY, ALLOWED_AUDIO_TYPES, MAX_FILE_SIZE_MB
-from database import get_bdrs, save_cold_call_analise
-from utils import create_matplotlib_radar_chart, validate_audio_file, validate_input_text
+from config import OPENAI_API_KEY, ALLOWED_AUDIO_TYPES
+from database import (get_bdrs, save_cold_call_analise, link_api_usage, find_audio_recordings, save_audio_recording,
+                      get_cold_call)
+from utils import validate_audio_file, validate_input_text
+from charts import show_radar_chart
+from analysis import (HYBRID_STEPS, HYBRID_LABELS, TRANSCRIPTION_MODEL, ANALYSIS_MODEL, get_openai_client,
+                      build_cold_call_prompt, transcribe_audio, run_analysis, parse_cold_call_analysis,
+                      default_cold_call_parse)
+from audio import AUDIO_MIME_TYPES
+from workflow import (load_audio_upload, make_checkpoint_key, last_completed_stage, load_checkpoint, run_stage,
+                      clear_checkpoint, seed_checkpoint, describe_recording)
+from tracing import span
+from usage import usage_recorder, record_cache_hit, budget_status, budget_message
 
 st.set_page_config(layout="wide")
 
@@ -20,6 +23,11 @@ if not OPENAI_API_KEY:
     st.error("⚠️ **API Key não configurada!** Por favor, configure a variável de ambiente OPENAI_API_KEY no Streamlit Cloud.")
     st.stop()
 
+# Alerta de orçamento mensal da API (MONTHLY_BUDGET_USD)
+gasto_mes, orcamento, nivel_orcamento = budget_status()
+if nivel_orcamento:
+    (st.error if nivel_orcamento == "excedido" else st.warning)(budget_message(gasto_mes, orcamento, nivel_orcamento))
+
 # Seletor de idioma
 col_lang, col_space = st.columns([1, 3])
 with col_lang:
@@ -92,7 +100,42 @@ else:
             st.error(f"❌ {message}")
             st.stop()
 
-        st.audio(audio_file)
+        # Hash e formato real calculados uma vez por arquivo, sem copiar o áudio
+        upload = load_audio_upload(st.session_state, audio_file)
+        st.audio(audio_file, format=AUDIO_MIME_TYPES[upload.format])
+
+        bdr_id_selecionado = bdr_map[bdr_nome_selecionado]
+
+        # Chave do checkpoint: mesmo áudio + mesmos parâmetros retomam a mesma análise
+        checkpoint_key = make_checkpoint_key(
+            "cold_call",
+            upload.sha256,
+            bdr_id=bdr_id_selecionado,
+            prospect_nome=prospect_nome,
+            prospect_empresa=prospect_empresa,
+            insight_comercial=insight_comercial,
+            idioma=idioma
+        )
+        etapa_concluida = last_completed_stage(st.session_state, checkpoint_key)
+
+        if etapa_concluida and etapa_concluida != "saved":
+            st.info(f"🔄 Análise anterior interrompida após a etapa **{etapa_concluida}**. Clique em analisar para retomar de onde parou.")
+
+        # Mesmo áudio já processado antes (em qualquer página, por qualquer BDR): oferece reaproveitar
+        reaproveitamento = None
+        anteriores = [] if etapa_concluida else find_audio_recordings(upload.sha256)
+        if anteriores:
+            st.warning("♻️ **Este áudio já foi processado:**\n" +
+                       "\n".join(f"- {describe_recording(anterior)}" for anterior in anteriores[:5]))
+            cold_call_anterior = next((anterior for anterior in anteriores if anterior[3]), None)
+            transcricao_anterior = next((anterior[5] for anterior in anteriores if anterior[5]), None)
+            opcoes = {}
+            if cold_call_anterior:
+                opcoes["Usar a análise existente (sem chamadas à API)"] = "analise"
+            if transcricao_anterior:
+                opcoes["Reaproveitar a transcrição e gerar uma nova análise"] = "transcricao"
+            opcoes["Processar do zero"] = None
+            reaproveitamento = opcoes[st.radio("O que fazer com este áudio?", list(opcoes))]
 
         if st.button("🎯 Analisar Cold Call - Conversa Híbrida", type="primary"):
             # Validar campos obrigatórios
@@ -115,277 +158,127 @@ else:
                 st.error(f"❌ {insight_msg}")
                 st.stop()
             else:
-                with st.spinner("Analisando cold call com metodologia Conversa Híbrida... Este processo pode levar alguns minutos."):
-                    bdr_id_selecionado = bdr_map[bdr_nome_selecionado]
-                    
-                    client = OpenAI(api_key=OPENAI_API_KEY)
-
+                # Etapas reaproveitadas entram no checkpoint e são puladas (e contadas como evitadas) por run_stage
+                if reaproveitamento == "analise":
+                    existente = get_cold_call(cold_call_anterior[3])
+                    seed_checkpoint(st.session_state, checkpoint_key, {
+                        'uploaded': {'file_name': audio_file.name, 'size': audio_file.size},
+                        'transcribed': cold_call_anterior[5] or "",
+                        'analysed': existente['analise_completa'],
+                        'parsed': {chave: existente[chave] for chave in ('scores', 'pontos_atencao', 'recomendacoes')},
+                        'saved': cold_call_anterior[3],
+                    })
+                elif reaproveitamento == "transcricao":
+                    seed_checkpoint(st.session_state, checkpoint_key, {
+                        'uploaded': {'file_name': audio_file.name, 'size': audio_file.size},
+                        'transcribed': transcricao_anterior,
+                    })
+
+                client = get_openai_client()
+                # Tokens, segundos de áudio e custo de cada chamada ficam registrados com a chave da análise
+                registrar_uso = usage_recorder(checkpoint_key, bdr_id_selecionado)
+
+                def transcrever():
                     st.info("Transcrevendo áudio... Isso pode levar um momento.")
-                    
-                    transcription = client.audio.transcriptions.create(
-                        model="whisper-1", file=audio_file
-                    )
-                    texto_transcrito = transcription.text
-                
-                # Criar prompt bilíngue baseado no idioma selecionado
-                if idioma == "English":
-                    prompt_analysis = f"""
-You are a sales expert and certified coach in the Hybrid Conversation methodology.
-
-Analyze this cold call transcription based on the HYBRID CONVERSATION methodology (6 steps):
-
-**HYBRID CONVERSATION METHODOLOGY:**
-This approach combines SPIN Selling and The Challenger Sale in 6 sequential steps for maximum effectiveness in complex B2B sales.
-
-**THE 6 STEPS:**
-
-**1. Warmer (Warm-up)**
-- SPIN Focus: Situation and Problem Questions
-- Objective: Establish credibility, show research, diagnose known problems
-- Key Elements: Transparent opening, demonstrate knowledge, engagement question
-
-**2. Reframe (Recontextualization)**
-- SPIN Focus: Problem Validation
-- Objective: Validate prospect response and introduce disruptive commercial insight
-- Key Elements: Validate and agree, introduce reframing with insight
-
-**3. Rational Drowning (Rational Drowning)**
-- SPIN Focus: Implication Questions
-- Objective: Use data and logic to quantify cost of reframed problem
-- Key Elements: Present key data, ask implication question
-
-**4. Emotional Impact (Emotional Impact)**
-- SPIN Focus: Need-Payoff Questions
-- Objective: Make problem personal with story and make prospect articulate benefits
-- Key Elements: Tell mini-story, ask need-payoff question
-
-**5. New Way (New Way)**
-- Objective: Introduce ideal solution vision, capabilities needed to solve reframed problem
-- Key Elements: Present solution vision without mentioning specific product
-
-**6. Your Solution (Your Solution)**
-- Objective: Connect "New Way" directly to your product/service and schedule next step
-- Key Elements: Make connection, propose next step (call to action)
-
-**CALL INFORMATION:**
-- BDR: {bdr_nome_selecionado}
-- Prospect: {prospect_nome}
-- Company: {prospect_empresa}
-- Language: English
-- Commercial Insight Used: {insight_comercial if insight_comercial else 'Not specified'}
-
-**TRANSCRIPTION:**
-{texto_transcrito}
-
-**REQUESTED ANALYSIS:**
-
-Evaluate each step from 0 to 10 and provide:
-
-### HYBRID CONVERSATION SCORES
-**Warmer:** X/10
-**Reframe:** X/10
-**Rational Drowning:** X/10
-**Emotional Impact:** X/10
-**New Way:** X/10
-**Your Solution:** X/10
-
-### DETAILED ANALYSIS
-(Complete call analysis based on the 6-step hybrid conversation methodology)
-
-### COMMERCIAL INSIGHT EVALUATION
-(How well was the commercial insight used and developed?)
-
-### ATTENTION POINTS
-(Specific areas that need improvement based on the 6 steps)
-
-### RECOMMENDATIONS
-(Specific actions to improve each step)
-
-IMPORTANT: Be rigorous in evaluation. High scores (8-10) should be reserved for exemplary execution of each step.
-"""
-                else:  # Português
-                    prompt_analysis = f"""
-Você é um especialista em vendas e coach certificado na metodologia Conversa Híbrida.
-
-Analise esta transcrição de cold call baseado na metodologia CONVERSA HÍBRIDA (6 etapas):
-
-**METODOLOGIA CONVERSA HÍBRIDA:**
-Esta abordagem combina SPIN Selling e The Challenger Sale em 6 etapas sequenciais para máxima eficácia em vendas B2B complexas.
-
-**AS 6 ETAPAS:**
-
-**1. Warmer (Aquecimento)**
-- Foco SPIN: Perguntas de Situação e Problema
-- Objetivo: Estabelecer credibilidade, mostrar pesquisa, diagnosticar problemas conhecidos
-- Elementos-chave: Abertura transparente, demonstrar conhecimento, pergunta de engajamento
+                    return transcribe_audio(client, upload.as_upload(), on_usage=registrar_uso)
 
-**2. Reframe (Reenquadramento)**
-- Foco SPIN: Validação do Problema
-- Objetivo: Validar resposta do prospect e introduzir insight comercial disruptivo
-- Elementos-chave: Validar e concordar, introduzir reenquadramento com insight
-
-**3. Rational Drowning (Afogamento Racional)**
-- Foco SPIN: Perguntas de Implicação
-- Objetivo: Usar dados e lógica para quantificar custo do problema reenquadrado
-- Elementos-chave: Apresentar dado chave, fazer pergunta de implicação
-
-**4. Emotional Impact (Impacto Emocional)**
-- Foco SPIN: Perguntas de Necessidade de Solução
-- Objetivo: Tornar problema pessoal com história e fazer prospect articular benefícios
-- Elementos-chave: Contar mini-história, fazer pergunta de necessidade de solução
-
-**5. New Way (Novo Caminho)**
-- Objetivo: Introduzir visão da solução ideal, capacidades necessárias para resolver problema reenquadrado
-- Elementos-chave: Apresentar visão da solução sem mencionar produto específico
-
-**6. Your Solution (Sua Solução)**
-- Objetivo: Conectar "Novo Caminho" diretamente ao seu produto/serviço e agendar próximo passo
-- Elementos-chave: Fazer conexão, propor próximo passo (call to action)
-
-**INFORMAÇÕES DA LIGAÇÃO:**
-- BDR: {bdr_nome_selecionado}
-- Prospect: {prospect_nome}
-- Empresa: {prospect_empresa}
-- Idioma: Português
-- Insight Comercial Utilizado: {insight_comercial if insight_comercial else 'Não especificado'}
-
-**TRANSCRIÇÃO:**
-{texto_transcrito}
-
-**ANÁLISE SOLICITADA:**
-
-Avalie cada etapa de 0 a 10 e forneça:
-
-### SCORES CONVERSA HÍBRIDA
-**Warmer:** X/10
-**Reframe:** X/10
-**Rational Drowning:** X/10
-**Emotional Impact:** X/10
-**New Way:** X/10
-**Your Solution:** X/10
-
-### ANÁLISE DETALHADA
-(Análise completa da ligação baseada na metodologia de 6 etapas da conversa híbrida)
-
-### AVALIAÇÃO DO INSIGHT COMERCIAL
-(Quão bem o insight comercial foi usado e desenvolvido?)
+                def analisar():
+                    st.info("Analisando com metodologia Conversa Híbrida...")
+                    prompt_analysis = build_cold_call_prompt(
+                        idioma, bdr_nome_selecionado, prospect_nome, prospect_empresa, insight_comercial, texto_transcrito
+                    )
+                    return run_analysis(client, prompt_analysis, on_usage=registrar_uso)
+
+                def extrair_resultados():
+                    try:
+                        return parse_cold_call_analysis(analise_completa, idioma)
+                    except Exception as e:
+                        st.error(f"Erro ao processar scores: {e}")
+                        return default_cold_call_parse()
+
+                def salvar():
+                    call_id = save_cold_call_analise(
+                        bdr_id_selecionado, 
+                        prospect_nome, 
+                        prospect_empresa, 
+                        resultados['scores'],
+                        analise_completa, 
+                        resultados['pontos_atencao'], 
+                        resultados['recomendacoes'],
+                        insight_comercial
+                    )
+                    link_api_usage(checkpoint_key, cold_call_id=call_id)
+                    save_audio_recording(upload.sha256, upload.size, "cold_call", bdr_id_selecionado,
+                                         cold_call_id=call_id, transcricao=texto_transcrito)
+                    return call_id
 
-### PONTOS DE ATENÇÃO
-(Áreas específicas que precisam de melhoria baseadas nas 6 etapas)
+                evitadas = []
 
-### RECOMENDAÇÕES
-(Ações específicas para melhorar cada etapa)
+                def evitada(tipo, modelo):
+                    evitadas.append(tipo)
+                    record_cache_hit(checkpoint_key, bdr_id_selecionado, tipo, modelo)
 
-IMPORTANTE: Seja rigoroso na avaliação. Scores altos (8-10) devem ser reservados para execução exemplar de cada etapa.
-"""
-                
-                st.info("Analisando com metodologia Conversa Híbrida...")
-                response = client.chat.completions.create(
-                    model="gpt-4-turbo",
-                    messages=[{"role": "user", "content": prompt_analysis}]
-                )
-                analise_completa = response.choices[0].message.content
-                
-                # Extrair scores e seções
+                # Cada etapa só roda se ainda não foi concluída; o resultado fica salvo na sessão e no banco
                 try:
-                    import re
-                    
-                    # Extrair scores usando regex bilíngue - apenas 6 etapas
-                    if idioma == "English":
-                        score_patterns = {
-                            'warmer_score': r'Warmer.*?(\d+)/10',
-                            'reframe_score': r'Reframe.*?(\d+)/10',
-                            'rational_drowning_score': r'Rational Drowning.*?(\d+)/10',
-                            'emotional_impact_score': r'Emotional Impact.*?(\d+)/10',
-                            'new_way_score': r'New Way.*?(\d+)/10',
-                            'your_solution_score': r'Your Solution.*?(\d+)/10'
-                        }
-                    else:
-                        score_patterns = {
-                            'warmer_score': r'Warmer.*?(\d+)/10',
-                            'reframe_score': r'Reframe.*?(\d+)/10',
-                            'rational_drowning_score': r'Rational Drowning.*?(\d+)/10',
-                            'emotional_impact_score': r'Emotional Impact.*?(\d+)/10',
-                            'new_way_score': r'New Way.*?(\d+)/10',
-                            'your_solution_score': r'Your Solution.*?(\d+)/10'
-                        }
-                    
-                    scores = {}
-                    for key, pattern in score_patterns.items():
-                        match = re.search(pattern, analise_completa, re.IGNORECASE)
-                        scores[key] = int(match.group(1)) if match else 5
-                    
-                    # Extrair seções bilíngue
-                    sections = analise_completa.split("###")
-                    pontos_atencao = ""
-                    recomendacoes = ""
-                    
-                    for section in sections:
-                        section_upper = section.upper()
-                        if idioma == "English":
-                            if "ATTENTION POINTS" in section_upper:
-                                pontos_atencao = section.split("ATTENTION POINTS")[1].strip()
-                            elif "RECOMMENDATIONS" in section_upper:
-                                recomendacoes = section.split("RECOMMENDATIONS")[1].strip()
-                        else:
-                            if "PONTOS DE ATENÇÃO" in section_upper:
-                                pontos_atencao = section.split("PONTOS DE ATENÇÃO")[1].strip()
-                            elif "RECOMENDAÇÕES" in section_upper:
-                                recomendacoes = section.split("RECOMENDAÇÕES")[1].strip()
-                    
-                    if not pontos_atencao:
-                        pontos_atencao = "Ver análise completa"
-                    if not recomendacoes:
-                        recomendacoes = "Ver análise completa"
-                        
+                    with st.spinner("Analisando cold call com metodologia Conversa Híbrida... Este processo pode levar alguns minutos."), \
+                            span("pagina.analisar_cold_call", idioma=idioma, tamanho_audio=upload.size):
+                        run_stage(st.session_state, checkpoint_key, "uploaded",
+                                  lambda: {'file_name': audio_file.name, 'size': audio_file.size})
+                        texto_transcrito = run_stage(
+                            st.session_state, checkpoint_key, "transcribed", transcrever,
+                            on_cached=lambda: evitada("transcricao", TRANSCRIPTION_MODEL))
+                        analise_completa = run_stage(
+                            st.session_state, checkpoint_key, "analysed", analisar,
+                            on_cached=lambda: evitada("analise", ANALYSIS_MODEL))
+                        resultados = run_stage(st.session_state, checkpoint_key, "parsed", extrair_resultados)
+                        run_stage(st.session_state, checkpoint_key, "saved", salvar)
                 except Exception as e:
-                    st.error(f"Erro ao processar scores: {e}")
-                    scores = {key: 5 for key in ['warmer_score', 'reframe_score', 'rational_drowning_score', 'emotional_impact_score', 'new_way_score', 'your_solution_score']}
-                    pontos_atencao = "Erro no processamento"
-                    recomendacoes = "Ver análise completa"
-
-                # Salvar no banco
-                save_cold_call_analise(
-                    bdr_id_selecionado, 
-                    prospect_nome, 
-                    prospect_empresa, 
-                    scores,
-                    analise_completa, 
-                    pontos_atencao, 
-                    recomendacoes,
-                    insight_comercial
-                )
-                
-                st.success("✅ Análise Conversa Híbrida salva com sucesso!")
-                
-                # Exibir gráfico de radar
-                st.markdown("---")
-                st.markdown("## 📊 Performance - Conversa Híbrida (6 Etapas)")
-                
-                col1, col2 = st.columns([2, 1])
+                    etapa = last_completed_stage(st.session_state, checkpoint_key) or "nenhuma"
+                    st.error(f"❌ Erro durante a análise: {e}")
+                    st.info(f"💾 Progresso salvo até a etapa **{etapa}**. Clique em analisar novamente para retomar sem repetir as etapas concluídas.")
+                    st.stop()
                 
-                with col1:
-                    # Radar chart do matplotlib
-                    matplotlib_fig = create_matplotlib_radar_chart(scores, bdr_nome_selecionado)
-                    st.pyplot(matplotlib_fig)
-                
-                with col2:
-                    st.markdown("### 📈 Scores - 6 Etapas")
-                    
-                    # 6 Etapas da Conversa Híbrida
-                    hybrid_steps = ['warmer_score', 'reframe_score', 'rational_drowning_score', 'emotional_impact_score', 'new_way_score', 'your_solution_score']
-                    hybrid_labels = ['1. Warmer', '2. Reframe', '3. Rational Drowning', '4. Emotional Impact', '5. New Way', '6. Your Solution']
-                    
-                    for key, label in zip(hybrid_steps, hybrid_labels):
-                        value = scores[key]
-                        if value >= 8:
-                            st.success(f"**{label}:** {value}/10")
-                        elif value >= 6:
-                            st.warning(f"**{label}:** {value}/10")
-                        else:
-                            st.error(f"**{label}:** {value}/10")
+                if reaproveitamento == "analise":
+                    link_api_usage(checkpoint_key, cold_call_id=cold_call_anterior[3])
+                    st.success("✅ Análise existente reaproveitada, sem criar um novo cold call.")
+                else:
+                    st.success("✅ Análise Conversa Híbrida salva com sucesso!")
+                if evitadas:
+                    st.info(f"♻️ {len(evitadas)} chamada(s) à API evitada(s) reaproveitando resultados anteriores.")
+
+        # Exibir resultado salvo (persiste entre interações com a página)
+        checkpoint = load_checkpoint(st.session_state, checkpoint_key)
+        if checkpoint['stage'] == "saved":
+            analise_completa = checkpoint['outputs']['analysed']
+            scores = checkpoint['outputs']['parsed']['scores']
+
+            # Exibir gráfico de radar
+            st.markdown("---")
+            st.markdown("## 📊 Performance - Conversa Híbrida (6 Etapas)")
+            
+            col1, col2 = st.columns([2, 1])
+            
+            with col1:
+                # Radar chart (backend definido em CHART_BACKEND)
+                show_radar_chart(scores, bdr_nome_selecionado)
+            
+            with col2:
+                st.markdown("### 📈 Scores - 6 Etapas")
                 
-                # Exibir análise completa
-                st.markdown("---")
-                st.markdown("## 📋 Análise Completa - Conversa Híbrida")
-                st.markdown(analise_completa)
\ No newline at end of file
+                for key, label in zip(HYBRID_STEPS, HYBRID_LABELS):
+                    value = scores[key]
+                    if value >= 8:
+                        st.success(f"**{label}:** {value}/10")
+                    elif value >= 6:
+                        st.warning(f"**{label}:** {value}/10")
+                    else:
+                        st.error(f"**{label}:** {value}/10")
+            
+            # Exibir análise completa
+            st.markdown("---")
+            st.markdown("## 📋 Análise Completa - Conversa Híbrida")
+            st.markdown(analise_completa)
+
+            if st.button("🔁 Nova análise deste áudio", help="Descarta o resultado salvo em cache e permite analisar novamente"):
+                clear_checkpoint(st.session_state, checkpoint_key)
+                st.rerun()
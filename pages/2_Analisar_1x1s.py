@@ -1,11 +1,14 @@
 import streamlit as st
-from openai import OpenAI
-import sqlite3
-from datetime import datetime
-import os
 from config import OPENAI_API_KEY, ALLOWED_AUDIO_TYPES
-from database import get_bdrs, save_analise
+from database import get_bdrs, save_analise, link_api_usage, find_audio_recordings, save_audio_recording, get_analise
 from utils import validate_audio_file, validate_input_text
+from analysis import (TRANSCRIPTION_MODEL, ANALYSIS_MODEL, ONE_ON_ONE_SUMMARY_TITLE, ONE_ON_ONE_GOALS_TITLE,
+                      get_openai_client, transcribe_audio, run_analysis, build_one_on_one_prompt,
+                      parse_one_on_one_analysis)
+from audio import AUDIO_MIME_TYPES
+from workflow import load_audio_upload, make_checkpoint_key, describe_recording
+from tracing import span
+from usage import usage_recorder, record_cache_hit, budget_status, budget_message
 
 st.set_page_config(layout="wide")
 
@@ -20,6 +23,11 @@ if not OPENAI_API_KEY:
     st.error("⚠️ **API Key não configurada!** Por favor, configure a variável de ambiente OPENAI_API_KEY no Streamlit Cloud.")
     st.stop()
 
+# Alerta de orçamento mensal da API (MONTHLY_BUDGET_USD)
+gasto_mes, orcamento, nivel_orcamento = budget_status()
+if nivel_orcamento:
+    (st.error if nivel_orcamento == "excedido" else st.warning)(budget_message(gasto_mes, orcamento, nivel_orcamento))
+
 bdrs_list = get_bdrs()
 
 if not bdrs_list:
@@ -41,44 +49,63 @@ else:
             st.error(f"❌ {message}")
             st.stop()
 
-        st.audio(audio_file)
+        # Hash e formato real calculados uma vez por arquivo, sem copiar o áudio
+        upload = load_audio_upload(st.session_state, audio_file)
+        st.audio(audio_file, format=AUDIO_MIME_TYPES[upload.format])
+
+        # Mesmo áudio já processado antes (em qualquer página, por qualquer BDR): oferece reaproveitar
+        reaproveitamento = None
+        anteriores = find_audio_recordings(upload.sha256)
+        if anteriores:
+            st.warning("♻️ **Este áudio já foi processado:**\n" +
+                       "\n".join(f"- {describe_recording(anterior)}" for anterior in anteriores[:5]))
+            analise_anterior = next((anterior[4] for anterior in anteriores if anterior[4]), None)
+            transcricao_anterior = next((anterior[5] for anterior in anteriores if anterior[5]), None)
+            opcoes = {}
+            if analise_anterior:
+                opcoes["Usar a análise existente (sem chamadas à API)"] = "analise"
+            if transcricao_anterior:
+                opcoes["Reaproveitar a transcrição e gerar uma nova análise"] = "transcricao"
+            opcoes["Processar do zero"] = None
+            reaproveitamento = opcoes[st.radio("O que fazer com este áudio?", list(opcoes))]
 
         if st.button("Analisar Áudio"):
-            with st.spinner("Analisando reunião... Este processo pode levar alguns minutos."):
-                bdr_id_selecionado = bdr_map[bdr_nome_selecionado]
-                
-                client = OpenAI(api_key=OPENAI_API_KEY)
+            bdr_id_selecionado = bdr_map[bdr_nome_selecionado]
+            # Consumo da API registrado com uma chave do áudio + BDR, como nos cold calls
+            analysis_key = make_checkpoint_key("1x1", upload.sha256, bdr_id=bdr_id_selecionado)
+
+            if reaproveitamento == "analise":
+                for tipo, modelo in (("transcricao", TRANSCRIPTION_MODEL), ("analise", ANALYSIS_MODEL)):
+                    record_cache_hit(analysis_key, bdr_id_selecionado, tipo, modelo)
+                link_api_usage(analysis_key, analise_id=analise_anterior)
+                data, resumo, metas = get_analise(analise_anterior)
+                st.success(f"✅ Análise existente de {data} reaproveitada, sem criar uma nova análise.")
+                st.info("♻️ 2 chamada(s) à API evitada(s) reaproveitando resultados anteriores.")
+                st.write(f"{ONE_ON_ONE_SUMMARY_TITLE}\n{resumo}\n\n{ONE_ON_ONE_GOALS_TITLE}\n{metas}")
+                st.stop()
 
-                st.info("Iniciando análise... Isso pode levar um momento.")
+            with span("pagina.analisar_1x1", tamanho_audio=upload.size):
+                with st.spinner("Analisando reunião... Este processo pode levar alguns minutos."):
+                    client = get_openai_client()
+                    registrar_uso = usage_recorder(analysis_key, bdr_id_selecionado)
+
+                    st.info("Iniciando análise... Isso pode levar um momento.")
                 
-                transcription = client.audio.transcriptions.create(
-                    model="whisper-1", file=audio_file
-                )
-                texto_transcrito = transcription.text
-            
-            prompt_de_analise = f"""
-            Você é um coach de vendas... (seu prompt completo aqui)
+                    if reaproveitamento == "transcricao":
+                        texto_transcrito = transcricao_anterior
+                        record_cache_hit(analysis_key, bdr_id_selecionado, "transcricao", TRANSCRIPTION_MODEL)
+                    else:
+                        texto_transcrito = transcribe_audio(client, upload.as_upload(), on_usage=registrar_uso)
             
-            Transcrição:
-            \"\"\"
-            {texto_transcrito}
-            \"\"\"
-            ... (resto do seu prompt aqui, pedindo Resumo e Metas)
-            """
-            response = client.chat.completions.create(
-                model="gpt-4-turbo",
-                messages=[{"role": "user", "content": prompt_de_analise}]
-            )
-            analise_completa = response.choices[0].message.content
-            
-            try:
-                resumo = analise_completa.split("### 🎯 Metas e Próximos Passos")[0].replace("### 📋 Resumo da Reunião", "").strip()
-                metas = analise_completa.split("### 🎯 Metas e Próximos Passos")[1].strip()
-            except IndexError:
-                resumo = "Não foi possível extrair o resumo."
-                metas = analise_completa
-
-            save_analise(bdr_id_selecionado, resumo, metas)
+                analise_completa = run_analysis(client, build_one_on_one_prompt(texto_transcrito), on_usage=registrar_uso)
+                resumo, metas = parse_one_on_one_analysis(analise_completa)
+
+                analise_id = save_analise(bdr_id_selecionado, resumo, metas)
+                link_api_usage(analysis_key, analise_id=analise_id)
+                save_audio_recording(upload.sha256, upload.size, "1x1", bdr_id_selecionado, analise_id=analise_id,
+                                     transcricao=texto_transcrito)
             
             st.success("Análise salva com sucesso no banco de dados!")
+            if reaproveitamento == "transcricao":
+                st.info("♻️ 1 chamada(s) à API evitada(s) reaproveitando resultados anteriores.")
             st.write(analise_completa)
\ No newline at end of file
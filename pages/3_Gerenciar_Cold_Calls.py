@@ -1,165 +1,49 @@
+import math
 import streamlit as st
-import sqlite3
-from datetime import datetime
-import matplotlib.pyplot as plt
-import numpy as np
-from math import pi
+from config import HISTORY_PAGE_SIZE, TREND_WINDOW, TREND_MAX_POINTS
+from charts import show_radar_chart, show_radar_overlay, show_heatmap, show_trend_chart
+from database import (get_bdrs, get_bdr_cold_calls, count_bdr_cold_calls, get_hybrid_conversation_average_scores, get_stage_averages_by_bdr,
+                      get_rolling_score_trends, get_weekly_score_trends, delete_cold_call, delete_cold_calls,
+                      reassign_cold_calls, delete_all_cold_calls, set_include_archived)
+from analysis import HYBRID_STEPS, HYBRID_LABELS
+from analytics import stage_matrix, compare_stages, overall_means, scores_dict
+from snapshot import get_snapshot
+from filters import period_filter, company_filter, archive_filter
 
 st.set_page_config(layout="wide")
 
 st.title("📞 Gerenciar Cold Calls - Conversa Híbrida")
 st.markdown("**Visualize performance e histórico de análises da Conversa Híbrida (6 etapas) dos seus BDRs**")
 
-# --- Funções do Banco de Dados ---
-def get_bdr_cold_calls(bdr_id):
-    """Busca todos os cold calls da Conversa Híbrida de um BDR específico."""
-    conn = sqlite3.connect('gestao_bdrs.db')
-    cursor = conn.cursor()
-    cursor.execute(
-        """SELECT data, prospect_nome, prospect_empresa, 
-           warmer_score, reframe_score, rational_drowning_score, emotional_impact_score, 
-           new_way_score, your_solution_score, analise_completa, pontos_atencao, recomendacoes, insight_comercial, id 
-           FROM cold_calls WHERE bdr_id = ? ORDER BY data DESC""",
-        (bdr_id,)
-    )
-    cold_calls = cursor.fetchall()
-    conn.close()
-    return cold_calls
-
-def get_hybrid_conversation_average_scores(bdr_id=None):
-    """Calcula médias dos scores da Conversa Híbrida (6 etapas)."""
-    conn = sqlite3.connect('gestao_bdrs.db')
-    cursor = conn.cursor()
-    
-    if bdr_id:
-        cursor.execute(
-            """SELECT AVG(warmer_score), AVG(reframe_score), AVG(rational_drowning_score), 
-               AVG(emotional_impact_score), AVG(new_way_score), AVG(your_solution_score), COUNT(*) 
-               FROM cold_calls WHERE bdr_id = ?""", 
-            (bdr_id,)
-        )
-    else:
-        cursor.execute(
-            """SELECT AVG(warmer_score), AVG(reframe_score), AVG(rational_drowning_score), 
-               AVG(emotional_impact_score), AVG(new_way_score), AVG(your_solution_score), COUNT(*) 
-               FROM cold_calls"""
-        )
-    
-    result = cursor.fetchone()
-    conn.close()
-    
-    if result and result[6] > 0:  # Se há dados
-        return {
-            'warmer_score': round(result[0] or 0, 1),
-            'reframe_score': round(result[1] or 0, 1),
-            'rational_drowning_score': round(result[2] or 0, 1),
-            'emotional_impact_score': round(result[3] or 0, 1),
-            'new_way_score': round(result[4] or 0, 1),
-            'your_solution_score': round(result[5] or 0, 1),
-            'total_calls': result[6]
-        }
-    else:
-        return {
-            'warmer_score': 0,
-            'reframe_score': 0,
-            'rational_drowning_score': 0,
-            'emotional_impact_score': 0,
-            'new_way_score': 0,
-            'your_solution_score': 0,
-            'total_calls': 0
-        }
-
-def delete_cold_call(call_id):
-    """Deleta um cold call específico."""
-    conn = sqlite3.connect('gestao_bdrs.db')
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM cold_calls WHERE id = ?", (call_id,))
-    conn.commit()
-    conn.close()
-
-def create_matplotlib_radar_chart(scores, title):
-    """Cria um radar chart do matplotlib focado na Conversa Híbrida (6 etapas)."""
-    # Configurar o estilo escuro
-    plt.style.use('dark_background')
-    
-    # Categorias - 6 Etapas da Conversa Híbrida
-    categories = [
-        '1. Warmer\n(Aquecimento)',
-        '2. Reframe\n(Reenquadramento)', 
-        '3. Rational Drowning\n(Afogamento Racional)',
-        '4. Emotional Impact\n(Impacto Emocional)',
-        '5. New Way\n(Novo Caminho)',
-        '6. Your Solution\n(Sua Solução)'
-    ]
-    
-    values = [
-        scores['warmer_score'],
-        scores['reframe_score'], 
-        scores['rational_drowning_score'],
-        scores['emotional_impact_score'],
-        scores['new_way_score'],
-        scores['your_solution_score']
-    ]
-    
-    # Número de variáveis
-    N = len(categories)
-    
-    # Calcular ângulos para cada eixo
-    angles = [n / float(N) * 2 * pi for n in range(N)]
-    angles += angles[:1]  # Fechar o círculo
-    
-    # Adicionar primeiro valor no final para fechar o círculo
-    values += values[:1]
-    
-    # Criar figura
-    fig, ax = plt.subplots(figsize=(8, 8), subplot_kw=dict(projection='polar'))
-    fig.patch.set_facecolor('#1a1a1a')  # Fundo escuro
-    ax.set_facecolor('#1a1a1a')
-    
-    # Plotar o radar chart
-    ax.plot(angles, values, 'o-', linewidth=3, color='#00ffff', label=title)
-    ax.fill(angles, values, alpha=0.25, color='#00ffff')
-    
-    # Configurar eixos
-    ax.set_xticks(angles[:-1])
-    ax.set_xticklabels(categories, fontsize=10, color='white')
-    
-    # Configurar escala radial
-    ax.set_ylim(0, 10)
-    ax.set_yticks([0, 2, 4, 6, 8, 10])
-    ax.set_yticklabels(['0', '2', '4', '6', '8', '10'], fontsize=8, color='white')
-    ax.grid(True, color='#333333', alpha=0.3)
-    
-    # Adicionar valores nos pontos
-    for angle, value, category in zip(angles[:-1], values[:-1], categories):
-        ax.text(angle, value + 0.5, str(value), 
-                horizontalalignment='center', 
-                verticalalignment='center',
-                fontsize=9, 
-                color='white',
-                weight='bold')
-    
-    # Título
-    plt.title(title, size=14, color='white', weight='bold', pad=20)
-    
-    # Remover bordas
-    ax.spines['polar'].set_visible(False)
-    
-    plt.tight_layout()
-    return fig
+# --- Filtros (valem para todas as seções da página) ---
+st.sidebar.markdown("### 🔎 Filtros")
+since, until = period_filter()
+filtros = {'since': since, 'until': until, 'empresa': company_filter()}
+incluir_arquivo = archive_filter()
+if any(valor is not None for valor in filtros.values()):
+    SEM_ANALISES = "Nenhuma análise da Conversa Híbrida encontrada para os filtros selecionados."
+else:
+    SEM_ANALISES = "Nenhuma análise da Conversa Híbrida encontrada ainda."
+
+def medias_por_bdr(filtros, incluir_arquivo):
+    """Médias por BDR com os filtros da página: (ids, nomes, contagens, matriz, quantidades).
 
+    Período vem do snapshot em memória; o filtro por empresa e o histórico arquivado consultam o banco.
+    """
+    if filtros['empresa'] is None and not incluir_arquivo:
+        return get_snapshot().stage_matrix(dict(get_bdrs()), filtros['since'], filtros['until'])
+    return stage_matrix(get_stage_averages_by_bdr(**filtros))
 
 # --- Estatísticas Gerais Conversa Híbrida ---
 st.subheader("📊 Performance Geral - Conversa Híbrida")
-stats_gerais = get_hybrid_conversation_average_scores()
+stats_gerais = get_hybrid_conversation_average_scores(**filtros)
 
 if stats_gerais['total_calls'] > 0:
     col1, col2 = st.columns([2, 1])
     
     with col1:
-        # Radar chart do matplotlib
-        matplotlib_fig_geral = create_matplotlib_radar_chart(stats_gerais, "Performance Média Geral")
-        st.pyplot(matplotlib_fig_geral)
+        # Radar chart (backend definido em CHART_BACKEND)
+        show_radar_chart(stats_gerais, "Performance Média Geral", size=8)
     
     with col2:
         st.markdown("### 📈 Médias - 6 Etapas")
@@ -167,10 +51,7 @@ if stats_gerais['total_calls'] > 0:
         st.markdown("---")
         
         # 6 Etapas da Conversa Híbrida
-        hybrid_steps = ['warmer_score', 'reframe_score', 'rational_drowning_score', 'emotional_impact_score', 'new_way_score', 'your_solution_score']
-        hybrid_labels = ['1. Warmer', '2. Reframe', '3. Rational Drowning', '4. Emotional Impact', '5. New Way', '6. Your Solution']
-        
-        for key, label in zip(hybrid_steps, hybrid_labels):
+        for key, label in zip(HYBRID_STEPS, HYBRID_LABELS):
             value = stats_gerais[key]
             if value >= 7:
                 st.success(f"**{label}:** {value}/10")
@@ -179,128 +60,242 @@ if stats_gerais['total_calls'] > 0:
             else:
                 st.error(f"**{label}:** {value}/10")
 else:
-    st.info("Nenhuma análise da Conversa Híbrida encontrada ainda.")
+    st.info(SEM_ANALISES)
+
+st.divider()
+
+# --- Comparação entre BDRs ---
+st.subheader("🆚 Comparação entre BDRs")
+
+# Médias de todos os BDRs calculadas de uma vez; as comparações são vetorizadas
+ids_bdrs, nomes_bdrs, contagens_bdrs, matriz_bdrs, quantidades_bdrs = medias_por_bdr(filtros, incluir_arquivo)
+
+if len(nomes_bdrs) < 2:
+    st.info("É preciso ao menos dois BDRs com análises para comparar.")
+else:
+    comparacao = compare_stages(matriz_bdrs, quantidades_bdrs)
+    indice_por_nome = {nome: i for i, nome in enumerate(nomes_bdrs)}
+
+    col_selecao, col_metrica = st.columns([3, 1])
+    with col_selecao:
+        selecionados = st.multiselect(
+            "BDRs para sobrepor no radar:",
+            options=nomes_bdrs,
+            default=nomes_bdrs[:3],
+            max_selections=8
+        )
+    with col_metrica:
+        metrica = st.radio("Heatmap:", ["Z-score", "Diferença"], horizontal=True,
+                           help="Z-score: diferença para a média do time dividida pelo desvio padrão entre BDRs")
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        series = [("Média do Time", scores_dict(comparacao['team_mean']))]
+        series += [(nome, scores_dict(matriz_bdrs[indice_por_nome[nome]])) for nome in selecionados]
+        show_radar_overlay(series, "Comparação - Conversa Híbrida", size=8)
+
+    with col2:
+        valores = comparacao['zscore'] if metrica == "Z-score" else comparacao['delta']
+        show_heatmap(nomes_bdrs, HYBRID_LABELS, valores, f"BDR x Etapa ({metrica} vs média do time)")
 
 st.divider()
 
 # --- Listar Cold Calls por BDR ---
 st.subheader("👥 Performance Individual por BDR")
 
-conn = sqlite3.connect('gestao_bdrs.db')
-cursor = conn.cursor()
-cursor.execute("SELECT id, nome FROM bdrs ORDER BY nome")
-bdrs = cursor.fetchall()
-conn.close()
+def deletar_cold_call(call_id):
+    """Callback do botão de exclusão: remove o call antes do rerun do fragmento."""
+    delete_cold_call(call_id)
+    st.session_state['cold_call_deletado'] = True
 
-if not bdrs:
-    st.info("Nenhum BDR cadastrado ainda.")
-else:
-    for bdr_id, nome in bdrs:
-        cold_calls = get_bdr_cold_calls(bdr_id)
-        scores_bdr = get_hybrid_conversation_average_scores(bdr_id)
+def aplicar_em_lote(acao, criterios, destino, chave_confirmacao):
+    """Callback das ações em lote: remove ou move os calls (uma única transação) antes do rerun do fragmento."""
+    if acao == "mover":
+        total = reassign_cold_calls(destino, **criterios)
+        st.session_state['acao_em_lote'] = f"{total} cold call(s) movido(s) para {dict(get_bdrs())[destino]}!"
+    else:
+        total = delete_cold_calls(**criterios)
+        st.session_state['acao_em_lote'] = f"{total} cold call(s) deletado(s)!"
+    st.session_state[chave_confirmacao] = False
+
+@st.fragment
+def performance_individual(filtros, incluir_arquivo):
+    """Seção de um BDR por vez: só consulta e renderiza o BDR selecionado.
+
+    Como é um fragmento, trocar de BDR, de página ou deletar um call
+    reexecuta apenas esta seção, e não o dashboard inteiro.
+    """
+    # A reexecução do fragmento não passa pelo archive_filter: a escolha da barra lateral vem como argumento
+    set_include_archived(incluir_arquivo)
+    if st.session_state.pop('cold_call_deletado', False):
+        st.toast("Cold call deletado!")
+    mensagem = st.session_state.pop('acao_em_lote', None)
+    if mensagem:
+        st.toast(mensagem)
+
+    bdrs = get_bdrs()
+    if not bdrs:
+        st.info("Nenhum BDR cadastrado ainda.")
+        return
+
+    # Resumo de todos os BDRs com os filtros da página (para o seletor)
+    ids_resumo, _, contagens_resumo, medias_resumo, _ = medias_por_bdr(filtros, incluir_arquivo)
+    resumo = {bdr_id: (int(total), float(media))
+              for bdr_id, total, media in zip(ids_resumo.tolist(), contagens_resumo, overall_means(medias_resumo))}
+    sem_analises = [nome for bdr_id, nome in bdrs if bdr_id not in resumo]
+    bdrs_com_analises = [(bdr_id, nome) for bdr_id, nome in bdrs if bdr_id in resumo]
+
+    if sem_analises:
+        st.caption(f"Sem análises da Conversa Híbrida: {', '.join(sem_analises)}")
+    if not bdrs_com_analises:
+        st.info(SEM_ANALISES)
+        return
+
+    def rotulo_bdr(bdr):
+        total_calls, media_geral = resumo[bdr[0]]
+        return f"🎯 {bdr[1]} - {total_calls} análises (Média: {media_geral:.1f}/10)"
+
+    bdr_id, nome = st.selectbox("Selecione o BDR:", options=bdrs_com_analises, format_func=rotulo_bdr)
+
+    scores_bdr = get_hybrid_conversation_average_scores(bdr_id, **filtros)
+    if scores_bdr['total_calls'] == 0:
+        st.info("Nenhuma análise da Conversa Híbrida para este BDR.")
+        return
+
+    # Performance da Conversa Híbrida do BDR
+    col1, col2 = st.columns([2, 1])
+    
+    with col1:
+        # Radar chart (backend definido em CHART_BACKEND)
+        show_radar_chart(scores_bdr, f"Performance Conversa Híbrida - {nome}", size=8)
+    
+    with col2:
+        st.markdown("### 📊 Scores Médios - 6 Etapas")
         
-        # Header do BDR com estatísticas da Conversa Híbrida
-        if scores_bdr['total_calls'] > 0:
-            # Calcular média geral
-            all_scores = [scores_bdr[key] for key in scores_bdr.keys() if key != 'total_calls']
-            media_geral = sum(all_scores) / len(all_scores)
+        for key, label in zip(HYBRID_STEPS, HYBRID_LABELS):
+            value = scores_bdr[key]
+            if value >= 7:
+                st.success(f"**{label}:** {value}/10")
+            elif value >= 5:
+                st.warning(f"**{label}:** {value}/10")
+            else:
+                st.error(f"**{label}:** {value}/10")
+    
+    # Evolução dos scores (médias móveis ou semanais)
+    st.markdown("### 📈 Evolução dos Scores")
+    modo = st.radio("Agrupar por:", [f"Últimas {TREND_WINDOW} calls", "Semana"], horizontal=True,
+                    key=f"tendencia_{bdr_id}", help="Média móvel das últimas calls ou média de cada semana")
+    if modo == "Semana":
+        linhas = get_weekly_score_trends(bdr_id, limit=TREND_MAX_POINTS, **filtros)
+    else:
+        linhas = get_rolling_score_trends(bdr_id, window=TREND_WINDOW, limit=TREND_MAX_POINTS, **filtros)
+
+    # As duas consultas retornam (rótulo, contagem/id, 6 médias)
+    if len(linhas) < 2:
+        st.info("São necessários ao menos dois pontos para mostrar a evolução.")
+    else:
+        eixo_x = [linha[0] for linha in linhas]
+        series = {label: [round(linha[2 + i], 1) for linha in linhas] for i, label in enumerate(HYBRID_LABELS)}
+        show_trend_chart(eixo_x, series, f"Evolução - {nome} ({modo})")
+    
+    st.markdown("---")
+
+    # Lista paginada de cold calls da Conversa Híbrida
+    total_historico = count_bdr_cold_calls(bdr_id, **filtros)
+    total_paginas = max(1, math.ceil(total_historico / HISTORY_PAGE_SIZE))
+    pagina = st.number_input("Página", min_value=1, max_value=total_paginas, value=1, key=f"pagina_calls_{bdr_id}")
+    inicio = (pagina - 1) * HISTORY_PAGE_SIZE
+    cold_calls = get_bdr_cold_calls(bdr_id, limit=HISTORY_PAGE_SIZE, offset=inicio, **filtros)
+    st.caption(f"Mostrando {inicio + 1}–{inicio + len(cold_calls)} de {total_historico} análises")
+
+    for data, prospect_nome, prospect_empresa, warmer, reframe, rational_drowning, emotional_impact, new_way, your_solution, analise_completa, pontos_atencao, recomendacoes, insight_comercial, call_id in cold_calls:
+        
+        # Container para cada cold call da Conversa Híbrida
+        call_container = st.container()
+        with call_container:
+            # Header do call
+            col_info, col_delete = st.columns([4, 1])
+            
+            with col_info:
+                st.markdown(f"**🏢 {prospect_empresa} - {prospect_nome}**")
+                st.caption(f"📅 {data}")
+                if insight_comercial:
+                    st.caption(f"💡 **Insight Comercial:** {insight_comercial}")
+            
+            with col_delete:
+                st.button("🗑️", key=f"delete_{call_id}", help="Deletar este cold call",
+                          on_click=deletar_cold_call, args=(call_id,))
+                st.checkbox("Selecionar", key=f"selecionar_{call_id}", help="Incluir nas ações em lote")
+            
+            # Scores da Conversa Híbrida individuais
+            st.markdown("**📊 Scores - 6 Etapas:**")
+            
+            # 6 Etapas da Conversa Híbrida
+            colunas = st.columns(6)
+            hybrid_scores = [warmer, reframe, rational_drowning, emotional_impact, new_way, your_solution]
             
-            with st.expander(f"🎯 {nome} - {scores_bdr['total_calls']} análises (Média: {media_geral:.1f}/10)", expanded=False):
-                
-                if not cold_calls:
-                    st.info("Nenhuma análise da Conversa Híbrida para este BDR.")
-                else:
-                    # Performance da Conversa Híbrida do BDR
-                    col1, col2 = st.columns([2, 1])
-                    
-                    with col1:
-                        # Radar chart do matplotlib
-                        matplotlib_fig_bdr = create_matplotlib_radar_chart(scores_bdr, f"Performance Conversa Híbrida - {nome}")
-                        st.pyplot(matplotlib_fig_bdr)
-                    
-                    with col2:
-                        st.markdown("### 📊 Scores Médios - 6 Etapas")
-                        
-                        # 6 Etapas da Conversa Híbrida
-                        hybrid_steps = ['warmer_score', 'reframe_score', 'rational_drowning_score', 'emotional_impact_score', 'new_way_score', 'your_solution_score']
-                        hybrid_labels = ['1. Warmer', '2. Reframe', '3. Rational Drowning', '4. Emotional Impact', '5. New Way', '6. Your Solution']
-                        
-                        for key, label in zip(hybrid_steps, hybrid_labels):
-                            value = scores_bdr[key]
-                            if value >= 7:
-                                st.success(f"**{label}:** {value}/10")
-                            elif value >= 5:
-                                st.warning(f"**{label}:** {value}/10")
-                            else:
-                                st.error(f"**{label}:** {value}/10")
-                    
-                    st.markdown("---")
-                    
-                    # Lista de cold calls da Conversa Híbrida
-                    for data, prospect_nome, prospect_empresa, warmer, reframe, rational_drowning, emotional_impact, new_way, your_solution, analise_completa, pontos_atencao, recomendacoes, insight_comercial, call_id in cold_calls:
-                        
-                        # Container para cada cold call da Conversa Híbrida
-                        call_container = st.container()
-                        with call_container:
-                            # Header do call
-                            col_info, col_delete = st.columns([4, 1])
-                            
-                            with col_info:
-                                st.markdown(f"**🏢 {prospect_empresa} - {prospect_nome}**")
-                                st.caption(f"📅 {data}")
-                                if insight_comercial:
-                                    st.caption(f"💡 **Insight Comercial:** {insight_comercial}")
-                            
-                            with col_delete:
-                                if st.button("🗑️", key=f"delete_{call_id}", help="Deletar este cold call"):
-                                    delete_cold_call(call_id)
-                                    st.success("Cold call deletado!")
-                                    st.rerun()
-                            
-                            # Scores da Conversa Híbrida individuais
-                            st.markdown("**📊 Scores - 6 Etapas:**")
-                            
-                            # 6 Etapas da Conversa Híbrida
-                            col1, col2, col3, col4, col5, col6 = st.columns(6)
-                            hybrid_steps = [warmer, reframe, rational_drowning, emotional_impact, new_way, your_solution]
-                            hybrid_labels = ["1. Warmer", "2. Reframe", "3. Rational Drowning", "4. Emotional Impact", "5. New Way", "6. Your Solution"]
-                            
-                            for col, score, label in zip([col1, col2, col3, col4, col5, col6], hybrid_steps, hybrid_labels):
-                                with col:
-                                    if score >= 7:
-                                        col.success(f"**{label}**\n{score}/10")
-                                    elif score >= 5:
-                                        col.warning(f"**{label}**\n{score}/10")
-                                    else:
-                                        col.error(f"**{label}**\n{score}/10")
-                            
-                            # Conteúdo detalhado em tabs
-                            tab1, tab2, tab3 = st.tabs(["📋 Análise Completa", "⚠️ Pontos de Atenção", "💡 Recomendações"])
-                            
-                            with tab1:
-                                st.markdown(analise_completa)
-                            
-                            with tab2:
-                                st.markdown(pontos_atencao)
-                            
-                            with tab3:
-                                st.markdown(recomendacoes)
-                            
-                            st.divider()
-        else:
-            st.info(f"Nenhuma análise da Conversa Híbrida encontrada para {nome}.")
+            for col, score, label in zip(colunas, hybrid_scores, HYBRID_LABELS):
+                with col:
+                    if score >= 7:
+                        col.success(f"**{label}**\n{score}/10")
+                    elif score >= 5:
+                        col.warning(f"**{label}**\n{score}/10")
+                    else:
+                        col.error(f"**{label}**\n{score}/10")
+            
+            # Conteúdo detalhado em tabs
+            tab1, tab2, tab3 = st.tabs(["📋 Análise Completa", "⚠️ Pontos de Atenção", "💡 Recomendações"])
+            
+            with tab1:
+                st.markdown(analise_completa)
+            
+            with tab2:
+                st.markdown(pontos_atencao)
+            
+            with tab3:
+                st.markdown(recomendacoes)
+            
+            st.divider()
+
+    # Ações em lote: os calls marcados nesta página ou todos os do BDR com os filtros da página
+    selecionados = [call[13] for call in cold_calls if st.session_state.get(f"selecionar_{call[13]}")]
+    with st.expander("🧹 Ações em lote"):
+        escopo = st.radio("Aplicar a:", ["selecao", "filtros"], key=f"escopo_lote_{bdr_id}", format_func=lambda opcao: (
+            f"Calls selecionados nesta página ({len(selecionados)})" if opcao == "selecao"
+            else f"Todos os calls de {nome} com os filtros da página (inclusive os arquivados)"))
+        acao = st.radio("Ação:", ["remover", "mover"], horizontal=True, key=f"acao_lote_{bdr_id}",
+                        format_func=lambda opcao: "🗑️ Remover" if opcao == "remover" else "🔀 Mover para outro BDR")
+        destino = None
+        if acao == "mover":
+            outros = [bdr for bdr in bdrs if bdr[0] != bdr_id]
+            if outros:
+                destino = st.selectbox("BDR de destino:", options=outros, format_func=lambda bdr: bdr[1],
+                                       key=f"destino_lote_{bdr_id}")[0]
+            else:
+                st.info("Cadastre outro BDR para mover os calls.")
+        criterios = {'ids': selecionados} if escopo == "selecao" else {'bdr_id': bdr_id, **filtros}
+        chave_confirmacao = f"confirmar_lote_{bdr_id}"
+        confirmado = st.checkbox("Confirmo a ação em lote", key=chave_confirmacao)
+        st.button("Aplicar", key=f"aplicar_lote_{bdr_id}", type="primary", on_click=aplicar_em_lote,
+                  args=(acao, criterios, destino, chave_confirmacao),
+                  disabled=not confirmado or (escopo == "selecao" and not selecionados) or (acao == "mover" and destino is None))
+
+performance_individual(filtros, incluir_arquivo)
 
 # --- Seção de Limpeza ---
+def limpar_todos():
+    """Callback da limpeza: remove tudo e desmarca a confirmação antes do rerun."""
+    delete_all_cold_calls()
+    st.session_state['confirmar_limpeza'] = False
+    st.session_state['limpeza_feita'] = True
+
 st.markdown("---")
 with st.expander("⚠️ Zona de Perigo"):
     st.warning("**Atenção:** As ações abaixo são irreversíveis!")
     
-    if st.button("🗑️ Limpar TODOS os Cold Calls", type="secondary"):
-        if st.button("⚠️ CONFIRMAR EXCLUSÃO DE TODOS OS COLD CALLS"):
-            conn = sqlite3.connect('gestao_bdrs.db')
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM cold_calls")
-            conn.commit()
-            conn.close()
-            st.success("Todos os cold calls foram removidos!")
-            st.rerun()
\ No newline at end of file
+    if st.session_state.pop('limpeza_feita', False):
+        st.success("Todos os cold calls foram removidos!")
+    # Confirmação por checkbox: um botão dentro de outro nunca dispara (o primeiro volta a False no rerun)
+    confirmar_limpeza = st.checkbox("⚠️ Confirmo a exclusão de TODOS os cold calls", key="confirmar_limpeza")
+    st.button("🗑️ Limpar TODOS os Cold Calls", type="secondary", disabled=not confirmar_limpeza, on_click=limpar_todos)
\ No newline at end of file
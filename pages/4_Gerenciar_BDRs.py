@@ -1,24 +1,21 @@
+import math
 import streamlit as st
-import sqlite3
+from config import HISTORY_PAGE_SIZE
+from database import (get_bdrs, get_bdr_analyses, count_bdr_analyses, add_bdr, update_bdr_nome, delete_bdr,
+                      delete_bdrs, merge_bdrs, rename_bdrs, get_table_counts, set_include_archived)
 from utils import validate_input_text
+from storage import IntegrityError
+from filters import period_filter, archive_filter
 
 st.set_page_config(layout="wide")
 
 st.title("👥 Gerenciar BDRs")
 st.markdown("**Cadastre, edite e gerencie seus BDRs e visualize o histórico de análises**")
 
-# --- Funções do Banco de Dados ---
-def get_bdr_analyses(bdr_id):
-    """Busca todas as análises de um BDR específico."""
-    conn = sqlite3.connect('gestao_bdrs.db')
-    cursor = conn.cursor()
-    cursor.execute(
-        "SELECT data, resumo, metas FROM analises WHERE bdr_id = ? ORDER BY data DESC",
-        (bdr_id,)
-    )
-    analyses = cursor.fetchall()
-    conn.close()
-    return analyses
+# --- Filtros ---
+st.sidebar.markdown("### 🔎 Filtros")
+since, until = period_filter()
+incluir_arquivo = archive_filter()
 
 # --- Adicionar Novo BDR ---
 with st.expander("➕ Adicionar Novo BDR"):
@@ -33,14 +30,10 @@ with st.expander("➕ Adicionar Novo BDR"):
                 st.stop()
             else:
                 try:
-                    conn = sqlite3.connect('gestao_bdrs.db')
-                    cursor = conn.cursor()
-                    cursor.execute("INSERT INTO bdrs (nome) VALUES (?)", (novo_bdr_nome,))
-                    conn.commit()
-                    conn.close()
+                    add_bdr(novo_bdr_nome)
                     st.success(f"BDR '{novo_bdr_nome}' adicionado com sucesso!")
                     st.rerun()
-                except sqlite3.IntegrityError:
+                except IntegrityError:
                     st.error(f"Erro: O BDR '{novo_bdr_nome}' já existe.")
         else:
             st.warning("Por favor, digite o nome do BDR.")
@@ -50,94 +43,133 @@ st.divider()
 # --- Listar e Gerenciar BDRs Existentes ---
 st.subheader("📋 BDRs Cadastrados")
 
-conn = sqlite3.connect('gestao_bdrs.db')
-cursor = conn.cursor()
-cursor.execute("SELECT id, nome FROM bdrs ORDER BY nome")
-bdrs = cursor.fetchall()
-conn.close()
+bdrs = get_bdrs()
+
+@st.fragment
+def gerenciar_bdr(bdrs, since=None, until=None, incluir_arquivo=False):
+    """Histórico e edição de um BDR por vez.
+
+    Só o BDR selecionado é consultado; trocar de BDR ou de página do
+    histórico reexecuta apenas este fragmento.
+    """
+    # A reexecução do fragmento não passa pelo archive_filter: a escolha da barra lateral vem como argumento
+    set_include_archived(incluir_arquivo)
+    bdr_id, nome = st.selectbox("Selecione o BDR:", options=bdrs, format_func=lambda bdr: bdr[1])
+
+    # --- Visualizar Histórico ---
+    st.markdown("**📊 Histórico de Análises**")
+    total_analises = count_bdr_analyses(bdr_id, since, until)
+    if total_analises == 0:
+        st.info("Nenhuma análise encontrada para este BDR.")
+    else:
+        total_paginas = max(1, math.ceil(total_analises / HISTORY_PAGE_SIZE))
+        pagina = st.number_input("Página", min_value=1, max_value=total_paginas, value=1, key=f"pagina_analises_{bdr_id}")
+        inicio = (pagina - 1) * HISTORY_PAGE_SIZE
+        analyses = get_bdr_analyses(bdr_id, limit=HISTORY_PAGE_SIZE, offset=inicio, since=since, until=until)
+        st.caption(f"Mostrando {inicio + 1}–{inicio + len(analyses)} de {total_analises} análises")
+        for data, resumo, metas in analyses:
+            st.markdown(f"**Data:** {data}")
+            st.markdown("**Resumo:**")
+            st.info(resumo)
+            st.markdown("**Metas e Próximos Passos:**")
+            st.warning(metas)
+            st.divider()
+    
+    # --- Editar Nome ---
+    st.markdown("**✏️ Editar ou Remover BDR**")
+    novo_nome = st.text_input("Editar nome", value=nome, key=f"edit_{bdr_id}", max_chars=50, help="Apenas letras, números, espaços e acentos")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("Salvar Alterações", key=f"salvar_{bdr_id}"):
+            # Validar nome do BDR
+            nome_valid, nome_msg = validate_input_text(novo_nome, "Nome do BDR", 50)
+            
+            if not nome_valid:
+                st.error(f"❌ {nome_msg}")
+                st.stop()
+            else:
+                try:
+                    update_bdr_nome(bdr_id, novo_nome)
+                    st.success("Nome atualizado com sucesso!")
+                    st.rerun()
+                except IntegrityError:
+                    st.error(f"Erro: O BDR '{novo_nome}' já existe.")
+    with col2:
+        if st.button("Remover BDR", key=f"remover_{bdr_id}"):
+            delete_bdr(bdr_id)
+            st.success(f"BDR '{nome}' e seu histórico foram removidos.")
+            st.rerun()
 
 if not bdrs:
     st.info("Nenhum BDR cadastrado ainda.")
 else:
-    for bdr_id, nome in bdrs:
-        with st.expander(nome):  # Cada BDR agora é um menu expansível
-            
-            # --- Visualizar Histórico ---
-            st.markdown("**📊 Histórico de Análises**")
-            analyses = get_bdr_analyses(bdr_id)
-            if not analyses:
-                st.info("Nenhuma análise encontrada para este BDR.")
+    gerenciar_bdr(bdrs, since, until, incluir_arquivo)
+
+# --- Ações em Lote (cada uma em uma única transação) ---
+if bdrs:
+    with st.expander("🧩 Ações em Lote"):
+        aba_unir, aba_renomear, aba_remover = st.tabs(["🔗 Unir BDRs", "✏️ Renomear vários", "🗑️ Remover vários"])
+
+        with aba_unir:
+            if len(bdrs) < 2:
+                st.info("É preciso ao menos dois BDRs para unir.")
             else:
-                for data, resumo, metas in analyses:
-                    st.markdown(f"**Data:** {data}")
-                    st.markdown("**Resumo:**")
-                    st.info(resumo)
-                    st.markdown("**Metas e Próximos Passos:**")
-                    st.warning(metas)
-                    st.divider()
-            
-            # --- Editar Nome ---
-            st.markdown("**✏️ Editar ou Remover BDR**")
-            novo_nome = st.text_input("Editar nome", value=nome, key=f"edit_{bdr_id}", max_chars=50, help="Apenas letras, números, espaços e acentos")
-            
-            col1, col2 = st.columns(2)
-            with col1:
-                if st.button("Salvar Alterações", key=f"salvar_{bdr_id}"):
-                    # Validar nome do BDR
-                    nome_valid, nome_msg = validate_input_text(novo_nome, "Nome do BDR", 50)
-                    
-                    if not nome_valid:
-                        st.error(f"❌ {nome_msg}")
-                        st.stop()
-                    else:
+                st.caption("Para cadastros duplicados: cold calls, análises 1:1, gravações e consumo da API passam "
+                           "para o BDR mantido.")
+                origem = st.selectbox("BDR duplicado (será removido):", options=bdrs, format_func=lambda bdr: bdr[1],
+                                      key="unir_origem")
+                destino = st.selectbox("Manter como:", options=[bdr for bdr in bdrs if bdr != origem],
+                                       format_func=lambda bdr: bdr[1], key="unir_destino")
+                confirmar_uniao = st.checkbox(f"Confirmo: o histórico de '{origem[1]}' passa para '{destino[1]}' "
+                                              f"e '{origem[1]}' é removido", key="confirmar_uniao")
+                if st.button("Unir BDRs", disabled=not confirmar_uniao):
+                    movidos = merge_bdrs(origem[0], destino[0])
+                    st.success(f"{movidos['cold_calls']} cold calls e {movidos['analises']} análises 1:1 passaram "
+                               f"para '{destino[1]}'.")
+                    st.rerun()
+
+        with aba_renomear:
+            with st.form("renomear_em_lote"):
+                novos_nomes = {bdr_id: st.text_input(f"Nome de {nome}", value=nome, max_chars=50, key=f"renomear_{bdr_id}")
+                               for bdr_id, nome in bdrs}
+                if st.form_submit_button("Salvar nomes"):
+                    nomes_atuais = dict(bdrs)
+                    alterados = {bdr_id: novo for bdr_id, novo in novos_nomes.items() if novo != nomes_atuais[bdr_id]}
+                    erros = [msg for valid, msg in (validate_input_text(novo, "Nome do BDR", 50) for novo in alterados.values())
+                             if not valid]
+                    if erros:
+                        st.error(f"❌ {erros[0]}")
+                    elif alterados:
                         try:
-                            conn = sqlite3.connect('gestao_bdrs.db')
-                            cursor = conn.cursor()
-                            cursor.execute("UPDATE bdrs SET nome = ? WHERE id = ?", (novo_nome, bdr_id))
-                            conn.commit()
-                            conn.close()
-                            st.success("Nome atualizado com sucesso!")
+                            rename_bdrs(alterados)
+                            st.success(f"{len(alterados)} nome(s) atualizado(s) com sucesso!")
                             st.rerun()
-                        except sqlite3.IntegrityError:
-                            st.error(f"Erro: O BDR '{novo_nome}' já existe.")
-            with col2:
-                if st.button("Remover BDR", key=f"remover_{bdr_id}"):
-                    conn = sqlite3.connect('gestao_bdrs.db')
-                    cursor = conn.cursor()
-                    # Cuidado: aqui também deletaríamos as análises associadas ou reatribuiríamos
-                    cursor.execute("DELETE FROM analises WHERE bdr_id = ?", (bdr_id,))
-                    cursor.execute("DELETE FROM cold_calls WHERE bdr_id = ?", (bdr_id,))
-                    cursor.execute("DELETE FROM bdrs WHERE id = ?", (bdr_id,))
-                    conn.commit()
-                    conn.close()
-                    st.success(f"BDR '{nome}' e seu histórico foram removidos.")
-                    st.rerun()
+                        except IntegrityError:
+                            st.error("Erro: os nomes precisam ser únicos; nenhum BDR foi renomeado.")
+
+        with aba_remover:
+            remover = st.multiselect("BDRs a remover (com todo o histórico):", options=bdrs, format_func=lambda bdr: bdr[1],
+                                     key="remover_em_lote")
+            confirmar_remocao = st.checkbox(f"Confirmo a remoção de {len(remover)} BDR(s) e de todo o seu histórico",
+                                            key="confirmar_remocao")
+            if st.button("Remover BDRs", disabled=not (remover and confirmar_remocao)):
+                removidos = delete_bdrs([bdr[0] for bdr in remover])
+                st.success(f"{removidos} BDR(s) e seu histórico foram removidos.")
+                st.rerun()
 
 # --- Estatísticas Gerais ---
 st.markdown("---")
 st.subheader("📈 Estatísticas Gerais")
 
-conn = sqlite3.connect('gestao_bdrs.db')
-cursor = conn.cursor()
-
-# Contar BDRs
-cursor.execute("SELECT COUNT(*) FROM bdrs")
-total_bdrs = cursor.fetchone()[0]
-
-# Contar análises de 1:1
-cursor.execute("SELECT COUNT(*) FROM analises")
-total_analises_1x1 = cursor.fetchone()[0]
-
-# Contar análises de cold calls
-cursor.execute("SELECT COUNT(*) FROM cold_calls")
-total_analises_cold_calls = cursor.fetchone()[0]
-
-conn.close()
+totais = get_table_counts(since, until)
+if since is not None or until is not None:
+    st.caption("Análises contadas dentro do período selecionado.")
 
 col1, col2, col3 = st.columns(3)
 with col1:
-    st.metric("Total de BDRs", total_bdrs)
+    st.metric("Total de BDRs", totais['bdrs'])
 with col2:
-    st.metric("Análises 1:1", total_analises_1x1)
+    st.metric("Análises 1:1", totais['analises'])
 with col3:
-    st.metric("Análises Cold Calls", total_analises_cold_calls)
\ No newline at end of file
+    st.metric("Análises Cold Calls", totais['cold_calls'])
\ No newline at end of file
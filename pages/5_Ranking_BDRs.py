@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta
+import streamlit as st
+from database import get_leaderboard, get_stage_top_k, get_score_changes
+from analysis import HYBRID_STEPS, HYBRID_LABELS
+
+st.set_page_config(layout="wide")
+
+st.title("🏆 Ranking de BDRs - Conversa Híbrida")
+st.markdown("**Quem lidera cada etapa da Conversa Híbrida e quem mais evoluiu ou regrediu no período**")
+
+MEDALHAS = {1: "🥇", 2: "🥈", 3: "🥉"}
+PERIODOS = ["Este mês", "Últimos 30 dias", "Últimos 90 dias", "Todo o período"]
+
+def intervalo_do_periodo(periodo, agora):
+    """Retorna (início do período anterior, início do período) para comparação."""
+    if periodo == "Este mês":
+        inicio = agora.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        return (inicio - timedelta(days=1)).replace(day=1), inicio
+    if periodo == "Todo o período":
+        return None, None
+    dias = 30 if periodo == "Últimos 30 dias" else 90
+    inicio = agora - timedelta(days=dias)
+    return inicio - timedelta(days=dias), inicio
+
+def mostrar_ranking(linhas):
+    """Exibe as linhas (posição, bdr_id, nome, calls, média) de um ranking."""
+    if not linhas:
+        st.caption("Nenhum BDR atinge o mínimo de calls no período.")
+        return
+    for posicao, _, nome, calls, media in linhas:
+        st.markdown(f"{MEDALHAS.get(posicao, f'**{posicao}º**')} **{nome}** — {media:.1f}/10 ({calls} calls)")
+
+# --- Filtros ---
+col1, col2, col3, col4 = st.columns(4)
+with col1:
+    periodo = st.selectbox("Período:", PERIODOS)
+with col2:
+    rotulos_etapas = dict(zip(HYBRID_LABELS, HYBRID_STEPS))
+    rotulo_etapa = st.selectbox("Etapa:", ["Geral (média das 6 etapas)"] + HYBRID_LABELS)
+    etapa = rotulos_etapas.get(rotulo_etapa)
+with col3:
+    min_calls = st.number_input("Mínimo de calls:", min_value=1, value=3)
+with col4:
+    top_k = st.number_input("Top:", min_value=1, max_value=20, value=5)
+
+# Limites por dia para que a chave do cache não mude a cada rerun
+inicio_anterior, inicio = intervalo_do_periodo(periodo, datetime.now().replace(hour=0, minute=0, second=0, microsecond=0))
+
+st.divider()
+
+# --- Ranking principal ---
+col1, col2 = st.columns(2)
+with col1:
+    st.subheader(f"🔝 Top {top_k} - {rotulo_etapa}")
+    mostrar_ranking(get_leaderboard(etapa, since=inicio, min_calls=min_calls, limit=top_k))
+with col2:
+    st.subheader(f"⚠️ Precisam de atenção - {rotulo_etapa}")
+    mostrar_ranking(get_leaderboard(etapa, since=inicio, min_calls=min_calls, limit=top_k, ascending=True))
+
+st.divider()
+
+# --- Evolução entre períodos ---
+st.subheader("📈 Evolução em relação ao período anterior")
+if inicio is None:
+    st.info("Selecione um período para comparar com o período anterior.")
+else:
+    st.caption(f"Comparando desde {inicio:%d/%m/%Y} com {inicio_anterior:%d/%m/%Y} a {inicio - timedelta(days=1):%d/%m/%Y}")
+    col1, col2 = st.columns(2)
+    for coluna, titulo, evoluiu in [(col1, "Mais evoluíram", True), (col2, "Mais regrediram", False)]:
+        with coluna:
+            st.markdown(f"### {titulo}")
+            variacoes = get_score_changes(inicio, inicio_anterior, stage=etapa, min_calls=min_calls,
+                                          limit=top_k, improved=evoluiu)
+            variacoes = [linha for linha in variacoes if (linha[4] > 0 if evoluiu else linha[4] < 0)]
+            if not variacoes:
+                st.caption("Nenhum BDR com variação nesse sentido.")
+            for _, nome, anterior, atual, variacao in variacoes:
+                st.markdown(f"**{nome}**: {anterior:.1f} → {atual:.1f} ({variacao:+.1f})")
+
+st.divider()
+
+# --- Top por etapa ---
+st.subheader(f"🎯 Top 3 por etapa - {periodo}")
+top_por_etapa = get_stage_top_k(3, since=inicio, min_calls=min_calls)
+colunas = st.columns(3)
+for i, (key, label) in enumerate(zip(HYBRID_STEPS, HYBRID_LABELS)):
+    with colunas[i % 3]:
+        st.markdown(f"**{label}**")
+        mostrar_ranking(top_por_etapa[key])
@@ -0,0 +1,72 @@
+import json
+import time
+from datetime import datetime
+import numpy as np
+import streamlit as st
+from database import get_span_durations, get_slowest_runs, get_run_spans
+from tracing import is_enabled, set_enabled, latency_summary, span_tree
+
+st.set_page_config(layout="wide")
+
+st.title("📈 Métricas de Desempenho")
+st.markdown("**Onde o tempo é gasto: etapas das análises, consultas ao banco e renderização de gráficos**")
+
+JANELAS = {"Última hora": 3600, "Últimas 24 horas": 86400, "Últimos 7 dias": 7 * 86400}
+
+col1, col2 = st.columns([1, 3])
+with col1:
+    coletar = st.toggle("Coletar métricas", value=is_enabled(),
+                        help="Vale para todo o processo do Streamlit. Para ligar desde o início, use TRACING_ENABLED=1")
+    if coletar != is_enabled():
+        set_enabled(coletar)
+with col2:
+    janela = st.radio("Janela:", list(JANELAS), horizontal=True)
+since = time.time() - JANELAS[janela]
+
+if not is_enabled():
+    st.info("A coleta está desligada; os dados abaixo são de quando ela estava ligada.")
+
+# --- Percentis por span ---
+st.subheader("⏱️ Latência por etapa")
+resumo = latency_summary(since)
+if not resumo:
+    st.info("Nenhuma métrica registrada nesta janela.")
+    st.stop()
+
+st.dataframe(
+    [{"Span": nome, "Chamadas": n, "p50 (ms)": round(p50, 1), "p95 (ms)": round(p95, 1), "p99 (ms)": round(p99, 1),
+      "Máx (ms)": round(maximo, 1)} for nome, n, p50, p95, p99, maximo in resumo],
+    hide_index=True
+)
+
+# --- Histograma de um span ---
+nome = st.selectbox("Histograma de:", [linha[0] for linha in resumo])
+duracoes = np.array([duracao for _, duracao in get_span_durations(since, nome)])
+if duracoes.size > 1 and duracoes.max() > duracoes.min():
+    # Faixas em escala logarítmica: as latências vão de microssegundos (cache) a minutos (API)
+    bordas = np.geomspace(max(duracoes.min(), 0.001), duracoes.max(), 21)
+    contagens, _ = np.histogram(duracoes, bins=bordas)
+    st.bar_chart({"Faixa (ms)": [f"{inicio:,.1f}–{fim:,.1f}" for inicio, fim in zip(bordas[:-1], bordas[1:])],
+                  "Chamadas": contagens.tolist()}, x="Faixa (ms)", y="Chamadas")
+else:
+    st.caption(f"{duracoes.size} chamada(s) de {duracoes.max() if duracoes.size else 0:.1f} ms.")
+
+st.divider()
+
+# --- Execuções mais lentas ---
+st.subheader("🐢 Execuções mais lentas")
+somente_paginas = st.checkbox("Somente análises (páginas de cold calls e 1:1s)", value=True)
+execucoes = get_slowest_runs(since, limit=50 if somente_paginas else 10)
+if somente_paginas:
+    execucoes = [execucao for execucao in execucoes if execucao[1].startswith("pagina.")][:10]
+if not execucoes:
+    st.info("Nenhuma execução nesta janela.")
+for run_id, nome_raiz, inicio, duracao, status in execucoes:
+    titulo = f"{nome_raiz} — {duracao / 1000:.2f} s em {datetime.fromtimestamp(inicio):%d/%m %H:%M:%S}"
+    with st.expander(titulo + ("" if status == "ok" else f" ({status})")):
+        linhas = []
+        for nivel, (_, _, nome_span, _, duracao_span, status_span, atributos) in span_tree(get_run_spans(run_id)):
+            detalhes = f" `{json.loads(atributos)}`" if atributos else ""
+            erro = "" if status_span == "ok" else f" ⚠️ {status_span}"
+            linhas.append(f"{'  ' * nivel}- **{nome_span}** {duracao_span:,.1f} ms{erro}{detalhes}")
+        st.markdown("\n".join(linhas))
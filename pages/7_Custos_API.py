@@ -0,0 +1,57 @@
+import streamlit as st
+from database import get_usage_summary
+from filters import period_filter
+from usage import budget_status, budget_message
+
+st.set_page_config(layout="wide")
+
+st.title("💰 Custos da API")
+st.markdown("**Tokens, minutos de áudio e custo estimado das análises, por BDR, dia e modelo**")
+
+since, until = period_filter()
+
+# --- Orçamento do mês ---
+gasto_mes, orcamento, nivel = budget_status()
+col1, col2, col3 = st.columns(3)
+col1.metric("Gasto no mês", f"US$ {gasto_mes:,.2f}")
+if orcamento > 0:
+    col2.metric("Orçamento mensal", f"US$ {orcamento:,.2f}")
+    col3.metric("Usado", f"{gasto_mes / orcamento:.0%}")
+    st.progress(min(gasto_mes / orcamento, 1.0))
+    if nivel:
+        (st.error if nivel == "excedido" else st.warning)(budget_message(gasto_mes, orcamento, nivel))
+else:
+    col2.caption("Sem orçamento definido (configure MONTHLY_BUDGET_USD).")
+
+st.caption("Custos estimados pela tabela de preços em config.py; não substituem a fatura da OpenAI.")
+st.divider()
+
+AGRUPAMENTOS = {"BDR": 'bdr', "Dia": 'dia', "Modelo": 'modelo'}
+rotulo = st.radio("Agrupar por:", list(AGRUPAMENTOS), horizontal=True)
+linhas = get_usage_summary(AGRUPAMENTOS[rotulo], since, until)
+
+if not linhas:
+    st.info("Nenhuma chamada à API registrada neste período.")
+    st.stop()
+
+total_custo = sum(linha[9] for linha in linhas)
+total_chamadas = sum(linha[1] for linha in linhas)
+total_evitadas = sum(linha[2] for linha in linhas)
+col1, col2, col3 = st.columns(3)
+col1.metric("Custo no período", f"US$ {total_custo:,.2f}")
+col2.metric("Chamadas à API", total_chamadas)
+col3.metric("Chamadas evitadas (cache)", total_evitadas)
+
+st.dataframe(
+    [{rotulo: grupo, "Chamadas": chamadas, "Evitadas": evitadas, "Análises": analises,
+      "Tokens prompt": prompt, "Tokens resposta": completion, "Tokens em cache": cached,
+      "Áudio (min)": round(audio / 60, 1), "Latência média (s)": round((latencia or 0) / 1000, 2),
+      "Custo (US$)": round(custo, 4)}
+     for grupo, chamadas, evitadas, analises, prompt, completion, cached, audio, latencia, custo in linhas],
+    hide_index=True
+)
+
+if rotulo == "Dia":
+    por_dia = sorted(linhas)
+    st.bar_chart({"Dia": [linha[0] for linha in por_dia], "Custo (US$)": [linha[9] for linha in por_dia]},
+                 x="Dia", y="Custo (US$)")
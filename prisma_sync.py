@@ -0,0 +1,242 @@
+"""
+Sincronização incremental do banco SQLite do Streamlit com o PostgreSQL do
+front end Next.js (analise-bdrs-nextjs, tabelas do Prisma).
+
+    python prisma_sync.py               # envia só o que mudou desde a última execução
+    python prisma_sync.py --full        # reenvia tudo e remove o que não existe mais no SQLite
+
+Mapeamento (colunas em camelCase, como no schema.prisma):
+- bdrs       -> bdrs
+- cold_calls -> cold_calls (createdAt = data da call)
+- analises   -> meetings   (dataReuniao = createdAt = data da análise; os scores
+  e textos de análise, que as análises 1:1 não têm, vão zerados/vazios)
+
+Os triggers de database.py gravam cada inserção, alteração e remoção em
+`sync_changes`; `seq` é a marca d'água. A cada lote, as linhas tocadas são
+relidas do SQLite e enviadas com INSERT ... ON CONFLICT (upsert), as que
+não existem mais são removidas, e o último `seq` aplicado é gravado no
+destino na mesma transação. Uma execução interrompida recomeça do último
+lote confirmado, e reaplicar um lote não muda o resultado.
+
+A primeira execução em um destino (ou quando o log já foi limpo além da
+marca d'água dele) faz uma carga completa, que deixa as três tabelas do
+destino iguais às do SQLite. As tabelas do Prisma passam a ser um espelho
+do Streamlit: os ids são os mesmos do SQLite.
+"""
+
+import argparse
+from analysis import HYBRID_STEPS
+from config import SYNC_DATABASE_URL, SYNC_BATCH_SIZE, POSTGRES_SCHEMA, DATABASE_BACKEND
+from tracing import traced
+import database
+
+def _camel(coluna):
+    """`rational_drowning_score` -> `rationalDrowningScore` (nomes das colunas do Prisma)."""
+    primeira, *resto = coluna.split("_")
+    return primeira + "".join(parte.capitalize() for parte in resto)
+
+# Epoch da linha (as datas do Prisma são gravadas em UTC)
+_EPOCH = "COALESCE(data_ts, CAST(strftime('%s', 'now') AS INTEGER))"
+_SCORES = [(_camel(step), f"COALESCE({step}, 0)") for step in HYBRID_STEPS]
+
+# Tabela no SQLite -> (tabela do Prisma, [(coluna do Prisma, expressão no SQLite)])
+_MAPEAMENTO = {
+    'bdrs': ("bdrs", [("id", "id"), ("nome", "nome")]),
+    'cold_calls': ("cold_calls", [
+        ("id", "id"), ("bdrId", "bdr_id"), ("createdAt", _EPOCH),
+        ("prospectNome", "COALESCE(prospect_nome, '')"), ("prospectEmpresa", "COALESCE(prospect_empresa, '')"),
+        ("insightComercial", "insight_comercial"),
+        *_SCORES,
+        ("analiseCompleta", "COALESCE(analise_completa, '')"), ("pontosAtencao", "COALESCE(pontos_atencao, '')"),
+        ("recomendacoes", "COALESCE(recomendacoes, '')"),
+    ]),
+    'analises': ("meetings", [
+        ("id", "id"), ("bdrId", "bdr_id"), ("createdAt", _EPOCH), ("dataReuniao", _EPOCH),
+        ("resumo", "COALESCE(resumo, '')"), ("metas", "COALESCE(metas, '')"),
+        *[(coluna, "0") for coluna, _ in _SCORES],
+        ("analiseCompleta", "''"), ("pontosAtencao", "''"), ("recomendacoes", "''"),
+    ]),
+}
+# Colunas DateTime do Prisma, enviadas como epoch
+_DATAS = {"createdAt", "dataReuniao"}
+# Linhas sem BDR (ou com BDR já removido) não cabem na chave estrangeira do Prisma e não são enviadas
+_COM_BDR = "EXISTS (SELECT 1 FROM bdrs b WHERE b.id = bdr_id)"
+
+def _select(tabela):
+    """SELECT das colunas mapeadas de `tabela` no SQLite."""
+    filtro = "" if tabela == 'bdrs' else f" WHERE {_COM_BDR}"
+    colunas = ", ".join(expressao for _, expressao in _MAPEAMENTO[tabela][1])
+    return f"SELECT {colunas} FROM {tabela}{filtro}"
+
+def _upsert_sql(tabela):
+    """INSERT ... ON CONFLICT no destino; `updatedAt` recebe o horário da sincronização."""
+    destino, colunas = _MAPEAMENTO[tabela]
+    nomes = [coluna for coluna, _ in colunas]
+    valores = ["to_timestamp(%s) AT TIME ZONE 'UTC'" if nome in _DATAS else "%s" for nome in nomes]
+    entre_aspas = ", ".join(f'"{nome}"' for nome in nomes)
+    atualizar = ", ".join(f'"{nome}" = EXCLUDED."{nome}"' for nome in nomes[1:])
+    return (f'INSERT INTO "{destino}" ({entre_aspas}, "updatedAt") '
+            f"VALUES ({', '.join(valores)}, now() AT TIME ZONE 'UTC') "
+            f'ON CONFLICT ("id") DO UPDATE SET {atualizar}, "updatedAt" = EXCLUDED."updatedAt"')
+
+def _source_connection():
+    """Conexão com o SQLite de origem, com o histórico arquivado (arquivar não remove linhas do Next.js)."""
+    if DATABASE_BACKEND != "sqlite":
+        raise ValueError("A sincronização com o Prisma parte do banco SQLite (DATABASE_BACKEND=sqlite).")
+    return database.get_connection(archived=True)
+
+def current_seq(source):
+    """Último `seq` já atribuído no log de alterações (0 se nenhum)."""
+    row = source.execute("SELECT seq FROM sqlite_sequence WHERE name = 'sync_changes'").fetchone()
+    return row[0] if row else 0
+
+def needs_full_sync(source, last_seq):
+    """Indica se o destino precisa de carga completa: nunca sincronizado ou log já limpo além da marca d'água dele."""
+    if last_seq is None:
+        return True
+    primeiro = source.execute("SELECT MIN(seq) FROM sync_changes").fetchone()[0]
+    inicio = primeiro if primeiro is not None else current_seq(source) + 1
+    return last_seq + 1 < inicio
+
+def pending_changes(source, after_seq, limit):
+    """Próximo lote do log: (último seq do lote, {tabela: (linhas a enviar, ids a remover)}).
+
+    Cada linha tocada é relida no estado atual: várias alterações da mesma
+    linha viram um único upsert, e uma linha que não existe mais vira remoção.
+    """
+    log = source.execute("SELECT seq, tabela, row_id FROM sync_changes WHERE seq > ? ORDER BY seq LIMIT ?",
+                         (after_seq, limit)).fetchall()
+    if not log:
+        return after_seq, {}
+    tocadas = {}
+    for _, tabela, row_id in log:
+        tocadas.setdefault(tabela, set()).add(row_id)
+    lote = {}
+    for tabela, ids in tocadas.items():
+        marcadores = ", ".join("?" * len(ids))
+        filtro = " AND " if tabela != 'bdrs' else " WHERE "
+        linhas = source.execute(f"{_select(tabela)}{filtro}id IN ({marcadores}) ORDER BY id", sorted(ids)).fetchall()
+        lote[tabela] = (linhas, sorted(ids - {linha[0] for linha in linhas}))
+    return log[-1][0], lote
+
+def _state_table():
+    return f'"{POSTGRES_SCHEMA}".prisma_sync_state'
+
+def _read_state(target):
+    """Último seq aplicado no destino (None se ele nunca foi sincronizado)."""
+    with target.cursor() as cursor:
+        cursor.execute(f'CREATE SCHEMA IF NOT EXISTS "{POSTGRES_SCHEMA}"')
+        cursor.execute(f"""CREATE TABLE IF NOT EXISTS {_state_table()} (
+            origem TEXT PRIMARY KEY, ultimo_seq BIGINT NOT NULL, atualizado_em TIMESTAMP(3) NOT NULL)""")
+        cursor.execute(f"SELECT ultimo_seq FROM {_state_table()} WHERE origem = 'streamlit'")
+        row = cursor.fetchone()
+    target.commit()
+    return row[0] if row else None
+
+def _write_state(cursor, seq):
+    cursor.execute(
+        f"""INSERT INTO {_state_table()} (origem, ultimo_seq, atualizado_em) VALUES ('streamlit', %s, now() AT TIME ZONE 'UTC')
+            ON CONFLICT (origem) DO UPDATE SET ultimo_seq = EXCLUDED.ultimo_seq, atualizado_em = EXCLUDED.atualizado_em""",
+        (seq,))
+
+def _delete(cursor, tabela, condicao, ids):
+    cursor.execute(f'DELETE FROM "{_MAPEAMENTO[tabela][0]}" WHERE {condicao}', (list(ids),))
+    return cursor.rowcount
+
+def _upsert(cursor, tabela, linhas):
+    cursor.executemany(_upsert_sql(tabela), linhas)
+    destino = _MAPEAMENTO[tabela][0]
+    # Inserções feitas pelo Next.js continuam depois do maior id vindo do SQLite
+    cursor.execute(f"""SELECT setval(pg_get_serial_sequence('"{destino}"', 'id'), GREATEST(MAX("id"), 1))
+                       FROM "{destino}" """)
+    return len(linhas)
+
+def _apply(cursor, lote):
+    """Aplica um lote no destino.
+
+    Remoções primeiro (filhos antes dos pais), para que o nome de um BDR
+    removido possa ser reutilizado no mesmo lote; depois os upserts (pais
+    antes dos filhos, por causa da chave estrangeira).
+    """
+    removidos = sum(_delete(cursor, tabela, '"id" = ANY(%s)', lote[tabela][1])
+                    for tabela in reversed(database.SYNCED_TABLES) if tabela in lote and lote[tabela][1])
+    enviados = sum(_upsert(cursor, tabela, lote[tabela][0])
+                   for tabela in database.SYNCED_TABLES if tabela in lote and lote[tabela][0])
+    return enviados, removidos
+
+def _full_sync(source, target, batch_size):
+    """Carga completa em uma transação: remove do destino o que não existe no SQLite e envia todas as linhas."""
+    seq = current_seq(source)
+    enviados = removidos = 0
+    with target.cursor() as cursor:
+        for tabela in reversed(database.SYNCED_TABLES):
+            ids = [linha[0] for linha in source.execute(f"SELECT id FROM ({_select(tabela)}) AS origem")]
+            removidos += _delete(cursor, tabela, 'NOT ("id" = ANY(%s))', ids)
+        for tabela in database.SYNCED_TABLES:
+            linhas = source.execute(f"{_select(tabela)} ORDER BY id")
+            while True:
+                bloco = linhas.fetchmany(batch_size)
+                if not bloco:
+                    break
+                enviados += _upsert(cursor, tabela, bloco)
+        _write_state(cursor, seq)
+    target.commit()
+    return seq, enviados, removidos
+
+@traced()
+def sync(target=None, batch_size=SYNC_BATCH_SIZE, full=False, prune=True):
+    """Sincroniza o SQLite com o destino (conexão psycopg ou SYNC_DATABASE_URL).
+
+    Retorna {'modo', 'lotes', 'enviados', 'removidos', 'ultimo_seq'}. Com
+    `prune`, as entradas do log já aplicadas são apagadas do SQLite.
+    """
+    fechar = target is None
+    if fechar:
+        import psycopg
+        target = psycopg.connect(SYNC_DATABASE_URL)
+    source = _source_connection()
+    try:
+        seq = _read_state(target)
+        resultado = {'modo': 'incremental', 'lotes': 0, 'enviados': 0, 'removidos': 0}
+        if full or needs_full_sync(source, seq):
+            seq, enviados, removidos = _full_sync(source, target, batch_size)
+            resultado.update(modo='completa', lotes=1, enviados=enviados, removidos=removidos)
+        while True:
+            proximo, lote = pending_changes(source, seq, batch_size)
+            if not lote:
+                break
+            with target.cursor() as cursor:
+                enviados, removidos = _apply(cursor, lote)
+                _write_state(cursor, proximo)
+            target.commit()
+            seq = proximo
+            resultado['lotes'] += 1
+            resultado['enviados'] += enviados
+            resultado['removidos'] += removidos
+        if prune:
+            source.execute("DELETE FROM sync_changes WHERE seq <= ?", (seq,))
+            source.commit()
+        resultado['ultimo_seq'] = seq
+        return resultado
+    except Exception:
+        target.rollback()
+        raise
+    finally:
+        source.close()
+        if fechar:
+            target.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Sincroniza o banco do Streamlit com as tabelas do Prisma (Next.js).")
+    parser.add_argument("--full", action="store_true", help="reenvia todas as linhas e remove as que não existem mais")
+    parser.add_argument("--batch-size", type=int, default=SYNC_BATCH_SIZE, help="alterações por transação no destino")
+    parser.add_argument("--keep-log", action="store_true", help="mantém as entradas já aplicadas em sync_changes")
+    args = parser.parse_args()
+    if not SYNC_DATABASE_URL:
+        parser.error("defina SYNC_DATABASE_URL (ou DATABASE_URL) com o banco do Next.js")
+    resultado = sync(batch_size=args.batch_size, full=args.full, prune=not args.keep_log)
+    print(f"Sincronização {resultado['modo']}: {resultado['enviados']} linhas enviadas, "
+          f"{resultado['removidos']} removidas em {resultado['lotes']} lote(s); seq {resultado['ultimo_seq']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+import threading
+import warnings
+import numpy as np
+from numpy.lib.recfunctions import structured_to_unstructured
+import database
+from analysis import HYBRID_STEPS
+
+# Formato de cada linha lida do banco: id, bdr_id (0 sem BDR), timestamp (epoch) e os 6 scores (NaN quando ausentes)
+ROW_DTYPE = np.dtype([('id', 'i8'), ('bdr_id', 'i8'), ('timestamp', 'i8')] + [(key, 'f8') for key in HYBRID_STEPS])
+
+# Valor lido no lugar de scores ausentes (NULL), trocado por NaN depois de carregado: os scores vão de 0 a 10
+_MISSING_SCORE = -1
+
+def _nan_aware(fn):
+    """Executa `fn` sem os avisos do NumPy para etapas sem nenhum score (o resultado fica NaN)."""
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        return fn()
+
+class ScoreSnapshot:
+    """Cópia colunar em memória dos scores de todos os cold calls.
+
+    Mantém arrays NumPy alinhados (`ids`, `bdr_ids`, `timestamps` e
+    `scores` com formato (n, 6); scores ausentes são NaN e, como no AVG do
+    SQL, ficam fora das médias). É carregada uma vez e depois atualizada
+    de forma incremental: apenas as linhas com id maior que a marca d'água
+    são lidas. Remoções feitas por database.py forçam uma recarga completa.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._database_key = None
+        self._data_version = None
+        self._rewrite_version = None
+        self._memo = {}
+        self._set_columns(np.empty(0, dtype=ROW_DTYPE))
+
+    def _set_columns(self, rows, append=False):
+        """Converte as linhas lidas em colunas e substitui (ou estende) os arrays.
+
+        Os quatro arrays são trocados juntos, em uma única tupla: quem a lê
+        uma vez (ver _select) nunca mistura arrays de duas atualizações.
+        """
+        ids = rows['id']
+        bdr_ids = rows['bdr_id']
+        timestamps = rows['timestamp']
+        scores = structured_to_unstructured(rows[list(HYBRID_STEPS)], dtype=np.float64).reshape(len(rows), len(HYBRID_STEPS))
+        scores[scores == _MISSING_SCORE] = np.nan
+        if append:
+            ids = np.concatenate([self.ids, ids])
+            bdr_ids = np.concatenate([self.bdr_ids, bdr_ids])
+            timestamps = np.concatenate([self.timestamps, timestamps])
+            scores = np.concatenate([self.scores, scores])
+        self._columns = (ids, bdr_ids, timestamps, scores)
+        self._memo = {}
+
+    @property
+    def ids(self):
+        return self._columns[0]
+
+    @property
+    def bdr_ids(self):
+        return self._columns[1]
+
+    @property
+    def timestamps(self):
+        return self._columns[2]
+
+    @property
+    def scores(self):
+        return self._columns[3]
+
+    @property
+    def watermark(self):
+        """Maior id já carregado."""
+        return int(self.ids[-1]) if len(self.ids) else 0
+
+    def __len__(self):
+        return len(self.ids)
+
+    def refresh(self, force=False):
+        """Atualiza o snapshot se o banco mudou desde a última leitura.
+
+        Sem escritas novas não há consulta alguma além da conferência
+        periódica da versão compartilhada (gravações de outros processos
+        forçam a recarga). Com apenas inserções, lê somente as linhas novas;
+        após remoções (ou troca de banco, ou `force`), recarrega tudo.
+        """
+        database.poll_shared_data_version()
+        with self._lock:
+            recarregar = (
+                force
+                or self._database_key != database.get_database_key()
+                or self._rewrite_version != database.get_rewrite_version()
+            )
+            if not recarregar and self._data_version == database.get_data_version():
+                return self
+
+            data_version = database.get_data_version()
+            rewrite_version = database.get_rewrite_version()
+            after_id = 0 if recarregar else self.watermark
+            novas = np.fromiter(database.iter_score_rows(after_id, missing=_MISSING_SCORE), dtype=ROW_DTYPE)
+            self._set_columns(novas, append=not recarregar)
+            self._database_key = database.get_database_key()
+            self._data_version = data_version
+            self._rewrite_version = rewrite_version
+        return self
+
+    def _memoized(self, key, fn):
+        """Guarda o resultado de uma agregação até a próxima mudança nos arrays."""
+        memo = self._memo
+        if key not in memo:
+            memo[key] = fn()
+        return memo[key]
+
+    def _select(self, bdr_id=None, since=None, until=None):
+        """Retorna (bdr_ids, scores) filtrados por BDR e intervalo (epoch, `until` exclusivo)."""
+        # Uma única leitura: um refresh() concorrente troca a tupla inteira
+        ids, bdr_ids, timestamps, scores = self._columns
+        if bdr_id is None and since is None and until is None:
+            return bdr_ids, scores
+        mask = np.ones(len(ids), dtype=bool)
+        if bdr_id is not None:
+            mask &= bdr_ids == bdr_id
+        if since is not None:
+            mask &= timestamps >= since
+        if until is not None:
+            mask &= timestamps < until
+        return bdr_ids[mask], scores[mask]
+
+    def per_bdr_means(self, since=None, until=None):
+        """Médias por BDR e etapa.
+
+        Retorna (bdr_ids, contagens, médias) com médias no formato (k, 6),
+        ordenados por bdr_id. As contagens são de calls (COUNT(*)); cada
+        média só considera os scores presentes e é NaN se não houver nenhum.
+        Sem período, somam o histórico arquivado (archive_totals), como
+        get_hybrid_conversation_average_scores.
+        """
+        return self._per_bdr_stats(since, until)[:3]
+
+    def _per_bdr_stats(self, since, until, archived=True):
+        """Como per_bdr_means, com as quantidades de scores por BDR e etapa no fim da tupla.
+
+        Com `archived=False`, só as calls em memória (banco principal).
+        """
+        archived = archived and since is None and until is None
+        return self._memoized(('means', since, until, archived), lambda: self._per_bdr_means(since, until, archived))
+
+    def _per_bdr_means(self, since, until, archived):
+        bdr_ids, scores = self._select(since=since, until=until)
+        arquivadas = np.array(database.get_archive_score_totals() if archived else [], dtype=np.float64)
+        # Os ids de BDR são inteiros pequenos: bincount agrupa sem ordenar
+        tamanho = max(int(bdr_ids.max()) + 1 if len(bdr_ids) else 0,
+                      int(arquivadas[:, 0].max()) + 1 if len(arquivadas) else 0)
+        counts = np.bincount(bdr_ids, minlength=tamanho)
+        validos = ~np.isnan(scores)
+        sums = np.column_stack([np.bincount(bdr_ids, weights=np.where(validos[:, i], scores[:, i], 0), minlength=tamanho)
+                                for i in range(len(HYBRID_STEPS))])
+        n = np.column_stack([np.bincount(bdr_ids, weights=validos[:, i], minlength=tamanho)
+                             for i in range(len(HYBRID_STEPS))])
+        if len(arquivadas):
+            # Linhas (bdr_id, calls, 6 somas, 6 quantidades), um BDR por linha
+            etapas = len(HYBRID_STEPS)
+            ids_arquivo = arquivadas[:, 0].astype(np.int64)
+            counts[ids_arquivo] += arquivadas[:, 1].astype(np.int64)
+            sums[ids_arquivo] += arquivadas[:, 2:2 + etapas]
+            n[ids_arquivo] += arquivadas[:, 2 + etapas:2 + 2 * etapas]
+        presentes = np.flatnonzero(counts)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return presentes, counts[presentes], sums[presentes] / n[presentes], n[presentes].astype(np.int64)
+
+    def per_bdr_overall(self, since=None, until=None):
+        """Média geral por BDR: média das etapas presentes em cada call e depois das calls.
+
+        Retorna (bdr_ids, médias) ordenados por bdr_id, só com as calls em
+        memória (o arquivo guarda somas por etapa, não por call); calls sem
+        nenhum score ficam de fora (NaN se o BDR só tiver calls assim).
+        """
+        def calcular():
+            bdr_ids, scores = self._select(since=since, until=until)
+            gerais = _nan_aware(lambda: np.nanmean(scores, axis=1)) if len(scores) else np.empty(0)
+            validos = ~np.isnan(gerais)
+            counts = np.bincount(bdr_ids)
+            sums = np.bincount(bdr_ids, weights=np.where(validos, gerais, 0), minlength=len(counts))
+            n = np.bincount(bdr_ids, weights=validos, minlength=len(counts))
+            presentes = np.flatnonzero(counts)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                return presentes, sums[presentes] / n[presentes]
+        return self._memoized(('overall', since, until), calcular)
+
+    def percentiles(self, q=(25, 50, 75), bdr_id=None, since=None, until=None):
+        """Percentis de cada etapa; formato (len(q), 6)."""
+        def calcular():
+            _, scores = self._select(bdr_id, since, until)
+            if not len(scores):
+                return np.zeros((len(q), len(HYBRID_STEPS)))
+            return _nan_aware(lambda: np.nanpercentile(scores, q, axis=0))
+        return self._memoized(('percentiles', tuple(q), bdr_id, since, until), calcular)
+
+    def stage_std(self, bdr_id=None, since=None, until=None):
+        """Desvio padrão de cada etapa; formato (6,)."""
+        def calcular():
+            _, scores = self._select(bdr_id, since, until)
+            return _nan_aware(lambda: np.nanstd(scores, axis=0)) if len(scores) else np.zeros(len(HYBRID_STEPS))
+        return self._memoized(('std', bdr_id, since, until), calcular)
+
+    def stage_correlations(self, bdr_id=None, since=None, until=None):
+        """Matriz de correlação entre as etapas (6, 6), só com as calls que têm as 6 etapas; etapas constantes ficam com 0."""
+        def calcular():
+            _, scores = self._select(bdr_id, since, until)
+            scores = scores[~np.isnan(scores).any(axis=1)]
+            if len(scores) < 2:
+                return np.eye(len(HYBRID_STEPS))
+            with np.errstate(invalid='ignore', divide='ignore'):
+                correlacoes = np.corrcoef(scores, rowvar=False)
+            return np.nan_to_num(correlacoes)
+        return self._memoized(('correlations', bdr_id, since, until), calcular)
+
+    def stage_matrix(self, nomes_por_id, since=None, until=None):
+        """Médias por BDR no mesmo formato de `analytics.stage_matrix`.
+
+        Retorna (ids, nomes, contagens, matriz, quantidades), mantendo apenas
+        os BDRs presentes em `nomes_por_id` (id -> nome), em ordem alfabética.
+        Etapas sem nenhum score ficam NaN, com quantidade 0.
+        """
+        bdr_ids, counts, means, n = self._per_bdr_stats(since, until)
+        linhas = sorted((nomes_por_id[bdr_id], i) for i, bdr_id in enumerate(bdr_ids.tolist()) if bdr_id in nomes_por_id)
+        indices = np.array([i for _, i in linhas], dtype=np.int64)
+        return bdr_ids[indices], [nome for nome, _ in linhas], counts[indices], means[indices], n[indices]
+
+    def ranking(self, stage=None, k=5, min_calls=1, ascending=False, since=None, until=None):
+        """Top-k (ou bottom-k com `ascending`) BDRs pela média de uma etapa.
+
+        `stage` é uma das chaves de HYBRID_STEPS; sem etapa, usa a média das
+        etapas presentes em cada call (ver per_bdr_overall). BDRs sem nenhum
+        score na etapa e calls sem BDR (id 0) ficam de fora e, como em
+        get_leaderboard, só entra o banco principal. Retorna uma lista de
+        (bdr_id, média, calls).
+        """
+        bdr_ids, counts, means, _ = self._per_bdr_stats(since, until, archived=False)
+        valores = self.per_bdr_overall(since, until)[1] if stage is None else means[:, HYBRID_STEPS.index(stage)]
+        elegiveis = np.flatnonzero((counts >= min_calls) & ~np.isnan(valores) & (bdr_ids != 0))
+        ordem = elegiveis[np.argsort(valores[elegiveis] if ascending else -valores[elegiveis], kind='stable')][:k]
+        return [(int(bdr_ids[i]), float(valores[i]), int(counts[i])) for i in ordem]
+
+_snapshot = ScoreSnapshot()
+
+def get_snapshot():
+    """Retorna o snapshot compartilhado do processo, já atualizado."""
+    return _snapshot.refresh()
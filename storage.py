@@ -0,0 +1,235 @@
+"""
+Backends de armazenamento da camada de dados (database.py).
+
+- SQLiteBackend: o arquivo em DATABASE_PATH, com uma conexão sqlite3 por
+  chamada (o comportamento de sempre).
+- PostgresBackend: DATABASE_BACKEND=postgres e DATABASE_URL, com um pool de
+  conexões (psycopg 3 + psycopg_pool), statements preparados no servidor e
+  cursores no servidor para leituras longas. As tabelas ficam no schema
+  POSTGRES_SCHEMA, separadas das tabelas do Prisma do front end Next.js.
+
+database.py escreve o SQL uma única vez, no dialeto comum aos dois bancos
+com parâmetros `?` e `:nome`; o que muda entre eles (expressões de data,
+"sem limite" no LIMIT, o id gerado no INSERT) fica aqui.
+
+Os erros do PostgreSQL são relançados como as exceções equivalentes do
+sqlite3 (IntegrityError, OperationalError), para que quem chama trate os
+dois bancos do mesmo jeito.
+"""
+
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from config import (DATABASE_BACKEND, DATABASE_URL, POSTGRES_SCHEMA, POSTGRES_POOL_MIN, POSTGRES_POOL_MAX,
+                    POSTGRES_ITER_SIZE)
+
+# Exceções da camada de dados, iguais em qualquer backend
+DatabaseError = sqlite3.Error
+IntegrityError = sqlite3.IntegrityError
+
+class SQLiteBackend:
+    """Banco SQLite em um arquivo local."""
+
+    name = "sqlite"
+    # Valor de LIMIT que significa "todas as linhas"
+    no_limit = -1
+
+    def __init__(self, path):
+        self.path = path
+        self.key = path
+
+    def connect(self):
+        conn = sqlite3.connect(self.path)
+        # O SQLite só aplica as chaves estrangeiras (e o ON DELETE CASCADE) se cada conexão pedir
+        conn.execute("PRAGMA foreign_keys = ON")
+        return conn
+
+    def iterate(self, conn, sql, params=()):
+        """Percorre o resultado de uma consulta longa sem carregá-lo inteiro."""
+        return conn.execute(sql, params)
+
+    def week_expression(self, column):
+        """Semana 'AAAA-SS' (semanas começando na segunda-feira) de uma coluna de data em texto."""
+        return f"strftime('%Y-%W', {column})"
+
+    def day_expression(self, column):
+        """Dia 'AAAA-MM-DD' (hora local) de uma coluna epoch."""
+        return f"date({column}, 'unixepoch', 'localtime')"
+
+    def close(self):
+        pass
+
+# Literais entre aspas, `?`, `:nome` (mas não `::tipo`) e `%`, na ordem em que aparecem
+_SQL_TOKENS = re.compile(r"'(?:[^']|'')*'|\?|(?<![:\w]):([A-Za-z_]\w*)|%")
+_INSERT_TABLE = re.compile(r"\s*INSERT\s+INTO\s+(\w+)", re.IGNORECASE)
+# Só consultas e alterações de dados viram statements preparados (DDL roda uma vez por processo)
+_PREPARABLE = re.compile(r"\s*(SELECT|INSERT|UPDATE|DELETE|WITH)\b", re.IGNORECASE)
+# Tabelas sem coluna `id` (o INSERT não devolve o id gerado)
+_TABLES_WITHOUT_ID = {"analysis_checkpoints", "data_version"}
+
+@lru_cache(maxsize=512)
+def translate_sql(sql):
+    """Converte os parâmetros `?`/`:nome` do sqlite3 para o formato do psycopg (`%s`/`%(nome)s`)."""
+    def trocar(match):
+        token = match.group(0)
+        if token == "?":
+            return "%s"
+        if match.group(1):
+            return f"%({match.group(1)})s"
+        # `%` literal (inclusive dentro de strings) precisa ser duplicado para o psycopg
+        return token.replace("%", "%%")
+    return _SQL_TOKENS.sub(trocar, sql)
+
+@contextmanager
+def _sqlite_errors():
+    """Relança erros do PostgreSQL como as exceções equivalentes do sqlite3."""
+    import psycopg
+    try:
+        yield
+    except psycopg.IntegrityError as erro:
+        raise sqlite3.IntegrityError(str(erro)) from erro
+    except psycopg.Error as erro:
+        raise sqlite3.OperationalError(str(erro)) from erro
+
+class _PgCursor:
+    """Cursor do psycopg com a interface usada por database.py (inclusive `lastrowid`)."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.lastrowid = None
+
+    def execute(self, sql, params=()):
+        tabela = _INSERT_TABLE.match(sql)
+        devolve_id = tabela is not None and tabela.group(1) not in _TABLES_WITHOUT_ID and "RETURNING" not in sql.upper()
+        with _sqlite_errors():
+            self._cursor.execute(translate_sql(sql + " RETURNING id" if devolve_id else sql), params,
+                                 prepare=None if _PREPARABLE.match(sql) else False)
+            if devolve_id:
+                self.lastrowid = self._cursor.fetchone()[0]
+        return self
+
+    def executemany(self, sql, params_seq):
+        with _sqlite_errors():
+            self._cursor.executemany(translate_sql(sql), params_seq)
+        return self
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+class _PgConnection:
+    """Conexão emprestada do pool; `close()` a devolve (desfazendo o que não foi confirmado)."""
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    def cursor(self):
+        return _PgCursor(self._conn.cursor())
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, params_seq):
+        return self.cursor().executemany(sql, params_seq)
+
+    def commit(self):
+        with _sqlite_errors():
+            self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        if self._conn is None:
+            return
+        conn, self._conn = self._conn, None
+        if not conn.closed:
+            conn.rollback()
+        self._pool.putconn(conn)
+
+class PostgresBackend:
+    """Banco PostgreSQL acessado por um pool de conexões."""
+
+    name = "postgres"
+    no_limit = None
+
+    def __init__(self, url, schema=POSTGRES_SCHEMA, min_size=POSTGRES_POOL_MIN, max_size=POSTGRES_POOL_MAX):
+        # Dependências opcionais: só são importadas quando o PostgreSQL é usado
+        from psycopg_pool import ConnectionPool
+        if not re.fullmatch(r"[A-Za-z_]\w*", schema):
+            raise ValueError(f"Nome de schema inválido: {schema}")
+        self.schema = schema
+        self.key = f"{url}#{schema}"
+        # prepare_threshold=0: cada consulta vira um statement preparado na primeira execução em cada conexão
+        self.pool = ConnectionPool(url, min_size=min_size, max_size=max_size, configure=self._configure,
+                                   kwargs={'prepare_threshold': 0}, open=True)
+
+    def _configure(self, conn):
+        """Prepara cada conexão nova do pool: schema próprio e NUMERIC lido como float (AVG, SUM)."""
+        from psycopg.types.numeric import FloatLoader
+        conn.adapters.register_loader("numeric", FloatLoader)
+        conn.execute(f'CREATE SCHEMA IF NOT EXISTS "{self.schema}"')
+        conn.execute(f'SET search_path TO "{self.schema}"')
+        conn.commit()
+
+    def connect(self):
+        return _PgConnection(self.pool, self.pool.getconn())
+
+    def iterate(self, conn, sql, params=()):
+        """Percorre o resultado com um cursor no servidor, buscando POSTGRES_ITER_SIZE linhas por vez."""
+        with _sqlite_errors():
+            cursor = conn._conn.cursor(name=f"iterate_{id(conn):x}")
+            cursor.itersize = POSTGRES_ITER_SIZE
+            cursor.execute(translate_sql(sql), params)
+        try:
+            yield from cursor
+        finally:
+            cursor.close()
+
+    def week_expression(self, column):
+        # Mesmo cálculo do %W do SQLite: semanas começando na segunda-feira, semana 00 antes da primeira segunda
+        data = f"CAST({column} AS timestamp)"
+        return (f"to_char({data}, 'YYYY') || '-' || "
+                f"to_char(floor((extract(doy FROM {data}) + 7 - extract(isodow FROM {data})) / 7), 'FM00')")
+
+    def day_expression(self, column):
+        # Dia no fuso da sessão (parâmetro TimeZone do servidor ou da URL de conexão)
+        return f"to_char(to_timestamp({column}), 'YYYY-MM-DD')"
+
+    def close(self):
+        self.pool.close()
+
+_backends = {}
+_backends_lock = threading.Lock()
+_override = None
+
+def get_backend(sqlite_path):
+    """Backend configurado: PostgreSQL (DATABASE_BACKEND=postgres) ou SQLite no caminho informado."""
+    if _override is not None:
+        return _override
+    chave = "postgres" if DATABASE_BACKEND == "postgres" else sqlite_path
+    backend = _backends.get(chave)
+    if backend is None:
+        with _backends_lock:
+            backend = _backends.get(chave)
+            if backend is None:
+                backend = PostgresBackend(DATABASE_URL) if chave == "postgres" else SQLiteBackend(sqlite_path)
+                _backends[chave] = backend
+    return backend
+
+def use_backend(backend):
+    """Força um backend (ou volta ao configurado, com None). Usado nos testes e em scripts."""
+    global _override
+    _override = backend
@@ -0,0 +1,59 @@
+"""
+Testes das análises vetorizadas de scores.
+"""
+
+import numpy as np
+from analytics import stage_matrix, compare_stages, overall_means, scores_dict
+
+LINHAS = [
+    (1, "Ana", 3, 8, 6, 4, 7, 5, 9, 3, 3, 3, 3, 3, 3),
+    (2, "Bia", 1, 4, 6, 8, 7, 5, 3, 1, 1, 1, 1, 1, 1),
+]
+
+def test_stage_matrix():
+    """As linhas do banco viram arrays alinhados por BDR."""
+    ids, nomes, contagens, matriz, quantidades = stage_matrix(LINHAS)
+    assert ids.tolist() == [1, 2]
+    assert nomes == ["Ana", "Bia"]
+    assert contagens.tolist() == [3, 1]
+    assert matriz.shape == quantidades.shape == (2, 6)
+
+def test_compare_stages():
+    """A média do time é ponderada pelas calls; o z-score usa o desvio entre BDRs."""
+    _, _, contagens, matriz, quantidades = stage_matrix(LINHAS)
+    comparacao = compare_stages(matriz, quantidades)
+    assert np.allclose(compare_stages(matriz, contagens)['team_mean'], comparacao['team_mean'])
+    assert np.allclose(comparacao['team_mean'], [7, 6, 5, 7, 5, 7.5])
+    assert np.allclose(comparacao['delta'][0], [1, 0, -1, 0, 0, 1.5])
+    assert np.allclose(comparacao['zscore'][0], [0.5, 0, -0.5, 0, 0, 0.5])
+    assert np.allclose(comparacao['zscore'][1], [-1.5, 0, 1.5, 0, 0, -1.5])
+    assert np.allclose(comparacao['normalized'][0], [1, 0, 0, 0, 0, 1])
+
+def test_compare_stages_sem_dados():
+    """Sem BDRs, a comparação retorna arrays vazios em vez de falhar."""
+    _, _, contagens, matriz, quantidades = stage_matrix([])
+    assert compare_stages(matriz, quantidades)['delta'].shape == (0, 6)
+    assert compare_stages(matriz, contagens)['delta'].shape == (0, 6)
+
+def test_etapas_sem_score_ficam_fora_da_comparacao():
+    """NULL no SQL vira NaN: não puxa a média do time para 0 e o peso é o número de scores da etapa."""
+    linhas = [
+        (1, "Ana", 4, 8, None, 4, 7, 5, 9, 4, 0, 4, 4, 4, 4),
+        (2, "Bia", 2, 4, 6, 8, 7, 5, None, 1, 2, 2, 2, 2, 0),
+        (3, "Caio", 1, 2, 9, 8, 7, 5, None, 1, 1, 1, 1, 1, 0),
+    ]
+    _, _, _, matriz, quantidades = stage_matrix(linhas)
+    assert np.isnan(matriz[0, 1]) and quantidades[0, 1] == 0
+    comparacao = compare_stages(matriz, quantidades)
+    # Warmer: (8*4 + 4*1 + 2*1) / 6; Reframe só da Bia e do Caio; Your Solution só da Ana
+    assert np.allclose(comparacao['team_mean'], [38 / 6, 7, 40 / 7, 7, 5, 9])
+    assert np.isnan(comparacao['delta'][0, 1]) and np.isnan(comparacao['zscore'][0, 1])
+    assert np.isnan(comparacao['normalized'][1, 5])
+    assert comparacao['zscore'][0, 5] == 0 and comparacao['normalized'][0, 5] == 0
+    assert np.allclose(comparacao['delta'][1, :2], [4 - 38 / 6, -1])
+    assert np.allclose(overall_means(matriz), [33 / 5, 6, 31 / 5])
+    assert overall_means(np.full((1, 6), np.nan)).tolist() == [0]
+    assert scores_dict(matriz[0])['reframe_score'] == 0
+
+def test_scores_dict():
+    assert scores_dict([1, 2, 3, 4, 5, 6.04])['your_solution_score'] == 6.0
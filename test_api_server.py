@@ -0,0 +1,95 @@
+"""
+Testes da API JSON somente leitura (api_server.py).
+"""
+
+import json
+import sqlite3
+import urllib.error
+import urllib.request
+import pytest
+import database
+import api_server
+from analysis import HYBRID_STEPS
+
+@pytest.fixture(autouse=True)
+def banco_temporario(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DATABASE_PATH", str(tmp_path / "teste.db"))
+    database._invalidate_cache()
+
+@pytest.fixture
+def servidor():
+    servidor = api_server.start_server(cache_size=8)
+    yield servidor
+    servidor.shutdown()
+    servidor.server_close()
+
+def pedir(servidor, caminho, etag=None):
+    """GET na API: (status, headers, corpo JSON ou None)."""
+    pedido = urllib.request.Request(servidor.base_url + caminho, headers={'If-None-Match': etag} if etag else {})
+    try:
+        with urllib.request.urlopen(pedido) as resposta:
+            return resposta.status, resposta.headers, json.loads(resposta.read())
+    except urllib.error.HTTPError as erro:
+        corpo = erro.read()
+        return erro.code, erro.headers, json.loads(corpo) if corpo else None
+
+def salvar_call(bdr_id, prospect, empresa, valor, insight=""):
+    return database.save_cold_call_analise(bdr_id, prospect, empresa, {key: valor for key in HYBRID_STEPS},
+                                           "análise", "pontos", "recomendações", insight)
+
+def test_endpoints_respondem_json_paginado(servidor):
+    ana = database.add_bdr("Ana")
+    for indice in range(5):
+        salvar_call(ana, f"Prospect {indice}", "Acme", indice + 5)
+    status, _, corpo = pedir(servidor, f"/bdrs/{ana}/cold-calls?limit=2&offset=1")
+    assert status == 200
+    assert (corpo['bdr'], corpo['total'], corpo['limit']) == ({'id': ana, 'nome': "Ana"}, 5, 2)
+    assert [item['prospect_nome'] for item in corpo['itens']] == ["Prospect 3", "Prospect 2"]
+    assert corpo['itens'][0]['scores']['warmer_score'] == 8
+
+    assert pedir(servidor, "/bdrs")[2] == [{'id': ana, 'nome': "Ana"}]
+    assert pedir(servidor, "/medias")[2]['medias']['reframe_score'] == 7
+    assert pedir(servidor, "/ranking")[2][0]['nome'] == "Ana"
+    assert len(pedir(servidor, f"/bdrs/{ana}/tendencias?janela=3")[2]['pontos']) == 5
+    assert pedir(servidor, f"/cold-calls/{corpo['itens'][0]['id']}")[2]['analise_completa'] == "análise"
+
+    assert pedir(servidor, "/bdrs/999/cold-calls")[0] == 404
+    assert pedir(servidor, "/cold-calls/999")[0] == 404
+    assert pedir(servidor, "/desconhecido")[0] == 404
+    assert pedir(servidor, "/bdrs/1/cold-calls?limit=abc")[2] == {'erro': "Parâmetro 'limit' deve ser um número inteiro"}
+    assert pedir(servidor, "/ranking?etapa=outra")[0] == 400
+    assert pedir(servidor, "/medias?since=ontem")[0] == 400
+
+def test_etag_e_304_ate_outro_processo_gravar(servidor):
+    ana = database.add_bdr("Ana")
+    salvar_call(ana, "Carla", "Acme", 6)
+    status, headers, corpo = pedir(servidor, "/medias")
+    etag = headers['ETag']
+    assert (status, corpo['total_calls']) == (200, 1)
+
+    # Mesma versão: 304 sem corpo; sem If-None-Match, a resposta sai do cache em memória
+    status, _, corpo_304 = pedir(servidor, "/medias", etag)
+    assert (status, corpo_304) == (304, None)
+    assert pedir(servidor, "/medias")[2] == corpo
+    assert servidor.contadores['cache'] == 1
+
+    # Gravação por outra conexão (outro processo): o ETag muda e o cache é descartado
+    conn = sqlite3.connect(database.DATABASE_PATH)
+    conn.execute("UPDATE cold_calls SET warmer_score = 10")
+    conn.commit()
+    conn.close()
+    status, headers, corpo = pedir(servidor, "/medias", etag)
+    assert (status, corpo['medias']['warmer_score']) == (200, 10)
+    assert headers['ETag'] != etag
+    assert servidor.contadores['cache'] == 1
+
+def test_busca_trata_curingas_como_texto(servidor):
+    ana = database.add_bdr("Ana")
+    salvar_call(ana, "Carla", "Acme_Brasil", 6)
+    salvar_call(ana, "Davi", "AcmeXBrasil", 6, insight="desconto de 100%")
+    salvar_call(ana, "Eva", "Outra", 6)
+    nomes = lambda caminho: [item['prospect_nome'] for item in pedir(servidor, caminho)[2]['itens']]
+    assert nomes("/busca?q=acme_") == ["Carla"]
+    assert nomes("/busca?q=100%25") == ["Davi"]
+    assert nomes("/busca?q=ACME") == ["Davi", "Carla"]
+    assert pedir(servidor, "/busca?q=")[0] == 400
@@ -0,0 +1,84 @@
+"""
+Testes da camada de dados assíncrona (async_database.py).
+"""
+
+import asyncio
+import time
+import pytest
+import database
+import tracing
+import async_database as adb
+from analysis import HYBRID_STEPS
+
+SCORES = {key: 7 for key in HYBRID_STEPS}
+
+@pytest.fixture(autouse=True)
+def banco_temporario(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DATABASE_PATH", str(tmp_path / "teste.db"))
+    database._invalidate_cache()
+    yield
+    adb.shutdown()
+    tracing.set_enabled(False)
+    tracing._buffer.clear()
+
+async def batimentos(intervalos, parar):
+    """Mede o intervalo entre pulsos do event loop: cresce se alguém bloquear o loop."""
+    anterior = time.perf_counter()
+    while not parar.is_set():
+        await asyncio.sleep(0.002)
+        agora = time.perf_counter()
+        intervalos.append(agora - anterior)
+        anterior = agora
+
+def test_mesmos_resultados_da_camada_sincrona():
+    async def cenario():
+        ana = await adb.add_bdr("Ana")
+        call_id = await adb.save_cold_call_analise(ana, "Carla", "Acme", SCORES, "análise", "pontos", "recs", "")
+        analise_id = await adb.save_analise(ana, "resumo", "metas")
+        return ana, call_id, analise_id, await asyncio.gather(
+            adb.get_bdrs(), adb.get_bdr_cold_calls(ana), adb.get_hybrid_conversation_average_scores(ana),
+            adb.get_bdr_analyses(ana))
+
+    ana, call_id, analise_id, (bdrs, calls, medias, analises) = asyncio.run(cenario())
+    assert bdrs == database.get_bdrs() == [(ana, "Ana")]
+    assert calls == database.get_bdr_cold_calls(ana) and len(calls) == 1
+    assert database.get_cold_call(call_id)['scores'] == SCORES
+    assert medias == database.get_hybrid_conversation_average_scores(ana)
+    assert analises == database.get_bdr_analyses(ana)
+    assert database.get_analise(analise_id)[1:] == ("resumo", "metas")
+
+def test_event_loop_responsivo_sob_muitas_escritas():
+    """300 gravações e 100 leituras concorrentes não travam o loop (em chamadas síncronas, ele pararia o lote inteiro)."""
+    async def cenario():
+        ana = await adb.add_bdr("Ana")
+        intervalos, parar = [], asyncio.Event()
+        pulso = asyncio.create_task(batimentos(intervalos, parar))
+        await asyncio.sleep(0.01)
+        inicio = time.perf_counter()
+        ids = await asyncio.gather(
+            *(adb.save_cold_call_analise(ana, f"P{i}", "Acme", SCORES, "x" * 4000, "", "", "") for i in range(300)),
+            *(adb.get_hybrid_conversation_average_scores(ana) for _ in range(100)))
+        duracao = time.perf_counter() - inicio
+        parar.set()
+        await pulso
+        return ana, ids[:300], duracao, max(intervalos)
+
+    ana, ids, duracao, maior_intervalo = asyncio.run(cenario())
+    assert len(set(ids)) == 300
+    assert database.get_hybrid_conversation_average_scores(ana)['total_calls'] == 300
+    assert maior_intervalo < duracao / 3, f"loop parado por {maior_intervalo * 1000:.0f} ms em {duracao * 1000:.0f} ms"
+
+def test_escritas_na_ordem_e_spans_aninhados_no_chamador():
+    tracing.set_enabled(True)
+
+    async def cenario():
+        with tracing.span("pipeline.teste"):
+            ana = await adb.add_bdr("Ana")
+            return await asyncio.gather(*(adb.save_analise(ana, f"resumo {i}", "") for i in range(20)))
+
+    ids = asyncio.run(cenario())
+    assert ids == sorted(ids)
+    tracing.flush()
+    run_id, nome, _, _, _ = database.get_slowest_runs(limit=1)[0]
+    filhos = [linha[2] for linha in database.get_run_spans(run_id)]
+    assert nome == "pipeline.teste" and filhos.count("database.save_analise") == 20
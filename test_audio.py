@@ -0,0 +1,78 @@
+"""
+Testes da ingestão de áudio (audio.py).
+"""
+
+import hashlib
+import io
+import pytest
+from audio import sniff_audio_format, ingest_audio, ingest_audio_path, read_header
+from utils import validate_audio_file
+
+CABECALHOS = [
+    (b"ID3\x04\x00\x00\x00\x00\x00\x00", "mp3"),
+    (b"\xff\xfb\x90\x64\x00", "mp3"),
+    (b"RIFF\x24\x08\x00\x00WAVEfmt ", "wav"),
+    (b"\x00\x00\x00\x20ftypM4A \x00\x00\x00\x00", "m4a"),
+    (b"\x00\x00\x00\x18ftypmp42\x00\x00\x00\x00", "mp4"),
+    (b"OggS\x00\x02", "ogg"),
+    (b"%PDF-1.4\n", None),
+    (b"", None),
+]
+
+class StreamSemSeek(io.RawIOBase):
+    """Stream que só pode ser lido em sequência, como o corpo de uma requisição."""
+
+    def __init__(self, dados):
+        self._dados = io.BytesIO(dados)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        return self._dados.readinto(buffer)
+
+class ArquivoEnviado(io.BytesIO):
+    """Imita o UploadedFile do Streamlit (BytesIO com nome e tamanho)."""
+
+    def __init__(self, dados, name):
+        super().__init__(dados)
+        self.name = name
+        self.size = len(dados)
+
+@pytest.mark.parametrize("cabecalho, formato", CABECALHOS)
+def test_identifica_formato_pelo_conteudo(cabecalho, formato):
+    assert sniff_audio_format(cabecalho) == formato
+
+def test_buffer_em_memoria_nao_e_copiado():
+    dados = b"ID3" + bytes(5000)
+    origem = ArquivoEnviado(dados, "call.wav")
+    upload = ingest_audio(origem, chunk_size=1024)
+    assert upload.file is origem
+    assert upload.sha256 == hashlib.sha256(dados).hexdigest()
+    assert upload.size == len(dados)
+    # A extensão enviada à API segue o conteúdo, não o nome original
+    nome, handle, mime = upload.as_upload()
+    assert (nome, mime) == ("call.mp3", "audio/mpeg")
+    assert handle.read() == dados
+
+def test_stream_vai_para_o_disco_acima_do_limite():
+    dados = b"RIFF\x00\x00\x00\x00WAVE" + bytes(10000)
+    with ingest_audio(io.BufferedReader(StreamSemSeek(dados)), name="a.wav", spool_threshold=4096,
+                      chunk_size=1024) as upload:
+        assert upload.file._rolled
+        assert upload.format == "wav"
+        assert upload.sha256 == hashlib.sha256(dados).hexdigest()
+        assert upload.as_upload()[1].read() == dados
+
+def test_arquivo_em_disco_e_usado_no_lugar(tmp_path):
+    caminho = tmp_path / "call.m4a"
+    caminho.write_bytes(b"\x00\x00\x00\x20ftypM4A " + bytes(3000))
+    with ingest_audio_path(str(caminho)) as upload:
+        assert upload.file.name == str(caminho)
+        assert (upload.name, upload.format, upload.size) == ("call.m4a", "m4a", 3012)
+        assert read_header(upload.file, 4) == b"\x00\x00\x00\x20"
+
+def test_validacao_rejeita_conteudo_que_nao_e_audio():
+    assert validate_audio_file(ArquivoEnviado(b"ID3" + bytes(100), "call.mp3"))[0]
+    valido, mensagem = validate_audio_file(ArquivoEnviado(b"MZ\x90\x00" + bytes(100), "call.mp3"))
+    assert not valido and "conteúdo" in mensagem
@@ -0,0 +1,87 @@
+"""
+Testes da análise em lote (batch_analysis.py) contra a API local (benchmarks/fake_openai.py).
+"""
+
+import pytest
+import database
+import batch_analysis
+from benchmarks.fake_openai import start_server
+
+openai = pytest.importorskip("openai")
+
+@pytest.fixture(autouse=True)
+def banco_temporario(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DATABASE_PATH", str(tmp_path / "teste.db"))
+    database._invalidate_cache()
+
+@pytest.fixture
+def client():
+    servidor = start_server(latencia_transcricao="const:0", latencia_chat="const:0", seed=1)
+    client = openai.OpenAI(api_key="teste", base_url=servidor.base_url, max_retries=0)
+    client.servidor = servidor
+    yield client
+    servidor.shutdown()
+    servidor.server_close()
+
+def gravacoes(diretorio, quantidade):
+    """Cria `quantidade` mp3 diferentes (e um arquivo que não é áudio, ignorado)."""
+    diretorio.mkdir(exist_ok=True)
+    for indice in range(quantidade):
+        (diretorio / f"prospect_{indice}.mp3").write_bytes(b"ID3" + bytes([indice]) * 4096)
+    (diretorio / "exportacao.txt").write_text("metadados")
+    return diretorio
+
+def situacoes(resultados):
+    return sorted(situacao for _, situacao, _ in resultados)
+
+def test_diretorio_retomado_sem_refazer_arquivos_concluidos(tmp_path, client, monkeypatch):
+    ana = database.add_bdr("Ana")
+    itens = batch_analysis.scan_directory(str(gravacoes(tmp_path / "gravacoes", 4)), "Ana", "Acme")
+    assert [item['prospect'] for item in itens] == [f"prospect {indice}" for indice in range(4)]
+
+    # A análise do último arquivo falha: o lote continua e a transcrição dele fica no checkpoint
+    analisar = batch_analysis.run_analysis
+    def falha_no_ultimo(client, prompt, on_usage=None):
+        if "prospect 3" in prompt:
+            raise RuntimeError("GPT indisponível")
+        return analisar(client, prompt, on_usage=on_usage)
+    monkeypatch.setattr(batch_analysis, "run_analysis", falha_no_ultimo)
+    resultados = batch_analysis.run(itens, workers=2, client=client)
+    assert situacoes(resultados) == ["analisado"] * 3 + ["erro"]
+    assert database.get_hybrid_conversation_average_scores(ana)['total_calls'] == 3
+
+    monkeypatch.setattr(batch_analysis, "run_analysis", analisar)
+    transcricoes = client.servidor.contadores["/v1/audio/transcriptions 200"]
+    assert transcricoes == 4
+    resultados = batch_analysis.run(itens, workers=2, client=client)
+    assert situacoes(resultados) == ["analisado"] + ["ja_processado"] * 3
+    assert client.servidor.contadores["/v1/audio/transcriptions 200"] == transcricoes
+    assert database.get_hybrid_conversation_average_scores(ana)['total_calls'] == 4
+
+def test_manifesto_valida_cada_linha(tmp_path, client):
+    database.add_bdr("Ana")
+    gravacoes(tmp_path, 2)
+    (tmp_path / "vazio.mp3").write_bytes(b"")
+    manifesto = tmp_path / "manifesto.csv"
+    manifesto.write_text("arquivo,bdr,prospect,empresa,insight,idioma\n"
+                         "prospect_0.mp3,Ana,Carla,Acme,,Português\n"
+                         "prospect_1.mp3,Bruno,Davi,Acme,,\n"
+                         "vazio.mp3,Ana,Eva,Acme,,\n"
+                         "prospect_1.mp3,Ana,Fabio,<script>,,\n", encoding="utf-8")
+    resultados = {item['prospect']: (situacao, detalhe)
+                  for item, situacao, detalhe in batch_analysis.run(batch_analysis.read_manifest(str(manifesto)),
+                                                                    client=client)}
+    assert resultados['Carla'][0] == "analisado"
+    assert resultados['Davi'] == ("invalido", "BDR 'Bruno' não cadastrado")
+    assert resultados['Eva'] == ("invalido", "Arquivo está vazio")
+    assert resultados['Fabio'][0] == "invalido"
+
+    # O mesmo áudio com outros dados já tem análise: é pulado sem chamar a API
+    (tmp_path / "outro.csv").write_text("arquivo,bdr,prospect,empresa\nprospect_0.mp3,Ana,Carla Souza,Acme\n",
+                                        encoding="utf-8")
+    [(_, situacao, call_id)] = batch_analysis.run(batch_analysis.read_manifest(str(tmp_path / "outro.csv")), client=client)
+    assert (situacao, call_id) == ("duplicado", resultados['Carla'][1])
+
+    (tmp_path / "incompleto.csv").write_text("arquivo,bdr\nprospect_0.mp3,Ana\n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        batch_analysis.read_manifest(str(tmp_path / "incompleto.csv"))
@@ -0,0 +1,111 @@
+"""
+Testes do módulo de gráficos (charts.py): cache das imagens renderizadas, ciclo de vida das figuras, specs Plotly e escolha do backend.
+"""
+
+import xml.etree.ElementTree as ET
+import pytest
+import charts
+from analysis import HYBRID_STEPS
+
+pytest.importorskip("matplotlib")
+
+SCORES = dict(zip(HYBRID_STEPS, (8, 6, 4, 7, 5, 9)))
+
+@pytest.fixture(autouse=True)
+def cache_vazio():
+    charts.clear_chart_cache()
+    yield
+    charts.clear_chart_cache()
+
+def png_valido(dados):
+    return dados.startswith(b"\x89PNG\r\n\x1a\n") and dados.endswith(b"IEND\xaeB`\x82")
+
+def test_renderizacoes_identicas_vem_do_cache():
+    primeira = charts.render_radar_chart(SCORES, "Ana", size=8)
+    assert (charts.chart_cache_info().hits, charts.chart_cache_info().misses) == (0, 1)
+    assert charts.render_radar_chart(dict(SCORES), "Ana", size=8) is primeira
+    assert charts.render_radar_overlay([("Ana", SCORES)], "Ana", size=8) is primeira
+    assert (charts.chart_cache_info().hits, charts.chart_cache_info().misses) == (2, 1)
+
+def test_tamanho_tema_e_formato_fazem_parte_da_chave():
+    base = charts.render_radar_chart(SCORES, "Ana", size=8)
+    variacoes = [
+        charts.render_radar_chart(SCORES, "Ana", size=10),
+        charts.render_radar_chart(SCORES, "Ana", size=8, theme='light'),
+        charts.render_radar_chart(SCORES, "Ana", size=8, fmt='svg'),
+        charts.render_radar_chart(dict(SCORES, warmer_score=2), "Ana", size=8),
+    ]
+    assert charts.chart_cache_info().misses == 5 and charts.chart_cache_info().currsize == 5
+    assert len({base, *variacoes}) == 5
+
+def test_bytes_png_e_svg_bem_formados():
+    assert png_valido(charts.render_radar_chart(SCORES, "Ana"))
+    assert png_valido(charts.render_trend_chart(["s1", "s2", "s3"], {"Warmer": [5, 6, 7], "Reframe": [4, 4, 6]}, "Evolução"))
+    assert png_valido(charts.render_heatmap(["Ana", "Bia"], ["Warmer", "Reframe"], [[0.5, -1.0], [-0.5, 1.0]], "Heatmap"))
+
+    svg = ET.fromstring(charts.render_radar_overlay([("Ana", SCORES), ("Bia", SCORES)], "Comparação", fmt='svg'))
+    assert svg.tag == "{http://www.w3.org/2000/svg}svg"
+
+def test_nenhuma_figura_fica_registrada():
+    import matplotlib.pyplot as plt
+    charts.render_radar_chart(SCORES, "Ana")
+    charts.render_radar_overlay([("Ana", SCORES), ("Bia", SCORES)], "Comparação")
+    charts.render_trend_chart(["s1", "s2"], {"Warmer": [5, 6]}, "Evolução", fmt='svg')
+    charts.render_heatmap(["Ana"], ["Warmer"], [[1.0]], "Heatmap")
+    assert plt.get_fignums() == []
+
+def test_celulas_sem_dados_no_heatmap_ficam_mascaradas():
+    nan = float("nan")
+    imagem = charts.render_heatmap(["Ana", "Bia"], ["Warmer", "Reframe"], [[0.5, nan], [nan, nan]], "Heatmap")
+    assert png_valido(imagem)
+    # NaN não quebra o cache: a mesma matriz com NaN novos é a mesma imagem
+    assert charts.render_heatmap(["Ana", "Bia"], ["Warmer", "Reframe"], [[0.5, float("nan")], [None, nan]], "Heatmap") is imagem
+
+    z = charts.heatmap_figure_spec(["Ana"], ["Warmer", "Reframe"], [[0.123, nan]], "Heatmap")['data'][0]['z']
+    assert z == [[0.12, None]]
+
+# --- Backend Plotly (specs) e escolha do backend ---
+
+def test_spec_do_radar_fecha_o_poligono_com_uma_trace_por_serie():
+    spec = charts.radar_figure_spec([("Ana", SCORES), ("Bia", dict(SCORES, warmer_score=3))], "Comparação")
+    assert [trace['name'] for trace in spec['data']] == ["Ana", "Bia"]
+    for trace in spec['data']:
+        assert trace['type'] == 'scatterpolar'
+        assert len(trace['r']) == len(trace['theta']) == len(HYBRID_STEPS) + 1
+        assert (trace['r'][-1], trace['theta'][-1]) == (trace['r'][0], trace['theta'][0])
+    assert spec['data'][1]['r'][0] == 3
+    assert spec['layout']['polar']['radialaxis']['range'] == [0, 10]
+    assert spec['layout']['showlegend'] is True
+
+    sozinho = charts.radar_figure_spec([("Ana", SCORES)], "Ana")
+    assert sozinho['layout']['showlegend'] is False
+    assert sozinho['data'][0]['text'] == ["8", "6", "4", "7", "5", "9", ""]
+
+def test_spec_de_tendencia_e_heatmap():
+    spec = charts.trend_figure_spec(["s1", "s2", "s3"], {"Warmer": [5, 6, 7], "Reframe": [4, 4, 6]}, "Evolução")
+    assert [(trace['name'], trace['x'], trace['y']) for trace in spec['data']] == [
+        ("Warmer", ["s1", "s2", "s3"], [5, 6, 7]), ("Reframe", ["s1", "s2", "s3"], [4, 4, 6])]
+    assert spec['layout']['yaxis']['range'] == [0, 10.5]
+
+    valores = [[0.123, -1.0, 2.0], [0.5, 0.25, -0.75]]
+    heatmap = charts.heatmap_figure_spec(["Ana", "Bia"], ["Warmer", "Reframe", "Rational"], valores, "Heatmap")['data'][0]
+    assert (len(heatmap['z']), len(heatmap['z'][0])) == (len(heatmap['y']), len(heatmap['x'])) == (2, 3)
+    assert heatmap['z'][0][0] == 0.12 and heatmap['zmid'] == 0
+
+@pytest.mark.parametrize("configurado, esperado", [
+    ("plotly", "plotly"), (" Plotly ", "plotly"), ("matplotlib", "matplotlib"), ("bokeh", "matplotlib"), ("", "matplotlib"),
+])
+def test_escolha_do_backend(monkeypatch, configurado, esperado):
+    monkeypatch.setattr(charts, "CHART_BACKEND", configurado)
+    assert charts.chart_backend() == esperado
+
+    exibidos = []
+    monkeypatch.setattr(charts.st, "plotly_chart", lambda figura, **opcoes: exibidos.append(("plotly", figura)))
+    monkeypatch.setattr(charts.st, "image", lambda imagem: exibidos.append(("matplotlib", imagem)))
+    charts.show_radar_chart(SCORES, "Ana", size=8)
+    charts.show_heatmap(["Ana"], ["Warmer"], [[1.0]], "Heatmap")
+    assert [backend for backend, _ in exibidos] == [esperado, esperado]
+    if esperado == "plotly":
+        assert exibidos[0][1] == charts.radar_figure_spec([("Ana", SCORES)], "Ana", 8)
+    else:
+        assert exibidos[0][1] == charts.render_radar_chart(SCORES, "Ana", size=8)
@@ -0,0 +1,321 @@
+"""
+Testes das funções de acesso a dados (database.py).
+"""
+
+import sqlite3
+from datetime import date
+import pytest
+import database
+from analysis import HYBRID_STEPS
+
+@pytest.fixture(autouse=True)
+def banco_temporario(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DATABASE_PATH", str(tmp_path / "teste.db"))
+
+def salvar_call(bdr_id, valor, data=None):
+    """Salva um cold call com todos os scores iguais a `valor`."""
+    call_id = database.save_cold_call_analise(bdr_id, "Prospect", "Empresa", {key: valor for key in HYBRID_STEPS},
+                                              "análise", "pontos", "recomendações", "")
+    if data:
+        conn = database.get_connection()
+        conn.execute("UPDATE cold_calls SET data = ? WHERE id = ?", (data, call_id))
+        conn.commit()
+        conn.close()
+    return call_id
+
+def test_paginacao_de_cold_calls():
+    bdr_id = database.add_bdr("Ana")
+    for dia in range(1, 6):
+        salvar_call(bdr_id, dia, f"2026-01-0{dia} 10:00:00")
+    pagina = database.get_bdr_cold_calls(bdr_id, limit=2, offset=2)
+    assert [call[0] for call in pagina] == ["2026-01-03 10:00:00", "2026-01-02 10:00:00"]
+    assert len(database.get_bdr_cold_calls(bdr_id)) == 5
+
+def paginas(buscar, tamanho, **filtros):
+    """Percorre `buscar(limit=, offset=)` página a página até voltar vazia; devolve os tamanhos e as linhas."""
+    tamanhos, linhas = [], []
+    while pagina := buscar(limit=tamanho, offset=len(linhas), **filtros):
+        tamanhos.append(len(pagina))
+        linhas.extend(pagina)
+    return tamanhos, linhas
+
+def test_limites_da_paginacao_de_cold_calls():
+    ana = database.add_bdr("Ana")
+    bia = database.add_bdr("Bia")
+    for dia in range(1, 6):
+        salvar_call(ana, dia, f"2026-01-0{dia} 10:00:00")
+    salvar_call(bia, 7, "2026-01-03 12:00:00")
+    buscar = lambda **opcoes: database.get_bdr_cold_calls(ana, **opcoes)
+
+    tamanhos, linhas = paginas(buscar, 2)
+    assert tamanhos == [2, 2, 1]
+    assert linhas == database.get_bdr_cold_calls(ana)
+    assert len({linha[13] for linha in linhas}) == 5
+    assert database.count_bdr_cold_calls(ana) == sum(tamanhos) == 5
+    assert buscar(limit=2, offset=5) == [] and buscar(limit=2, offset=50) == []
+
+    periodo = {'since': "2026-01-02", 'until': "2026-01-05"}
+    tamanhos, linhas = paginas(buscar, 2, **periodo)
+    assert tamanhos == [2, 1]
+    assert [linha[0][:10] for linha in linhas] == ["2026-01-04", "2026-01-03", "2026-01-02"]
+    assert database.count_bdr_cold_calls(ana, **periodo) == 3
+    assert database.count_bdr_cold_calls(ana, empresa="Outra") == 0 and buscar(limit=2, offset=0, empresa="Outra") == []
+
+def test_limites_da_paginacao_de_analises():
+    ana = database.add_bdr("Ana")
+    for dia in range(1, 6):
+        analise_id = database.save_analise(ana, f"resumo {dia}", "metas")
+        conn = database.get_connection()
+        conn.execute("UPDATE analises SET data = ? WHERE id = ?", (f"2026-01-0{dia} 10:00:00", analise_id))
+        conn.commit()
+        conn.close()
+    buscar = lambda **opcoes: database.get_bdr_analyses(ana, **opcoes)
+
+    tamanhos, linhas = paginas(buscar, 3)
+    assert tamanhos == [3, 2]
+    assert [linha[1] for linha in linhas] == [f"resumo {dia}" for dia in range(5, 0, -1)]
+    assert database.count_bdr_analyses(ana) == sum(tamanhos) == 5
+    assert buscar(limit=3, offset=5) == []
+
+    tamanhos, _ = paginas(buscar, 3, since="2026-01-03")
+    assert tamanhos == [3] and database.count_bdr_analyses(ana, since="2026-01-03") == 3
+    assert database.count_bdr_analyses(ana, since="2027-01-01") == 0 and buscar(limit=3, offset=0, since="2027-01-01") == []
+
+def test_medias_moveis():
+    """A média móvel considera apenas as últimas `window` calls."""
+    bdr_id = database.add_bdr("Ana")
+    for dia, valor in enumerate([2, 4, 6, 8], start=1):
+        salvar_call(bdr_id, valor, f"2026-01-0{dia} 10:00:00")
+    tendencia = database.get_rolling_score_trends(bdr_id, window=2)
+    assert [linha[2] for linha in tendencia] == [2, 3, 5, 7]
+    assert [linha[2] for linha in database.get_rolling_score_trends(bdr_id, window=2, limit=2)] == [5, 7]
+
+def test_medias_semanais():
+    bdr_id = database.add_bdr("Ana")
+    salvar_call(bdr_id, 4, "2026-01-05 10:00:00")
+    salvar_call(bdr_id, 6, "2026-01-06 10:00:00")
+    salvar_call(bdr_id, 9, "2026-01-13 10:00:00")
+    semanas = database.get_weekly_score_trends(bdr_id)
+    assert [(linha[1], linha[2]) for linha in semanas] == [(2, 5), (1, 9)]
+
+def test_cache_invalidado_apos_escrita():
+    """Leituras em cache refletem novas gravações."""
+    bdr_id = database.add_bdr("Ana")
+    salvar_call(bdr_id, 4)
+    assert database.get_hybrid_conversation_average_scores(bdr_id)['total_calls'] == 1
+    versao = database.get_data_version()
+    salvar_call(bdr_id, 8)
+    assert database.get_data_version() > versao
+    medias = database.get_hybrid_conversation_average_scores(bdr_id)
+    assert medias['total_calls'] == 2
+    assert medias['warmer_score'] == 6
+    assert len(database.get_rolling_score_trends(bdr_id)) == 2
+
+def test_remover_bdr_remove_historico():
+    bdr_id = database.add_bdr("Ana")
+    salvar_call(bdr_id, 5)
+    database.save_analise(bdr_id, "resumo", "metas")
+    database.delete_bdr(bdr_id)
+    assert database.get_table_counts() == {'bdrs': 0, 'analises': 0, 'cold_calls': 0}
+
+def test_ranking_com_minimo_de_calls_e_empates():
+    ana, bia, caio = database.add_bdr("Ana"), database.add_bdr("Bia"), database.add_bdr("Caio")
+    for bdr_id, valor in [(ana, 8), (ana, 6), (bia, 7), (bia, 7), (caio, 10)]:
+        salvar_call(bdr_id, valor)
+    assert database.get_leaderboard(min_calls=2) == [(1, ana, "Ana", 2, 7.0), (1, bia, "Bia", 2, 7.0)]
+    assert [linha[1] for linha in database.get_leaderboard(limit=1)] == [caio]
+    assert [linha[1] for linha in database.get_leaderboard(HYBRID_STEPS[2], ascending=True)] == [ana, bia, caio]
+
+def test_ranking_geral_ignora_etapas_sem_score():
+    ana, bia, caio = database.add_bdr("Ana"), database.add_bdr("Bia"), database.add_bdr("Caio")
+    salvar_call(ana, 8)
+    salvar_call(bia, 7)
+    sem_score = salvar_call(caio, 5)
+    conn = database.get_connection()
+    # Ana sem Reframe: a média geral continua 8 (e não 8 * 5/6); Caio sem nenhuma etapa
+    conn.execute("UPDATE cold_calls SET reframe_score = NULL WHERE bdr_id = ?", (ana,))
+    conn.execute(f"UPDATE cold_calls SET {', '.join(f'{key} = NULL' for key in HYBRID_STEPS)} WHERE id = ?", (sem_score,))
+    conn.commit()
+    conn.close()
+    database._invalidate_cache(rewrite=True)
+
+    assert database.get_leaderboard() == [(1, ana, "Ana", 1, 8.0), (2, bia, "Bia", 1, 7.0)]
+    assert [linha[1] for linha in database.get_leaderboard(HYBRID_STEPS[1], ascending=True)] == [bia]
+    # Uma call sem score não pesa na média geral do BDR
+    salvar_call(caio, 6)
+    assert database.get_leaderboard(ascending=True)[0][1:] == (caio, "Caio", 2, 6.0)
+
+def test_ranking_por_periodo_e_cache():
+    ana, bia = database.add_bdr("Ana"), database.add_bdr("Bia")
+    salvar_call(ana, 9, "2026-01-10 10:00:00")
+    salvar_call(bia, 5, "2026-02-10 10:00:00")
+    assert [linha[2] for linha in database.get_leaderboard(since="2026-02-01")] == ["Bia"]
+    assert [linha[2] for linha in database.get_leaderboard(until="2026-02-01")] == ["Ana"]
+
+    # Uma nova análise invalida o ranking em cache
+    salvar_call(ana, 9)
+    assert [linha[2] for linha in database.get_leaderboard(since="2026-02-01")] == ["Ana", "Bia"]
+
+def test_top_k_por_etapa():
+    ana, bia = database.add_bdr("Ana"), database.add_bdr("Bia")
+    salvar_call(ana, 8)
+    salvar_call(bia, 6)
+    top = database.get_stage_top_k(k=1)
+    assert set(top) == set(HYBRID_STEPS)
+    assert all(linhas == [(1, ana, "Ana", 1, 8.0)] for linhas in top.values())
+
+def test_variacao_entre_periodos():
+    ana, bia = database.add_bdr("Ana"), database.add_bdr("Bia")
+    for bdr_id, antes, depois in [(ana, 8, 5), (bia, 4, 6)]:
+        salvar_call(bdr_id, antes, "2026-01-10 10:00:00")
+        salvar_call(bdr_id, depois, "2026-02-10 10:00:00")
+    regrediram = database.get_score_changes("2026-02-01", "2026-01-01")
+    assert regrediram[0] == (ana, "Ana", 8.0, 5.0, -3.0)
+    assert database.get_score_changes("2026-02-01", improved=True, limit=1)[0][1] == "Bia"
+    assert database.get_score_changes("2026-02-01", min_calls=2) == []
+
+def test_migracao_preenche_data_ts(tmp_path, monkeypatch):
+    """Bancos criados antes da coluna `data_ts` são migrados na primeira conexão."""
+    caminho = str(tmp_path / "antigo.db")
+    conn = sqlite3.connect(caminho)
+    conn.execute("CREATE TABLE bdrs (id INTEGER PRIMARY KEY, nome TEXT NOT NULL UNIQUE)")
+    conn.execute("INSERT INTO bdrs (id, nome) VALUES (1, 'Ana')")
+    conn.execute("CREATE TABLE cold_calls (id INTEGER PRIMARY KEY, bdr_id INTEGER, data TEXT NOT NULL, prospect_empresa TEXT)")
+    conn.execute("CREATE TABLE analises (id INTEGER PRIMARY KEY, bdr_id INTEGER, data TEXT NOT NULL, resumo TEXT, metas TEXT)")
+    conn.execute("INSERT INTO cold_calls (bdr_id, data) VALUES (1, '2026-01-05 10:00:00')")
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setattr(database, "DATABASE_PATH", caminho)
+    conn = database.get_connection()
+    assert conn.execute("SELECT data_ts FROM cold_calls").fetchone()[0] == database.to_epoch("2026-01-05 10:00:00")
+    # Inserções que não informam data_ts são preenchidas pelo trigger
+    conn.execute("INSERT INTO analises (bdr_id, data) VALUES (1, '2026-01-06 00:00:00')")
+    assert conn.execute("SELECT data_ts FROM analises").fetchone()[0] == database.to_epoch(date(2026, 1, 6))
+    conn.close()
+
+def test_filtros_por_periodo_e_empresa():
+    ana = database.add_bdr("Ana")
+    salvar_call(ana, 4, "2026-01-05 10:00:00")
+    salvar_call(ana, 8, "2026-01-20 10:00:00")
+    call_id = database.save_cold_call_analise(ana, "Prospect", "Acme", {key: 6 for key in HYBRID_STEPS},
+                                              "análise", "pontos", "recomendações", "")
+
+    janeiro = database.period_bounds(date(2026, 1, 1), date(2026, 1, 31))
+    ultimo_dia = database.period_bounds(date(2026, 1, 20), date(2026, 1, 20))
+    assert len(database.get_bdr_cold_calls(ana, since=janeiro[0], until=janeiro[1])) == 2
+    assert [call[0] for call in database.get_bdr_cold_calls(ana, since=ultimo_dia[0], until=ultimo_dia[1])] == [
+        "2026-01-20 10:00:00"]
+    assert [call[13] for call in database.get_bdr_cold_calls(ana, empresa="Acme")] == [call_id]
+    assert database.get_hybrid_conversation_average_scores(ana, *janeiro)['warmer_score'] == 6
+    assert database.get_hybrid_conversation_average_scores(empresa="Acme")['total_calls'] == 1
+    assert database.get_stage_averages_by_bdr(since="2026-01-10", until="2026-02-01")[0][2] == 1
+    assert database.get_table_counts(*janeiro) == {'bdrs': 1, 'analises': 0, 'cold_calls': 2}
+    assert database.get_prospect_companies() == ["Acme", "Empresa"]
+
+def test_filtro_por_periodo_usa_indice():
+    """Janelas de data percorrem apenas o intervalo do índice, sem varrer a tabela."""
+    where, params = database._filters(bdr_id=1, since="2026-01-01", until="2026-02-01")
+    conn = database.get_connection()
+    plano = " ".join(row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN SELECT * FROM cold_calls{where}", params))
+    conn.close()
+    assert "idx_cold_calls_bdr_ts" in plano and "SCAN" not in plano
+
+def test_cache_ignora_resultado_de_consulta_concorrente_com_escrita():
+    """Uma escrita durante a consulta (outra sessão) não deixa o resultado antigo em cache."""
+    bdr_id = database.add_bdr("Ana")
+    salvar_call(bdr_id, 4)
+
+    def consulta_com_escrita_concorrente():
+        resultado = database._query_average_scores(None, None, None, None)
+        salvar_call(bdr_id, 8)
+        return resultado
+
+    antigo = database._cached(("medias_teste",), consulta_com_escrita_concorrente)
+    assert antigo['total_calls'] == 1
+    assert database.get_hybrid_conversation_average_scores()['total_calls'] == 2
+    assert database._cached(("medias_teste",), lambda: "novo") == "novo"
+
+def test_gravacoes_duplicadas_pelo_hash():
+    ana = database.add_bdr("Ana")
+    call_id = salvar_call(ana, 7)
+    analise_id = database.save_analise(ana, "resumo", "metas")
+    database.save_audio_recording("abc", 1000, "cold_call", ana, cold_call_id=call_id, transcricao="texto")
+    database.save_audio_recording("abc", 1000, "1x1", ana, analise_id=analise_id, transcricao="texto")
+    database.save_audio_recording("outro", 1000, "1x1", ana, analise_id=analise_id)
+
+    tipos = {linha[0]: linha for linha in database.find_audio_recordings("abc")}
+    assert set(tipos) == {"cold_call", "1x1"}
+    assert tipos["cold_call"][2:6] == ("Ana", call_id, None, "texto")
+    assert database.get_cold_call(call_id)['scores'] == {key: 7 for key in HYBRID_STEPS}
+    assert database.get_analise(analise_id)[1:] == ("resumo", "metas")
+    assert database.find_audio_recordings("xyz") == []
+
+    # Análise removida: a transcrição continua disponível, mas sem o id do cold call
+    database.delete_cold_call(call_id)
+    tipos = {linha[0]: linha for linha in database.find_audio_recordings("abc")}
+    assert tipos["cold_call"][3] is None and tipos["cold_call"][5] == "texto"
+
+    conn = database.get_connection()
+    plano = " ".join(linha[3] for linha in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM audio_recordings WHERE sha256 = 'abc'"))
+    conn.close()
+    assert "idx_audio_recordings_sha256" in plano
+
+def test_operacoes_em_lote_por_selecao_e_filtro():
+    ana, bia = database.add_bdr("Ana"), database.add_bdr("Bia")
+    janeiro = [salvar_call(ana, 4, f"2026-01-{dia:02d} 10:00:00") for dia in (5, 6, 7)]
+    fevereiro = salvar_call(ana, 8, "2026-02-05 10:00:00")
+
+    with pytest.raises(ValueError):
+        database.delete_cold_calls()
+    assert database.delete_cold_calls(ids=[]) == 0
+    assert database.delete_cold_calls(ids=janeiro[:2] + [fevereiro], since="2026-01-01", until="2026-02-01") == 2
+    assert database.reassign_cold_calls(bia, bdr_id=ana, until="2026-02-01") == 1
+    assert [call[13] for call in database.get_bdr_cold_calls(bia)] == [janeiro[2]]
+    assert [call[13] for call in database.get_bdr_cold_calls(ana)] == [fevereiro]
+    with pytest.raises(sqlite3.IntegrityError):
+        database.reassign_cold_calls(999, ids=[fevereiro])
+
+def test_unir_e_renomear_bdrs():
+    ana, bia, caio = database.add_bdr("Ana"), database.add_bdr("Bia"), database.add_bdr("Caio")
+    salvar_call(ana, 4)
+    salvar_call(bia, 8)
+    database.save_analise(bia, "resumo", "metas")
+
+    assert database.merge_bdrs(bia, ana) == {'cold_calls': 1, 'analises': 1}
+    assert database.get_bdrs() == [(ana, "Ana"), (caio, "Caio")]
+    assert database.get_hybrid_conversation_average_scores(ana)['total_calls'] == 2
+    assert database.count_bdr_analyses(ana) == 1
+
+    # Troca de nomes em uma transação; com um nome repetido, nenhum BDR é renomeado
+    database.rename_bdrs({ana: "Caio", caio: "Ana"})
+    assert dict(database.get_bdrs()) == {ana: "Caio", caio: "Ana"}
+    with pytest.raises(sqlite3.IntegrityError):
+        database.rename_bdrs({ana: "Ana Souza", caio: "Ana Souza"})
+    assert dict(database.get_bdrs()) == {ana: "Caio", caio: "Ana"}
+
+def test_remover_bdrs_em_cascata(tmp_path, monkeypatch):
+    """Bancos antigos são recriados com ON DELETE CASCADE; o consumo da API continua registrado."""
+    caminho = str(tmp_path / "antigo.db")
+    conn = sqlite3.connect(caminho)
+    conn.execute("CREATE TABLE bdrs (id INTEGER PRIMARY KEY, nome TEXT NOT NULL UNIQUE)")
+    conn.execute(f"CREATE TABLE cold_calls ({database._COLD_CALLS_COLUMNS}, FOREIGN KEY (bdr_id) REFERENCES bdrs (id))")
+    conn.execute(f"CREATE TABLE analises ({database._ANALISES_COLUMNS}, FOREIGN KEY (bdr_id) REFERENCES bdrs (id))")
+    conn.executemany("INSERT INTO bdrs (id, nome) VALUES (?, ?)", [(1, "Ana"), (2, "Bia"), (3, "Caio")])
+    conn.executemany("INSERT INTO cold_calls (id, bdr_id, data) VALUES (?, ?, '2026-01-05 10:00:00')", [(7, 1), (8, 2), (9, 3)])
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setattr(database, "DATABASE_PATH", caminho)
+    database.save_api_usage("chave", 1, "cold_call", "gpt-4o", custo_usd=0.5)
+    assert database.delete_bdrs([1, 2]) == 2
+    assert [call[13] for call in database.get_bdr_cold_calls(3)] == [9]
+    assert database.get_table_counts() == {'bdrs': 1, 'analises': 0, 'cold_calls': 1}
+    assert database.get_usage_cost() == 0.5
+    # Os ids e o log da sincronização continuam valendo depois da migração
+    conn = database.get_connection()
+    removidos = conn.execute("SELECT row_id FROM sync_changes WHERE tabela = 'cold_calls' AND operacao = 'DELETE'").fetchall()
+    assert sorted(removidos) == [(7,), (8,)]
+    assert "idx_cold_calls_bdr_ts" in {row[1] for row in conn.execute("PRAGMA index_list(cold_calls)")}
+    conn.close()
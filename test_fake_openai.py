@@ -0,0 +1,66 @@
+"""
+Testes do fluxo de análise contra a API local (benchmarks/fake_openai.py), sem rede externa.
+"""
+
+import io
+import pytest
+from analysis import (build_cold_call_prompt, transcribe_audio, run_analysis, parse_cold_call_analysis,
+                      build_one_on_one_prompt, parse_one_on_one_analysis)
+from benchmarks.fake_openai import start_server, parse_latency
+
+openai = pytest.importorskip("openai")
+
+@pytest.fixture
+def servidor():
+    servidor = start_server(latencia_transcricao="const:0", latencia_chat="const:0", seed=1)
+    yield servidor
+    servidor.shutdown()
+    servidor.server_close()
+
+@pytest.mark.parametrize("idioma", ["Português", "English"])
+def test_analise_de_cold_call_no_idioma_do_prompt(servidor, idioma):
+    client = openai.OpenAI(api_key="teste", base_url=servidor.base_url, max_retries=0)
+    texto = transcribe_audio(client, ("call.mp3", io.BytesIO(b"ID3" + bytes(2048)), "audio/mpeg"))
+    assert texto
+
+    analise = run_analysis(client, build_cold_call_prompt(idioma, "Ana", "Carla", "Acme", "", texto))
+    resultado = parse_cold_call_analysis(analise, idioma)
+    # Os scores vêm da resposta (não do valor padrão) e as seções são encontradas
+    assert all(2 <= valor <= 10 for valor in resultado['scores'].values())
+    assert "Ver análise completa" not in (resultado['pontos_atencao'], resultado['recomendacoes'])
+
+def test_analise_de_1x1(servidor):
+    client = openai.OpenAI(api_key="teste", base_url=servidor.base_url, max_retries=0)
+    resumo, metas = parse_one_on_one_analysis(run_analysis(client, build_one_on_one_prompt("Transcrição")))
+    assert resumo.startswith("O BDR fechou") and metas.startswith("- Praticar")
+
+def test_consumo_informado_por_chamada(servidor):
+    client = openai.OpenAI(api_key="teste", base_url=servidor.base_url, max_retries=0)
+    consumo = []
+    transcribe_audio(client, ("call.mp3", io.BytesIO(bytes(64000)), "audio/mpeg"), on_usage=consumo.append)
+    run_analysis(client, build_one_on_one_prompt("Transcrição"), on_usage=consumo.append)
+
+    transcricao, analise = consumo
+    assert (transcricao['tipo'], transcricao['modelo']) == ("transcricao", "whisper-1")
+    assert transcricao['audio_segundos'] >= 4
+    assert analise['tipo'] == "analise" and analise['prompt_tokens'] > 0 and analise['completion_tokens'] > 0
+
+def test_429_injetado_e_repetido_pelo_sdk(servidor):
+    servidor.taxa_429 = 1.0
+    client = openai.OpenAI(api_key="teste", base_url=servidor.base_url, max_retries=0)
+    with pytest.raises(openai.RateLimitError):
+        run_analysis(client, build_one_on_one_prompt("Transcrição"))
+
+    # Com retries, o SDK respeita o Retry-After e conclui quando o limite passa
+    servidor.taxa_429 = 0.0
+    servidor.retry_after_ms = 10
+    assert run_analysis(openai.OpenAI(api_key="teste", base_url=servidor.base_url), build_one_on_one_prompt("x"))
+    assert servidor.contadores["/v1/chat/completions 429"] == 1
+
+def test_especificacao_de_latencia():
+    import random
+    rng = random.Random(0)
+    assert parse_latency("const:250")(rng) == 0.25
+    assert 0.1 <= parse_latency("uniform:100,200")(rng) <= 0.2
+    with pytest.raises(ValueError):
+        parse_latency("gamma:1")
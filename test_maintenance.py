@@ -0,0 +1,250 @@
+"""
+Testes do arquivamento do histórico e da manutenção do banco (maintenance.py).
+"""
+
+import contextvars
+import os
+import sqlite3
+import pytest
+import numpy as np
+import database
+import maintenance
+from analysis import HYBRID_STEPS
+from analytics import stage_matrix
+from snapshot import ScoreSnapshot
+
+@pytest.fixture(autouse=True)
+def banco_temporario(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DATABASE_PATH", str(tmp_path / "teste.db"))
+    monkeypatch.setattr(maintenance, "_last_run", None)
+    database._invalidate_cache()
+    yield
+    database.set_include_archived(False)
+
+def salvar_call(bdr_id, valor, data):
+    call_id = database.save_cold_call_analise(bdr_id, "Prospect", f"Empresa {valor}", {key: valor for key in HYBRID_STEPS},
+                                              "análise", "pontos", "recomendações", "")
+    conn = database.get_connection()
+    conn.execute("UPDATE cold_calls SET data = ? WHERE id = ?", (data, call_id))
+    conn.commit()
+    conn.close()
+    return call_id
+
+def salvar_analise(bdr_id, resumo, data):
+    analise_id = database.save_analise(bdr_id, resumo, "metas")
+    conn = database.get_connection()
+    conn.execute("UPDATE analises SET data = ? WHERE id = ?", (data, analise_id))
+    conn.commit()
+    conn.close()
+    return analise_id
+
+def historico():
+    """Ana com calls de 2024 (antigas) e 2026; Bia só com calls antigas; análises 1:1 das duas épocas."""
+    ana = database.add_bdr("Ana")
+    bia = database.add_bdr("Bia")
+    antigas = [salvar_call(ana, 2, "2024-03-01 10:00:00"), salvar_call(bia, 4, "2024-05-01 10:00:00")]
+    recentes = [salvar_call(ana, 8, "2026-01-10 10:00:00"), salvar_call(ana, 9, "2026-01-11 10:00:00")]
+    salvar_analise(ana, "antiga", "2024-02-01 10:00:00")
+    salvar_analise(ana, "recente", "2026-01-05 10:00:00")
+    return ana, bia, antigas, recentes
+
+def contar(tabela):
+    conn = database.get_connection(archived=False)
+    total = conn.execute(f"SELECT COUNT(*) FROM {tabela}").fetchone()[0]
+    conn.close()
+    return total
+
+def test_arquivamento_preserva_totais_gerais():
+    ana, bia, antigas, recentes = historico()
+    medias = {bdr: database.get_hybrid_conversation_average_scores(bdr) for bdr in (None, ana, bia)}
+    contagens = database.get_table_counts()
+
+    assert database.archive_records("2025-01-01") == {'cold_calls': 2, 'analises': 1}
+    assert (contar("cold_calls"), contar("analises")) == (2, 1)
+    assert os.path.exists(database.get_archive_path())
+    # Médias e contagens de todo o histórico continuam as mesmas
+    assert {bdr: database.get_hybrid_conversation_average_scores(bdr) for bdr in (None, ana, bia)} == medias
+    assert database.get_table_counts() == contagens
+    # Com filtro de período, só o banco principal
+    assert database.get_hybrid_conversation_average_scores(ana, since="2024-01-01")['total_calls'] == 2
+
+def test_medias_por_bdr_incluem_o_arquivo_como_as_medias_gerais():
+    ana, bia = database.add_bdr("Ana"), database.add_bdr("Bia")
+    for dia in range(1, 6):
+        salvar_call(ana, dia, f"2024-0{dia}-01 10:00:00")
+        salvar_call(bia, 10 - dia, f"{2024 if dia < 4 else 2026}-0{dia}-02 10:00:00")
+    salvar_call(ana, 7, "2026-01-01 10:00:00")
+    conn = database.get_connection()
+    conn.execute("UPDATE cold_calls SET reframe_score = NULL WHERE bdr_id = ? AND warmer_score IN (9, 5)", (bia,))
+    conn.commit()
+    conn.close()
+    database._invalidate_cache(rewrite=True)
+    assert database.archive_records("2025-01-01")['cold_calls'] == 8
+    assert database.get_hybrid_conversation_average_scores()['total_calls'] == 11
+
+    nomes_por_id = dict(database.get_bdrs())
+    matrizes = {"snapshot": ScoreSnapshot().refresh().stage_matrix(nomes_por_id),
+                "sql": stage_matrix(database.get_stage_averages_by_bdr())}
+    for origem, (ids, nomes, contagens, matriz, quantidades) in matrizes.items():
+        assert nomes == ["Ana", "Bia"], origem
+        for bdr_id, total, medias in zip(ids.tolist(), contagens.tolist(), matriz):
+            esperado = database.get_hybrid_conversation_average_scores(bdr_id)
+            assert total == esperado['total_calls'], origem
+            assert np.round(medias, 1).tolist() == [esperado[step] for step in HYBRID_STEPS], origem
+        assert quantidades.tolist() == [[6] * 6, [5, 3, 5, 5, 5, 5]], origem
+
+    # Com período, só o banco principal
+    ids, _, contagens, _, _ = ScoreSnapshot().refresh().stage_matrix(nomes_por_id, since=database.to_epoch("2025-01-01"))
+    assert (ids.tolist(), contagens.tolist()) == ([ana, bia], [1, 2])
+
+def test_leitura_do_historico_arquivado_sob_pedido():
+    ana, _, antigas, recentes = historico()
+    database.archive_records("2025-01-01")
+    assert [linha[1] for linha in database.get_bdr_analyses(ana)] == ["recente"]
+    assert database.count_bdr_analyses(ana, since="2024-01-01", until="2024-12-31") == 0
+
+    database.set_include_archived(True)
+    assert [linha[1] for linha in database.get_bdr_analyses(ana)] == ["recente", "antiga"]
+    assert database.count_bdr_analyses(ana, since="2024-01-01", until="2024-12-31") == 1
+    assert len(database.get_bdr_cold_calls(ana)) == 3
+    assert database.get_table_counts() == {'bdrs': 2, 'analises': 2, 'cold_calls': 4}
+    # Gravar continua possível com a leitura do arquivo ligada
+    database.save_analise(ana, "nova", "")
+    database.set_include_archived(False)
+
+    # Buscas por id (reaproveitamento de áudio repetido) encontram o arquivo sem pedir
+    assert database.get_cold_call(antigas[0])['scores']['warmer_score'] == 2
+
+def dados_do_fragmento(bdr_id, incluir_arquivo, tamanho=2):
+    """Caminho de dados dos fragmentos das páginas 3 e 4: liga o flag, conta e percorre as páginas do histórico."""
+    database.set_include_archived(incluir_arquivo)
+    calls, analises = [], []
+    while pagina := database.get_bdr_cold_calls(bdr_id, limit=tamanho, offset=len(calls)):
+        calls.extend(pagina)
+    while pagina := database.get_bdr_analyses(bdr_id, limit=tamanho, offset=len(analises)):
+        analises.extend(pagina)
+    return database.count_bdr_cold_calls(bdr_id), calls, database.count_bdr_analyses(bdr_id), analises
+
+def test_paginacao_do_fragmento_bate_com_o_total_com_e_sem_arquivo():
+    ana, _, antigas, recentes = historico()
+    salvar_call(ana, 7, "2026-01-12 10:00:00")
+    database.archive_records("2025-01-01")
+    # A média geral soma o arquivo mesmo com o flag desligado; o total da paginação não
+    assert database.get_hybrid_conversation_average_scores(ana)['total_calls'] == 4
+
+    # Cada rerun de fragmento roda num contexto novo, sem o flag ligado pelo script da página
+    for incluir_arquivo, total_calls, total_analises in ((False, 3, 1), (True, 4, 2)):
+        total, calls, total_1a1, analises = contextvars.Context().run(dados_do_fragmento, ana, incluir_arquivo)
+        assert total == len(calls) == total_calls
+        assert len({linha[13] for linha in calls}) == total_calls
+        assert total_1a1 == len(analises) == total_analises
+        assert database.get_bdr_cold_calls(ana, limit=2, offset=total_calls) == []
+    assert {linha[13] for linha in calls} >= {antigas[0], *recentes}
+
+def test_ids_nao_se_repetem_e_remocoes_alcancam_o_arquivo():
+    ana, bia, antigas, recentes = historico()
+    ultima = salvar_call(bia, 6, "2024-06-01 10:00:00")
+    database.archive_records("2025-01-01")
+    # Inclusive a linha de maior id vai para o arquivo: os próximos ids continuam depois dela
+    assert database.get_cold_call(ultima) is not None and contar("cold_calls") == 2
+    assert salvar_call(ana, 5, "2026-02-01 10:00:00") > ultima
+
+    database.delete_cold_call(antigas[0])
+    assert database.get_cold_call(antigas[0]) is None
+    assert database.get_hybrid_conversation_average_scores(ana)['total_calls'] == 3
+
+    conn = database.get_connection()
+    conn.execute("DELETE FROM sync_changes")
+    conn.commit()
+    conn.close()
+    database.delete_bdr(bia)
+    assert database.get_hybrid_conversation_average_scores(bia)['total_calls'] == 0
+    # As remoções no arquivo também vão para o log da sincronização com o Next.js
+    conn = database.get_connection()
+    removidas = conn.execute("SELECT row_id FROM sync_changes WHERE tabela = 'cold_calls'").fetchall()
+    conn.close()
+    assert sorted(removidas) == sorted([(antigas[1],), (ultima,)])
+
+    database.delete_all_cold_calls()
+    assert database.get_table_counts()['cold_calls'] == 0
+
+def test_ids_arquivados_nao_voltam_apos_remover_a_linha_mais_nova():
+    ana, _, antigas, recentes = historico()
+    database.archive_records("2025-01-01")
+    # Sem nenhuma linha no banco principal, o SQLite recomeçaria do maior id que sobrou
+    for call_id in recentes:
+        database.delete_cold_call(call_id)
+    analise_id = database.save_analise(ana, "nova", "metas")
+    nova = salvar_call(ana, 7, "2026-03-01 10:00:00")
+    assert nova > max(antigas + recentes) and analise_id > 2
+
+    database.set_include_archived(True)
+    ids = [linha[-1] for linha in database.get_bdr_cold_calls(ana)]
+    assert sorted(ids) == sorted(set(ids)) == sorted([antigas[0], nova])
+    database.set_include_archived(False)
+    assert database.get_cold_call(antigas[0])['scores']['warmer_score'] == 2
+    assert database.get_cold_call(nova)['scores']['warmer_score'] == 7
+
+def test_migracao_continua_ids_depois_do_arquivo(tmp_path):
+    """Banco de antes do AUTOINCREMENT cujo arquivo já tem ids maiores que os do banco principal."""
+    conn = sqlite3.connect(database.DATABASE_PATH)
+    conn.execute("CREATE TABLE bdrs (id INTEGER PRIMARY KEY, nome TEXT NOT NULL UNIQUE)")
+    conn.execute("INSERT INTO bdrs (id, nome) VALUES (1, 'Ana')")
+    conn.execute("""CREATE TABLE cold_calls (id INTEGER PRIMARY KEY, bdr_id INTEGER, data TEXT NOT NULL,
+                    prospect_nome TEXT, prospect_empresa TEXT, FOREIGN KEY (bdr_id) REFERENCES bdrs (id))""")
+    conn.execute("INSERT INTO cold_calls (id, bdr_id, data) VALUES (3, 1, '2026-01-01 10:00:00')")
+    conn.commit()
+    conn.close()
+    conn = sqlite3.connect(database.get_archive_path())
+    conn.execute("CREATE TABLE cold_calls (id INTEGER PRIMARY KEY, bdr_id INTEGER, data TEXT NOT NULL)")
+    conn.execute("INSERT INTO cold_calls (id, bdr_id, data) VALUES (7, 1, '2024-01-01 10:00:00')")
+    conn.commit()
+    conn.close()
+
+    assert salvar_call(1, 5, "2026-02-01 10:00:00") == 8
+
+def test_manutencao_libera_paginas_e_registra_execucao():
+    ana = database.add_bdr("Ana")
+    for dia in range(1, 29):
+        salvar_call(ana, 5, f"2024-02-{dia:02d} 10:00:00")
+    salvar_call(ana, 5, "2026-01-01 10:00:00")
+    database.get_connection().close()
+
+    resultado = maintenance.run(archive_days=365)
+    assert resultado['arquivados'] == {'cold_calls': 28, 'analises': 0}
+    conn = database.get_connection()
+    assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    assert conn.execute("PRAGMA freelist_count").fetchone()[0] == 0
+    conn.close()
+    assert database.get_last_maintenance() is not None
+
+def test_agendador_espera_ociosidade_e_intervalo(monkeypatch):
+    monkeypatch.setattr(maintenance, "MAINTENANCE_IDLE_SECONDS", 60)
+    database.get_bdrs()
+    assert not maintenance.is_due()
+    monkeypatch.setattr(database, "_last_access", database._last_access - 120)
+    assert maintenance.is_due()
+    maintenance.run(archive_days=0)
+    monkeypatch.setattr(database, "_last_access", database._last_access - 120)
+    assert not maintenance.is_due()
+
+def test_operacoes_em_lote_alcancam_o_arquivo():
+    ana, bia, antigas, recentes = historico()
+    database.archive_records("2025-01-01")
+
+    # Calls antigas da Ana (arquivadas) passam para a Bia; as médias gerais de cada BDR acompanham
+    assert database.reassign_cold_calls(bia, bdr_id=ana, until="2025-01-01") == 1
+    assert database.get_hybrid_conversation_average_scores(bia)['total_calls'] == 2
+    assert database.get_hybrid_conversation_average_scores(ana)['total_calls'] == 2
+
+    assert database.merge_bdrs(ana, bia) == {'cold_calls': 2, 'analises': 2}
+    assert database.get_hybrid_conversation_average_scores(bia)['total_calls'] == 4
+    assert database.get_table_counts() == {'bdrs': 1, 'analises': 2, 'cold_calls': 4}
+
+    assert database.delete_cold_calls(bdr_id=bia, until="2025-01-01") == 2
+    assert database.get_hybrid_conversation_average_scores()['warmer_score'] == 8.5
+    # As alterações no arquivo também vão para o log da sincronização com o Next.js
+    conn = database.get_connection()
+    log = set(conn.execute("SELECT row_id, operacao FROM sync_changes WHERE tabela = 'cold_calls'").fetchall())
+    conn.close()
+    assert {(antigas[0], 'UPDATE'), (antigas[0], 'DELETE'), (antigas[1], 'DELETE')} <= log
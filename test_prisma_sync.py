@@ -0,0 +1,161 @@
+"""
+Testes da sincronização incremental com as tabelas do Prisma (prisma_sync.py).
+
+Os testes no PostgreSQL criam as tabelas do schema.prisma em um schema
+temporário e são pulados se TEST_DATABASE_URL não estiver definida.
+"""
+
+import os
+import uuid
+import pytest
+import database
+import prisma_sync
+from analysis import HYBRID_STEPS
+
+POSTGRES_URL = os.getenv("TEST_DATABASE_URL")
+
+# Tabelas como criadas pelo `prisma migrate` a partir de analise-bdrs-nextjs/prisma/schema.prisma
+_SCORES_DDL = ", ".join(f'"{prisma_sync._camel(step)}" INTEGER NOT NULL' for step in HYBRID_STEPS)
+PRISMA_DDL = (
+    """CREATE TABLE "bdrs" ("id" SERIAL PRIMARY KEY, "nome" TEXT NOT NULL UNIQUE,
+       "createdAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP, "updatedAt" TIMESTAMP(3) NOT NULL)""",
+    f"""CREATE TABLE "cold_calls" ("id" SERIAL PRIMARY KEY,
+       "bdrId" INTEGER NOT NULL REFERENCES "bdrs" ("id") ON DELETE CASCADE ON UPDATE CASCADE,
+       "prospectNome" TEXT NOT NULL, "prospectEmpresa" TEXT NOT NULL, "insightComercial" TEXT, {_SCORES_DDL},
+       "analiseCompleta" TEXT NOT NULL, "pontosAtencao" TEXT NOT NULL, "recomendacoes" TEXT NOT NULL,
+       "createdAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP, "updatedAt" TIMESTAMP(3) NOT NULL)""",
+    f"""CREATE TABLE "meetings" ("id" SERIAL PRIMARY KEY,
+       "bdrId" INTEGER NOT NULL REFERENCES "bdrs" ("id") ON DELETE CASCADE ON UPDATE CASCADE,
+       "dataReuniao" TIMESTAMP(3) NOT NULL, "resumo" TEXT NOT NULL, "metas" TEXT NOT NULL, {_SCORES_DDL},
+       "analiseCompleta" TEXT NOT NULL, "pontosAtencao" TEXT NOT NULL, "recomendacoes" TEXT NOT NULL,
+       "createdAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP, "updatedAt" TIMESTAMP(3) NOT NULL)""",
+)
+
+@pytest.fixture(autouse=True)
+def banco_temporario(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DATABASE_PATH", str(tmp_path / "teste.db"))
+
+@pytest.fixture
+def prisma(monkeypatch):
+    """Conexão com um schema novo contendo as tabelas do Prisma (e o estado da sincronização)."""
+    if not POSTGRES_URL:
+        pytest.skip("defina TEST_DATABASE_URL para rodar os testes no PostgreSQL")
+    psycopg = pytest.importorskip("psycopg")
+    schema = f"prisma_{uuid.uuid4().hex[:12]}"
+    monkeypatch.setattr(prisma_sync, "POSTGRES_SCHEMA", schema)
+    conn = psycopg.connect(POSTGRES_URL, options=f"-c search_path={schema}")
+    conn.execute(f'CREATE SCHEMA "{schema}"')
+    for ddl in PRISMA_DDL:
+        conn.execute(ddl)
+    conn.commit()
+    yield conn
+    conn.rollback()
+    conn.execute(f'DROP SCHEMA "{schema}" CASCADE')
+    conn.commit()
+    conn.close()
+
+def salvar_call(bdr_id, valor, prospect="Prospect"):
+    return database.save_cold_call_analise(bdr_id, prospect, "Empresa", {key: valor for key in HYBRID_STEPS},
+                                           "análise", "pontos", "recomendações", "")
+
+def log():
+    conn = database.get_connection()
+    linhas = conn.execute("SELECT tabela, row_id, operacao FROM sync_changes ORDER BY seq").fetchall()
+    conn.close()
+    return linhas
+
+def test_triggers_registram_insercoes_alteracoes_e_remocoes():
+    ana = database.add_bdr("Ana")
+    call_id = salvar_call(ana, 5)
+    database.update_bdr_nome(ana, "Ana Souza")
+    database.delete_cold_call(call_id)
+    assert ('bdrs', ana, 'INSERT') in log()
+    assert log()[-2:] == [('bdrs', ana, 'UPDATE'), ('cold_calls', call_id, 'DELETE')]
+    # Tabelas que não vão para o Next.js não entram no log
+    database.save_analysis_checkpoint("chave", "transcricao", {})
+    assert {tabela for tabela, _, _ in log()} == {'bdrs', 'cold_calls'}
+
+def test_lote_reflete_o_estado_atual_das_linhas():
+    ana = database.add_bdr("Ana")
+    bia = database.add_bdr("Bia")
+    mantida = salvar_call(ana, 5)
+    removida = salvar_call(bia, 7)
+    analise = database.save_analise(bia, "resumo", "metas")
+    database.delete_bdr(bia)
+
+    conn = database.get_connection()
+    ultimo, lote = prisma_sync.pending_changes(conn, 0, 100)
+    assert ultimo == prisma_sync.current_seq(conn)
+    # Várias alterações da mesma linha viram um único upsert; o que não existe mais vira remoção
+    assert [linha[:2] for linha in lote['bdrs'][0]] == [(ana, "Ana")] and lote['bdrs'][1] == [bia]
+    assert [linha[0] for linha in lote['cold_calls'][0]] == [mantida] and lote['cold_calls'][1] == [removida]
+    assert lote['analises'] == ([], [analise])
+
+    # Lotes limitados continuam de onde o anterior parou
+    primeiro, _ = prisma_sync.pending_changes(conn, 0, 2)
+    assert primeiro == 2 and prisma_sync.pending_changes(conn, ultimo, 100) == (ultimo, {})
+    conn.close()
+
+def test_carga_completa_quando_o_log_foi_limpo():
+    ana = database.add_bdr("Ana")
+    salvar_call(ana, 5)
+    conn = database.get_connection()
+    assert prisma_sync.needs_full_sync(conn, None)
+    assert not prisma_sync.needs_full_sync(conn, 0)
+    conn.execute("DELETE FROM sync_changes WHERE seq <= 2")
+    conn.commit()
+    assert not prisma_sync.needs_full_sync(conn, 2)
+    assert prisma_sync.needs_full_sync(conn, 1)
+    conn.close()
+
+def tabela(prisma, nome, colunas='"id"'):
+    return prisma.execute(f'SELECT {colunas} FROM "{nome}" ORDER BY "id"').fetchall()
+
+def test_sincronizacao_completa_e_incremental(prisma):
+    ana = database.add_bdr("Ana")
+    call_id = salvar_call(ana, 5, "Carla")
+    database.save_analise(ana, "resumo", "metas")
+
+    resultado = prisma_sync.sync(prisma)
+    assert resultado['modo'] == 'completa' and resultado['enviados'] == 3
+    assert tabela(prisma, "cold_calls", '"id", "bdrId", "prospectNome", "rationalDrowningScore"') == [(call_id, ana, "Carla", 5)]
+    assert tabela(prisma, "meetings", '"resumo", "metas", "warmerScore"') == [("resumo", "metas", 0)]
+
+    # Só as alterações desde a última execução são enviadas
+    bia = database.add_bdr("Bia")
+    nova = salvar_call(bia, 8)
+    database.delete_cold_call(call_id)
+    database.update_bdr_nome(ana, "Ana Souza")
+    resultado = prisma_sync.sync(prisma)
+    assert resultado['modo'] == 'incremental' and (resultado['enviados'], resultado['removidos']) == (3, 1)
+    assert tabela(prisma, "bdrs", '"id", "nome"') == [(ana, "Ana Souza"), (bia, "Bia")]
+    assert tabela(prisma, "cold_calls") == [(nova,)]
+
+    # Nada mudou: nenhum lote; e o Next.js continua inserindo depois dos ids do SQLite
+    assert prisma_sync.sync(prisma)['lotes'] == 0
+    novo_id = prisma.execute('INSERT INTO "bdrs" ("nome", "updatedAt") VALUES (%s, now()) RETURNING "id"', ("Caio",)).fetchone()[0]
+    assert novo_id > bia
+
+def test_execucao_interrompida_recomeca_do_ultimo_lote(prisma, monkeypatch):
+    ana = database.add_bdr("Ana")
+    prisma_sync.sync(prisma)
+    ids = [salvar_call(ana, valor) for valor in range(6)]
+
+    aplicar = prisma_sync._apply
+    lotes = []
+    def falha_no_terceiro_lote(cursor, lote):
+        lotes.append(lote)
+        if len(lotes) == 3:
+            raise RuntimeError("conexão perdida")
+        return aplicar(cursor, lote)
+    monkeypatch.setattr(prisma_sync, "_apply", falha_no_terceiro_lote)
+    with pytest.raises(RuntimeError):
+        prisma_sync.sync(prisma, batch_size=2)
+    assert tabela(prisma, "cold_calls") == [(call_id,) for call_id in ids[:4]]
+
+    monkeypatch.setattr(prisma_sync, "_apply", aplicar)
+    resultado = prisma_sync.sync(prisma, batch_size=2)
+    assert resultado['lotes'] == 1 and tabela(prisma, "cold_calls") == [(call_id,) for call_id in ids]
+    # Reaplicar tudo (carga completa) não muda o resultado
+    assert prisma_sync.sync(prisma, full=True)['removidos'] == 0
+    assert tabela(prisma, "cold_calls") == [(call_id,) for call_id in ids]
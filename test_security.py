@@ -5,6 +5,7 @@ Execute este script para ver como as validações funcionam.
 """
 
 from utils import validate_input_text, validate_audio_file
+from validation import validate_many, validate_records, sanitize_text, sanitize_fields, has_dangerous_filename
 
 def test_input_validation():
     """Testa as validações de entrada de texto."""
@@ -33,10 +34,40 @@ def test_input_validation():
         is_valid, message = validate_input_text(text, "Nome", 50)
         status = "✅" if is_valid == expected else "❌"
         print(f"{status} {description}: '{text[:30]}{'...' if len(text) > 30 else ''}' -> {message}")
+        assert is_valid == expected, description
     
     print("\n" + "=" * 50)
     print("✅ Testes de segurança concluídos!")
     print("💡 As validações estão funcionando corretamente.")
 
+def test_token_message_precedence():
+    """Tokens proibidos são reportados antes de caracteres não permitidos."""
+    assert validate_input_text("João -- Silva", "Nome", 50) == (False, "Nome contém caracteres ou palavras inválidas: '--'")
+    assert validate_input_text("SELECTED", "Nome", 50)[1].endswith("'select'")
+    assert validate_input_text("João_# Silva", "Nome", 50)[1].startswith("Nome contém caracteres não permitidos")
+    assert validate_input_text("João # exec", "Nome", 50)[1].endswith("'exec'")
+
+def test_batch_validation():
+    """A API em lote valida vários campos e linhas de uma vez."""
+    resultados = validate_many([("João", "Nome", 50), ("<b>", "Empresa", 100)])
+    assert [valido for valido, _ in resultados] == [True, False]
+
+    schema = {'nome': ("Nome do Prospect", 100), 'empresa': ("Empresa do Prospect", 100)}
+    linhas = [{'nome': "Ana", 'empresa': "Acme"}, {'nome': "Bia", 'empresa': "Acme; DROP TABLE"}, {'nome': ""}]
+    assert [(indice, campo) for indice, campo, _ in validate_records(linhas, schema)] == [
+        (1, 'empresa'), (2, 'nome'), (2, 'empresa')]
+
+def test_sanitization():
+    """A sanitização remove caracteres e sequências perigosas dos textos gravados."""
+    assert sanitize_text("  <b>Olá</b>; 'x' -- /* y */ ") == "bOlá/b x   y"
+    assert sanitize_text("- item 1\n- item 2") == "- item 1\n- item 2"
+    assert sanitize_text("") == "" and sanitize_text(None) is None
+    assert sanitize_fields({'a': "x;", 'b': None}) == {'a': "x", 'b': None}
+
+def test_dangerous_filenames():
+    assert has_dangerous_filename("../audio.mp3")
+    assert has_dangerous_filename("audio?.mp3")
+    assert not has_dangerous_filename("call 01.mp3")
+
 if __name__ == "__main__":
     test_input_validation()
@@ -0,0 +1,170 @@
+"""
+Testes do snapshot colunar de scores (snapshot.py).
+"""
+
+import os
+import sqlite3
+import subprocess
+import sys
+import numpy as np
+import pytest
+import database
+from analysis import HYBRID_STEPS
+from analytics import stage_matrix
+from snapshot import ScoreSnapshot, get_snapshot
+
+@pytest.fixture(autouse=True)
+def banco_temporario(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DATABASE_PATH", str(tmp_path / "teste.db"))
+
+def salvar_call(bdr_id, valor):
+    """Salva um cold call com todos os scores iguais a `valor`."""
+    return database.save_cold_call_analise(bdr_id, "Prospect", "Empresa", {key: valor for key in HYBRID_STEPS},
+                                           "análise", "pontos", "recomendações", "")
+
+def test_atualizacao_incremental():
+    """Inserções novas são anexadas sem recarregar o que já estava em memória."""
+    ana = database.add_bdr("Ana")
+    salvar_call(ana, 4)
+    snapshot = ScoreSnapshot().refresh()
+    ids_antes = snapshot.ids
+
+    salvar_call(ana, 8)
+    snapshot.refresh()
+    assert len(snapshot) == 2
+    assert snapshot.ids[:1].tolist() == ids_antes.tolist()
+    assert snapshot.scores[:, 0].tolist() == [4, 8]
+
+def test_recarga_apos_remocao():
+    """Remoções invalidam a marca d'água e forçam a recarga completa."""
+    ana = database.add_bdr("Ana")
+    primeiro = salvar_call(ana, 4)
+    salvar_call(ana, 8)
+    snapshot = ScoreSnapshot().refresh()
+
+    database.delete_cold_call(primeiro)
+    snapshot.refresh()
+    assert snapshot.scores[:, 0].tolist() == [8]
+
+def test_medias_batem_com_o_sql():
+    ana, bia = database.add_bdr("Ana"), database.add_bdr("Bia")
+    for bdr_id, valor in [(ana, 4), (ana, 8), (bia, 3)]:
+        salvar_call(bdr_id, valor)
+    ids, nomes, contagens, matriz, quantidades = ScoreSnapshot().refresh().stage_matrix(dict(database.get_bdrs()))
+    linhas = database.get_stage_averages_by_bdr()
+    assert ids.tolist() == [linha[0] for linha in linhas]
+    assert nomes == [linha[1] for linha in linhas]
+    assert contagens.tolist() == [linha[2] for linha in linhas]
+    assert np.allclose(matriz, [linha[3:9] for linha in linhas])
+    assert quantidades.tolist() == [list(linha[9:]) for linha in linhas]
+
+def test_scores_ausentes_ficam_fora_das_medias_como_no_sql():
+    ana, bia = database.add_bdr("Ana"), database.add_bdr("Bia")
+    ausente = salvar_call(ana, 4)
+    salvar_call(ana, 8)
+    sem_reframe = salvar_call(bia, 6)
+    conn = database.get_connection()
+    conn.execute("UPDATE cold_calls SET reframe_score = NULL WHERE id IN (?, ?)", (ausente, sem_reframe))
+    conn.commit()
+    conn.close()
+    database._invalidate_cache(rewrite=True)
+
+    snapshot = ScoreSnapshot().refresh()
+    assert np.isnan(snapshot.scores[0, 1])
+    _, contagens, medias = snapshot.per_bdr_means()
+    assert contagens.tolist() == [2, 1]
+    assert medias[0].tolist() == [6, 8, 6, 6, 6, 6] and np.isnan(medias[1, 1])
+
+    # A Bia não tem nenhum Reframe: NaN nas duas matrizes (AVG NULL no SQL), com quantidade 0
+    _, _, contagens_sql, matriz_sql, quantidades_sql = stage_matrix(database.get_stage_averages_by_bdr())
+    _, _, contagens_snapshot, matriz_snapshot, quantidades_snapshot = snapshot.stage_matrix(dict(database.get_bdrs()))
+    assert contagens_snapshot.tolist() == contagens_sql.tolist()
+    assert np.allclose(matriz_snapshot, matriz_sql, equal_nan=True) and np.isnan(matriz_snapshot[1, 1])
+    assert quantidades_snapshot.tolist() == quantidades_sql.tolist() == [[2, 1, 2, 2, 2, 2], [1, 0, 1, 1, 1, 1]]
+    assert np.allclose(snapshot.percentiles(q=(50,))[0], [6, 8, 6, 6, 6, 6])
+    # Média geral: só as etapas presentes de cada call (4 e 8 para a Ana, e não 6.33 das médias por etapa)
+    assert snapshot.ranking() == [(ana, 6.0, 2), (bia, 6.0, 1)]
+    assert snapshot.ranking(HYBRID_STEPS[1]) == [(ana, 8.0, 2)]
+
+def test_calls_sem_bdr_ou_sem_data_nao_quebram_o_snapshot():
+    ana = database.add_bdr("Ana")
+    salvar_call(ana, 6)
+    orfa = salvar_call(ana, 2)
+    conn = database.get_connection()
+    conn.execute("UPDATE cold_calls SET bdr_id = NULL, data_ts = NULL WHERE id = ?", (orfa,))
+    conn.commit()
+    conn.close()
+    database._invalidate_cache(rewrite=True)
+
+    snapshot = ScoreSnapshot().refresh()
+    assert (snapshot.bdr_ids.tolist(), snapshot.timestamps.tolist()[1]) == ([ana, 0], 0)
+    # Entra nas estatísticas gerais, como no SQL, mas não aparece como BDR
+    assert snapshot.percentiles(q=(50,))[0, 0] == 4
+    assert database.get_hybrid_conversation_average_scores()['warmer_score'] == 4
+    assert snapshot.ranking() == [(ana, 6.0, 1)]
+    ids, nomes, contagens, _, _ = snapshot.stage_matrix(dict(database.get_bdrs()))
+    assert (ids.tolist(), nomes, contagens.tolist()) == ([ana], ["Ana"], [1])
+    assert snapshot.per_bdr_means(since=1)[0].tolist() == [ana]
+
+def gravar_em_outro_processo(codigo):
+    """Roda `codigo` (com database importado) em outro processo Python, no mesmo banco."""
+    subprocess.run([sys.executable, "-c", "import database\n" + codigo], check=True,
+                   cwd=os.path.dirname(os.path.abspath(__file__)), env=dict(os.environ, DATABASE_PATH=database.DATABASE_PATH))
+
+def test_gravacoes_de_outro_processo_aparecem_no_cache_e_no_snapshot(monkeypatch):
+    monkeypatch.setattr(database, "SHARED_VERSION_CHECK_SECONDS", 0)
+    monkeypatch.setattr(database, "_shared_version", None)
+    ana = database.add_bdr("Ana")
+    salvar_call(ana, 4)
+    assert database.get_hybrid_conversation_average_scores()['total_calls'] == 1
+    assert len(get_snapshot()) == 1
+    rewrite = database.get_rewrite_version()
+
+    # Análise em lote em outro processo: só inserções, o snapshot lê apenas as linhas novas
+    gravar_em_outro_processo(f"""
+from analysis import HYBRID_STEPS
+for _ in range(4):
+    database.save_cold_call_analise({ana}, "Prospect", "Empresa", {{key: 8 for key in HYBRID_STEPS}}, "a", "p", "r", "")
+""")
+    assert database.get_hybrid_conversation_average_scores()['total_calls'] == 5
+    assert get_snapshot().scores[:, 0].tolist() == [4, 8, 8, 8, 8]
+    assert database.get_rewrite_version() == rewrite
+
+    # Remoção em outro processo: recarga completa
+    conn = sqlite3.connect(database.DATABASE_PATH)
+    conn.execute("DELETE FROM cold_calls WHERE warmer_score = 4")
+    conn.commit()
+    conn.close()
+    assert get_snapshot().scores[:, 0].tolist() == [8, 8, 8, 8]
+    assert database.get_rewrite_version() > rewrite
+    assert database.get_hybrid_conversation_average_scores()['warmer_score'] == 8
+
+    # Dentro do intervalo de conferência, o cache continua valendo
+    monkeypatch.setattr(database, "SHARED_VERSION_CHECK_SECONDS", 3600)
+    gravar_em_outro_processo(f"database.delete_bdr({ana})")
+    assert database.get_hybrid_conversation_average_scores()['total_calls'] == 4
+
+def test_ranking_respeita_minimo_de_calls():
+    ana, bia, caio = database.add_bdr("Ana"), database.add_bdr("Bia"), database.add_bdr("Caio")
+    for bdr_id, valor in [(ana, 6), (ana, 8), (bia, 10), (caio, 2), (caio, 4)]:
+        salvar_call(bdr_id, valor)
+    snapshot = ScoreSnapshot().refresh()
+    assert snapshot.ranking(k=2) == [(bia, 10.0, 1), (ana, 7.0, 2)]
+    assert [linha[0] for linha in snapshot.ranking(HYBRID_STEPS[0], min_calls=2)] == [ana, caio]
+    assert [linha[0] for linha in snapshot.ranking(min_calls=2, ascending=True, k=1)] == [caio]
+
+def test_estatisticas_por_etapa():
+    ana = database.add_bdr("Ana")
+    for valor in [2, 4, 6]:
+        salvar_call(ana, valor)
+    snapshot = ScoreSnapshot().refresh()
+    assert snapshot.percentiles().shape == (3, 6)
+    assert np.allclose(snapshot.percentiles(q=(50,))[0], 4)
+    assert snapshot.stage_std().shape == (6,)
+    assert snapshot.stage_correlations().shape == (6, 6)
+
+def test_snapshot_vazio():
+    snapshot = ScoreSnapshot().refresh()
+    assert len(snapshot) == 0
+    assert snapshot.ranking() == []
+    assert snapshot.stage_matrix({})[2].shape == (0,)
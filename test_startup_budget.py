@@ -0,0 +1,36 @@
+"""
+Teste de regressão do tempo de carregamento das páginas.
+
+Cada página é importada a frio em um processo novo. O teste falha se o
+bloco de imports passar do orçamento ou se carregar dependências pesadas
+que só deveriam ser importadas sob demanda.
+"""
+
+import os
+import pytest
+from benchmarks.import_profile import PAGES, profile_page
+
+# Orçamento de import a frio por página (segundos); ajustável por ambiente
+STARTUP_BUDGET_SECONDS = float(os.getenv("STARTUP_BUDGET_SECONDS", "1.5"))
+
+# Dependências pesadas permitidas no carregamento de cada página
+ALLOWED_HEAVY_MODULES = {
+    "pages/3_Gerenciar_Cold_Calls.py": {"numpy"},
+    "pages/6_Metricas.py": {"numpy"},
+}
+
+@pytest.mark.parametrize("page", PAGES)
+def test_import_a_frio_dentro_do_orcamento(page):
+    """O import a frio da página cabe no orçamento."""
+    report = profile_page(page)
+    assert report['seconds'] < STARTUP_BUDGET_SECONDS, (
+        f"{page} levou {report['seconds']:.2f}s para importar (orçamento: {STARTUP_BUDGET_SECONDS}s). "
+        "Rode `python benchmarks/import_profile.py` para ver os módulos mais caros."
+    )
+
+@pytest.mark.parametrize("page", PAGES)
+def test_dependencias_pesadas_sob_demanda(page):
+    """matplotlib, openai e numpy só são carregados quando usados."""
+    report = profile_page(page)
+    inesperados = set(report['heavy_modules']) - ALLOWED_HEAVY_MODULES.get(page, set())
+    assert not inesperados, f"{page} importa {sorted(inesperados)} no carregamento"
@@ -0,0 +1,49 @@
+"""
+Testes da camada de métricas (tracing.py).
+"""
+
+import pytest
+import database
+import tracing
+from tracing import span, traced, set_enabled, flush, latency_summary, span_tree
+
+@pytest.fixture(autouse=True)
+def banco_temporario(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DATABASE_PATH", str(tmp_path / "teste.db"))
+    tracing._buffer.clear()
+    yield
+    set_enabled(False)
+    tracing._buffer.clear()
+
+def test_spans_aninhados_na_mesma_execucao():
+    set_enabled(True)
+    with span("pagina.teste", idioma="English"):
+        database.add_bdr("Ana")
+        database.get_bdrs()
+    flush()
+
+    run_id, nome, _, _, status = database.get_slowest_runs(limit=1)[0]
+    assert (nome, status) == ("pagina.teste", "ok")
+    arvore = [(nivel, linha[2]) for nivel, linha in span_tree(database.get_run_spans(run_id))]
+    assert arvore == [(0, "pagina.teste"), (1, "database.add_bdr"), (1, "database.get_bdrs")]
+    assert {linha[0] for linha in latency_summary()} == {"pagina.teste", "database.add_bdr", "database.get_bdrs"}
+
+def test_erro_fica_registrado_no_span():
+    set_enabled(True)
+
+    @traced("teste.falha")
+    def falha():
+        raise ValueError("x")
+
+    with pytest.raises(ValueError):
+        falha()
+    flush()
+    assert database.get_slowest_runs(limit=1)[0][4] == "erro: ValueError"
+
+def test_desligado_nao_registra_nada():
+    set_enabled(False)
+    with span("pagina.teste") as atual:
+        atual.set(tamanho=1)
+        database.get_bdrs()
+    assert tracing._buffer == []
+    assert flush() == 0
@@ -0,0 +1,62 @@
+"""
+Testes da contabilidade de consumo e custo da API (usage.py).
+"""
+
+from datetime import datetime
+import pytest
+import database
+from analysis import HYBRID_STEPS
+from usage import estimate_cost, usage_recorder, record_cache_hit, budget_status
+
+@pytest.fixture(autouse=True)
+def banco_temporario(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DATABASE_PATH", str(tmp_path / "teste.db"))
+    database._invalidate_cache()
+
+def test_custo_por_tokens_audio_e_versao_datada():
+    # gpt-4o: US$ 2,50 entrada, 1,25 entrada em cache, 10 saída por 1M tokens
+    assert estimate_cost("gpt-4o", prompt_tokens=1_000_000, completion_tokens=100_000,
+                         cached_tokens=400_000) == pytest.approx(0.6 * 2.5 + 0.4 * 1.25 + 0.1 * 10)
+    # Versão datada usa o prefixo mais longo: gpt-4o-mini, não gpt-4o
+    assert estimate_cost("gpt-4o-mini-2024-07-18", prompt_tokens=1_000_000) == pytest.approx(0.15)
+    assert estimate_cost("whisper-1", audio_segundos=90) == pytest.approx(1.5 * 0.006)
+    assert estimate_cost("modelo-desconhecido", prompt_tokens=10_000) == 0.0
+
+def test_consumo_registrado_ligado_e_agregado():
+    bdr_id = database.add_bdr("Ana")
+    registrar = usage_recorder("cold_call:abc", bdr_id)
+    registrar({'tipo': "transcricao", 'modelo': "whisper-1", 'latencia_ms': 1200.0, 'audio_segundos': 120.0})
+    registrar({'tipo': "analise", 'modelo': "gpt-4-turbo", 'latencia_ms': 3000.0,
+               'prompt_tokens': 2000, 'completion_tokens': 500, 'cached_tokens': 0})
+    record_cache_hit("cold_call:abc", bdr_id, "analise", "gpt-4-turbo")
+    call_id = database.save_cold_call_analise(bdr_id, "Carla", "Acme", {key: 7 for key in HYBRID_STEPS},
+                                             "análise", "", "", "")
+    database.link_api_usage("cold_call:abc", cold_call_id=call_id)
+
+    custo_esperado = 2 * 0.006 + (2000 * 10 + 500 * 30) / 1_000_000
+    (grupo, chamadas, evitadas, analises, prompt, completion, _, audio, latencia, custo), = \
+        database.get_usage_summary('bdr')
+    assert (grupo, chamadas, evitadas, analises, prompt, completion, audio) == ("Ana", 2, 1, 1, 2000, 500, 120.0)
+    assert latencia == pytest.approx(2100.0)
+    assert custo == pytest.approx(custo_esperado)
+    assert {linha[0] for linha in database.get_usage_summary('modelo')} == {"whisper-1", "gpt-4-turbo"}
+    assert database.get_usage_cost() == pytest.approx(custo_esperado)
+
+    conn = database.get_connection()
+    ligados = conn.execute("SELECT COUNT(*) FROM api_usage WHERE cold_call_id = ?", (call_id,)).fetchone()[0]
+    conn.close()
+    assert ligados == 3
+
+    with pytest.raises(ValueError):
+        database.get_usage_summary('prospect')
+
+def test_alerta_de_orcamento_mensal():
+    registrar = usage_recorder("1x1:abc", None)
+    registrar({'tipo': "analise", 'modelo': "gpt-4-turbo", 'prompt_tokens': 0, 'completion_tokens': 100_000})
+
+    assert budget_status(budget=0)[2] is None
+    assert budget_status(budget=10, threshold=0.8)[2] is None
+    assert budget_status(budget=3.5, threshold=0.8) == (pytest.approx(3.0), 3.5, "aviso")
+    assert budget_status(budget=2.5)[2] == "excedido"
+    # O gasto de meses anteriores não conta para o mês corrente
+    assert budget_status(agora=datetime(2100, 1, 15), budget=2.5)[0] == 0
@@ -0,0 +1,109 @@
+"""
+Testes do fluxo de análise em etapas com checkpoints.
+"""
+
+import pytest
+import database
+from analysis import parse_cold_call_analysis, HYBRID_STEPS
+from workflow import (make_checkpoint_key, run_stage, last_completed_stage, load_checkpoint, clear_checkpoint,
+                      seed_checkpoint)
+
+ANALISE_EXEMPLO = """
+### HYBRID CONVERSATION SCORES
+**Warmer:** 7/10
+**Reframe:** 6/10
+**Rational Drowning:** 4/10
+**Emotional Impact:** 8/10
+**New Way:** 5/10
+**Your Solution:** 9/10
+
+### ATTENTION POINTS
+Faltou quantificar o problema.
+
+### RECOMMENDATIONS
+Usar dados do setor.
+"""
+
+@pytest.fixture(autouse=True)
+def banco_temporario(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DATABASE_PATH", str(tmp_path / "teste.db"))
+
+def test_etapa_concluida_nao_roda_novamente():
+    """Uma etapa já concluída é retomada do checkpoint, sem nova chamada."""
+    chamadas = []
+    sessao = {}
+    key = make_checkpoint_key("cold_call", "abc", idioma="English")
+
+    def transcrever():
+        chamadas.append(1)
+        return "texto transcrito"
+
+    evitadas = []
+    assert run_stage(sessao, key, "transcribed", transcrever, on_cached=lambda: evitadas.append(1)) == "texto transcrito"
+    assert run_stage(sessao, key, "transcribed", transcrever, on_cached=lambda: evitadas.append(1)) == "texto transcrito"
+    assert len(chamadas) == 1 and len(evitadas) == 1
+    assert last_completed_stage(sessao, key) == "transcribed"
+
+def test_checkpoint_sobrevive_a_nova_sessao():
+    """Após uma falha, uma nova sessão retoma da última etapa salva no banco."""
+    key = make_checkpoint_key("cold_call", "abc", idioma="English")
+    run_stage({}, key, "transcribed", lambda: "texto")
+
+    def falha():
+        raise RuntimeError("GPT indisponível")
+
+    with pytest.raises(RuntimeError):
+        run_stage({}, key, "analysed", falha)
+
+    nova_sessao = {}
+    assert last_completed_stage(nova_sessao, key) == "transcribed"
+    assert run_stage(nova_sessao, key, "analysed", lambda: ANALISE_EXEMPLO) == ANALISE_EXEMPLO
+    assert load_checkpoint({}, key)['outputs']['transcribed'] == "texto"
+
+def test_salvamento_nao_duplica_linhas():
+    """Repetir a etapa de salvamento não cria um novo cold call."""
+    conn = database.get_connection()
+    conn.execute("INSERT INTO bdrs (nome) VALUES ('Ana')")
+    conn.commit()
+    conn.close()
+
+    key = make_checkpoint_key("cold_call", "abc", idioma="English")
+    parsed = parse_cold_call_analysis(ANALISE_EXEMPLO, "English")
+
+    def salvar():
+        return database.save_cold_call_analise(1, "Prospect", "Empresa", parsed['scores'], ANALISE_EXEMPLO,
+                                               parsed['pontos_atencao'], parsed['recomendacoes'], "")
+
+    primeiro_id = run_stage({}, key, "saved", salvar)
+    assert run_stage({}, key, "saved", salvar) == primeiro_id
+    assert len(database.get_bdr_cold_calls(1)) == 1
+
+    clear_checkpoint({}, key)
+    assert last_completed_stage({}, key) is None
+
+def test_etapas_reaproveitadas_de_analise_anterior():
+    """Etapas preenchidas com um resultado anterior do mesmo áudio não rodam e contam como evitadas."""
+    sessao = {}
+    key = make_checkpoint_key("cold_call", "abc", idioma="English")
+    seed_checkpoint(sessao, key, {'uploaded': {'size': 10}, 'transcribed': "texto anterior"})
+    assert last_completed_stage({}, key) == "transcribed"
+
+    evitadas = []
+
+    def transcrever():
+        raise AssertionError("a transcrição não deveria ser refeita")
+
+    assert run_stage(sessao, key, "transcribed", transcrever, on_cached=lambda: evitadas.append(1)) == "texto anterior"
+    assert run_stage(sessao, key, "analysed", lambda: ANALISE_EXEMPLO, on_cached=lambda: evitadas.append(1))
+    assert evitadas == [1]
+
+def test_parse_cold_call_analysis():
+    """Scores e seções são extraídos da resposta do GPT."""
+    parsed = parse_cold_call_analysis(ANALISE_EXEMPLO, "English")
+    assert [parsed['scores'][k] for k in HYBRID_STEPS] == [7, 6, 4, 8, 5, 9]
+    assert parsed['pontos_atencao'] == "Faltou quantificar o problema."
+    assert parsed['recomendacoes'] == "Usar dados do setor."
+
+def test_chave_depende_dos_parametros():
+    """Parâmetros diferentes geram checkpoints diferentes para o mesmo áudio."""
+    assert make_checkpoint_key("cold_call", "abc", idioma="English") != make_checkpoint_key("cold_call", "abc", idioma="Português")
@@ -0,0 +1,172 @@
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+from contextvars import ContextVar
+from storage import DatabaseError
+from config import TRACING_ENABLED, TRACING_FLUSH_SPANS, TRACING_FLUSH_SECONDS, METRICS_RETENTION_DAYS
+
+# Spans medidos por este processo: (run_id, span_id, parent_id, nome, início, duração ms, status, atributos)
+_enabled = TRACING_ENABLED
+_current = ContextVar("tracing_span", default=None)
+_buffer = []
+_buffer_lock = threading.Lock()
+_last_flush = time.time()
+
+def is_enabled():
+    return _enabled
+
+def set_enabled(enabled):
+    """Liga ou desliga a coleta de spans neste processo (a página de métricas usa isto)."""
+    global _enabled
+    _enabled = bool(enabled)
+
+def _new_id():
+    return os.urandom(8).hex()
+
+class _Span:
+    """Um trecho medido; spans abertos dentro dele viram filhos (mesma execução)."""
+
+    __slots__ = ("name", "attrs", "span_id", "parent", "run_id", "_token", "_start_wall", "_start")
+
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        self.parent = _current.get()
+        self.span_id = _new_id()
+        self.run_id = self.parent.run_id if self.parent else self.span_id
+        self._token = _current.set(self)
+        self._start_wall = time.time()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duracao_ms = (time.perf_counter() - self._start) * 1000
+        _current.reset(self._token)
+        status = "ok" if exc_type is None else f"erro: {exc_type.__name__}"
+        attrs = json.dumps(self.attrs, ensure_ascii=False, default=str) if self.attrs else None
+        with _buffer_lock:
+            _buffer.append((self.run_id, self.span_id, self.parent.span_id if self.parent else None, self.name,
+                            self._start_wall, duracao_ms, status, attrs))
+        # Grava em lote ao fim de uma execução completa, nunca no meio de uma
+        if self.parent is None:
+            _maybe_flush()
+        return False
+
+    def set(self, **attrs):
+        """Acrescenta atributos ao span (por exemplo, o tamanho do resultado)."""
+        self.attrs.update(attrs)
+
+class _NoopSpan:
+    """Span usado com a coleta desligada: não mede nem grava nada."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+_NOOP = _NoopSpan()
+
+def span(name, **attrs):
+    """Mede um trecho de código: `with span("etapa.transcribed"): ...`.
+
+    Spans abertos dentro de outro ficam aninhados na mesma execução. Com a
+    coleta desligada, devolve um objeto vazio compartilhado.
+    """
+    if not _enabled:
+        return _NOOP
+    return _Span(name, attrs)
+
+def traced(name=None):
+    """Decorator que mede cada chamada da função como um span.
+
+    O nome padrão é `módulo.função`. Com a coleta desligada, o custo é
+    apenas o teste de uma variável global.
+    """
+    def decorator(fn):
+        nome = name or f"{fn.__module__}.{fn.__name__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with _Span(nome, {}):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def _maybe_flush():
+    """Grava o lote se ele encheu ou envelheceu; falhas ao gravar métricas nunca interrompem a página."""
+    if len(_buffer) >= TRACING_FLUSH_SPANS or time.time() - _last_flush >= TRACING_FLUSH_SECONDS:
+        try:
+            flush()
+        except DatabaseError:
+            pass
+
+def flush():
+    """Grava os spans pendentes na tabela de métricas e descarta os mais antigos que a retenção."""
+    global _last_flush
+    with _buffer_lock:
+        pendentes = _buffer[:]
+        _buffer.clear()
+        _last_flush = time.time()
+    if not pendentes:
+        return 0
+    # Import tardio: database.py usa os decorators deste módulo
+    import database
+    try:
+        database.save_spans(pendentes, before=time.time() - METRICS_RETENTION_DAYS * 86400)
+    except DatabaseError:
+        # Banco ocupado: os spans voltam para o próximo lote (com limite, para não crescer sem fim)
+        with _buffer_lock:
+            _buffer[:0] = pendentes[-10 * TRACING_FLUSH_SPANS:]
+        raise
+    return len(pendentes)
+
+atexit.register(flush)
+
+def latency_summary(since=None):
+    """p50/p95/p99 por nome de span na janela: lista de (nome, n, p50, p95, p99, máx), do mais lento ao mais rápido."""
+    import numpy as np
+    import database
+    flush()
+    por_nome = {}
+    for nome, duracao in database.get_span_durations(since):
+        por_nome.setdefault(nome, []).append(duracao)
+    resumo = []
+    for nome, duracoes in por_nome.items():
+        valores = np.asarray(duracoes)
+        p50, p95, p99 = np.percentile(valores, (50, 95, 99))
+        resumo.append((nome, len(valores), float(p50), float(p95), float(p99), float(valores.max())))
+    return sorted(resumo, key=lambda linha: linha[3], reverse=True)
+
+def span_tree(spans):
+    """Ordena os spans de uma execução em profundidade: lista de (nível, span).
+
+    `spans` são linhas (span_id, parent_id, nome, início, duração ms, status, atributos).
+    """
+    filhos = {}
+    for linha in spans:
+        filhos.setdefault(linha[1], []).append(linha)
+    ids = {linha[0] for linha in spans}
+    raizes = [linha for linha in spans if linha[1] is None or linha[1] not in ids]
+    ordem = []
+
+    def visitar(linha, nivel):
+        ordem.append((nivel, linha))
+        for filho in sorted(filhos.get(linha[0], []), key=lambda s: s[3]):
+            visitar(filho, nivel + 1)
+
+    for raiz in sorted(raizes, key=lambda s: s[3]):
+        visitar(raiz, 0)
+    return ordem
@@ -0,0 +1,67 @@
+from datetime import datetime
+from config import TOKEN_PRICES_USD, AUDIO_PRICES_USD, MONTHLY_BUDGET_USD, BUDGET_ALERT_THRESHOLD
+from database import save_api_usage, get_usage_cost
+
+def _price(prices, modelo):
+    """Preço do modelo; versões datadas (ex.: "gpt-4-turbo-2024-04-09") usam o prefixo mais longo."""
+    candidatos = [nome for nome in prices if modelo == nome or modelo.startswith(nome + "-")]
+    return prices[max(candidatos, key=len)] if candidatos else None
+
+def estimate_cost(modelo, prompt_tokens=0, completion_tokens=0, cached_tokens=0, audio_segundos=0.0):
+    """Custo estimado (USD) de uma chamada pela tabela de preços de config.py; 0 para modelos sem preço."""
+    preco_audio = _price(AUDIO_PRICES_USD, modelo)
+    if preco_audio is not None:
+        return audio_segundos / 60 * preco_audio
+    precos = _price(TOKEN_PRICES_USD, modelo)
+    if precos is None:
+        return 0.0
+    entrada, entrada_cache, saida = precos
+    cached_tokens = min(cached_tokens, prompt_tokens)
+    return ((prompt_tokens - cached_tokens) * entrada + cached_tokens * entrada_cache
+            + completion_tokens * saida) / 1_000_000
+
+def record_usage(analysis_key, bdr_id, usage):
+    """Grava o consumo informado por transcribe_audio/run_analysis (`on_usage`) com o custo estimado."""
+    prompt_tokens = usage.get('prompt_tokens', 0)
+    completion_tokens = usage.get('completion_tokens', 0)
+    cached_tokens = usage.get('cached_tokens', 0)
+    audio_segundos = usage.get('audio_segundos', 0.0)
+    custo = estimate_cost(usage['modelo'], prompt_tokens, completion_tokens, cached_tokens, audio_segundos)
+    return save_api_usage(analysis_key, bdr_id, usage['tipo'], usage['modelo'], usage.get('latencia_ms', 0.0),
+                          prompt_tokens, completion_tokens, cached_tokens, audio_segundos, custo)
+
+def record_cache_hit(analysis_key, bdr_id, tipo, modelo):
+    """Registra uma chamada evitada: o resultado da etapa foi reaproveitado, sem tokens nem custo."""
+    return save_api_usage(analysis_key, bdr_id, tipo, modelo, cache_hit=True)
+
+def usage_recorder(analysis_key, bdr_id):
+    """Callback `on_usage` que grava cada chamada da análise `analysis_key`."""
+    return lambda usage: record_usage(analysis_key, bdr_id, usage)
+
+def month_start(agora=None):
+    """Início do mês corrente (hora local)."""
+    agora = agora or datetime.now()
+    return agora.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+def budget_status(agora=None, budget=None, threshold=None):
+    """Gasto do mês comparado ao orçamento.
+
+    Retorna (gasto, orçamento, nível), onde nível é None (sem orçamento ou
+    abaixo do limite de aviso), "aviso" ou "excedido".
+    """
+    budget = MONTHLY_BUDGET_USD if budget is None else budget
+    threshold = BUDGET_ALERT_THRESHOLD if threshold is None else threshold
+    gasto = get_usage_cost(since=month_start(agora))
+    if budget <= 0:
+        return gasto, budget, None
+    if gasto >= budget:
+        return gasto, budget, "excedido"
+    if gasto >= budget * threshold:
+        return gasto, budget, "aviso"
+    return gasto, budget, None
+
+def budget_message(gasto, budget, nivel):
+    """Mensagem do alerta de orçamento exibida nas páginas de análise."""
+    if nivel == "excedido":
+        return f"🚨 Orçamento mensal da API excedido: US$ {gasto:,.2f} de US$ {budget:,.2f}."
+    return f"⚠️ {gasto / budget:.0%} do orçamento mensal da API já foi usado (US$ {gasto:,.2f} de US$ {budget:,.2f})."
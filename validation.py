@@ -0,0 +1,97 @@
+import re
+
+# Tokens proibidos em textos digitados pelo usuário (SQL injection e XSS)
+DANGEROUS_TOKENS = (
+    '<', '>', '"', "'", '&', ';', '--', '/*', '*/', 'xp_', 'sp_', 'exec', 'select', 'insert', 'update', 'delete',
+    'drop', 'create', 'alter', 'union', 'script', 'javascript', 'vbscript', 'onload', 'onerror', 'onclick',
+)
+
+# Caracteres aceitos em textos digitados: letras, números, espaços, acentos e pontuação simples
+ALLOWED_TEXT_CHARS = r'a-zA-Z0-9\sáàâãéèêíìîóòôõúùûçÁÀÂÃÉÈÊÍÌÎÓÒÔÕÚÙÛÇ\-\.\,\!\?\(\)'
+
+# Caracteres proibidos em nomes de arquivo enviados
+DANGEROUS_FILENAME_TOKENS = ('..', '/', '\\', '<', '>', ':', '"', '|', '?', '*')
+
+_ALLOWED_TEXT = re.compile(f"[{ALLOWED_TEXT_CHARS}]+")
+
+# Tokens formados só por caracteres permitidos ('--' e as palavras); os
+# demais já são barrados pela varredura de caracteres inválidos
+_TOKENS_IN_CHARSET = tuple(token for token in DANGEROUS_TOKENS if _ALLOWED_TEXT.fullmatch(token))
+
+# Uma única varredura encontra o primeiro caractere fora da lista permitida
+_INVALID_SCAN = re.compile(f"[^{ALLOWED_TEXT_CHARS}]")
+_FILENAME_SCAN = re.compile("|".join(re.escape(token) for token in DANGEROUS_FILENAME_TOKENS))
+
+# Sanitização de textos gravados no banco (inclusive as respostas do GPT)
+_SANITIZE_CHARS = '<>"\';'
+_SANITIZE_CHARS_PATTERN = re.compile(r'[<>"\';]')
+_SANITIZE_SEQUENCES = ('--', '/*', '*/')
+_SANITIZE_SEQUENCES_PATTERN = re.compile(r'--|/\*|\*/')
+
+def validate_text(text, field_name, max_length=1000):
+    """Valida texto de entrada do usuário. Retorna (válido, mensagem)."""
+    if not text or text.strip() == "":
+        return False, f"{field_name} não pode estar vazio"
+
+    if len(text) > max_length:
+        return False, f"{field_name} muito longo. Máximo {max_length} caracteres"
+
+    if _INVALID_SCAN.search(text) is None:
+        # Texto só com caracteres permitidos: restam '--' e as palavras proibidas
+        text_lower = text.lower()
+        for token in _TOKENS_IN_CHARSET:
+            if token in text_lower:
+                return False, f"{field_name} contém caracteres ou palavras inválidas: '{token}'"
+        return True, "Texto válido"
+
+    # Texto inválido: a mensagem cita o primeiro token proibido encontrado, se houver
+    text_lower = text.lower()
+    for token in DANGEROUS_TOKENS:
+        if token in text_lower:
+            return False, f"{field_name} contém caracteres ou palavras inválidas: '{token}'"
+    return False, f"{field_name} contém caracteres não permitidos. Use apenas letras, números, espaços e acentos"
+
+def validate_many(items):
+    """Valida vários campos de uma vez.
+
+    `items` é um iterável de (texto, nome do campo, tamanho máximo).
+    Retorna a lista de (válido, mensagem) na mesma ordem.
+    """
+    return [validate_text(text, field_name, max_length) for text, field_name, max_length in items]
+
+def validate_records(records, schema):
+    """Valida linhas inteiras (por exemplo, de uma importação em lote).
+
+    `schema` mapeia a chave de cada campo para (nome exibido, tamanho
+    máximo). Retorna somente os erros, como (índice da linha, chave,
+    mensagem); lista vazia significa que todas as linhas são válidas.
+    """
+    erros = []
+    for indice, record in enumerate(records):
+        for key, (field_name, max_length) in schema.items():
+            valido, mensagem = validate_text(record.get(key), field_name, max_length)
+            if not valido:
+                erros.append((indice, key, mensagem))
+    return erros
+
+def has_dangerous_filename(filename):
+    """Indica se o nome do arquivo contém caracteres perigosos."""
+    return _FILENAME_SCAN.search(filename) is not None
+
+def sanitize_text(text):
+    """Sanitiza texto removendo caracteres perigosos.
+
+    As substituições só rodam quando o texto contém algo a remover, o que
+    é raro nas respostas do GPT.
+    """
+    if not text:
+        return text
+    if any(char in text for char in _SANITIZE_CHARS):
+        text = _SANITIZE_CHARS_PATTERN.sub('', text)
+    if any(sequence in text for sequence in _SANITIZE_SEQUENCES):
+        text = _SANITIZE_SEQUENCES_PATTERN.sub('', text)
+    return text.strip()
+
+def sanitize_fields(fields):
+    """Sanitiza de uma vez todos os valores de um dicionário de campos."""
+    return {key: sanitize_text(value) for key, value in fields.items()}
@@ -0,0 +1,93 @@
+import hashlib
+import json
+from datetime import datetime
+from database import get_analysis_checkpoint, save_analysis_checkpoint, delete_analysis_checkpoint
+from audio import ingest_audio
+from tracing import span
+
+# Etapas do fluxo de análise, na ordem em que são executadas
+STAGES = ("uploaded", "transcribed", "analysed", "parsed", "saved")
+
+SESSION_KEY = "analysis_checkpoints"
+AUDIO_SESSION_KEY = "audio_upload"
+
+def load_audio_upload(session_state, audio_file):
+    """Ingere o áudio enviado uma única vez e o reaproveita nos reruns seguintes.
+
+    Só o último arquivo fica na sessão, para não manter na memória áudios
+    que o usuário já trocou.
+    """
+    identificador = getattr(audio_file, "file_id", None) or (audio_file.name, audio_file.size)
+    atual = session_state.get(AUDIO_SESSION_KEY)
+    if atual is None or atual[0] != identificador:
+        atual = (identificador, ingest_audio(audio_file))
+        session_state[AUDIO_SESSION_KEY] = atual
+    return atual[1]
+
+def make_checkpoint_key(kind, content_hash, **params):
+    """Gera a chave do checkpoint a partir do áudio e dos parâmetros da análise."""
+    params_json = json.dumps(params, sort_keys=True, ensure_ascii=False)
+    params_hash = hashlib.sha256(params_json.encode("utf-8")).hexdigest()[:16]
+    return f"{kind}:{content_hash}:{params_hash}"
+
+def load_checkpoint(session_state, checkpoint_key):
+    """Retorna o checkpoint da sessão, buscando no banco se necessário."""
+    checkpoints = session_state.setdefault(SESSION_KEY, {})
+    if checkpoint_key not in checkpoints:
+        checkpoints[checkpoint_key] = get_analysis_checkpoint(checkpoint_key) or {'stage': None, 'outputs': {}}
+    return checkpoints[checkpoint_key]
+
+def last_completed_stage(session_state, checkpoint_key):
+    """Retorna a última etapa concluída (ou None se nada foi feito)."""
+    return load_checkpoint(session_state, checkpoint_key)['stage']
+
+def run_stage(session_state, checkpoint_key, stage, fn, on_cached=None):
+    """Executa uma etapa apenas se ela ainda não foi concluída e grava o resultado.
+
+    O resultado precisa ser serializável em JSON, pois também é persistido
+    no banco para sobreviver a reruns e reinícios do Streamlit. Quando o
+    resultado salvo é reaproveitado, `on_cached()` é chamado (usado para
+    contabilizar chamadas à API evitadas).
+    """
+    if stage not in STAGES:
+        raise ValueError(f"Etapa desconhecida: {stage}")
+
+    checkpoint = load_checkpoint(session_state, checkpoint_key)
+    if stage in checkpoint['outputs']:
+        if on_cached is not None:
+            on_cached()
+        return checkpoint['outputs'][stage]
+
+    with span(f"etapa.{stage}"):
+        result = fn()
+    checkpoint['outputs'][stage] = result
+    checkpoint['stage'] = stage
+    save_analysis_checkpoint(checkpoint_key, stage, checkpoint['outputs'])
+    return result
+
+def seed_checkpoint(session_state, checkpoint_key, outputs):
+    """Preenche etapas com resultados já existentes (o mesmo áudio analisado antes), sem executá-las.
+
+    As etapas preenchidas passam a ser reaproveitadas por run_stage como se
+    tivessem sido concluídas nesta análise.
+    """
+    checkpoint = load_checkpoint(session_state, checkpoint_key)
+    checkpoint['outputs'].update(outputs)
+    checkpoint['stage'] = max(checkpoint['outputs'], key=STAGES.index)
+    save_analysis_checkpoint(checkpoint_key, checkpoint['stage'], checkpoint['outputs'])
+
+def describe_recording(recording):
+    """Descrição de uma análise anterior do mesmo áudio (linha de find_audio_recordings)."""
+    tipo, data_ts, bdr_nome, cold_call_id, analise_id, _, prospect, empresa = recording
+    quando = datetime.fromtimestamp(data_ts).strftime("%d/%m/%Y %H:%M")
+    if tipo == "cold_call":
+        descricao = f"Cold call de {bdr_nome or 'BDR removido'} com {prospect} ({empresa})" if cold_call_id \
+            else "Cold call (análise removida)"
+    else:
+        descricao = f"1:1 de {bdr_nome or 'BDR removido'}" if analise_id else "1:1 (análise removida)"
+    return f"{descricao} em {quando}"
+
+def clear_checkpoint(session_state, checkpoint_key):
+    """Descarta o checkpoint para permitir uma nova análise do mesmo áudio."""
+    session_state.setdefault(SESSION_KEY, {}).pop(checkpoint_key, None)
+    delete_analysis_checkpoint(checkpoint_key)